@@ -0,0 +1,229 @@
+"""
+計算項目モジュール
+完成工事総利益・営業利益・経常利益などの計算項目を依存グラフとして評価します
+
+各計算項目は入力項目からの式（ノード）として定義され、トポロジカル順に評価されます。
+差額の式（総利益 = 完成工事高 − 完成工事原価 など）はすべての入力が揃ったときのみ計算し、
+合計の式（販管費合計 など）は内訳が1つでもあれば、無い内訳を 0 として計算します。
+DerivedValueEvaluator は前回の入力値と計算結果を保持し、入力が変わった
+ノードとその下流だけを再計算します（1つの書類を段階的に評価する場合に同じ評価器を使います）。
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Tuple
+
+from financial_statement import FinancialData, as_statement
+from schema import get_statement
+
+# (カテゴリ, 項目名)
+Field = Tuple[str, str]
+
+INCOME = 'income_statement'
+NON_OPERATING = 'non_operating'
+COST = 'cost_report'
+
+
+@dataclass(frozen=True)
+class Formula:
+    """
+    計算項目の式  target = Σ(sign × input) + Σ(sign × addend)
+
+    inputs はすべて揃ったときのみ計算し、addends は無い項目を 0 とします。
+    inputs が無い式（合計の式）は、addends のいずれかがある場合のみ計算します。
+    同じ target の式が複数ある場合は宣言順に試し、計算できた最初の式を採用します。
+
+    Attributes:
+        target: 計算結果の項目
+        inputs: (符号, 入力項目) のタプル（必須）
+        addends: (符号, 入力項目) のタプル（無い場合は 0）
+    """
+    target: Field
+    inputs: Tuple[Tuple[int, Field], ...] = ()
+    addends: Tuple[Tuple[int, Field], ...] = ()
+
+    @property
+    def fields(self) -> Tuple[Tuple[int, Field], ...]:
+        """
+        すべての入力項目（必須の入力、0 とみなせる入力の順）
+        """
+        return self.inputs + self.addends
+
+
+# 計算項目のノード（計算結果の項目, 宣言順の式）
+Node = Tuple[Field, Tuple[Formula, ...]]
+
+# 合計項目・計算項目として扱う販管費の項目（販管費合計の入力から除外）
+_EXPENSE_TOTALS = ('販管費合計', '営業損失金額', '営業利益金額')
+
+
+def _expense_inputs() -> Tuple[Tuple[int, Field], ...]:
+    """
+    販管費合計の入力（スキーマの販売費及び一般管理費グループの全項目）
+    """
+    section = next(s for s in get_statement('income_statement').sections if s.name == 'expenses')
+    return tuple((1, (INCOME, item.key)) for item in section.items if item.key not in _EXPENSE_TOTALS)
+
+
+FORMULAS: Tuple[Formula, ...] = (
+    Formula((INCOME, '完成工事総利益金額'), (
+        (1, (INCOME, '完成工事高')),
+        (-1, (INCOME, '完成工事原価')),
+    )),
+    Formula((INCOME, '販管費合計'), addends=_expense_inputs()),
+    # 営業損失が抽出されている場合は営業利益 = −営業損失
+    Formula((INCOME, '営業利益金額'), (
+        (-1, (INCOME, '営業損失金額')),
+    )),
+    Formula((INCOME, '営業利益金額'), (
+        (1, (INCOME, '完成工事総利益金額')),
+        (-1, (INCOME, '販管費合計')),
+    )),
+    # 受取利息・配当金が抽出されている場合は内訳（受取利息 + 受取配当金）を加算しない
+    Formula((NON_OPERATING, '受取利息・配当金'), addends=(
+        (1, (NON_OPERATING, '受取利息')),
+        (1, (NON_OPERATING, '受取配当金')),
+    )),
+    Formula((NON_OPERATING, '営業外収益合計'), addends=(
+        (1, (NON_OPERATING, '受取利息・配当金')),
+        (1, (NON_OPERATING, '雑収入')),
+    )),
+    Formula((NON_OPERATING, '営業外費用合計'), addends=(
+        (1, (NON_OPERATING, '支払利息')),
+    )),
+    # 営業外損益が無い場合は経常利益 = 営業利益
+    Formula((NON_OPERATING, '経常利益金額'), (
+        (1, (INCOME, '営業利益金額')),
+    ), addends=(
+        (1, (NON_OPERATING, '営業外収益合計')),
+        (-1, (NON_OPERATING, '営業外費用合計')),
+    )),
+    Formula((NON_OPERATING, '当期純利益'), (
+        (1, (NON_OPERATING, '税引前当期純利益')),
+        (-1, (NON_OPERATING, '法人税・住民税・事業税')),
+    )),
+    Formula((COST, '完成工事原価'), addends=(
+        (1, (COST, '材料費')),
+        (1, (COST, '労務費')),
+        (1, (COST, '外注加工費')),
+        (1, (COST, '経費')),
+    )),
+)
+
+
+@lru_cache(maxsize=None)
+def compile_formula_graph(formulas: Tuple[Formula, ...] = FORMULAS) -> Tuple[Node, ...]:
+    """
+    式を計算項目ごとのノードにまとめ、トポロジカル順に並べ替え（初回のみ計算しキャッシュ）
+
+    Args:
+        formulas: 式のタプル
+
+    Returns:
+        入力が先に評価される順に並べた (計算項目, 宣言順の式) のタプル
+
+    Raises:
+        ValueError: 式に循環参照がある場合
+    """
+    by_target: Dict[Field, List[Formula]] = {}
+    for formula in formulas:
+        by_target.setdefault(formula.target, []).append(formula)
+    ordered: List[Node] = []
+    state: Dict[Field, str] = {}
+
+    def visit(target: Field) -> None:
+        if state.get(target) == 'done':
+            return
+        if state.get(target) == 'visiting':
+            raise ValueError(f"計算項目に循環参照があります: {target[1]}")
+        state[target] = 'visiting'
+        for formula in by_target[target]:
+            for _, field in formula.fields:
+                if field in by_target:
+                    visit(field)
+        state[target] = 'done'
+        ordered.append((target, tuple(by_target[target])))
+
+    for target in by_target:
+        visit(target)
+
+    return tuple(ordered)
+
+
+class DerivedValueEvaluator:
+    """
+    計算項目の増分評価器
+
+    前回評価時の入力値を保持し、値が変わった入力に依存するノードのみを再計算します。
+    """
+
+    def __init__(self, formulas: Tuple[Formula, ...] = FORMULAS):
+        self._order = compile_formula_graph(formulas)
+        self._inputs: Dict[Field, Optional[int]] = {}
+        self._results: Dict[Field, Optional[int]] = {}
+        self.recomputed = 0
+
+    def evaluate(self, data: FinancialData) -> Dict[Field, int]:
+        """
+        計算項目を評価
+
+        抽出済みの項目はそのまま採用し、未抽出の計算項目のみを式から算出します。
+
+        Args:
+            data: PDF解析で抽出したデータ（FinancialStatement またはカテゴリ → {項目名: 数値} の辞書）
+
+        Returns:
+            算出した計算項目 → 値 の辞書（抽出済みの項目は含まない）
+        """
+        statement = as_statement(data)
+
+        def lookup(field: Field) -> Optional[int]:
+            return statement.get(*field)
+
+        # 前回から値が変わった入力（計算項目自身の抽出値を含む）
+        changed: Set[Field] = set()
+        for target, formulas in self._order:
+            for field in (target,) + tuple(f for formula in formulas for _, f in formula.fields):
+                value = lookup(field)
+                if field not in self._inputs or self._inputs[field] != value:
+                    self._inputs[field] = value
+                    changed.add(field)
+
+        self.recomputed = 0
+        for target, formulas in self._order:
+            dirty = target in changed or any(
+                field in changed for formula in formulas for _, field in formula.fields
+            )
+            if not dirty and target in self._results:
+                continue
+
+            previous = self._results.get(target)
+            self._results[target] = self._compute(target, formulas)
+            self.recomputed += 1
+            if self._results[target] != previous:
+                changed.add(target)
+
+        return {target: value for target, value in self._results.items() if value is not None}
+
+    def _compute(self, target: Field, formulas: Tuple[Formula, ...]) -> Optional[int]:
+        """
+        1ノードを計算（抽出値があればそれを優先し、計算できた最初の式を採用）
+        """
+        if self._inputs.get(target) is not None:
+            return None
+
+        def value_of(field: Field) -> Optional[int]:
+            value = self._results.get(field)
+            return self._inputs.get(field) if value is None else value
+
+        for formula in formulas:
+            required = [(sign, value_of(field)) for sign, field in formula.inputs]
+            optional = [(sign, value_of(field)) for sign, field in formula.addends]
+            if any(value is None for _, value in required):
+                continue
+            present = [(sign, value) for sign, value in optional if value is not None]
+            if not required and not present:
+                continue
+            return sum(sign * value for sign, value in required + present)
+
+        return None
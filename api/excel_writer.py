@@ -4,131 +4,225 @@ Excel書き込みモジュール
 """
 
 import os
-from typing import Dict, Any
-from openpyxl import load_workbook
-from openpyxl.cell.cell import MergedCell
+import pickle
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 
+from derived_values import DerivedValueEvaluator
+from fastfill import FastFillTemplate, load_artifact, plan_fingerprint
+from financial_statement import FinancialData, FinancialStatement, as_statement, field_index
+from schema import CATEGORIES, LOSS_ITEMS, category_labels, iter_sections
+from template_registry import STANDARD_TEMPLATE, get_template, template_for_path
 
-# セルマッピング定義
+
+@lru_cache(maxsize=None)
+def compile_cell_map(category: str, template: str = STANDARD_TEMPLATE) -> Dict[str, Tuple[str, str]]:
+    """
+    スキーマからカテゴリごとのセルマッピングを構築（テンプレートごとに初回のみ構築しキャッシュ）
+
+    別名（aliases）も同じセルに解決されるため、抽出側と書き込み側のキー名が
+    ずれていても値が捨てられることはありません。
+
+    Args:
+        category: parse_pdfの出力キー（'balance_sheet_assets' など）
+        template: テンプレート名（template_registry.TEMPLATES）
+
+    Returns:
+        項目名 → (シート名, セル位置) の辞書
+    """
+    variant = get_template(template)
+    mapping: Dict[str, Tuple[str, str]] = {}
+
+    for _, section in iter_sections(category):
+        for item in section.items:
+            target = variant.target(category, item)
+            if target is None:
+                continue
+            mapping[item.key] = target
+            for alias in item.aliases:
+                mapping[alias] = target
+
+    return mapping
+
+
+# セルマッピング定義（schema.py から構築、標準の様式）
 # シート「１５ (１)」- 貸借対照表（資産の部）
-BALANCE_SHEET_ASSETS_MAP = {
-    '現金及び預金': ('１５ (１)', 'AE12'),
-    '売掛金': ('１５ (１)', 'AE14'),
-    '未成工事支出金': ('１５ (１)', 'AE16'),
-    '原材料': ('１５ (１)', 'AE17'),
-    '立替金': ('１５ (１)', 'AE20'),
-    '流動資産合計': ('１５ (１)', 'AG22'),
-    '建物': ('１５ (１)', 'T26'),
-    '構築物': ('１５ (１)', 'AD26'),
-    '建物・構築物': ('１５ (１)', 'T28'),
-    '機械装置': ('１５ (１)', 'T28'),
-    '車両運搬具': ('１５ (１)', 'AD28'),
-    '機械・運搬具': ('１５ (１)', 'T30'),
-    '工具器具・備品': ('１５ (１)', 'T32'),
-    '有形固定資産合計': ('１５ (１)', 'AE38'),
-    'ソフトウェア': ('１５ (１)', 'AE45'),
-    '無形固定資産合計': ('１５ (１)', 'AE46'),
-    '出資金': ('１５（２）', 'AR8'),
-    '投資その他の資産合計': ('１５（２）', 'AR10'),
-    '固定資産合計': ('１５（２）', 'BE11'),
-    '資産合計': ('１５（２）', 'BE19'),
-}
+BALANCE_SHEET_ASSETS_MAP = compile_cell_map('balance_sheet_assets')
 
 # シート「１５（２）」- 投資その他の資産・負債の部
-BALANCE_SHEET_LIABILITIES_MAP = {
-    '工事未払金': ('１５（２）', 'AR24'),
-    '未払金': ('１５（２）', 'AR27'),
-    '未払法人税等': ('１５（２）', 'AR29'),
-    '未払消費税等': ('１５（２）', 'AS30'),
-    '未成工事受入金': ('１５（２）', 'AR30'),
-    '預り金': ('１５（２）', 'AR32'),
-    '流動負債合計': ('１５（２）', 'BE35'),
-    '長期借入金': ('１５（２）', 'AR38'),
-    '役員等借入金': ('１５（２）', 'AR43'),
-    '固定負債合計': ('１５（２）', 'BE44'),
-    '負債合計': ('１５（２）', 'BE45'),
-}
+BALANCE_SHEET_LIABILITIES_MAP = compile_cell_map('balance_sheet_liabilities')
 
 # シート「１５（３）」- 純資産の部
-BALANCE_SHEET_EQUITY_MAP = {
-    '資本金': ('１５（３）', 'AW4'),
-    '繰越利益剰余金': ('１５（３）', 'AM15'),
-    '利益剰余金合計': ('１５（３）', 'AY16'),
-    '株主資本合計': ('１５（３）', 'BK19'),
-    '純資産合計': ('１５（３）', 'BK26'),
-    '負債・純資産合計': ('１５（３）', 'BI28'),
-}
+BALANCE_SHEET_EQUITY_MAP = compile_cell_map('balance_sheet_equity')
 
 # シート「１６（４）」- 損益計算書（売上〜販売費）
-INCOME_STATEMENT_MAP = {
-    '完成工事高': ('１６（４）', 'S9'),
-    '完成工事原価': ('１６（４）', 'S12'),
-    '完成工事総利益金額': ('１６（４）', 'S15'),
-    '役員報酬': ('１６（４）', 'S18'),
-    '給与手当': ('１６（４）', 'S19'),
-    '給与手当等': ('１６（４）', 'S19'),
-    '法定福利費': ('１６（４）', 'S21'),
-    '事務用品費等': ('１６（４）', 'S24'),
-    '通信交通費': ('１６（４）', 'S25'),
-    '旅費交通費': ('１６（４）', 'S25'),
-    '通信費': ('１６（４）', 'S25'),
-    '動力用水光熱費': ('１６（４）', 'S26'),
-    'リース料': ('１６（４）', 'S27'),
-    '広告宣伝費': ('１６（４）', 'S28'),
-    '研修諸会費': ('１６（４）', 'S30'),
-    '交際費': ('１６（４）', 'S31'),
-    '外注費': ('１６（４）', 'S32'),
-    '地代家賃': ('１６（４）', 'S33'),
-    '賃借料': ('１６（４）', 'S33'),
-    '減価償却費': ('１６（４）', 'S34'),
-    '会議費': ('１６（４）', 'S35'),
-    '租税公課': ('１６（４）', 'S36'),
-    '保険料': ('１６（４）', 'S37'),
-    '雑費': ('１６（４）', 'S38'),
-    '販管費合計': ('１６（４）', 'AH38'),
-    '営業損失金額': ('１６（４）', 'S39'),
-    '営業利益金額': ('１６（４）', 'S39'),
-}
-
-# シート「１６（５）」- 損益計算書（営業外損益）・完成工事原価報告書
-NON_OPERATING_MAP = {
-    '受取利息': ('１６（５）', 'S4'),
-    '受取配当金': ('１６（５）', 'S4'),
-    '受取利息・配当金': ('１６（５）', 'S4'),
-    '雑収入': ('１６（５）', 'S5'),
-    '営業外収益合計': ('１６（５）', 'AH5'),
-    '支払利息': ('１６（５）', 'S7'),
-    '営業外費用合計': ('１６（５）', 'AH10'),
-    '経常利益金額': ('１６（５）', 'S11'),
-    '税引前当期純利益': ('１６（５）', 'S20'),
-    '法人税・住民税・事業税': ('１６（５）', 'S21'),
-    '当期純利益': ('１６（５）', 'S23'),
-    '材料費': ('１６（５）', 'S31'),
-    '労務費': ('１６（５）', 'S32'),
-    '外注加工費': ('１６（５）', 'S34'),
-    '経費': ('１６（５）', 'S35'),
-}
-
-# 完成工事原価報告書のマッピングを追加（NON_OPERATING_MAPに含めているが、別途定義も可能）
-COST_REPORT_MAP = {
-    '材料費': ('１６（５）', 'S31'),
-    '労務費': ('１６（５）', 'S32'),
-    '外注加工費': ('１６（５）', 'S34'),
-    '経費': ('１６（５）', 'S35'),
-    '完成工事原価': ('１６（５）', 'S37'),
-}
+INCOME_STATEMENT_MAP = compile_cell_map('income_statement')
+
+# シート「１６（５）」- 損益計算書（営業外損益）
+NON_OPERATING_MAP = compile_cell_map('non_operating')
+
+# シート「１６（５）」- 完成工事原価報告書
+COST_REPORT_MAP = compile_cell_map('cost_report')
 
 # シート「１７（６）」- 株主資本等変動計算書
-EQUITY_CHANGE_MAP = {
-    '当期首残高_資本金': ('１７（６）', 'N15'),
-    '当期首残高_繰越利益剰余金': ('１７（６）', 'AH15'),
-    '当期純利益': ('１７（６）', 'AH18'),
-    '当期末残高_資本金': ('１７（６）', 'N27'),
-    '当期末残高_繰越利益剰余金': ('１７（６）', 'AH27'),
-}
+EQUITY_CHANGE_MAP = compile_cell_map('equity_change')
+
+
+@dataclass(frozen=True)
+class CellPlan:
+    """
+    1セル分の書き込みプラン
+
+    Attributes:
+        sheet: シート名
+        cell: セル位置
+        reduce: 集約方法（'sum'、'priority' または 'net'）
+        sources: 書き込み元 (カテゴリ, 項目名) のタプル（スキーマ定義順）
+        slots: 書き込み元の (FinancialStatement の項目番号, 項目名) のタプル（別名は除く）
+    """
+    sheet: str
+    cell: str
+    reduce: str
+    sources: Tuple[Tuple[str, str], ...]
+    slots: Tuple[Tuple[int, str], ...] = ()
+
+
+@lru_cache(maxsize=None)
+def compile_write_plan(template: str = STANDARD_TEMPLATE) -> Tuple[CellPlan, ...]:
+    """
+    スキーマからセル単位の書き込みプランを構築（テンプレートごとに初回のみ構築しキャッシュ）
+
+    同じセルに複数の項目がマッピングされている場合は、CELL_REDUCTIONS に
+    宣言された集約方法で1つの値にまとめてから書き込みます。
+
+    Args:
+        template: テンプレート名（template_registry.TEMPLATES）
+
+    Returns:
+        CellPlanのタプル（セルごとに1つ）
+
+    Raises:
+        KeyError: 未登録のテンプレート名、またはテンプレートのセル位置にスキーマに無い項目がある場合
+    """
+    variant = get_template(template)
+    numbers = field_index()
+    unknown = [field for field in variant.cells if field not in numbers]
+    if unknown:
+        raise KeyError(f"テンプレート「{template}」のセル位置にスキーマに無い項目があります: {unknown}")
+
+    sources: Dict[Tuple[str, str], List[Tuple[str, str]]] = {}
+    standard_targets: Dict[Tuple[str, str], Tuple[str, str]] = {}
+
+    for category in CATEGORIES:
+        standard = compile_cell_map(category)
+        for key, target in compile_cell_map(category, template).items():
+            sources.setdefault(target, []).append((category, key))
+            standard_targets.setdefault(target, standard.get(key))
+
+    def slots(cell_sources: List[Tuple[str, str]]) -> Tuple[Tuple[int, str], ...]:
+        # 別名は正式な項目名と同じ項目番号のため、最初の1つのみ
+        unique: Dict[int, str] = {}
+        for field in cell_sources:
+            unique.setdefault(numbers[field], field[1])
+        return tuple(unique.items())
+
+    return tuple(
+        CellPlan(sheet, cell, variant.reduction((sheet, cell), standard_targets[(sheet, cell)]),
+                 tuple(cell_sources), slots(cell_sources))
+        for (sheet, cell), cell_sources in sources.items()
+    )
+
+
+def reduce_cell_values(data: FinancialData, plan: Tuple[CellPlan, ...]) -> List[Tuple[CellPlan, Any, List[str]]]:
+    """
+    書き込みプランに従ってセルごとの値を1パスで算出（値は項目番号で参照）
+
+    Args:
+        data: PDF解析で抽出したデータ
+        plan: compile_write_plan() の戻り値
+
+    Returns:
+        (CellPlan, 書き込む値, 値の元になった項目名のリスト) のリスト（値が存在するセルのみ）
+    """
+    values = as_statement(data).values
+    resolved = []
+
+    for cell_plan in plan:
+        present = [(key, values[number]) for number, key in cell_plan.slots if values[number] is not None]
+        if not present:
+            continue
+
+        if cell_plan.reduce == 'sum':
+            value = sum(v for _, v in present)
+            keys = [key for key, _ in present]
+        elif cell_plan.reduce == 'net':
+            gains = [(key, v) for key, v in present if key not in LOSS_ITEMS]
+            key, value = gains[0] if gains else (present[0][0], -present[0][1])
+            keys = [key]
+        else:
+            key, value = present[0]
+            keys = [key]
+
+        resolved.append((cell_plan, value, keys))
+
+    return resolved
+
+
+@lru_cache(maxsize=16)
+def _template_snapshot(template_path: str, mtime: float) -> bytes:
+    """
+    テンプレートを読み込み、シリアライズしたスナップショットを返す（プロセス内でキャッシュ）
+
+    Args:
+        template_path: テンプレートファイルパス
+        mtime: テンプレートの更新時刻（更新時にキャッシュを無効化するためのキー）
+
+    Returns:
+        pickle化したWorkbook
+    """
+    # openpyxl は読み込みに時間がかかるため、使用する時点でインポート
+    # （コンパイル済みテンプレートで書き込む場合は読み込まない）
+    from openpyxl import load_workbook
+
+    print(f"テンプレート読み込み: {template_path}")
+    return pickle.dumps(load_workbook(template_path), protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_template(template_path: str):
+    """
+    キャッシュしたスナップショットからテンプレートのWorkbookを復元
+
+    load_workbook はスタイル解析を含むため低速です。初回のみ読み込み、
+    以降はスナップショットから新しいWorkbookを作成します（書き込みは互いに影響しません）。
+
+    Args:
+        template_path: テンプレートファイルパス
+
+    Returns:
+        Workbookオブジェクト
+    """
+    return pickle.loads(_template_snapshot(os.path.abspath(template_path), os.path.getmtime(template_path)))
 
 
-def write_to_excel(data: Dict[str, Any], template_path: str, output_path: str) -> str:
+def prepare_template(template_path: str) -> str:
+    """
+    テンプレートを読み込んでプロセス内にキャッシュ（起動時のウォームアップ用）
+
+    Args:
+        template_path: テンプレートファイルパス
+
+    Returns:
+        使用する書き込み方式（'fastfill': コンパイル済みテンプレート / 'openpyxl'）
+    """
+    template = template_for_path(template_path).name
+    if load_artifact(template_path, write_plan_fingerprint(template)) is not None:
+        return 'fastfill'
+    load_template(template_path)
+    return 'openpyxl'
+
+
+def write_to_excel(data: FinancialData, template_path: str, output_path: str) -> str:
     """
     抽出データをExcelテンプレートに書き込み
 
@@ -140,6 +234,30 @@ def write_to_excel(data: Dict[str, Any], template_path: str, output_path: str) -
     Returns:
         出力ファイルパス
 
+    Raises:
+        FileNotFoundError: テンプレートが見つからない場合
+        Exception: 書き込み処理でエラーが発生した場合
+    """
+    for _ in iter_write_excel(data, template_path, output_path):
+        pass
+    return output_path
+
+
+def iter_write_excel(data: FinancialData, template_path: str, output_path: str) -> Iterator[Dict[str, Any]]:
+    """
+    抽出データをExcelテンプレートに書き込み、シートごとに進捗を返す
+
+    書き込み先のセルはテンプレートの様式（template_registry.template_for_path）に従います。
+
+    Args:
+        data: PDF解析で抽出したデータ
+        template_path: テンプレートファイルパス
+        output_path: 出力先ファイルパス
+
+    Yields:
+        {'event': 'sheet', 'sheet': シート名, 'cells': 書き込んだセル数} をシートごとに返し、
+        保存後に {'event': 'saved', 'path': 出力ファイルパス, 'cells': 合計セル数} を返す
+
     Raises:
         FileNotFoundError: テンプレートが見つからない場合
         Exception: 書き込み処理でエラーが発生した場合
@@ -147,175 +265,268 @@ def write_to_excel(data: Dict[str, Any], template_path: str, output_path: str) -
     if not os.path.exists(template_path):
         raise FileNotFoundError(f"テンプレートファイルが見つかりません: {template_path}")
 
-    print(f"Excel書き込み開始: {template_path} -> {output_path}")
+    template = template_for_path(template_path).name
+    print(f"Excel書き込み開始: {template_path} -> {output_path} (様式: {template})")
 
     try:
-        # テンプレートを読み込み
-        wb = load_workbook(template_path)
+        plan = compile_write_plan(template)
+        data = as_statement(data)
+
+        # マッピングに無い項目を通知
+        report_unmapped_items(data, template)
+
+        # 計算項目を算出
+        data = calculate_derived_values(data)
 
-        # 各データカテゴリを書き込み
+        # コンパイル済みテンプレートがあればシートXMLに直接書き込み
+        artifact = load_artifact(template_path, write_plan_fingerprint(template))
         write_count = 0
 
-        # 1. 貸借対照表 - 資産の部
-        if 'balance_sheet_assets' in data:
-            write_count += write_data_to_sheet(
-                wb,
-                data['balance_sheet_assets'],
-                BALANCE_SHEET_ASSETS_MAP,
-                "資産の部"
-            )
-
-        # 2. 貸借対照表 - 負債の部
-        if 'balance_sheet_liabilities' in data:
-            write_count += write_data_to_sheet(
-                wb,
-                data['balance_sheet_liabilities'],
-                BALANCE_SHEET_LIABILITIES_MAP,
-                "負債の部"
-            )
-
-        # 3. 貸借対照表 - 純資産の部
-        if 'balance_sheet_equity' in data:
-            write_count += write_data_to_sheet(
-                wb,
-                data['balance_sheet_equity'],
-                BALANCE_SHEET_EQUITY_MAP,
-                "純資産の部"
-            )
-
-        # 4. 損益計算書
-        if 'income_statement' in data:
-            write_count += write_data_to_sheet(
-                wb,
-                data['income_statement'],
-                INCOME_STATEMENT_MAP,
-                "損益計算書"
-            )
-
-        # 5. 営業外損益
-        if 'non_operating' in data:
-            write_count += write_data_to_sheet(
-                wb,
-                data['non_operating'],
-                NON_OPERATING_MAP,
-                "営業外損益"
-            )
-
-        # 6. 株主資本等変動計算書
-        if 'equity_change' in data:
-            write_count += write_data_to_sheet(
-                wb,
-                data['equity_change'],
-                EQUITY_CHANGE_MAP,
-                "株主資本等変動計算書"
-            )
-
-        # 7. 完成工事原価報告書
-        if 'cost_report' in data:
-            write_count += write_data_to_sheet(
-                wb,
-                data['cost_report'],
-                COST_REPORT_MAP,
-                "完成工事原価報告書"
-            )
-
-        # 出力ディレクトリが存在しない場合は作成
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-
-        # ファイル保存
-        wb.save(output_path)
+        if artifact is not None:
+            values: Dict[Tuple[str, str], Any] = {}
+            for sheet_name, entries in _group_by_sheet(data, plan):
+                count = _fill_sheet(artifact, sheet_name, entries, values)
+                write_count += count
+                yield {'event': 'sheet', 'sheet': sheet_name, 'cells': count}
+
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            artifact.save(output_path, artifact.render(values))
+
+        else:
+            # テンプレートを読み込み（キャッシュ済みスナップショットから復元）
+            wb = load_template(template_path)
+
+            # セルごとに値を集約し、1セル1回で書き込み
+            for sheet_name, count in iter_sheet_writes(wb, data, plan):
+                write_count += count
+                yield {'event': 'sheet', 'sheet': sheet_name, 'cells': count}
+
+            # 出力ディレクトリが存在しない場合は作成
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+            # ファイル保存
+            wb.save(output_path)
 
         print(f"✓ Excel書き込み完了: {write_count}件のデータを書き込みました")
-        return output_path
+        yield {'event': 'saved', 'path': output_path, 'cells': write_count}
 
     except Exception as e:
         print(f"Excel書き込みエラー: {str(e)}")
         raise
 
 
-def write_data_to_sheet(wb, data: Dict[str, Any], mapping: Dict[str, tuple], category_name: str) -> int:
+def report_unmapped_items(data: FinancialData, template: str = STANDARD_TEMPLATE) -> None:
+    """
+    書き込み先セルが定義されていない項目をログ出力
+
+    Args:
+        data: PDF解析で抽出したデータ
+        template: テンプレート名
+    """
+    for category, item, _ in as_statement(data).items():
+        if item not in compile_cell_map(category, template):
+            print(f"  情報: {item}はマッピングに定義されていません")
+
+
+def write_plan_to_workbook(wb, data: FinancialData, plan: Tuple[CellPlan, ...]) -> int:
     """
-    データをExcelシートに書き込み
+    書き込みプランに従ってデータをExcelに書き込み
 
     Args:
         wb: Workbookオブジェクト
-        data: 書き込むデータ
-        mapping: セルマッピング辞書
-        category_name: カテゴリ名（ログ用）
+        data: PDF解析で抽出したデータ
+        plan: compile_write_plan() の戻り値
 
     Returns:
-        書き込んだデータ件数
+        書き込んだセル数
+    """
+    return sum(count for _, count in iter_sheet_writes(wb, data, plan))
+
+
+def iter_sheet_writes(wb, data: FinancialData, plan: Tuple[CellPlan, ...]) -> Iterator[Tuple[str, int]]:
+    """
+    書き込みプランに従ってデータをシート単位で書き込み
+
+    Args:
+        wb: Workbookオブジェクト
+        data: PDF解析で抽出したデータ
+        plan: compile_write_plan() の戻り値
+
+    Yields:
+        (シート名, 書き込んだセル数) をシートの書き込みが終わるごとに返す
+    """
+    for sheet_name, entries in _group_by_sheet(data, plan):
+        yield sheet_name, _write_sheet(wb, sheet_name, entries)
+
+
+def _group_by_sheet(data: FinancialData,
+                    plan: Tuple[CellPlan, ...]) -> List[Tuple[str, List[Tuple[CellPlan, Any, List[str]]]]]:
+    """
+    集約した値をシートごとにまとめる（シートの順序はプラン内の初出順）
+    """
+    by_sheet: Dict[str, List[Tuple[CellPlan, Any, List[str]]]] = {}
+    for entry in reduce_cell_values(data, plan):
+        by_sheet.setdefault(entry[0].sheet, []).append(entry)
+    return list(by_sheet.items())
+
+
+@lru_cache(maxsize=None)
+def write_plan_fingerprint(template: str = STANDARD_TEMPLATE) -> str:
+    """
+    書き込みプランの書き込み先セルのハッシュ（コンパイル済みテンプレートの鮮度確認用）
+    """
+    return plan_fingerprint((cell_plan.sheet, cell_plan.cell) for cell_plan in compile_write_plan(template))
+
+
+def _cell_value(value: Any) -> Any:
+    """
+    セルに書き込む値（すべての数値について下3桁を除去＝1000で割る）
+    """
+    if isinstance(value, (int, float)):
+        return int(value // 1000)
+    return value
+
+
+def _log_cell(category_name: str, item: str, value: Any, actual_value: Any, sheet_name: str, cell_address: str) -> None:
+    """
+    書き込んだセルのログ出力（数値の場合は変換前後を表示）
+    """
+    if isinstance(value, (int, float)):
+        print(f"  {category_name}: {item} = {value:,} -> {actual_value:,} (下3桁除去) -> {sheet_name}!{cell_address}")
+    else:
+        print(f"  {category_name}: {item} = {value} -> {sheet_name}!{cell_address}")
+
+
+def _fill_sheet(artifact: FastFillTemplate, sheet_name: str, entries: List[Tuple[CellPlan, Any, List[str]]],
+                values: Dict[Tuple[str, str], Any]) -> int:
+    """
+    1シート分の値をコンパイル済みテンプレートの書き込み対象に追加
+
+    Args:
+        artifact: コンパイル済みテンプレート
+        sheet_name: シート名
+        entries: シートに書き込む (CellPlan, 値, 項目名) のリスト
+        values: (シート名, セル位置) → 書き込む値（この辞書に追加）
+
+    Returns:
+        書き込んだセル数
     """
     write_count = 0
+    labels = category_labels()
 
-    for item, value in data.items():
-        if item in mapping:
-            sheet_name, cell_address = mapping[item]
+    for cell_plan, value, keys in entries:
+        item = '+'.join(keys)
+        category_name = labels.get(cell_plan.sources[0][0], '')
 
-            # シートが存在するか確認
-            if sheet_name not in wb.sheetnames:
-                print(f"  警告: シート「{sheet_name}」が見つかりません - {item}をスキップ")
-                continue
+        if artifact.slot(sheet_name, cell_plan.cell) is None:
+            print(f"  警告: シート「{sheet_name}」が見つかりません - {item}をスキップ")
+            continue
 
-            try:
-                ws = wb[sheet_name]
-
-                # すべての数値について下3桁を除去（1000で割る）
-                actual_value = value
-                if isinstance(value, (int, float)):
-                    actual_value = int(value // 1000)
-
-                # セルへの書き込み（マージセル対応）
-                cell = ws[cell_address]
-                target_cell = None
-
-                if isinstance(cell, MergedCell):
-                    # マージセルの場合、左上のセルに書き込む
-                    for merged_range in ws.merged_cells.ranges:
-                        if cell.coordinate in merged_range:
-                            # 左上セルに書き込み
-                            target_cell = ws.cell(merged_range.min_row, merged_range.min_col)
-                            target_cell.value = actual_value
-                            break
-                else:
-                    # 通常セルの場合
-                    target_cell = ws[cell_address]
-                    target_cell.value = actual_value
-
-                # すべての数値にカンマ区切りフォーマットを適用
-                if target_cell and isinstance(value, (int, float)):
-                    target_cell.number_format = '#,##0'
-
-                write_count += 1
-
-                # ログ出力（数値の場合は変換前後を表示）
-                if isinstance(value, (int, float)):
-                    print(f"  {category_name}: {item} = {value:,} -> {actual_value:,} (下3桁除去) -> {sheet_name}!{cell_address}")
-                else:
-                    print(f"  {category_name}: {item} = {value} -> {sheet_name}!{cell_address}")
-            except Exception as e:
-                print(f"  エラー: {item}の書き込みに失敗 ({sheet_name}!{cell_address}): {str(e)}")
-        else:
-            print(f"  情報: {item}はマッピングに定義されていません")
+        actual_value = _cell_value(value)
+        values[(sheet_name, cell_plan.cell)] = actual_value
+        write_count += 1
+        _log_cell(category_name, item, value, actual_value, sheet_name, cell_plan.cell)
+
+    return write_count
+
+
+def _write_sheet(wb, sheet_name: str, entries: List[Tuple[CellPlan, Any, List[str]]]) -> int:
+    """
+    1シート分のセルを書き込み
+
+    Returns:
+        書き込んだセル数
+    """
+    write_count = 0
+    labels = category_labels()
+
+    for cell_plan, value, keys in entries:
+        sheet_name, cell_address = cell_plan.sheet, cell_plan.cell
+        item = '+'.join(keys)
+        category_name = labels.get(cell_plan.sources[0][0], '')
+
+        # シートが存在するか確認
+        if sheet_name not in wb.sheetnames:
+            print(f"  警告: シート「{sheet_name}」が見つかりません - {item}をスキップ")
+            continue
+
+        try:
+            ws = wb[sheet_name]
+
+            # すべての数値について下3桁を除去（1000で割る）
+            actual_value = _cell_value(value)
+
+            target_cell = _resolve_target_cell(ws, cell_address)
+            target_cell.value = actual_value
+
+            # すべての数値にカンマ区切りフォーマットを適用
+            if isinstance(value, (int, float)):
+                target_cell.number_format = '#,##0'
+
+            write_count += 1
+            _log_cell(category_name, item, value, actual_value, sheet_name, cell_address)
+        except Exception as e:
+            print(f"  エラー: {item}の書き込みに失敗 ({sheet_name}!{cell_address}): {str(e)}")
 
     return write_count
 
 
-def calculate_derived_values(wb) -> None:
+def _resolve_target_cell(ws, cell_address: str):
+    """
+    書き込み対象のセルを取得（マージセルの場合は左上のセル）
+
+    Args:
+        ws: Worksheetオブジェクト
+        cell_address: セル位置
+
+    Returns:
+        Cellオブジェクト
+    """
+    from openpyxl.cell.cell import MergedCell
+
+    cell = ws[cell_address]
+
+    if isinstance(cell, MergedCell):
+        for merged_range in ws.merged_cells.ranges:
+            if cell.coordinate in merged_range:
+                return ws.cell(merged_range.min_row, merged_range.min_col)
+
+    return cell
+
+
+def calculate_derived_values(data: FinancialData, evaluator: Optional[DerivedValueEvaluator] = None) -> Any:
     """
     計算が必要な項目を算出
 
+    テンプレートには計算式が含まれていないため、計算項目もPythonで算出して
+    値として書き込みます（openpyxl等で読み込んだ場合もそのまま値が得られます）。
+
     Args:
-        wb: Workbookオブジェクト
+        data: PDF解析で抽出したデータ（変更されません）
+        evaluator: 増分評価器（同じ書類を段階的に評価した評価器を指定すると、前回から
+                   入力が変わったノードのみ再計算します。Noneの場合は新しく作成）
 
-    計算項目:
+    Returns:
+        計算項目を補完したデータ（data と同じ型）
+
+    計算項目（式の入力がすべて揃った場合のみ算出）:
     - 完成工事総利益 = 完成工事高 - 完成工事原価
-    - 営業利益 = 完成工事総利益 - 販売費及び一般管理費
+    - 営業利益 = 完成工事総利益 - 販売費及び一般管理費（営業損失が抽出されている場合は −営業損失）
     - 経常利益 = 営業利益 + 営業外収益 - 営業外費用
+    - その他 derived_values.FORMULAS を参照
     """
-    # 必要に応じて実装
-    # 現状ではテンプレートに計算式が含まれている前提
-    pass
+    if evaluator is None:
+        evaluator = DerivedValueEvaluator()
+
+    statement = as_statement(data)
+    derived = evaluator.evaluate(statement)
+
+    result = statement.copy()
+    for (category, key), value in derived.items():
+        result.set(category, key, value)
+        print(f"  計算項目: {key} = {value:,}")
+
+    return result if isinstance(data, FinancialStatement) else result.to_dict()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,133 @@
+"""
+出力フォーマットモジュール
+抽出データをExcel以外の形式（JSON・CSV）に変換します
+
+API利用者など数値のみが必要な場合は、Excelの生成を省略してこちらを使用します。
+"""
+
+import csv
+import io
+from typing import Any, Dict, List, Optional
+
+from financial_statement import FinancialData, as_statement
+from schema import CATEGORIES
+
+# 出力フォーマット → Content-Type
+OUTPUT_FORMATS = {
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'json': 'application/json',
+    'csv': 'text/csv',
+}
+
+
+def parse_accept(accept: str) -> List[str]:
+    """
+    Acceptヘッダーのメディアタイプを優先度順に並べる
+
+    q値の大きい順に並べ、同じq値はヘッダーでの記述順とします。q=0 のメディアタイプは除外します。
+
+    Args:
+        accept: Acceptヘッダー
+
+    Returns:
+        メディアタイプ（小文字）のリスト
+    """
+    ranked = []
+    for index, part in enumerate(accept.split(',')):
+        media_type, *params = [token.strip() for token in part.split(';')]
+        if not media_type:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            ranked.append((-quality, index, media_type.lower()))
+    return [media_type for _, _, media_type in sorted(ranked)]
+
+
+def resolve_output_format(format_param: Optional[str], accept: Optional[str]) -> str:
+    """
+    クエリパラメータとAcceptヘッダーから出力フォーマットを決定
+
+    format パラメータが指定されていればそれを優先し、なければAcceptヘッダーで判定します。
+    Acceptヘッダーはq値の大きい順（同じq値は記述順）に対応するフォーマットを探し、
+    */* や application/* などのワイルドカードは OUTPUT_FORMATS の先頭から該当するものを選びます。
+    どちらも該当しない場合は 'xlsx' を返します。
+
+    Args:
+        format_param: format クエリパラメータ
+        accept: Acceptヘッダー
+
+    Returns:
+        出力フォーマット（'xlsx', 'json', 'csv'）
+
+    Raises:
+        ValueError: 未対応のフォーマットが指定された場合
+    """
+    if format_param:
+        output_format = format_param.strip().lower()
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"未対応の出力フォーマットです: {format_param}（対応: {', '.join(OUTPUT_FORMATS)}）")
+        return output_format
+
+    if accept:
+        for accepted in parse_accept(accept):
+            for output_format, media_type in OUTPUT_FORMATS.items():
+                if accepted in (media_type, '*/*', media_type.split('/')[0] + '/*'):
+                    return output_format
+
+    return 'xlsx'
+
+
+def flatten_financial_data(data: FinancialData) -> List[Dict[str, Any]]:
+    """
+    抽出データを1行1項目のリストに変換
+
+    Args:
+        data: PDF解析で抽出したデータ（FinancialStatement またはカテゴリ → {項目名: 数値} の辞書）
+
+    Returns:
+        {'category': カテゴリ, 'item': 項目名, 'value': 値} のリスト（カテゴリ順、カテゴリ内はスキーマの定義順）
+    """
+    order = {category: index for index, category in enumerate(CATEGORIES)}
+    items = sorted(as_statement(data).items(), key=lambda item: order.get(item[0], len(order)))
+    return [{'category': category, 'item': item, 'value': value} for category, item, value in items]
+
+
+def to_json_payload(data: FinancialData, validation_report: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    JSON出力用のペイロードを作成
+
+    Args:
+        data: PDF解析で抽出したデータ
+        validation_report: 整合性検証レポート
+
+    Returns:
+        {'items': フラット化したデータ, 'validation': 検証レポート}
+    """
+    return {
+        'items': flatten_financial_data(data),
+        'validation': validation_report,
+    }
+
+
+def to_csv(data: FinancialData) -> str:
+    """
+    CSV文字列を作成（列: category, item, value）
+
+    Args:
+        data: PDF解析で抽出したデータ
+
+    Returns:
+        CSV文字列
+    """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=['category', 'item', 'value'], lineterminator='\n')
+    writer.writeheader()
+    writer.writerows(flatten_financial_data(data))
+    return buffer.getvalue()
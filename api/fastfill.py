@@ -0,0 +1,262 @@
+"""
+高速書き込みモジュール
+コンパイル済みテンプレート（fast-fill アーティファクト）のシートXMLに値を直接埋め込みます
+
+アーティファクトは create_template.py で作成します。内容は次のとおりです。
+    parts/...   : 書き込み先セルに書式を設定済みのテンプレート（xlsxのzip内の各ファイル）
+    index.json  : 書き込み先セルごとのシートXML内の位置（バイトオフセット）とスタイル番号
+
+実行時はopenpyxlでのテンプレート解析・保存を行わず、対象セルの要素だけを
+置き換えてxlsxを組み立てます。テンプレートまたはセルマッピングが変更されて
+アーティファクトが古くなった場合は使用しません（openpyxlでの書き込みに戻ります）。
+"""
+
+import hashlib
+import json
+import os
+import zipfile
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional, Tuple
+from xml.sax.saxutils import escape
+
+FORMAT_VERSION = 1
+INDEX_NAME = 'index.json'
+PARTS_PREFIX = 'parts/'
+ARTIFACT_DIR = 'templates'
+ARTIFACT_SUFFIX = '.fastfill'
+
+
+def artifact_path_for(template_path: str) -> str:
+    """
+    テンプレートに対応するアーティファクトのパス（テンプレートと同じディレクトリの templates/ 以下）
+    """
+    directory, filename = os.path.split(os.path.abspath(template_path))
+    return os.path.join(directory, ARTIFACT_DIR, os.path.splitext(filename)[0] + ARTIFACT_SUFFIX)
+
+
+@lru_cache(maxsize=32)
+def _file_sha256(path: str, mtime: float) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_sha256(path: str) -> str:
+    """
+    ファイルのSHA-256（更新時刻ごとにキャッシュ）
+    """
+    path = os.path.abspath(path)
+    return _file_sha256(path, os.path.getmtime(path))
+
+
+def plan_fingerprint(targets: Iterable[Tuple[str, str]]) -> str:
+    """
+    書き込み先セルの一覧のハッシュ（セルマッピングの変更を検出するため）
+
+    Args:
+        targets: (シート名, セル位置) のリスト
+    """
+    payload = json.dumps(sorted(set(targets)), ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+@dataclass(frozen=True)
+class CellSlot:
+    """
+    シートXML内の書き込み先セル要素
+
+    Attributes:
+        part: シートXMLのzip内パス
+        address: 実際に書き込むセル位置（マージセルの場合は左上）
+        start: セル要素の開始位置（バイト）
+        end: セル要素の終了位置（バイト）
+        style: スタイル番号（s属性）
+    """
+    part: str
+    address: str
+    start: int
+    end: int
+    style: Optional[int]
+
+
+class FastFillTemplate:
+    """
+    コンパイル済みテンプレート
+
+    Args:
+        parts: zip内パス → 内容 （zip内の順序を保持）
+        index: index.json の内容
+    """
+
+    def __init__(self, parts: Dict[str, bytes], index: Dict[str, Any]):
+        self.parts = parts
+        self.index = index
+        self.slots: Dict[Tuple[str, str], CellSlot] = {
+            (sheet, cell): CellSlot(**slot)
+            for sheet, cells in index['cells'].items()
+            for cell, slot in cells.items()
+        }
+
+    @property
+    def sheets(self) -> Dict[str, str]:
+        """
+        シート名 → シートXMLのzip内パス
+        """
+        return self.index['sheets']
+
+    def is_current(self, template_path: str, fingerprint: str) -> bool:
+        """
+        テンプレートとセルマッピングがコンパイル時から変わっていないか
+        """
+        return (
+            self.index.get('format_version') == FORMAT_VERSION
+            and self.index.get('source_sha256') == file_sha256(template_path)
+            and self.index.get('plan_fingerprint') == fingerprint
+        )
+
+    def slot(self, sheet: str, cell: str) -> Optional[CellSlot]:
+        """
+        書き込み先セルの位置（コンパイル時に含まれていないセルはNone）
+        """
+        return self.slots.get((sheet, cell))
+
+    def render(self, values: Dict[Tuple[str, str], Any]) -> Dict[str, bytes]:
+        """
+        セルに値を埋め込んだシートXMLを作成
+
+        Args:
+            values: (シート名, セル位置) → 書き込む値
+                    同じマージセルを指す書き込み先は、後に追加した値が優先されます
+
+        Returns:
+            変更したシートXMLのzip内パス → 内容
+        """
+        edits: Dict[str, Dict[Tuple[int, int], bytes]] = {}
+        for key, value in values.items():
+            slot = self.slots[key]
+            edits.setdefault(slot.part, {})[(slot.start, slot.end)] = cell_xml(slot, value)
+
+        patched = {}
+        for part, replacements in edits.items():
+            source = self.parts[part]
+            chunks = []
+            position = 0
+            for (start, end), element in sorted(replacements.items()):
+                chunks.append(source[position:start])
+                chunks.append(element)
+                position = end
+            chunks.append(source[position:])
+            patched[part] = b''.join(chunks)
+        return patched
+
+    def save(self, output_path: str, patched: Dict[str, bytes]) -> None:
+        """
+        変更したシートXMLと残りのファイルからxlsxを保存
+        """
+        with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for name, content in self.parts.items():
+                archive.writestr(name, patched.get(name, content))
+
+
+def cell_xml(slot: CellSlot, value: Any) -> bytes:
+    """
+    値を持つセル要素のXMLを作成（数値は <v>、それ以外はインライン文字列）
+    """
+    style = f' s="{slot.style}"' if slot.style is not None else ''
+    if isinstance(value, bool):
+        return f'<c r="{slot.address}"{style} t="b"><v>{int(value)}</v></c>'.encode('utf-8')
+    if isinstance(value, (int, float)):
+        return f'<c r="{slot.address}"{style}><v>{value}</v></c>'.encode('utf-8')
+    text = escape(str(value))
+    return f'<c r="{slot.address}"{style} t="inlineStr"><is><t>{text}</t></is></c>'.encode('utf-8')
+
+
+def find_cell_element(xml: bytes, address: str) -> Optional[Tuple[int, int, Optional[int]]]:
+    """
+    シートXMLからセル要素の位置とスタイル番号を探す
+
+    Returns:
+        (開始位置, 終了位置, スタイル番号)、見つからない場合はNone
+    """
+    marker = f'<c r="{address}"'.encode('utf-8')
+    start = xml.find(marker)
+    while start != -1 and xml[start + len(marker):start + len(marker) + 1] not in (b' ', b'>', b'/'):
+        start = xml.find(marker, start + 1)
+    if start == -1:
+        return None
+
+    tag_end = xml.index(b'>', start)
+    if xml[tag_end - 1:tag_end] == b'/':
+        end = tag_end + 1
+    else:
+        end = xml.index(b'</c>', tag_end) + len(b'</c>')
+
+    style = None
+    start_tag = xml[start:tag_end]
+    position = start_tag.find(b' s="')
+    if position != -1:
+        value_start = position + len(b' s="')
+        style = int(start_tag[value_start:start_tag.index(b'"', value_start)])
+
+    return start, end, style
+
+
+def write_artifact(path: str, parts: Dict[str, bytes], index: Dict[str, Any]) -> None:
+    """
+    アーティファクトを保存
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with zipfile.ZipFile(temp_path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr(INDEX_NAME, json.dumps(index, ensure_ascii=False, indent=1))
+        for name, content in parts.items():
+            archive.writestr(PARTS_PREFIX + name, content)
+    os.replace(temp_path, path)
+
+
+@lru_cache(maxsize=16)
+def _load_artifact(path: str, mtime: float) -> FastFillTemplate:
+    with zipfile.ZipFile(path) as archive:
+        index = json.loads(archive.read(INDEX_NAME))
+        parts = {
+            name[len(PARTS_PREFIX):]: archive.read(name)
+            for name in archive.namelist()
+            if name.startswith(PARTS_PREFIX)
+        }
+    return FastFillTemplate(parts, index)
+
+
+def load_artifact(template_path: str, fingerprint: str) -> Optional[FastFillTemplate]:
+    """
+    テンプレートに対応するアーティファクトを読み込む（プロセス内でキャッシュ）
+
+    Args:
+        template_path: テンプレートファイルパス
+        fingerprint: 現在のセルマッピングの plan_fingerprint()
+
+    Returns:
+        FastFillTemplate。存在しない、または古い場合はNone
+    """
+    path = artifact_path_for(template_path)
+    if not os.path.exists(path):
+        return None
+
+    try:
+        artifact = _load_artifact(path, os.path.getmtime(path))
+    except (OSError, KeyError, ValueError, zipfile.BadZipFile) as e:
+        print(f"警告: コンパイル済みテンプレートを読み込めません: {path} ({str(e)})")
+        return None
+
+    if not artifact.is_current(template_path, fingerprint):
+        _warn_stale(path)
+        return None
+
+    return artifact
+
+
+@lru_cache(maxsize=None)
+def _warn_stale(path: str) -> None:
+    print(f"警告: コンパイル済みテンプレートが古いため使用しません: {path}（python create_template.py で再作成してください）")
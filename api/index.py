@@ -1,16 +1,29 @@
 """
 FastAPI バックエンドアプリケーション (Vercel Serverless Functions用)
 決算報告書PDF→Excel変換API
+
+コールドスタートを短くするため、PDF解析・Excel書き込みのモジュール（pdfplumber・openpyxl）は
+最初の変換または /warmup の呼び出し時に読み込みます。Excelは同梱のコンパイル済みテンプレート
+（templates/エクセルサンプル.fastfill）に値を埋め込んで作成するため、テンプレートの解析も行いません。
 """
 
+import time
+
+# コールドスタートの計測開始（このモジュールの読み込み開始時刻）
+_MODULE_STARTED = time.perf_counter()
+
+import json
 import os
+import threading
 import uuid
-from typing import Optional
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from typing import Any, Dict, Optional
+from fastapi import FastAPI, UploadFile, File, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
-from pdf_parser import parse_pdf
-from excel_writer import write_to_excel
+from fastapi.responses import FileResponse, JSONResponse, Response
+from starlette.background import BackgroundTask
+from exporters import OUTPUT_FORMATS, resolve_output_format, to_json_payload
+from template_registry import DEFAULT_TEMPLATE, TEMPLATES, get_template
+from temp_files import TempFileSweeper
 
 # FastAPIアプリケーション作成
 app = FastAPI(
@@ -38,16 +51,38 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Validation-Report"],
 )
 
 # 定数
 UPLOAD_DIR = "/tmp"  # Vercelでは/tmpのみ書き込み可能
-TEMPLATE_PATH = os.path.join(os.path.dirname(__file__), "エクセルサンプル.xlsx")
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
 
+# 一時ファイルの有効期限（サーバーレスのため常駐タスクは使わず、変換リクエスト時に期限切れを削除）
+TEMP_FILE_TTL_SECONDS = float(os.getenv("TEMP_FILE_TTL_SECONDS", "3600"))
+TEMP_SWEEP_INTERVAL_SECONDS = float(os.getenv("TEMP_SWEEP_INTERVAL_SECONDS", "300"))
+
+temp_files = TempFileSweeper(
+    UPLOAD_DIR,
+    ttl_seconds=TEMP_FILE_TTL_SECONDS,
+    interval_seconds=TEMP_SWEEP_INTERVAL_SECONDS,
+)
+
 # アップロードディレクトリの作成
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+# コールドスタートの目標時間（ミリ秒）。モジュールの読み込みから最初の変換の準備完了まで
+COLD_START_BUDGET_MS = float(os.getenv("COLD_START_BUDGET_MS", "1500"))
+
+# コールドスタートの計測結果
+cold_start: Dict[str, Any] = {
+    "init_ms": None,              # このモジュールの読み込み時間
+    "deferred_import_ms": None,   # 変換処理のモジュールの読み込み時間（未読み込みの場合はNone）
+    "template_ms": None,          # 既定のテンプレートの準備時間（他のテンプレートは最初の変換時に準備）
+    "template_mode": None,        # Excelの書き込み方式（'fastfill' / 'openpyxl'）
+}
+_warm_lock = threading.Lock()
+
 
 @app.get("/")
 def read_root():
@@ -61,6 +96,8 @@ def read_root():
         "environment": "vercel" if os.getenv("VERCEL") else "local",
         "endpoints": {
             "convert": "/convert (POST)",
+            "warmup": "/warmup (GET)",
+            "templates": "/templates (GET)",
             "health": "/health (GET)"
         }
     }
@@ -71,31 +108,136 @@ def health_check():
     """
     ヘルスチェックエンドポイント
     """
-    # テンプレートファイルの存在確認
-    template_exists = os.path.exists(TEMPLATE_PATH)
+    # テンプレートファイルの存在確認（template パラメータを省略した場合のテンプレート）
+    template = get_template()
+    template_exists = os.path.exists(template.path)
 
     return {
         "status": "healthy" if template_exists else "degraded",
         "template_exists": template_exists,
-        "template_path": TEMPLATE_PATH,
-        "message": "OK" if template_exists else "エクセルサンプル.xlsxファイルが見つかりません。api/ディレクトリに配置してください。"
+        "template_path": template.path,
+        "templates": {name: os.path.exists(variant.path) for name, variant in TEMPLATES.items()},
+        "cold_start": cold_start_report(),
+        "message": "OK" if template_exists else f"{template.filename}ファイルが見つかりません。api/ディレクトリに配置してください。"
+    }
+
+
+@app.get("/templates")
+def list_templates():
+    """
+    変換に使えるテンプレート（届出書の様式）の一覧（template パラメータに指定する名前）
+    """
+    return {
+        "default": DEFAULT_TEMPLATE,
+        "templates": [
+            {"name": name, "label": variant.label, "available": os.path.exists(variant.path)}
+            for name, variant in TEMPLATES.items()
+        ]
+    }
+
+
+@app.get("/warmup")
+def warmup():
+    """
+    ウォームアップエンドポイント
+
+    変換処理のモジュールの読み込み・キーワードマッチャーのコンパイル・既定のテンプレートの準備を行います。
+    変換は行いません。デプロイ直後や定期実行（cron）で呼び出すと、最初の変換の待ち時間を短縮できます。
+    """
+    warm_up()
+    return {"status": "warm", "cold_start": cold_start_report()}
+
+
+def warm_up() -> None:
+    """
+    変換処理のモジュールを読み込み、キャッシュを準備（初回のみ実行し、所要時間を記録）
+    """
+    with _warm_lock:
+        if cold_start["deferred_import_ms"] is not None:
+            return
+
+        started = time.perf_counter()
+        from pdf_parser import compile_matchers
+        from excel_writer import prepare_template
+        from schema import STATEMENTS
+        for statement in STATEMENTS:
+            compile_matchers(statement.name)
+        imported = time.perf_counter()
+
+        template_path = get_template().path
+        if os.path.exists(template_path):
+            cold_start["template_mode"] = prepare_template(template_path)
+        finished = time.perf_counter()
+
+        cold_start["deferred_import_ms"] = round((imported - started) * 1000, 1)
+        cold_start["template_ms"] = round((finished - imported) * 1000, 1)
+
+        total = cold_start_total_ms()
+        print(f"ウォームアップ完了: {total}ms (目標 {COLD_START_BUDGET_MS:.0f}ms, 書き込み方式 {cold_start['template_mode']})")
+        if total > COLD_START_BUDGET_MS:
+            print(f"警告: コールドスタートが目標時間を超えています（{total}ms > {COLD_START_BUDGET_MS:.0f}ms）")
+
+
+def cold_start_total_ms() -> float:
+    """
+    モジュールの読み込みから変換の準備完了までの合計時間（ミリ秒、未ウォームアップの部分は含まない）
+    """
+    return round(sum(cold_start[key] or 0 for key in ("init_ms", "deferred_import_ms", "template_ms")), 1)
+
+
+def cold_start_report() -> Dict[str, Any]:
+    """
+    コールドスタートの計測結果（目標時間との比較を含む）
+    """
+    warm = cold_start["deferred_import_ms"] is not None
+    total = cold_start_total_ms()
+    return {
+        **cold_start,
+        "warm": warm,
+        "total_ms": total,
+        "budget_ms": COLD_START_BUDGET_MS,
+        "within_budget": total <= COLD_START_BUDGET_MS if warm else None,
     }
 
 
 @app.post("/convert")
-async def convert_pdf_to_excel(file: UploadFile = File(...)):
+async def convert_pdf_to_excel(
+    request: Request,
+    file: UploadFile = File(...),
+    output_format: Optional[str] = Query(None, alias="format", description="出力形式（xlsx / json / csv）"),
+    template: Optional[str] = Query(None, description="テンプレート名（/templates、省略時は既定のテンプレート）")
+):
     """
     PDFをExcelに変換するメインエンドポイント
 
+    format パラメータまたは Accept ヘッダーで json / csv を指定した場合は、
+    Excelを生成せずに抽出データのみを返します。
+    template パラメータで書き込み先のテンプレート（届出書の様式）を選択します。
+
     Args:
+        request: リクエスト（Acceptヘッダーの参照用）
         file: アップロードされたPDFファイル
+        output_format: 出力形式（省略時はAcceptヘッダーで判定、既定はxlsx）
+        template: テンプレート名（省略時は DEFAULT_TEMPLATE）
 
     Returns:
-        変換されたExcelファイル
+        変換されたExcelファイル、または抽出データ（JSON / CSV）
 
     Raises:
-        HTTPException: ファイル検証エラー、変換エラー時
+        HTTPException: ファイル検証エラー、未登録のテンプレート、変換エラー時
     """
+    # 出力形式の判定
+    try:
+        output_format = resolve_output_format(output_format, request.headers.get("accept"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # テンプレートの選択
+    try:
+        variant = get_template(template)
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=e.args[0])
+
     # ファイル検証
     if not file.filename:
         raise HTTPException(status_code=400, detail="ファイルが選択されていません")
@@ -116,19 +258,38 @@ async def convert_pdf_to_excel(file: UploadFile = File(...)):
     if file_size == 0:
         raise HTTPException(status_code=400, detail="ファイルが空です")
 
-    # テンプレートファイルの存在確認
-    if not os.path.exists(TEMPLATE_PATH):
+    # テンプレートファイルの存在確認（Excel出力時のみ）
+    if output_format == "xlsx" and not os.path.exists(variant.path):
         raise HTTPException(
             status_code=500,
-            detail="エクセルサンプル.xlsxファイルが見つかりません。api/ディレクトリに配置してください。"
+            detail=f"{variant.filename}ファイルが見つかりません。api/ディレクトリに配置してください。"
         )
 
+    # PDFの構造の事前検査（読み込めないPDF・時間がかかりすぎるPDFは変換前に拒否）
+    from preflight import PreflightError, inspect_pdf
+    try:
+        inspect_pdf(file_content)
+    except PreflightError as e:
+        print(f"✗ 事前検査で拒否: {file.filename} ({str(e)})")
+        raise HTTPException(status_code=400, detail=str(e))
+
     # 一時ファイル名の生成
     file_id = str(uuid.uuid4())
     pdf_path = os.path.join(UPLOAD_DIR, f"{file_id}.pdf")
     excel_path = os.path.join(UPLOAD_DIR, f"{file_id}_output.xlsx")
+    temp_files.sweep_if_due()
+    temp_files.acquire(pdf_path)
+    temp_files.acquire(excel_path)
+    excel_sent = False
 
     try:
+        # 変換処理のモジュールはコールドスタート短縮のため初回の変換時に読み込む
+        warm_up()
+        from pdf_parser import parse_pdf_statement
+        from excel_writer import calculate_derived_values, write_to_excel
+        from validator import validate_financial_data
+        from exporters import to_csv
+
         # PDFファイルを保存
         with open(pdf_path, "wb") as f:
             f.write(file_content)
@@ -138,38 +299,54 @@ async def convert_pdf_to_excel(file: UploadFile = File(...)):
         print(f"{'='*60}")
 
         # PDFを解析
-        print("\n[1/2] PDF解析中...")
-        data = parse_pdf(pdf_path)
+        print("\n[1/3] PDF解析中...")
+        data = parse_pdf_statement(pdf_path)
 
         # データが抽出できたか確認
-        total_items = sum([
-            len(data.get('balance_sheet_assets', {})),
-            len(data.get('balance_sheet_liabilities', {})),
-            len(data.get('balance_sheet_equity', {})),
-            len(data.get('income_statement', {})),
-            len(data.get('non_operating', {})),
-            len(data.get('equity_change', {}))
-        ])
-
-        if total_items == 0:
+        if len(data) == 0:
             print("警告: PDFからデータを抽出できませんでした")
 
+        # 整合性検証（逆算可能な未抽出項目を補完）
+        print("\n[2/3] 整合性検証中...")
+        data, validation_report = validate_financial_data(data)
+        # 検証レポート（ヘッダーはASCIIのみのためエスケープしたJSON）
+        report_header = json.dumps(validation_report, ensure_ascii=True)
+
+        # JSON / CSV 出力時はExcel生成を省略（計算項目はExcelと同じ値を含める）
+        if output_format in ("json", "csv"):
+            data = calculate_derived_values(data)
+
+        if output_format == "json":
+            print(f"\n変換処理完了（JSON出力）\n")
+            return JSONResponse(to_json_payload(data, validation_report))
+
+        if output_format == "csv":
+            print(f"\n変換処理完了（CSV出力）\n")
+            return Response(
+                content=to_csv(data),
+                media_type=OUTPUT_FORMATS["csv"],
+                headers={"X-Validation-Report": report_header}
+            )
+
         # Excelに書き込み
-        print("\n[2/2] Excel作成中...")
-        write_to_excel(data, TEMPLATE_PATH, excel_path)
+        print("\n[3/3] Excel作成中...")
+        write_to_excel(data, variant.path, excel_path)
 
         print(f"\n{'='*60}")
         print(f"変換処理完了")
         print(f"{'='*60}\n")
 
-        # Excelファイルを返却
+        # Excelファイルを返却（送信後に削除）
+        excel_sent = True
         return FileResponse(
             excel_path,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            media_type=OUTPUT_FORMATS["xlsx"],
             filename="事業年度終了届出書.xlsx",
             headers={
-                "Content-Disposition": "attachment; filename*=UTF-8''%E4%BA%8B%E6%A5%AD%E5%B9%B4%E5%BA%A6%E7%B5%82%E4%BA%86%E5%B1%8A%E5%87%BA%E6%9B%B8.xlsx"
-            }
+                "Content-Disposition": "attachment; filename*=UTF-8''%E4%BA%8B%E6%A5%AD%E5%B9%B4%E5%BA%A6%E7%B5%82%E4%BA%86%E5%B1%8A%E5%87%BA%E6%9B%B8.xlsx",
+                "X-Validation-Report": report_header
+            },
+            background=BackgroundTask(temp_files.remove, excel_path)
         )
 
     except FileNotFoundError as e:
@@ -182,36 +359,41 @@ async def convert_pdf_to_excel(file: UploadFile = File(...)):
         raise HTTPException(status_code=500, detail=f"変換エラー: {str(e)}")
 
     finally:
-        # 一時PDFファイルを削除（Excelは返却後に自動削除される）
-        if os.path.exists(pdf_path):
-            try:
-                os.remove(pdf_path)
-            except Exception as e:
-                print(f"一時ファイル削除エラー: {str(e)}")
+        # 一時PDFファイルを削除（Excelは返却後に削除される）
+        temp_files.remove(pdf_path)
+        if not excel_sent:
+            temp_files.remove(excel_path)
 
 
 @app.delete("/cleanup")
 def cleanup_temp_files():
     """
     一時ファイルをクリーンアップ（管理用）
+
+    このAPIが作成した一時ファイルのみを対象とし、変換中・送信中のファイルは削除しません。
     """
     try:
-        deleted_count = 0
-        if os.path.exists(UPLOAD_DIR):
-            for filename in os.listdir(UPLOAD_DIR):
-                file_path = os.path.join(UPLOAD_DIR, filename)
-                if os.path.isfile(file_path):
-                    os.remove(file_path)
-                    deleted_count += 1
-
+        result = temp_files.sweep(ttl_seconds=0)
         return {
             "status": "success",
-            "message": f"{deleted_count}個の一時ファイルを削除しました"
+            "message": f"{result['deleted']}個の一時ファイルを削除しました"
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"クリーンアップエラー: {str(e)}")
 
 
-# Vercel Serverless Functions用ハンドラー
-from mangum import Mangum
-handler = Mangum(app)
+_mangum = None
+
+
+def handler(event, context):
+    """
+    Vercel Serverless Functions用ハンドラー（Mangumは最初の呼び出し時に作成）
+    """
+    global _mangum
+    if _mangum is None:
+        from mangum import Mangum
+        _mangum = Mangum(app)
+    return _mangum(event, context)
+
+
+cold_start["init_ms"] = round((time.perf_counter() - _MODULE_STARTED) * 1000, 1)
@@ -0,0 +1,241 @@
+"""
+OCRモジュール
+テキストレイヤーの無いページ（スキャンした決算報告書）をTesseractで読み取ります
+
+Tesseract（日本語データ jpn）がインストールされている場合のみ有効になります。
+OCR結果はページ画像のハッシュをキーにディスクへキャッシュし、
+同じPDFを再アップロードした場合はOCRを再実行しません。
+"""
+
+import hashlib
+import io
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+# OCRの有効化（auto: Tesseractと言語データがあれば有効 / 1: 有効 / 0: 無効）
+OCR_ENABLED = os.getenv("OCR_ENABLED", "auto").strip().lower()
+OCR_LANG = os.getenv("OCR_LANG", "jpn")
+OCR_RESOLUTION = int(os.getenv("OCR_RESOLUTION", "300"))
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", "0")) or min(4, os.cpu_count() or 1)
+OCR_TIMEOUT_SECONDS = float(os.getenv("OCR_TIMEOUT_SECONDS", "120"))
+OCR_CACHE_DIR = os.getenv("OCR_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "ocr_cache"))
+TESSERACT_CMD = os.getenv("TESSERACT_CMD", "tesseract")
+
+# 日本語の文字（かな・漢字・全角記号）
+_CJK = r'　-ヿ㐀-䶿一-鿿＀-￯'
+_CJK_SPACE = re.compile(rf'(?<=[{_CJK}])[ \t]+(?=[{_CJK}])')
+
+
+def normalize_ocr_text(text: str) -> str:
+    """
+    OCR結果を抽出用に整形（日本語の文字間に入った空白を除去）
+
+    Tesseractは日本語の文字を1文字ずつ空白で区切って出力することがあるため、
+    「現 金 及 び 預 金」→「現金及び預金」のように詰めます。
+    """
+    return _CJK_SPACE.sub('', text)
+
+
+@lru_cache(maxsize=None)
+def find_tesseract(lang: str = OCR_LANG) -> Optional[str]:
+    """
+    Tesseractの実行ファイルを探す（指定言語のデータが無い場合はNone）
+
+    Args:
+        lang: OCR言語（例: 'jpn'）
+
+    Returns:
+        実行ファイルのパス、または None
+    """
+    command = shutil.which(TESSERACT_CMD)
+    if command is None:
+        return None
+
+    try:
+        result = subprocess.run([command, '--list-langs'], capture_output=True, text=True, timeout=30)
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+    languages = set((result.stdout + result.stderr).split())
+    if not all(part in languages for part in lang.split('+')):
+        print(f"警告: Tesseractの言語データ（{lang}）がインストールされていません")
+        return None
+
+    return command
+
+
+def is_enabled() -> bool:
+    """
+    OCRが利用可能か判定
+    """
+    if OCR_ENABLED in ('0', 'false', 'no', 'off'):
+        return False
+    available = find_tesseract(OCR_LANG) is not None
+    if not available and OCR_ENABLED in ('1', 'true', 'yes', 'on'):
+        print("警告: OCR_ENABLED が指定されていますが、Tesseractが見つかりません")
+    return available
+
+
+def render_page(page, resolution: int = OCR_RESOLUTION) -> bytes:
+    """
+    pdfplumberのページをPNG画像に変換
+
+    Args:
+        page: pdfplumberのPageオブジェクト
+        resolution: 解像度（dpi）
+
+    Returns:
+        PNG画像のバイト列
+    """
+    image = page.to_image(resolution=resolution).original
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def image_key(image: bytes, lang: str = OCR_LANG) -> str:
+    """
+    キャッシュキー（ページ画像と言語のハッシュ）
+    """
+    digest = hashlib.sha256(image)
+    digest.update(lang.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def run_tesseract(image: bytes, lang: str = OCR_LANG, timeout: float = OCR_TIMEOUT_SECONDS) -> str:
+    """
+    1ページ分の画像をOCR（ワーカープロセスで実行）
+
+    Args:
+        image: PNG画像のバイト列
+        lang: OCR言語
+        timeout: タイムアウト（秒）
+
+    Returns:
+        OCR結果のテキスト
+
+    Raises:
+        RuntimeError: Tesseractが見つからない、または異常終了した場合
+    """
+    command = find_tesseract(lang)
+    if command is None:
+        raise RuntimeError("Tesseractが見つかりません")
+
+    # --psm 6: ページ全体を1つのテキストブロックとして読む（表形式の決算書向け）
+    result = subprocess.run(
+        [command, 'stdin', 'stdout', '-l', lang, '--psm', '6'],
+        input=image,
+        capture_output=True,
+        timeout=timeout,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Tesseractの実行に失敗しました: {result.stderr.decode('utf-8', 'replace').strip()}")
+
+    return normalize_ocr_text(result.stdout.decode('utf-8', 'replace'))
+
+
+class OCRCache:
+    """
+    ページ画像のハッシュ → OCR結果 のディスクキャッシュ
+
+    Args:
+        directory: キャッシュディレクトリ
+    """
+
+    def __init__(self, directory: str = OCR_CACHE_DIR):
+        self.directory = directory
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.txt")
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        キャッシュ済みのOCR結果を返す（無い場合はNone）
+        """
+        try:
+            with open(self._path(key), encoding='utf-8') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            print(f"警告: OCRキャッシュを読み込めません: {str(e)}")
+            return None
+
+    def put(self, key: str, text: str) -> None:
+        """
+        OCR結果を保存（書き込み途中のファイルを読まないよう一時ファイルから置き換え）
+        """
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(text)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"警告: OCRキャッシュを保存できません: {str(e)}")
+
+
+def ocr_images(images: List[Tuple[int, bytes]], cache: Optional[OCRCache] = None,
+               lang: str = OCR_LANG, workers: int = OCR_WORKERS) -> Dict[int, str]:
+    """
+    複数ページの画像をOCR（キャッシュに無いページのみプロセスプールで並列実行）
+
+    Args:
+        images: (ページ番号, PNG画像) のリスト
+        cache: OCR結果のキャッシュ（Noneの場合はキャッシュしない）
+        lang: OCR言語
+        workers: 並列実行するプロセス数
+
+    Returns:
+        ページ番号 → OCR結果のテキスト（失敗したページは空文字列）
+    """
+    results: Dict[int, str] = {}
+    pending: List[Tuple[int, str, bytes]] = []
+
+    for index, image in images:
+        key = image_key(image, lang)
+        cached = cache.get(key) if cache is not None else None
+        if cached is not None:
+            results[index] = cached
+        else:
+            pending.append((index, key, image))
+
+    if len(results):
+        print(f"  OCRキャッシュ: {len(results)}ページ")
+    if not pending:
+        return results
+
+    print(f"  OCR実行中: {len(pending)}ページ")
+
+    def store(index: int, key: str, text: str) -> None:
+        results[index] = text
+        if cache is not None:
+            cache.put(key, text)
+
+    # 1ページのみの場合はプロセスを起動せずに実行
+    if len(pending) == 1 or workers <= 1:
+        for index, key, image in pending:
+            try:
+                store(index, key, run_tesseract(image, lang))
+            except Exception as e:
+                print(f"  OCRエラー（{index + 1}ページ目）: {str(e)}")
+                results[index] = ''
+        return results
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(pending))) as executor:
+        futures = [(index, key, executor.submit(run_tesseract, image, lang)) for index, key, image in pending]
+        for index, key, future in futures:
+            try:
+                store(index, key, future.result())
+            except Exception as e:
+                print(f"  OCRエラー（{index + 1}ページ目）: {str(e)}")
+                results[index] = ''
+
+    return results
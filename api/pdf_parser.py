@@ -3,39 +3,75 @@ PDF解析モジュール
 決算報告書PDFから財務データを抽出します
 """
 
+import os
 import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import ExitStack
+from functools import lru_cache
+from typing import Dict, Any, Iterable, Iterator, Optional, List, NamedTuple, Pattern, Tuple
+
 import pdfplumber
-from typing import Dict, Any, Optional, List
 
+import ocr
+import page_cache
+from financial_statement import FinancialStatement
+from resource_usage import PeakRSSTracker
+from schema import (
+    BALANCE_SHEET, INCOME_STATEMENT, COST_REPORT, EQUITY_STATEMENT, MAX_SCAN_PAGES, STATEMENTS, Statement,
+    get_statement
+)
 
-def extract_value(text: str, keyword: str, pattern_type: str = 'standard') -> Optional[int]:
+
+# キーワードの直前に来てよい文字（行頭・空白・数値の後のみ）
+# 「工事未払金」の中の「未払金」のように、別の項目名の一部には一致させない
+KEYWORD_BOUNDARY = r'(?<![^\s\d,])'
+
+
+def _build_patterns(keyword: str, pattern_type: str = 'standard') -> List[str]:
     """
-    テキストから特定項目の数値を抽出
+    キーワードから数値抽出用の正規表現パターンを作成（キーワードは行頭・空白・数値の直後のみ）
 
     Args:
-        text: 検索対象テキスト
         keyword: 検索キーワード
         pattern_type: パターンタイプ ('standard', 'with_unit', 'flexible')
 
     Returns:
-        抽出した数値（整数）、見つからない場合はNone
+        正規表現パターン文字列のリスト
     """
-    # パターンバリエーション
     patterns = []
 
     if pattern_type == 'standard':
         # "項目名 金額" のパターン
-        patterns.append(rf'{re.escape(keyword)}\s+([\d,]+)')
-        patterns.append(rf'{re.escape(keyword)}[　\s]+([\d,]+)')
+        patterns.append(rf'{KEYWORD_BOUNDARY}{re.escape(keyword)}\s+([\d,]+)')
+        patterns.append(rf'{KEYWORD_BOUNDARY}{re.escape(keyword)}[　\s]+([\d,]+)')
 
     elif pattern_type == 'with_unit':
         # "項目名 金額円" のパターン
-        patterns.append(rf'{re.escape(keyword)}\s+([\d,]+)円?')
-        patterns.append(rf'{re.escape(keyword)}[　\s]+([\d,]+)円?')
+        patterns.append(rf'{KEYWORD_BOUNDARY}{re.escape(keyword)}\s+([\d,]+)円?')
+        patterns.append(rf'{KEYWORD_BOUNDARY}{re.escape(keyword)}[　\s]+([\d,]+)円?')
 
     elif pattern_type == 'flexible':
         # より柔軟なパターン（改行やスペースを許容）
-        patterns.append(rf'{re.escape(keyword)}[　\s\n]+([\d,]+)')
+        patterns.append(rf'{KEYWORD_BOUNDARY}{re.escape(keyword)}[　\s\n]+([\d,]+)')
+
+    return patterns
+
+
+def extract_value(text: str, keyword: str, pattern_type: str = 'standard') -> Optional[int]:
+    """
+    テキストから特定項目の数値を抽出
+
+    Args:
+        text: 検索対象テキスト
+        keyword: 検索キーワード
+        pattern_type: パターンタイプ ('standard', 'with_unit', 'flexible')
+
+    Returns:
+        抽出した数値（整数）、見つからない場合はNone
+    """
+    patterns = _build_patterns(keyword, pattern_type)
 
     for pattern in patterns:
         match = re.search(pattern, text)
@@ -75,255 +111,633 @@ def extract_table_value(tables: List[List[List]], row_keyword: str, col_index: i
     return None
 
 
-def extract_balance_sheet(pdf_path: str) -> Dict[str, Any]:
+class StatementMatcher(NamedTuple):
     """
-    貸借対照表からデータ抽出
+    書類の全キーワードを1つの正規表現にまとめたマッチャー
+
+    Attributes:
+        pattern: 全キーワードの選択（長い順）+ 金額 のパターン（グループ1: キーワード, グループ2: 金額）
+                 キーワードを持つ項目が無い書類はNone
+        targets: キーワード → (グループ名, 項目名, 優先順位)。優先順位は項目内のキーワードの順番
+        items: (グループ名, 項目名) のスキーマ順のリスト（結果の並び順）
+    """
+    pattern: Optional[Pattern]
+    targets: Dict[str, Tuple[str, str, int]]
+    items: Tuple[Tuple[str, str], ...]
+
+
+@lru_cache(maxsize=None)
+def compile_matchers(statement_name: str) -> StatementMatcher:
+    """
+    スキーマから書類のキーワードマッチャーを構築（初回のみコンパイルしキャッシュ）
+
+    全項目のキーワードを長い順に並べた1つの選択パターンにまとめるため、
+    テキストを1回走査するだけで全項目を照合できます。同じ位置から始まる
+    キーワードは長い方が優先され（「工事未払金」は「未払金」より先に一致）、
+    キーワードの直前は行頭・空白・数値に限定するため、別の項目名の途中
+    （「税引前当期純利益」の中の「当期純利益」など）には一致しません。
 
     Args:
-        pdf_path: PDFファイルパス
+        statement_name: 書類の識別名（schema.Statement.name）
 
     Returns:
-        抽出データの辞書
+        StatementMatcher
+    """
+    statement = get_statement(statement_name)
+    targets: Dict[str, Tuple[str, str, int]] = {}
+    items = []
+
+    for section in statement.sections:
+        for item in section.items:
+            if not item.keywords:
+                continue
+            items.append((section.name, item.key))
+            for priority, keyword in enumerate(item.keywords):
+                # 同じキーワードが複数の項目にある場合はスキーマで先に定義した項目
+                targets.setdefault(keyword, (section.name, item.key, priority))
+
+    if not targets:
+        return StatementMatcher(None, targets, tuple(items))
+
+    alternation = '|'.join(re.escape(keyword) for keyword in sorted(targets, key=len, reverse=True))
+    separator = r'[　\s\n]+' if statement.pattern_type == 'flexible' else r'[　\s]+'
+    pattern = re.compile(rf'{KEYWORD_BOUNDARY}({alternation}){separator}([\d,]+)')
+
+    return StatementMatcher(pattern, targets, tuple(items))
+
+
+def match_statement_text(text: str, statement_name: str) -> Dict[str, Dict[str, int]]:
+    """
+    テキストに書類の全項目を照合（1回の走査）
+
+    同じ項目のキーワードが複数見つかった場合はスキーマで先に書かれたキーワードを優先し、
+    同じキーワードが複数回現れた場合は最初の値を使います。
+
+    Args:
+        text: 検索対象テキスト
+        statement_name: 書類の識別名（schema.Statement.name）
+
+    Returns:
+        グループ名 → {項目名: 数値} の辞書（見つかった項目のみ、スキーマ順）
+    """
+    matcher = compile_matchers(statement_name)
+    if matcher.pattern is None:
+        return {}
+    best: Dict[Tuple[str, str], Tuple[int, int]] = {}
+
+    for match in matcher.pattern.finditer(text):
+        section_name, key, priority = matcher.targets[match.group(1)]
+        current = best.get((section_name, key))
+        if current is not None and current[0] <= priority:
+            continue
+        try:
+            best[(section_name, key)] = (priority, int(match.group(2).replace(',', '')))
+        except ValueError:
+            continue
+
+    found: Dict[str, Dict[str, int]] = {}
+    for section_name, key in matcher.items:
+        if (section_name, key) in best:
+            found.setdefault(section_name, {})[key] = best[(section_name, key)][1]
+    return found
+
+
+# 表のセルの数値（△・▲・- は負数）
+_GRID_NUMBER = re.compile(r'^([△▲\-]?)([\d,]*\d)$')
+
+
+class GridSpec(NamedTuple):
+    """
+    表形式の書類（layout='grid'）で読み取るセルの定義
+
+    Attributes:
+        rows: 行見出し
+        columns: 列見出し
+        cells: (行見出し, 列見出し) → (グループ名, 項目名)
+    """
+    rows: Tuple[str, ...]
+    columns: Tuple[str, ...]
+    cells: Dict[Tuple[str, str], Tuple[str, str]]
+
+
+@lru_cache(maxsize=None)
+def compile_grid(statement_name: str) -> GridSpec:
+    """
+    スキーマの LineItem.grid から表のセル定義を構築（初回のみ構築しキャッシュ）
+    """
+    cells: Dict[Tuple[str, str], Tuple[str, str]] = {}
+    for section in get_statement(statement_name).sections:
+        for item in section.items:
+            if item.grid is not None:
+                cells.setdefault(item.grid, (section.name, item.key))
+
+    rows = tuple(dict.fromkeys(row for row, _ in cells))
+    columns = tuple(dict.fromkeys(column for _, column in cells))
+    return GridSpec(rows, columns, cells)
+
+
+def _grid_number(text: str) -> Optional[int]:
+    """
+    セルの文字列を数値に変換（数値でない場合はNone）
+    """
+    match = _GRID_NUMBER.match(text)
+    if match is None:
+        return None
+    value = int(match.group(2).replace(',', ''))
+    return -value if match.group(1) else value
+
+
+def _grid_label(text: str, labels: Tuple[str, ...]) -> Optional[str]:
+    """
+    セルの文字列に対応する見出し（空白を除いて一致、または末尾が一致する最も長い見出し）
+
+    「当期変動額 当期純利益」のように上位の見出しが前に付いたセルも対応します。
+    """
+    normalized = re.sub(r'\s+', '', text)
+    matched = [label for label in labels if normalized.endswith(label)]
+    return max(matched, key=len) if matched else None
+
+
+def _grid_lines(words: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """
+    単語を行ごとにまとめ、文字間に空白のある見出し（「資 本 金」）を1つのセルに結合
+
+    Returns:
+        上から順の行のリスト。各行は左から順のセル（text, x0, x1, top, bottom）
+    """
+    lines: List[List[Dict[str, Any]]] = []
+    for word in sorted(words, key=lambda w: (w['top'], w['x0'])):
+        height = word['bottom'] - word['top']
+        if lines and abs(lines[-1][0]['top'] - word['top']) <= height / 2:
+            lines[-1].append(word)
+        else:
+            lines.append([word])
+
+    merged_lines = []
+    for line in lines:
+        cells: List[Dict[str, Any]] = []
+        for word in sorted(line, key=lambda w: w['x0']):
+            previous = cells[-1] if cells else None
+            if (previous is not None
+                    and _grid_number(previous['text']) is None
+                    and _grid_number(word['text']) is None
+                    and word['x0'] - previous['x1'] <= word['bottom'] - word['top']):
+                previous['text'] += word['text']
+                previous['x1'] = word['x1']
+            else:
+                cells.append(dict(word))
+        merged_lines.append(cells)
+    return merged_lines
+
+
+def build_grid_index(words: List[Dict[str, Any]], spec: GridSpec) -> Dict[Tuple[str, str], int]:
+    """
+    ページの単語位置から (行見出し, 列見出し) → 数値 の索引を作成（1ページにつき1回）
+
+    列見出し（spec.columns のいずれか）を含む行を見出し行とし、その行の全セルを列とします。
+    各数値は横方向の位置が重なる（無い場合は中心が最も近い）列に割り当てるため、
+    スキーマに無い列（資本剰余金・純資産合計など）の数値を誤って読むことはありません。
+
+    Args:
+        words: ページの単語（PageContent.words）
+        spec: 表のセル定義
+
+    Returns:
+        (行見出し, 列見出し) → 数値 の辞書（spec に定義された見出しのみ）
+    """
+    lines = _grid_lines(words)
+
+    headers: List[Dict[str, Any]] = []
+    header_lines = set()
+    for number, line in enumerate(lines):
+        labels = [cell for cell in line if _grid_number(cell['text']) is None]
+        if any(_grid_label(cell['text'], spec.columns) for cell in labels):
+            headers.extend(labels)
+            header_lines.add(number)
+    if not headers:
+        return {}
+
+    def column_of(cell: Dict[str, Any]) -> Optional[str]:
+        overlapping = [h for h in headers if h['x0'] < cell['x1'] and cell['x0'] < h['x1']]
+        candidates = overlapping or headers
+        center = (cell['x0'] + cell['x1']) / 2
+        header = min(candidates, key=lambda h: abs((h['x0'] + h['x1']) / 2 - center))
+        return _grid_label(header['text'], spec.columns)
+
+    index: Dict[Tuple[str, str], int] = {}
+    for number, line in enumerate(lines):
+        if number in header_lines or _grid_number(line[0]['text']) is not None:
+            continue
+        row = _grid_label(line[0]['text'], spec.rows)
+        if row is None:
+            continue
+        for cell in line[1:]:
+            value = _grid_number(cell['text'])
+            if value is None:
+                continue
+            column = column_of(cell)
+            if column is not None:
+                index.setdefault((row, column), value)
+    return index
+
+
+def match_statement_grid(words: List[Dict[str, Any]], statement_name: str) -> Dict[str, Dict[str, int]]:
+    """
+    表形式の書類のページから LineItem.grid の位置の値を読み取る
+
+    Args:
+        words: ページの単語（PageContent.words）。OCRしたページは単語位置が無いため読み取れません
+        statement_name: 書類の識別名（schema.Statement.name）
+
+    Returns:
+        グループ名 → {項目名: 数値} の辞書（見つかった項目のみ）
+    """
+    spec = compile_grid(statement_name)
+    if not spec.cells or not words:
+        return {}
+
+    index = build_grid_index(words, spec)
+    found: Dict[str, Dict[str, int]] = {}
+    for position, (section_name, key) in spec.cells.items():
+        value = index.get(position)
+        if value is not None:
+            found.setdefault(section_name, {})[key] = value
+    return found
+
+
+# ページから保持する単語の属性（レイアウト解析結果全体は保持しない）
+_WORD_KEYS = page_cache.WORD_KEYS
+
+# ページキャッシュの既定値（page_cache.get_default_cache() を使う）
+_DEFAULT_CACHE = object()
+
+# 1つのPDFのページを並列に抽出するプロセス数（0または1の場合は1ページずつ順に抽出）
+PARALLEL_EXTRACT_WORKERS = int(os.getenv("PARALLEL_EXTRACT_WORKERS", "0"))
+# 並列に抽出する最小のページ数（これより少ない場合はプロセスの起動・PDFを開き直す時間の方が大きい）
+PARALLEL_EXTRACT_MIN_PAGES = int(os.getenv("PARALLEL_EXTRACT_MIN_PAGES", "4"))
+
+_extract_pool: Optional[ProcessPoolExecutor] = None
+
+# (ページ番号, テキスト, 単語のリスト, OCR用の画像（OCRしない場合はNone）)
+ExtractedPage = Tuple[int, str, List[Dict[str, Any]], Optional[bytes]]
+
+
+class PageContent(NamedTuple):
+    """
+    1ページ分の抽出結果（テキストと単語位置のみ）
+
+    Attributes:
+        index: ページ番号（0始まり）
+        text: ページのテキスト
+        words: 単語のリスト（text, x0, x1, top, bottom）。OCRしたページは空
+        ocr: テキストをOCRで読み取ったページか
+        cached: ページキャッシュから読み込んだページか
+    """
+    index: int
+    text: str
+    words: List[Dict[str, Any]]
+    ocr: bool = False
+    cached: bool = False
+
+
+def configure_parallel_extraction(workers: int) -> None:
+    """
+    ページを並列に抽出するプロセス数を変更（0または1で無効、作成済みのプロセスプールは終了）
+    """
+    global PARALLEL_EXTRACT_WORKERS
+    PARALLEL_EXTRACT_WORKERS = workers
+    shutdown_extract_pool()
+
+
+def shutdown_extract_pool() -> None:
+    """
+    ページ抽出用のプロセスプールを終了（次に並列抽出するときに作り直す）
+    """
+    global _extract_pool
+    if _extract_pool is not None:
+        _extract_pool.shutdown(wait=False, cancel_futures=True)
+        _extract_pool = None
+
+
+def _get_extract_pool() -> ProcessPoolExecutor:
+    """
+    ページ抽出用のプロセスプール（最初の並列抽出時に作成し、以降のPDFでも再利用）
+    """
+    global _extract_pool
+    if _extract_pool is None:
+        _extract_pool = ProcessPoolExecutor(max_workers=PARALLEL_EXTRACT_WORKERS)
+        print(f"ページ抽出プロセスプール作成: {PARALLEL_EXTRACT_WORKERS}プロセス")
+    return _extract_pool
+
+
+def _extract_page(page, use_ocr: bool,
+                  memory: Optional[PeakRSSTracker] = None) -> Tuple[str, List[Dict[str, Any]], Optional[bytes]]:
+    """
+    1ページのテキスト・単語（テキストが無くOCRする場合は画像も）を取り出し、レイアウト解析結果のキャッシュを破棄
+
+    Returns:
+        (テキスト, 単語のリスト, OCR用の画像（OCRしない場合はNone）)
+    """
+    image = None
+    try:
+        text = page.extract_text() or ''
+        words = [
+            {key: word[key] for key in _WORD_KEYS}
+            for word in page.extract_words()
+        ]
+        if use_ocr and not text.strip():
+            image = ocr.render_page(page)
+    finally:
+        if memory is not None:
+            memory.sample()
+        # レイアウト解析結果のキャッシュを破棄
+        page.flush_cache()
+    return text, words, image
+
+
+def _extract_page_range(pdf_path: str, page_numbers: List[int], use_ocr: bool) -> List[ExtractedPage]:
+    """
+    PDFを開き、指定したページを順に抽出（ワーカープロセスで実行）
+    """
+    with pdfplumber.open(pdf_path) as pdf:
+        return [(page_num, *_extract_page(pdf.pages[page_num], use_ocr)) for page_num in page_numbers]
+
+
+def _iter_parallel_pages(pdf_path: str, page_numbers: List[int], use_ocr: bool,
+                         memory: Optional[PeakRSSTracker] = None) -> Iterator[ExtractedPage]:
+    """
+    ページを連続する範囲に分けてプロセスプールで並列に抽出し、ページ番号順に返す
+
+    各ワーカーはPDFを開き直して担当範囲のページを抽出します。先頭の範囲から順に結果を待つため、
+    後続の範囲の抽出が終わる前に先頭のページを返せます。ワーカーが異常終了した場合は
+    残りの範囲をこのプロセスで順に抽出します。
     """
-    data = {
-        'assets': {},  # 資産の部
-        'liabilities': {},  # 負債の部
-        'equity': {}  # 純資産の部
-    }
+    workers = PARALLEL_EXTRACT_WORKERS
+    size = -(-len(page_numbers) // workers)
+    chunks = [page_numbers[start:start + size] for start in range(0, len(page_numbers), size)]
 
+    futures = []
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            # 貸借対照表は通常2-3ページ目
-            for page_num in range(min(len(pdf.pages), 5)):  # 最初の5ページをチェック
-                page = pdf.pages[page_num]
-                text = page.extract_text()
-
-                # ページに「貸借対照表」が含まれているか確認
-                if '貸借対照表' not in text:
+        try:
+            pool = _get_extract_pool()
+            futures = [pool.submit(_extract_page_range, pdf_path, chunk, use_ocr) for chunk in chunks]
+        except BrokenProcessPool:
+            _discard_broken_pool()
+
+        for index, chunk in enumerate(chunks):
+            extracted = None
+            if index < len(futures):
+                try:
+                    extracted = futures[index].result()
+                except BrokenProcessPool:
+                    _discard_broken_pool()
+                    del futures[index + 1:]
+            if extracted is None:
+                extracted = _extract_page_range(pdf_path, chunk, use_ocr)
+            if memory is not None:
+                memory.sample()
+            yield from extracted
+    finally:
+        # 途中で中断した場合は未着手の範囲を取り消す
+        for future in futures:
+            future.cancel()
+
+
+def _discard_broken_pool() -> None:
+    """
+    異常終了したプロセスプールを破棄（次の並列抽出で作り直す）
+    """
+    print("警告: ページ抽出のワーカープロセスが異常終了しました（残りのページは順に抽出します）")
+    shutdown_extract_pool()
+
+
+def iter_page_contents(pdf_path: str, max_pages: int = MAX_SCAN_PAGES,
+                       memory: Optional[PeakRSSTracker] = None,
+                       use_ocr: Optional[bool] = None,
+                       cache: Any = _DEFAULT_CACHE) -> Iterator[PageContent]:
+    """
+    PDFの先頭から1ページずつテキストと単語を取り出す
+
+    pdfplumberはページごとにレイアウト解析結果をキャッシュするため、
+    テキストと単語を取り出した直後にキャッシュを破棄し、
+    ページ数に比例してメモリが増えないようにしています。
+
+    テキストレイヤーの無いページは画像に変換し、連続するページをまとめて
+    OCRします（OCRが有効な場合のみ）。ページの順序は保たれます。
+
+    ページキャッシュが有効な場合、キャッシュ済みのページはPDFを解析せずに返し、
+    新たに抽出したページ（OCRしたページを除く）はキャッシュに保存します。
+    全ページがキャッシュ済みならPDFを開きません。
+
+    PARALLEL_EXTRACT_WORKERS が2以上で、抽出するページが PARALLEL_EXTRACT_MIN_PAGES 以上ある場合は
+    ページをプロセスプールで並列に抽出します。結果は常にページ番号順に返します。
+
+    Args:
+        pdf_path: PDFファイルパス
+        max_pages: 読み込む最大ページ数
+        memory: RSS計測器（指定した場合はページごとに計測）
+        use_ocr: OCRを使うか（Noneの場合は環境に応じて自動判定）
+        cache: ページキャッシュ（省略時は PAGE_CACHE_PATH の設定、Noneでキャッシュしない）
+
+    Yields:
+        PageContent
+    """
+    if use_ocr is None:
+        use_ocr = ocr.is_enabled()
+    ocr_cache = ocr.OCRCache() if use_ocr else None
+    if cache is _DEFAULT_CACHE:
+        cache = page_cache.get_default_cache()
+
+    # OCR待ちのページ（ページ番号, 画像）
+    scanned: List[Tuple[int, bytes]] = []
+    warned = False
+
+    def flush_scanned() -> Iterator[PageContent]:
+        if not scanned:
+            return
+        texts = ocr.ocr_images(scanned, ocr_cache)
+        for page_num, _ in scanned:
+            yield PageContent(page_num, texts.get(page_num, ''), [], True)
+        scanned.clear()
+
+    doc = page_cache.document_key(pdf_path) if cache is not None else None
+    page_count, cached_pages = cache.load(doc) if cache is not None else (None, {})
+    # 新たに抽出したページ（キャッシュに保存する）
+    extracted: Dict[int, page_cache.PageEntry] = {}
+
+    def reusable(entry: Optional[page_cache.PageEntry]) -> bool:
+        # テキストの無いページはOCRが有効ならPDFから読み直す
+        return entry is not None and not (use_ocr and not entry[0].strip())
+
+    with ExitStack() as stack:
+        pdf = None
+        if page_count is None:
+            pdf = stack.enter_context(pdfplumber.open(pdf_path))
+            page_count = len(pdf.pages)
+
+        try:
+            page_numbers = range(min(page_count, max_pages))
+            pending = [page_num for page_num in page_numbers if not reusable(cached_pages.get(page_num))]
+            parallel = None
+            if PARALLEL_EXTRACT_WORKERS > 1 and len(pending) >= PARALLEL_EXTRACT_MIN_PAGES:
+                parallel = _iter_parallel_pages(pdf_path, pending, use_ocr, memory)
+                stack.callback(parallel.close)
+
+            for page_num in page_numbers:
+                entry = cached_pages.get(page_num)
+                if reusable(entry):
+                    yield from flush_scanned()
+                    yield PageContent(page_num, entry[0], entry[1], cached=True)
                     continue
 
-                tables = page.extract_tables()
-
-                # 資産の部
-                assets_keywords = {
-                    '現金及び預金': ['現 金 及 び 預 金', '現金及び預金', '現金預金'],
-                    '売掛金': ['売掛金', '完成工事未収入金','売 掛 金'],
-                    '未成工事支出金': ['未成工事支出金'],
-                    '原材料': ['原材料', '原 材 料'],
-                    '立替金': ['立替金', '立 替 金'],
-                    '流動資産合計': ['流動資産合計', '流 動 資 産 合 計'],
-                    '建物': ['建物','建 物'],
-                    '構築物': ['構築物','構 築 物'],
-                    '建物・構築物': ['建物・構築物', '建物構築物', '建 物 ・ 構 築 物'],
-                    '機械装置': ['機械装置', '機械及び装置','機 械 装 置'],
-                    '車両運搬具': ['車両運搬具','車 両 運 搬 具 '],
-                    '機械・運搬具': ['機械・運搬具', '機械運搬具', '機 械 ・ 運 搬 具'],
-                    '工具器具・備品': ['工具器具・備品', '工具器具備品', '工 具 器 具 ・ 備 品','工 具 器 具 備 品'],
-                    '有形固定資産合計': ['有形固定資産合計', '有 形 固 定 資 産 合 計'],
-                    'ソフトウェア': ['ソフトウェア', 'ソフトウエア','ソ フ ト ウ エ ア '],
-                    '無形固定資産合計': ['無形固定資産合計', '無 形 固 定 資 産 合 計'],
-                    '出資金': ['出資金', '出 資 金'],
-                    '投資その他の資産合計': ['投資その他の資産合計', '投 資 そ の 他 の 資 産 合 計'],
-                    '固定資産合計': ['固定資産合計', '固 定 資 産 合 計'],
-                    '資産合計': ['資産合計', '資 産 合 計'],
-                }
+                if parallel is not None:
+                    _, text, words, image = next(parallel)
+                else:
+                    if pdf is None:
+                        pdf = stack.enter_context(pdfplumber.open(pdf_path))
+                    text, words, image = _extract_page(pdf.pages[page_num], use_ocr, memory)
 
-                for key, keywords in assets_keywords.items():
-                    for keyword in keywords:
-                        value = extract_value(text, keyword)
-                        if value is not None:
-                            data['assets'][key] = value
-                            break
-
-                # 負債の部
-                liabilities_keywords = {
-                    '工事未払金': ['工事未払金', '買掛金', '工 事 未 払 金'],
-                    '未払金': ['未払金', '未 払 金'],
-                    '未払法人税等': ['未払法人税等', '未払法人税', '未 払 法 人 税 等'],
-                    '未払消費税等': ['未払消費税等', '未払消費税', '未 払 消 費 税 等'],
-                    '未成工事受入金': ['未成工事受入金', '未 成 工 事 受 入 金'],
-                    '預り金': ['預り金', '預かり金', '預 り 金'],
-                    '流動負債合計': ['流動負債合計', '流 動 負 債 合 計'],
-                    '長期借入金': ['長期借入金', '長 期 借 入 金'],
-                    '役員等借入金': ['役員借入金', '役員等借入金', '役 員 等 借 入 金'],
-                    '固定負債合計': ['固定負債合計', '固 定 負 債 合 計'],
-                    '負債合計': ['負債合計', '負 債 合 計'],
-                }
+                if image is not None:
+                    scanned.append((page_num, image))
+                    continue
+
+                if not text.strip() and not warned:
+                    print("警告: テキストの無いページがあります（スキャンしたPDFはOCRを有効にしてください）")
+                    warned = True
+
+                extracted[page_num] = (text, words)
+                yield from flush_scanned()
+                yield PageContent(page_num, text, words)
+
+            yield from flush_scanned()
+        finally:
+            if cache is not None and (extracted or not cached_pages):
+                cache.store(doc, page_count, extracted)
 
-                for key, keywords in liabilities_keywords.items():
-                    for keyword in keywords:
-                        value = extract_value(text, keyword)
-                        if value is not None:
-                            data['liabilities'][key] = value
-                            break
-
-                # 純資産の部
-                equity_keywords = {
-                    '資本金': ['資本金', '資 本 金'],
-                    '繰越利益剰余金': ['繰越利益剰余金', '利益剰余金', '繰 越 利 益 剰 余 金'],
-                    '利益剰余金合計': ['利益剰余金合計', '利 益 剰 余 金 合 計'],
-                    '株主資本合計': ['株主資本合計', '株 主 資 本 合 計'],
-                    '純資産合計': ['純資産合計', '純 資 産 合 計'],
-                    '負債・純資産合計': ['負債・純資産合計', '負債純資産合計', '負 債 ・ 純 資 産 合 計'],
-                }
 
-                for key, keywords in equity_keywords.items():
-                    for keyword in keywords:
-                        value = extract_value(text, keyword)
-                        if value is not None:
-                            data['equity'][key] = value
-                            break
+def read_pages(pdf_path: str, max_pages: int = MAX_SCAN_PAGES,
+               memory: Optional[PeakRSSTracker] = None) -> List[PageContent]:
+    """
+    PDFのページを読み込む（読み込みに失敗した場合はそれまでのページを返す）
+
+    Args:
+        pdf_path: PDFファイルパス
+        max_pages: 読み込む最大ページ数
+        memory: RSS計測器
 
+    Returns:
+        PageContentのリスト
+    """
+    pages: List[PageContent] = []
+    try:
+        for page in iter_page_contents(pdf_path, max_pages, memory):
+            pages.append(page)
     except Exception as e:
-        print(f"貸借対照表の抽出エラー: {str(e)}")
+        print(f"PDF読み込みエラー: {str(e)}")
+    return pages
 
-    return data
 
+def _is_statement_page(page: PageContent, statement: Statement) -> bool:
+    """
+    ページが書類の検索対象か判定（検索ページ数の範囲内で、書類名を含む）
+    """
+    return page.index < statement.max_pages and any(marker in page.text for marker in statement.markers)
 
-def extract_income_statement(pdf_path: str) -> Dict[str, Any]:
+
+def _match_page(page: PageContent, statement: Statement) -> Dict[str, Dict[str, int]]:
     """
-    損益計算書からデータ抽出
+    1ページのテキスト（表形式の書類は単語位置も）に書類の全項目を照合
 
     Args:
-        pdf_path: PDFファイルパス
+        page: 読み込み済みのページ
+        statement: 抽出対象の書類定義
 
     Returns:
-        抽出データの辞書
+        グループ名 → {項目名: 数値} の辞書（見つかった項目のみ）
     """
-    data = {
-        'revenue': {},  # 売上
-        'cost': {},  # 原価
-        'expenses': {},  # 販売費及び一般管理費
-        'non_operating': {}  # 営業外損益
-    }
+    found = match_statement_text(page.text, statement.name)
+    if statement.layout == 'grid':
+        for section_name, values in match_statement_grid(page.words, statement.name).items():
+            found.setdefault(section_name, {}).update(values)
+    return found
 
-    try:
-        with pdfplumber.open(pdf_path) as pdf:
-            for page_num in range(min(len(pdf.pages), 8)):
-                page = pdf.pages[page_num]
-                text = page.extract_text()
 
-                # ページに「損益計算書」が含まれているか確認
-                if '損益計算書' not in text:
-                    continue
+def _to_categories(statement: Statement, grouped: Dict[str, Dict[str, int]]) -> Dict[str, Dict[str, int]]:
+    """
+    グループ名ごとの抽出結果を parse_pdf の出力カテゴリごとにまとめる
+    """
+    result: Dict[str, Dict[str, int]] = {}
+    for section in statement.sections:
+        if section.name in grouped:
+            result.setdefault(section.category, {}).update(grouped[section.name])
+    return result
 
-                # 売上・原価
-                revenue_keywords = {
-                    '完成工事高': ['完成工事高', '売上高', '完 成 工 事 高'],
-                    '完成工事原価': ['完成工事原価', '売上原価', '完 成 工 事 原 価'],
-                    '完成工事総利益金額': ['完成工事総利益金額', '完成工事総利益', '完 成 工 事 総 利 益 金 額'],
-                }
 
-                for key, keywords in revenue_keywords.items():
-                    for keyword in keywords:
-                        value = extract_value(text, keyword)
-                        if value is not None:
-                            data['revenue'][key] = value
-                            break
-
-                # 販売費及び一般管理費
-                expense_keywords = {
-                    '役員報酬': ['役員報酬', '役 員 報 酬'],
-                    '給与手当': ['給与手当', '従業員給料手当', '給 与 手 当'],
-                    '雑給': ['雑給', '雑 給'],
-                    '賞与': ['賞与', '賞 与'],                    
-                    '法定福利費': ['法定福利費', '法 定 福 利 費'],
-                    '外注費': ['外注費', '外 注 費'],
-                    '旅費交通費': ['旅費交通費', '旅 費 交 通 費'],
-                    '通信費': ['通信費', '通 信 費'],
-                    '交際費': ['交際費', '交 際 費'],
-                    '会議費': ['会議費', '会 議 費'],
-                    '減価償却費': ['減価償却費', '減 価 償 却 費'],
-                    '賃借料': ['賃借料','賃 借 料'],
-                    'リース料': ['リース料', 'リ ー ス 料'],
-                    '保険料': ['保険料', '保 険 料'],
-                    '水道光熱費': ['水道光熱費', '水 道 光 熱 費'],
-                    '消耗品費': ['消耗品費', '消 耗 品 費'],
-                    '租税公課': ['租税公課', '租 税 公 課'],
-                    '事務用品費': ['事務用品費等', '事務用品費', '事 務 用 品 費'],
-                    '広告宣伝費': ['広告宣伝費', '広 告 宣 伝 費'],
-                    '支払手数料': ['支払手数料', '支 払 手 数 料'],
-                    '研修諸会費': ['研修諸会費', '研 修 諸 会 費'],
-                    '新聞図書費': ['新聞図書費', '新 聞 図 書 費'],
-                    'ソフト費': ['ソフト費', 'ソ フ ト 費'],
-                    '雑費': ['雑費', '雑 費'],
-                    '営業損失金額': ['営業損失金額', '営業損失', '営 業 損 失 金 額']
-                }
+def _extract_statement(pages: List[PageContent], statement: Statement) -> Dict[str, Dict[str, int]]:
+    """
+    スキーマ定義に従って1つの書類からデータ抽出
 
-                for key, keywords in expense_keywords.items():
-                    for keyword in keywords:
-                        value = extract_value(text, keyword)
-                        if value is not None:
-                            data['expenses'][key] = value
-                            break
-
-                # 営業外損益
-                non_operating_keywords = {
-                    '受取利息': ['受取利息','受 取 利 息'],
-                    '受取配当金': ['受取配当金','受 取 配 当 金'],
-                    '雑収入': ['雑収入', 'その他営業外収益', '雑 収 入'],
-                    '営業外収益合計': ['営業外収益合計', '営 業 外 収 益 合 計'],
-                    '支払利息': ['支払利息', '支 払 利 息'],
-                    '経常利益金額': ['経常利益金額', '経常利益', '経 常 利 益 金 額'],
-                    '税引前当期純利益': ['税引前当期純利益', '税 引 前 当 期 純 利 益'],
-                    '法人税・住民税・事業税': ['法人税・住民税・事業税', '法人税、住民税及び事業税', '法 人 税 ・ 住 民 税 ・ 事 業 税'],
-                    '当期純利益': ['当期純利益', '当 期 純 利 益'],
-                }
+    Args:
+        pages: 読み込み済みのページ
+        statement: 抽出対象の書類定義
+
+    Returns:
+        グループ名 → {項目名: 数値} の辞書
+    """
+    data = {section.name: {} for section in statement.sections}
 
-                for key, keywords in non_operating_keywords.items():
-                    for keyword in keywords:
-                        value = extract_value(text, keyword)
-                        if value is not None:
-                            data['non_operating'][key] = value
-                            break
+    try:
+        for page in pages:
+            if page.index >= statement.max_pages:
+                break
+            if not _is_statement_page(page, statement):
+                continue
+            for section_name, values in _match_page(page, statement).items():
+                data[section_name].update(values)
 
     except Exception as e:
-        print(f"損益計算書の抽出エラー: {str(e)}")
+        print(f"{statement.title}の抽出エラー: {str(e)}")
 
     return data
 
 
-def extract_cost_report(pdf_path: str) -> Dict[str, Any]:
+def extract_balance_sheet(pdf_path: str) -> Dict[str, Any]:
     """
-    完成工事原価報告書からデータ抽出
+    貸借対照表からデータ抽出
 
     Args:
         pdf_path: PDFファイルパス
 
     Returns:
-        抽出データの辞書
+        抽出データの辞書（'assets', 'liabilities', 'equity'）
     """
-    data = {}
+    return _extract_statement(read_pages(pdf_path, BALANCE_SHEET.max_pages), BALANCE_SHEET)
 
-    try:
-        with pdfplumber.open(pdf_path) as pdf:
-            for page_num in range(min(len(pdf.pages), 8)):
-                page = pdf.pages[page_num]
-                text = page.extract_text()
 
-                # ページに「完成工事原価報告書」が含まれているか確認
-                if '完成工事原価報告書' not in text and '原価報告書' not in text:
-                    continue
+def extract_income_statement(pdf_path: str) -> Dict[str, Any]:
+    """
+    損益計算書からデータ抽出
 
-                keywords = {
-                    '材料費': ['材料費', '材 料 費'],
-                    '労務費': ['労務費', '労 務 費'],
-                    '外注加工費': ['外注加工費', '外注費', '外 注 加 工 費'],
-                    '経費': ['経費', '経 費'],
-                    '完成工事原価': ['完成工事原価', '完 成 工 事 原 価'],
-                }
+    Args:
+        pdf_path: PDFファイルパス
 
-                for key, keyword_list in keywords.items():
-                    for keyword in keyword_list:
-                        value = extract_value(text, keyword)
-                        if value is not None:
-                            data[key] = value
-                            break
+    Returns:
+        抽出データの辞書（'revenue', 'expenses', 'non_operating'）
+    """
+    return _extract_statement(read_pages(pdf_path, INCOME_STATEMENT.max_pages), INCOME_STATEMENT)
 
-    except Exception as e:
-        print(f"完成工事原価報告書の抽出エラー: {str(e)}")
 
-    return data
+def extract_cost_report(pdf_path: str) -> Dict[str, Any]:
+    """
+    完成工事原価報告書からデータ抽出
+
+    Args:
+        pdf_path: PDFファイルパス
+
+    Returns:
+        抽出データの辞書
+    """
+    return _extract_statement(read_pages(pdf_path, COST_REPORT.max_pages), COST_REPORT)['cost']
 
 
 def extract_equity_statement(pdf_path: str) -> Dict[str, Any]:
@@ -336,81 +750,220 @@ def extract_equity_statement(pdf_path: str) -> Dict[str, Any]:
     Returns:
         抽出データの辞書
     """
-    data = {}
+    return _extract_statement(read_pages(pdf_path, EQUITY_STATEMENT.max_pages), EQUITY_STATEMENT)['equity_change']
 
-    try:
-        with pdfplumber.open(pdf_path) as pdf:
-            for page_num in range(min(len(pdf.pages), 10)):
-                page = pdf.pages[page_num]
-                text = page.extract_text()
 
-                # ページに「株主資本等変動計算書」が含まれているか確認
-                if '株主資本等変動計算書' not in text and '資本等変動計算書' not in text:
-                    continue
+def iter_page_events(pages: Iterable[PageContent]) -> Iterator[Dict[str, Any]]:
+    """
+    ページを1つずつ照合し、進捗をイベントとして順に返す
+
+    書類ごとの検索ページ数を読み終えた時点でその書類の抽出結果を返すため、
+    後続ページの解析を待たずに貸借対照表などの結果を利用できます。
+
+    イベント（'event' キーで種類を判別）:
+        page: ページを読み込んだ（'page': ページ番号, 'ocr': OCRしたか, 'statements': 書類名を含む書類）
+        items: ページから項目を抽出した（'statement', 'page', 'items': カテゴリ → {項目名: 数値}）
+        statement: 書類の抽出が完了した（'statement', 'title', 'items'）
+        parsed: 全書類の抽出が完了した（'pages': 読み込みページ数, 'ocr_pages': OCRしたページ数,
+                'cached_pages': ページキャッシュから読み込んだページ数,
+                'timings': {'extract': ページの読み込み秒数, 'match': 項目の照合秒数},
+                'data': 抽出結果の FinancialStatement）
+
+    Args:
+        pages: 先頭から順に並んだページ（iter_page_contents または load_cached_pages の結果）
 
-                keywords = {
-                    '当期首残高_資本金': ['当期首残高.*資本金'],
-                    '当期首残高_繰越利益剰余金': ['当期首残高.*繰越利益剰余金'],
-                    '当期純利益': ['当期純利益'],
-                    '当期末残高_資本金': ['当期末残高.*資本金'],
-                    '当期末残高_繰越利益剰余金': ['当期末残高.*繰越利益剰余金'],
+    Yields:
+        イベントの辞書
+    """
+    result = FinancialStatement()
+    pending = list(STATEMENTS)
+    pages_read = 0
+    ocr_pages = 0
+    cached_pages = 0
+    # ページの読み込み（pdfplumberのレイアウト解析・OCR）と照合の処理時間
+    timings = {'extract': 0.0, 'match': 0.0}
+
+    def completed(statement: Statement) -> Dict[str, Any]:
+        categories = dict.fromkeys(section.category for section in statement.sections)
+        return {
+            'event': 'statement',
+            'statement': statement.name,
+            'title': statement.title,
+            'items': {category: result.category(category) for category in categories},
+        }
+
+    try:
+        iterator = iter(pages)
+        while True:
+            started = time.perf_counter()
+            page = next(iterator, None)
+            timings['extract'] += time.perf_counter() - started
+            if page is None:
+                break
+
+            pages_read += 1
+            ocr_pages += page.ocr
+            cached_pages += page.cached
+            started = time.perf_counter()
+            matched = [statement for statement in STATEMENTS if _is_statement_page(page, statement)]
+            timings['match'] += time.perf_counter() - started
+            yield {
+                'event': 'page',
+                'page': page.index + 1,
+                'ocr': page.ocr,
+                'statements': [statement.name for statement in matched],
+            }
+
+            for statement in matched:
+                started = time.perf_counter()
+                try:
+                    found = _match_page(page, statement)
+                except Exception as e:
+                    print(f"{statement.title}の抽出エラー: {str(e)}")
+                    continue
+                finally:
+                    timings['match'] += time.perf_counter() - started
+                if not found:
+                    continue
+                items = _to_categories(statement, found)
+                for category, values in items.items():
+                    result.update(category, values)
+                yield {
+                    'event': 'items',
+                    'statement': statement.name,
+                    'page': page.index + 1,
+                    'items': items,
                 }
 
-                for key, keyword_list in keywords.items():
-                    for keyword in keyword_list:
-                        value = extract_value(text, keyword, pattern_type='flexible')
-                        if value is not None:
-                            data[key] = value
-                            break
+            # 検索ページ数を読み終えた書類は確定
+            for statement in [s for s in pending if page.index + 1 >= s.max_pages]:
+                pending.remove(statement)
+                yield completed(statement)
 
     except Exception as e:
-        print(f"株主資本等変動計算書の抽出エラー: {str(e)}")
+        print(f"PDF読み込みエラー: {str(e)}")
 
-    return data
+    # ページ数が検索ページ数より少ない場合の残り
+    for statement in pending:
+        yield completed(statement)
 
+    yield {'event': 'parsed', 'pages': pages_read, 'ocr_pages': ocr_pages, 'cached_pages': cached_pages,
+           'timings': timings, 'data': result}
 
-def parse_pdf(pdf_path: str) -> Dict[str, Any]:
+
+def iter_parse_events(pdf_path: str, memory: Optional[PeakRSSTracker] = None) -> Iterator[Dict[str, Any]]:
     """
-    PDFから全データを抽出するメイン関数
+    PDFを1ページずつ解析し、進捗をイベントとして順に返す（イベントは iter_page_events を参照）
+
+    Args:
+        pdf_path: PDFファイルパス
+        memory: RSS計測器（指定した場合はページごとに計測）
+
+    Yields:
+        イベントの辞書
+    """
+    return iter_page_events(iter_page_contents(pdf_path, MAX_SCAN_PAGES, memory))
+
+
+def load_cached_pages(cache: page_cache.PageCache, doc: str,
+                      max_pages: int = MAX_SCAN_PAGES) -> Optional[List[PageContent]]:
+    """
+    ページキャッシュから検索対象のページを読み込む（PDFは開かない）
+
+    Args:
+        cache: ページキャッシュ
+        doc: page_cache.document_key() の値
+        max_pages: 読み込む最大ページ数
+
+    Returns:
+        PageContentのリスト。検索対象のページが揃っていない場合（OCRしたページがある、
+        検索ページ数を増やした場合など）は None
+    """
+    page_count, entries = cache.load(doc)
+    if page_count is None:
+        return None
+    indexes = range(min(page_count, max_pages))
+    if any(index not in entries for index in indexes):
+        return None
+    return [PageContent(index, entries[index][0], entries[index][1], cached=True) for index in indexes]
+
+
+def parse_pages(pages: Iterable[PageContent]) -> FinancialStatement:
+    """
+    読み込み済みのページから全データを抽出（parse_pdf_statement と同じ形式）
+    """
+    result = FinancialStatement()
+    for event in iter_page_events(pages):
+        if event['event'] == 'parsed':
+            result = event['data']
+    return result
+
+
+def parse_pdf(pdf_path: str, stats: Optional[Dict[str, Any]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    parse_pdf_statement の結果を辞書で返す互換用のラッパー
+
+    以前の辞書を返すAPIを使う外部のスクリプト向けです。このリポジトリ内の処理
+    （API・CLI・精度計測）は、辞書に変換しない parse_pdf_statement を使います。
+
+    Args:
+        pdf_path: PDFファイルパス
+        stats: parse_pdf_statement を参照
+
+    Returns:
+        抽出した全データ（カテゴリ → {項目名: 数値} の辞書、全カテゴリを含む）
+    """
+    return parse_pdf_statement(pdf_path, stats).to_dict()
+
+
+def parse_pdf_statement(pdf_path: str, stats: Optional[Dict[str, Any]] = None) -> FinancialStatement:
+    """
+    PDFから全データを抽出（項目番号順の FinancialStatement で返す）
+
+    PDFは1回だけ開き、各ページのテキストを全書類の抽出で共有します。
 
     Args:
         pdf_path: PDFファイルパス
+        stats: 指定した場合、読み込んだページ数（うちOCR・キャッシュ済み）、ページの読み込みと照合の
+               処理時間（'timings'）、メモリ使用量（RSS）を書き込む
 
     Returns:
-        抽出した全データを含む辞書
+        抽出した全データ（FinancialStatement）
     """
     print(f"PDF解析開始: {pdf_path}")
 
-    result = {
-        'balance_sheet_assets': {},
-        'balance_sheet_liabilities': {},
-        'balance_sheet_equity': {},
-        'income_statement': {},
-        'non_operating': {},
-        'cost_report': {},
-        'equity_change': {}
-    }
-
-    # 貸借対照表
-    balance_sheet_data = extract_balance_sheet(pdf_path)
-    result['balance_sheet_assets'] = balance_sheet_data.get('assets', {})
-    result['balance_sheet_liabilities'] = balance_sheet_data.get('liabilities', {})
-    result['balance_sheet_equity'] = balance_sheet_data.get('equity', {})
-
-    # 損益計算書
-    income_data = extract_income_statement(pdf_path)
-    result['income_statement'] = {**income_data.get('revenue', {}), **income_data.get('expenses', {})}
-    result['non_operating'] = income_data.get('non_operating', {})
-
-    # 完成工事原価報告書
-    result['cost_report'] = extract_cost_report(pdf_path)
-
-    # 株主資本等変動計算書
-    result['equity_change'] = extract_equity_statement(pdf_path)
+    memory = PeakRSSTracker()
+    result = FinancialStatement()
+    pages = 0
+    ocr_pages = 0
+    cached_pages = 0
+    timings: Dict[str, float] = {}
+    for event in iter_parse_events(pdf_path, memory):
+        if event['event'] == 'parsed':
+            result = event['data']
+            pages = event['pages']
+            ocr_pages = event['ocr_pages']
+            cached_pages = event['cached_pages']
+            timings = event['timings']
+
+    memory.sample()
+    memory_stats = memory.as_dict()
+    if stats is not None:
+        stats['pages'] = pages
+        stats['ocr_pages'] = ocr_pages
+        stats['cached_pages'] = cached_pages
+        stats['timings'] = timings
+        stats.update(memory_stats)
 
     print(f"✓ PDF解析完了")
-    print(f"  抽出データ数: 資産 {len(result['balance_sheet_assets'])}件, "
-          f"負債 {len(result['balance_sheet_liabilities'])}件, "
-          f"損益 {len(result['income_statement'])}件")
+    print(f"  抽出データ数: 資産 {result.count('balance_sheet_assets')}件, "
+          f"負債 {result.count('balance_sheet_liabilities')}件, "
+          f"損益 {result.count('income_statement')}件")
+    if ocr_pages:
+        print(f"  OCRしたページ数: {ocr_pages}")
+    if cached_pages:
+        print(f"  キャッシュから読み込んだページ数: {cached_pages}")
+    print(f"  読み込みページ数: {pages}, ピークRSS: {memory_stats['peak_rss_mb']}MB "
+          f"(+{memory_stats['peak_increase_mb']}MB)")
 
     return result
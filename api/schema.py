@@ -0,0 +1,308 @@
+"""
+財務諸表スキーマ定義モジュール
+抽出キーワードとExcel書き込み先セルを1か所で宣言します
+
+pdf_parser（キーワードマッチャー）と excel_writer（書き込みプラン）は
+どちらもこのスキーマから構築されます。項目を追加する場合は
+STATEMENTS に LineItem を1行追加するだけで、抽出と書き込みの両方に反映されます。
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class LineItem:
+    """
+    財務諸表の1項目
+
+    Attributes:
+        key: 項目名（parse_pdfの出力キー）
+        keywords: PDF内で検索するキーワード（優先順）。空の場合は抽出対象外
+        cell: 書き込み先 (シート名, セル位置)。Noneの場合は書き込み対象外
+        aliases: 同一項目として書き込みに受け付ける別名（旧キー名など）
+        grid: 表形式の書類（layout='grid'）で値を読み取る (行見出し, 列見出し)
+    """
+    key: str
+    keywords: Tuple[str, ...] = ()
+    cell: Optional[Tuple[str, str]] = None
+    aliases: Tuple[str, ...] = ()
+    grid: Optional[Tuple[str, str]] = None
+
+
+@dataclass(frozen=True)
+class Section:
+    """
+    項目グループ
+
+    Attributes:
+        name: 抽出関数内のグループ名（'assets', 'revenue' など）
+        category: parse_pdfの出力キー（'balance_sheet_assets' など）
+        label: ログ出力用のカテゴリ名
+        items: 項目のタプル
+    """
+    name: str
+    category: str
+    label: str
+    items: Tuple[LineItem, ...]
+
+
+@dataclass(frozen=True)
+class Statement:
+    """
+    財務諸表（PDF内の1書類）
+
+    Attributes:
+        name: 書類の識別名
+        title: 書類名（ログ用）
+        markers: ページ判定用キーワード（いずれかを含むページを対象とする）
+        max_pages: 先頭から検索する最大ページ数
+        pattern_type: extract_valueのパターンタイプ
+        sections: 項目グループのタプル
+        layout: 'text'（「項目名 金額」の行をキーワードで照合）/ 'grid'（行見出し×列見出しの表から LineItem.grid の位置を読み取る）
+    """
+    name: str
+    title: str
+    markers: Tuple[str, ...]
+    max_pages: int
+    sections: Tuple[Section, ...]
+    pattern_type: str = 'standard'
+    layout: str = 'text'
+
+
+# シート名
+SHEET_15_1 = '１５ (１)'
+SHEET_15_2 = '１５（２）'
+SHEET_15_3 = '１５（３）'
+SHEET_16_4 = '１６（４）'
+SHEET_16_5 = '１６（５）'
+SHEET_17_6 = '１７（６）'
+
+
+# 貸借対照表
+BALANCE_SHEET = Statement(
+    name='balance_sheet',
+    title='貸借対照表',
+    markers=('貸借対照表',),
+    max_pages=5,
+    sections=(
+        # 資産の部
+        Section('assets', 'balance_sheet_assets', '資産の部', (
+            LineItem('現金及び預金', ('現 金 及 び 預 金', '現金及び預金', '現金預金'), (SHEET_15_1, 'AE12')),
+            LineItem('売掛金', ('売掛金', '完成工事未収入金', '売 掛 金'), (SHEET_15_1, 'AE14')),
+            LineItem('未成工事支出金', ('未成工事支出金',), (SHEET_15_1, 'AE16')),
+            LineItem('原材料', ('原材料', '原 材 料'), (SHEET_15_1, 'AE17')),
+            LineItem('立替金', ('立替金', '立 替 金'), (SHEET_15_1, 'AE20')),
+            LineItem('流動資産合計', ('流動資産合計', '流 動 資 産 合 計'), (SHEET_15_1, 'AG22')),
+            LineItem('建物', ('建物', '建 物'), (SHEET_15_1, 'T26')),
+            LineItem('構築物', ('構築物', '構 築 物'), (SHEET_15_1, 'AD26')),
+            LineItem('建物・構築物', ('建物・構築物', '建物構築物', '建 物 ・ 構 築 物'), (SHEET_15_1, 'T28')),
+            LineItem('機械装置', ('機械装置', '機械及び装置', '機 械 装 置'), (SHEET_15_1, 'T28')),
+            LineItem('車両運搬具', ('車両運搬具', '車 両 運 搬 具'), (SHEET_15_1, 'AD28')),
+            LineItem('機械・運搬具', ('機械・運搬具', '機械運搬具', '機 械 ・ 運 搬 具'), (SHEET_15_1, 'T30')),
+            LineItem('工具器具・備品', ('工具器具・備品', '工具器具備品', '工 具 器 具 ・ 備 品', '工 具 器 具 備 品'), (SHEET_15_1, 'T32')),
+            LineItem('有形固定資産合計', ('有形固定資産合計', '有 形 固 定 資 産 合 計'), (SHEET_15_1, 'AE38')),
+            LineItem('ソフトウェア', ('ソフトウェア', 'ソフトウエア', 'ソ フ ト ウ エ ア'), (SHEET_15_1, 'AE45')),
+            LineItem('無形固定資産合計', ('無形固定資産合計', '無 形 固 定 資 産 合 計'), (SHEET_15_1, 'AE46')),
+            LineItem('出資金', ('出資金', '出 資 金'), (SHEET_15_2, 'AR8')),
+            LineItem('投資その他の資産合計', ('投資その他の資産合計', '投 資 そ の 他 の 資 産 合 計'), (SHEET_15_2, 'AR10')),
+            LineItem('固定資産合計', ('固定資産合計', '固 定 資 産 合 計'), (SHEET_15_2, 'BE11')),
+            LineItem('資産合計', ('資産合計', '資 産 合 計'), (SHEET_15_2, 'BE19')),
+        )),
+        # 負債の部
+        Section('liabilities', 'balance_sheet_liabilities', '負債の部', (
+            LineItem('工事未払金', ('工事未払金', '買掛金', '工 事 未 払 金'), (SHEET_15_2, 'AR24')),
+            LineItem('未払金', ('未払金', '未 払 金'), (SHEET_15_2, 'AR27')),
+            LineItem('未払法人税等', ('未払法人税等', '未払法人税', '未 払 法 人 税 等'), (SHEET_15_2, 'AR29')),
+            LineItem('未払消費税等', ('未払消費税等', '未払消費税', '未 払 消 費 税 等'), (SHEET_15_2, 'AS30')),
+            LineItem('未成工事受入金', ('未成工事受入金', '未 成 工 事 受 入 金'), (SHEET_15_2, 'AR30')),
+            LineItem('預り金', ('預り金', '預かり金', '預 り 金'), (SHEET_15_2, 'AR32')),
+            LineItem('流動負債合計', ('流動負債合計', '流 動 負 債 合 計'), (SHEET_15_2, 'BE35')),
+            LineItem('長期借入金', ('長期借入金', '長 期 借 入 金'), (SHEET_15_2, 'AR38')),
+            LineItem('役員等借入金', ('役員借入金', '役員等借入金', '役 員 等 借 入 金'), (SHEET_15_2, 'AR43')),
+            LineItem('固定負債合計', ('固定負債合計', '固 定 負 債 合 計'), (SHEET_15_2, 'BE44')),
+            LineItem('負債合計', ('負債合計', '負 債 合 計'), (SHEET_15_2, 'BE45')),
+        )),
+        # 純資産の部
+        Section('equity', 'balance_sheet_equity', '純資産の部', (
+            LineItem('資本金', ('資本金', '資 本 金'), (SHEET_15_3, 'AW4')),
+            LineItem('繰越利益剰余金', ('繰越利益剰余金', '利益剰余金', '繰 越 利 益 剰 余 金'), (SHEET_15_3, 'AM15')),
+            LineItem('利益剰余金合計', ('利益剰余金合計', '利 益 剰 余 金 合 計'), (SHEET_15_3, 'AY16')),
+            LineItem('株主資本合計', ('株主資本合計', '株 主 資 本 合 計'), (SHEET_15_3, 'BK19')),
+            LineItem('純資産合計', ('純資産合計', '純 資 産 合 計'), (SHEET_15_3, 'BK26')),
+            LineItem('負債・純資産合計', ('負債・純資産合計', '負債純資産合計', '負 債 ・ 純 資 産 合 計'), (SHEET_15_3, 'BI28')),
+        )),
+    ),
+)
+
+# 損益計算書
+INCOME_STATEMENT = Statement(
+    name='income_statement',
+    title='損益計算書',
+    markers=('損益計算書',),
+    max_pages=8,
+    sections=(
+        # 売上・原価
+        Section('revenue', 'income_statement', '損益計算書', (
+            LineItem('完成工事高', ('完成工事高', '売上高', '完 成 工 事 高'), (SHEET_16_4, 'S9')),
+            LineItem('完成工事原価', ('完成工事原価', '売上原価', '完 成 工 事 原 価'), (SHEET_16_4, 'S12')),
+            LineItem('完成工事総利益金額', ('完成工事総利益金額', '完成工事総利益', '完 成 工 事 総 利 益 金 額'), (SHEET_16_4, 'S15')),
+        )),
+        # 販売費及び一般管理費
+        Section('expenses', 'income_statement', '損益計算書', (
+            LineItem('役員報酬', ('役員報酬', '役 員 報 酬'), (SHEET_16_4, 'S18')),
+            LineItem('給与手当', ('給与手当', '従業員給料手当', '給 与 手 当'), (SHEET_16_4, 'S19'), aliases=('給与手当等',)),
+            LineItem('雑給', ('雑給', '雑 給')),
+            LineItem('賞与', ('賞与', '賞 与')),
+            LineItem('法定福利費', ('法定福利費', '法 定 福 利 費'), (SHEET_16_4, 'S21')),
+            LineItem('外注費', ('外注費', '外 注 費'), (SHEET_16_4, 'S32')),
+            LineItem('旅費交通費', ('旅費交通費', '旅 費 交 通 費'), (SHEET_16_4, 'S25')),
+            LineItem('通信費', ('通信費', '通 信 費'), (SHEET_16_4, 'S25')),
+            LineItem('通信交通費', (), (SHEET_16_4, 'S25')),
+            LineItem('交際費', ('交際費', '交 際 費'), (SHEET_16_4, 'S31')),
+            LineItem('会議費', ('会議費', '会 議 費'), (SHEET_16_4, 'S35')),
+            LineItem('減価償却費', ('減価償却費', '減 価 償 却 費'), (SHEET_16_4, 'S34')),
+            LineItem('賃借料', ('賃借料', '賃 借 料'), (SHEET_16_4, 'S33')),
+            LineItem('地代家賃', (), (SHEET_16_4, 'S33')),
+            LineItem('リース料', ('リース料', 'リ ー ス 料'), (SHEET_16_4, 'S27')),
+            LineItem('保険料', ('保険料', '保 険 料'), (SHEET_16_4, 'S37')),
+            LineItem('水道光熱費', ('水道光熱費', '水 道 光 熱 費'), (SHEET_16_4, 'S26'), aliases=('動力用水光熱費',)),
+            LineItem('消耗品費', ('消耗品費', '消 耗 品 費')),
+            LineItem('租税公課', ('租税公課', '租 税 公 課'), (SHEET_16_4, 'S36')),
+            LineItem('事務用品費', ('事務用品費等', '事務用品費', '事 務 用 品 費'), (SHEET_16_4, 'S24'), aliases=('事務用品費等',)),
+            LineItem('広告宣伝費', ('広告宣伝費', '広 告 宣 伝 費'), (SHEET_16_4, 'S28')),
+            LineItem('支払手数料', ('支払手数料', '支 払 手 数 料')),
+            LineItem('研修諸会費', ('研修諸会費', '研 修 諸 会 費'), (SHEET_16_4, 'S30')),
+            LineItem('新聞図書費', ('新聞図書費', '新 聞 図 書 費')),
+            LineItem('ソフト費', ('ソフト費', 'ソ フ ト 費')),
+            LineItem('雑費', ('雑費', '雑 費'), (SHEET_16_4, 'S38')),
+            LineItem('販管費合計', ('販売費及び一般管理費合計', '販売費及び一般管理費計'), (SHEET_16_4, 'AH38')),
+            LineItem('営業損失金額', ('営業損失金額', '営業損失', '営 業 損 失 金 額'), (SHEET_16_4, 'S39')),
+            LineItem('営業利益金額', (), (SHEET_16_4, 'S39')),
+        )),
+        # 営業外損益
+        Section('non_operating', 'non_operating', '営業外損益', (
+            LineItem('受取利息・配当金', ('受取利息・配当金', '受取利息及び配当金', '受取利息配当金'), (SHEET_16_5, 'S4')),
+            LineItem('受取利息', ('受取利息', '受 取 利 息'), (SHEET_16_5, 'S4')),
+            LineItem('受取配当金', ('受取配当金', '受 取 配 当 金'), (SHEET_16_5, 'S4')),
+            LineItem('雑収入', ('雑収入', 'その他営業外収益', '雑 収 入'), (SHEET_16_5, 'S5')),
+            LineItem('営業外収益合計', ('営業外収益合計', '営 業 外 収 益 合 計'), (SHEET_16_5, 'AH5')),
+            LineItem('支払利息', ('支払利息', '支 払 利 息'), (SHEET_16_5, 'S7')),
+            LineItem('営業外費用合計', (), (SHEET_16_5, 'AH10')),
+            LineItem('経常利益金額', ('経常利益金額', '経常利益', '経 常 利 益 金 額'), (SHEET_16_5, 'S11')),
+            LineItem('税引前当期純利益', ('税引前当期純利益', '税 引 前 当 期 純 利 益'), (SHEET_16_5, 'S20')),
+            LineItem('法人税・住民税・事業税', ('法人税・住民税・事業税', '法人税、住民税及び事業税', '法 人 税 ・ 住 民 税 ・ 事 業 税'), (SHEET_16_5, 'S21')),
+            LineItem('当期純利益', ('当期純利益', '当 期 純 利 益'), (SHEET_16_5, 'S23')),
+        )),
+    ),
+)
+
+# 完成工事原価報告書
+COST_REPORT = Statement(
+    name='cost_report',
+    title='完成工事原価報告書',
+    markers=('完成工事原価報告書', '原価報告書'),
+    max_pages=8,
+    sections=(
+        Section('cost', 'cost_report', '完成工事原価報告書', (
+            LineItem('材料費', ('材料費', '材 料 費'), (SHEET_16_5, 'S31')),
+            LineItem('労務費', ('労務費', '労 務 費'), (SHEET_16_5, 'S32')),
+            LineItem('外注加工費', ('外注加工費', '外注費', '外 注 加 工 費'), (SHEET_16_5, 'S34')),
+            LineItem('経費', ('経費', '経 費'), (SHEET_16_5, 'S35')),
+            LineItem('完成工事原価', ('完成工事原価', '完 成 工 事 原 価'), (SHEET_16_5, 'S37')),
+        )),
+    ),
+)
+
+# 株主資本等変動計算書
+EQUITY_STATEMENT = Statement(
+    name='equity_statement',
+    title='株主資本等変動計算書',
+    markers=('株主資本等変動計算書', '資本等変動計算書'),
+    max_pages=10,
+    layout='grid',
+    sections=(
+        Section('equity_change', 'equity_change', '株主資本等変動計算書', (
+            LineItem('当期首残高_資本金', cell=(SHEET_17_6, 'N15'), grid=('当期首残高', '資本金')),
+            LineItem('当期首残高_繰越利益剰余金', cell=(SHEET_17_6, 'AH15'), grid=('当期首残高', '繰越利益剰余金')),
+            LineItem('当期純利益', cell=(SHEET_17_6, 'AH18'), grid=('当期純利益', '繰越利益剰余金')),
+            LineItem('当期末残高_資本金', cell=(SHEET_17_6, 'N27'), grid=('当期末残高', '資本金')),
+            LineItem('当期末残高_繰越利益剰余金', cell=(SHEET_17_6, 'AH27'), grid=('当期末残高', '繰越利益剰余金')),
+        )),
+    ),
+)
+
+STATEMENTS: Tuple[Statement, ...] = (BALANCE_SHEET, INCOME_STATEMENT, COST_REPORT, EQUITY_STATEMENT)
+
+# 書類の検索対象となる最大ページ数（全書類共通で1回だけ読み込む。事前検査の見積もりにも使う）
+MAX_SCAN_PAGES = max(statement.max_pages for statement in STATEMENTS)
+
+# 複数項目が同じセルに書き込まれる場合の集約方法
+# 'sum': 存在する項目を合計 / 'priority': スキーマ定義順で最初に存在する項目を採用（未指定時の既定値）
+# 'net': 利益の項目を優先し、無い場合は損失の項目（LOSS_ITEMS）を負の値で採用
+CELL_REDUCTIONS: Dict[Tuple[str, str], str] = {
+    (SHEET_15_1, 'T28'): 'sum',   # 建物・構築物 + 機械装置
+    (SHEET_16_4, 'S25'): 'sum',   # 旅費交通費 + 通信費 + 通信交通費
+    (SHEET_16_4, 'S33'): 'sum',   # 賃借料 + 地代家賃
+    (SHEET_16_5, 'S4'): 'priority',  # 受取利息・配当金（内訳のみの場合は derived_values で 受取利息 + 受取配当金 を算出）
+    (SHEET_16_4, 'S39'): 'net',   # 営業利益金額（無い場合は −営業損失金額）
+}
+
+# 正の値で抽出される損失の項目（'net' のセルには負の値で書き込む）
+LOSS_ITEMS: Tuple[str, ...] = ('営業損失金額',)
+
+# parse_pdfの出力カテゴリ（出力順）
+CATEGORIES: Tuple[str, ...] = (
+    'balance_sheet_assets',
+    'balance_sheet_liabilities',
+    'balance_sheet_equity',
+    'income_statement',
+    'non_operating',
+    'cost_report',
+    'equity_change',
+)
+
+
+def get_statement(name: str) -> Statement:
+    """
+    書類名からStatementを取得
+
+    Args:
+        name: 書類の識別名
+
+    Returns:
+        Statement
+
+    Raises:
+        KeyError: 未定義の書類名の場合
+    """
+    for statement in STATEMENTS:
+        if statement.name == name:
+            return statement
+    raise KeyError(f"未定義の書類です: {name}")
+
+
+def iter_sections(category: Optional[str] = None):
+    """
+    全書類のSectionを順に返す
+
+    Args:
+        category: 指定した場合はそのカテゴリのSectionのみ
+
+    Yields:
+        (Statement, Section) のタプル
+    """
+    for statement in STATEMENTS:
+        for section in statement.sections:
+            if category is None or section.category == category:
+                yield statement, section
+
+
+def category_labels() -> Dict[str, str]:
+    """
+    カテゴリ → ログ用カテゴリ名の辞書を返す
+    """
+    labels: Dict[str, str] = {}
+    for _, section in iter_sections():
+        labels.setdefault(section.category, section.label)
+    return labels
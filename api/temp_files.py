@@ -0,0 +1,296 @@
+"""
+一時ファイル管理モジュール
+アップロードディレクトリの一時ファイル（PDF・出力Excel）を有効期限（TTL）で削除します
+
+変換中・送信中のファイルは使用中として登録し、削除対象から除外します。
+使用中の登録はファイルの隣の目印（{ファイル名}.lock）で行うため、同じディレクトリを共有する
+複数のワーカープロセス（gunicorn）の間でも、他のプロセスが使用中のファイルは削除しません。
+削除は os.scandir でディレクトリを少しずつ走査しながらバッチ単位で行い、
+常駐サーバーではバックグラウンドタスクとして定期的に実行します。
+"""
+
+import asyncio
+import itertools
+import os
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+# このアプリが作成する一時ファイル名（{uuid}.pdf / {uuid}_output.xlsx）
+MANAGED_FILE_PATTERN = re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}(\.pdf|_output\.xlsx)$')
+
+# 使用中の目印ファイルの拡張子（内容は登録したインスタンスの識別子）
+LOCK_SUFFIX = '.lock'
+
+
+def is_managed_file(filename: str) -> bool:
+    """
+    このアプリが作成した一時ファイルか判定（/tmp など共有ディレクトリの他のファイルは対象外）
+    """
+    return MANAGED_FILE_PATTERN.match(filename) is not None
+
+
+def lock_path(path: str) -> str:
+    """
+    使用中の目印ファイルのパス
+    """
+    return path + LOCK_SUFFIX
+
+
+def is_lock_file(filename: str) -> bool:
+    """
+    このアプリが作成した使用中の目印ファイルか判定
+    """
+    return filename.endswith(LOCK_SUFFIX) and is_managed_file(filename[:-len(LOCK_SUFFIX)])
+
+
+class TempFileSweeper:
+    """
+    一時ファイルの使用中管理と、有効期限切れファイルの削除
+
+    Args:
+        directory: 一時ファイルのディレクトリ
+        ttl_seconds: 有効期限（秒）。最終更新からこの時間が経過したファイルを削除
+        interval_seconds: バックグラウンド削除の実行間隔（秒）
+        batch_size: 1バッチで走査するエントリ数
+    """
+
+    def __init__(self, directory: str, ttl_seconds: float, interval_seconds: float, batch_size: int = 200):
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.interval_seconds = interval_seconds
+        self.batch_size = max(1, batch_size)
+        # このインスタンスで使用中のファイル → 登録数（同じファイルを複数の処理が使う場合）
+        self._in_use: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._instance_id = uuid.uuid4().hex
+        self._task: Optional[asyncio.Task] = None
+        self.last_sweep = 0.0
+        self.deleted_total = 0
+
+    def acquire(self, path: str) -> None:
+        """
+        ファイルを使用中として登録（目印ファイルを作成し、他のプロセスの削除からも除外）
+        """
+        path = os.path.abspath(path)
+        with self._lock:
+            self._in_use[path] = self._in_use.get(path, 0) + 1
+            try:
+                with open(lock_path(path), 'w') as f:
+                    f.write(self._owner())
+            except OSError as e:
+                print(f"警告: 使用中の目印を作成できません: {str(e)}")
+
+    def release(self, path: str) -> None:
+        """
+        ファイルの使用中登録を解除
+
+        このインスタンスでの登録がすべて解除され、目印が他のプロセス（インスタンス）で作り直されていない場合のみ
+        目印ファイルを削除します。
+        """
+        path = os.path.abspath(path)
+        with self._lock:
+            count = self._in_use.pop(path, 0) - 1
+            if count > 0:
+                self._in_use[path] = count
+                return
+            try:
+                with open(lock_path(path)) as f:
+                    owner = f.read().strip()
+                if owner == self._owner():
+                    os.remove(lock_path(path))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"警告: 使用中の目印を削除できません: {str(e)}")
+
+    def _owner(self) -> str:
+        """
+        目印ファイルに書き込む識別子（preload_app でフォークしたワーカーはPIDで区別）
+        """
+        return f"{os.getpid()}:{self._instance_id}"
+
+    @contextmanager
+    def track(self, path: str):
+        """
+        ブロックの間、ファイルを使用中として登録するコンテキストマネージャー
+        """
+        self.acquire(path)
+        try:
+            yield path
+        finally:
+            self.release(path)
+
+    def in_use(self, path: str, now: Optional[float] = None) -> bool:
+        """
+        ファイルが使用中か判定
+
+        目印ファイルで判定するため、他のプロセスが使用中のファイルも使用中とみなします。
+        有効期限より長く登録されたままのファイルは、送信が中断されたりプロセスが異常終了したりして
+        解除されなかったものとみなし、使用中として扱いません（目印は次回の削除で削除されます）。
+        """
+        now = time.time() if now is None else now
+        try:
+            since = os.stat(lock_path(path)).st_mtime
+        except FileNotFoundError:
+            return False
+        return now - since <= self.ttl_seconds
+
+    def remove(self, path: str) -> None:
+        """
+        ファイルを削除して使用中登録を解除（レスポンス送信後のバックグラウンドタスク用）
+        """
+        self.release(path)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"一時ファイル削除エラー: {str(e)}")
+
+    def _iter_candidates(self, ttl_seconds: float, now: float) -> Iterator[Tuple[bool, Optional[str]]]:
+        """
+        ディレクトリを走査し、エントリごとに (削除対象か, パス) を返す
+        """
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    lock = is_lock_file(entry.name)
+                    if not lock and not is_managed_file(entry.name):
+                        yield False, None
+                        continue
+                    try:
+                        if not entry.is_file(follow_symlinks=False):
+                            yield False, None
+                            continue
+                        age = now - entry.stat(follow_symlinks=False).st_mtime
+                    except FileNotFoundError:
+                        yield False, None
+                        continue
+                    if lock:
+                        # 解除されなかった目印は、手動クリーンアップ（TTL=0）でも有効期限を過ぎてから削除
+                        yield age > self.ttl_seconds, entry.path
+                    elif age >= ttl_seconds and not self.in_use(entry.path, now):
+                        yield True, entry.path
+                    else:
+                        yield False, None
+        except FileNotFoundError:
+            return
+
+    def _sweep_batch(self, candidates: Iterator[Tuple[bool, Optional[str]]]) -> Tuple[int, int]:
+        """
+        走査結果を batch_size 件だけ処理
+
+        Returns:
+            (走査したエントリ数, 削除したファイル数)
+        """
+        scanned = 0
+        deleted = 0
+        for expired, path in itertools.islice(candidates, self.batch_size):
+            scanned += 1
+            if not expired:
+                continue
+            try:
+                os.remove(path)
+                # 解除されなかった目印の削除は件数に含めない
+                deleted += not is_lock_file(os.path.basename(path))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"一時ファイル削除エラー: {str(e)}")
+        return scanned, deleted
+
+    def sweep(self, ttl_seconds: Optional[float] = None) -> Dict[str, Any]:
+        """
+        有効期限切れのファイルを削除（同期実行）
+
+        Args:
+            ttl_seconds: 有効期限（秒）。省略時はコンストラクタの値、0の場合は使用中以外をすべて削除
+
+        Returns:
+            {'scanned': 走査したエントリ数, 'deleted': 削除したファイル数}
+        """
+        ttl_seconds = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        candidates = self._iter_candidates(ttl_seconds, time.time())
+        scanned = deleted = 0
+        while True:
+            batch_scanned, batch_deleted = self._sweep_batch(candidates)
+            scanned += batch_scanned
+            deleted += batch_deleted
+            if batch_scanned < self.batch_size:
+                break
+        return self._finish(scanned, deleted)
+
+    def sweep_if_due(self) -> Optional[Dict[str, Any]]:
+        """
+        前回の削除から実行間隔が経過していれば削除を実行（バックグラウンドタスクを使えない環境用）
+        """
+        if time.time() - self.last_sweep < self.interval_seconds:
+            return None
+        return self.sweep()
+
+    async def sweep_async(self) -> Dict[str, Any]:
+        """
+        有効期限切れのファイルを削除（バッチごとにスレッドで実行し、イベントループを止めない）
+        """
+        loop = asyncio.get_running_loop()
+        candidates = self._iter_candidates(self.ttl_seconds, time.time())
+        scanned = deleted = 0
+        while True:
+            batch_scanned, batch_deleted = await loop.run_in_executor(None, self._sweep_batch, candidates)
+            scanned += batch_scanned
+            deleted += batch_deleted
+            if batch_scanned < self.batch_size:
+                break
+        return self._finish(scanned, deleted)
+
+    def _finish(self, scanned: int, deleted: int) -> Dict[str, Any]:
+        self.last_sweep = time.time()
+        self.deleted_total += deleted
+        if deleted:
+            print(f"一時ファイル削除: {deleted}件 ({self.directory})")
+        return {'scanned': scanned, 'deleted': deleted}
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.sweep_async()
+            except Exception as e:
+                print(f"一時ファイル削除エラー: {str(e)}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self) -> None:
+        """
+        バックグラウンドでの定期削除を開始（イベントループ内で呼び出す）
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        バックグラウンドでの定期削除を停止
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        一時ファイル削除の統計
+        """
+        with self._lock:
+            in_use = len(self._in_use)
+        return {
+            'ttl_seconds': self.ttl_seconds,
+            'interval_seconds': self.interval_seconds,
+            'in_use': in_use,
+            'last_sweep': self.last_sweep,
+            'deleted_total': self.deleted_total,
+        }
@@ -0,0 +1,161 @@
+"""
+テンプレート登録モジュール
+書き込み先のExcelテンプレート（都道府県ごとの届出書の様式）を名前で登録します
+
+標準の様式（エクセルサンプル.xlsx）のセル位置は schema.py の LineItem.cell で宣言し、
+様式の異なるテンプレートは標準の様式との差分（シート名・セル位置）のみを TEMPLATES に宣言します。
+APIでは template パラメータ、一括変換（cli.py）では -t でテンプレート名を指定します。
+
+書き込みプラン（excel_writer.compile_write_plan）とテンプレートのキャッシュ
+（コンパイル済みテンプレート templates/<ファイル名>.fastfill、またはopenpyxlのスナップショット）は
+テンプレートごとに最初に使う時点で作成するため、テンプレートを追加しても
+他のテンプレートを使う変換の処理時間は変わりません。
+"""
+
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+from schema import CELL_REDUCTIONS, LineItem
+
+# テンプレートのExcelファイルを置くディレクトリ
+TEMPLATE_DIR = os.getenv("TEMPLATE_DIR", os.path.dirname(os.path.abspath(__file__)))
+
+# 標準の様式（schema.py のセル位置そのまま）のテンプレート名
+STANDARD_TEMPLATE = 'standard'
+
+
+@dataclass(frozen=True)
+class TemplateVariant:
+    """
+    Excelテンプレート（届出書の様式）
+
+    Attributes:
+        name: テンプレート名（APIの template パラメータ）
+        label: 表示名
+        filename: Excelファイル名（TEMPLATE_DIR からの相対パス、または絶対パス）
+                  コンパイル済みテンプレートはファイル名ごとに作成するため、テンプレートごとに別のファイル名にします
+        sheets: 標準の様式のシート名 → このテンプレートのシート名（異なるシートのみ）
+        cells: (カテゴリ, 項目名) → このテンプレートの書き込み先 (シート名, セル位置)（異なる項目のみ）
+               シート名はこのテンプレートのシート名で指定し、Noneの場合は書き込まない
+        reductions: 書き込み先 (シート名, セル位置) → 集約方法（'sum' / 'priority' / 'net'）
+                    省略時は標準の様式の書き込み先の集約方法（schema.CELL_REDUCTIONS）を引き継ぐ
+    """
+    name: str
+    label: str
+    filename: str
+    sheets: Dict[str, str] = field(default_factory=dict)
+    cells: Dict[Tuple[str, str], Optional[Tuple[str, str]]] = field(default_factory=dict)
+    reductions: Dict[Tuple[str, str], str] = field(default_factory=dict)
+
+    @property
+    def path(self) -> str:
+        """
+        Excelファイルのパス
+        """
+        return os.path.join(TEMPLATE_DIR, self.filename)
+
+    def target(self, category: str, item: LineItem) -> Optional[Tuple[str, str]]:
+        """
+        項目の書き込み先 (シート名, セル位置)（書き込み対象外の場合はNone）
+        """
+        if (category, item.key) in self.cells:
+            return self.cells[(category, item.key)]
+        if item.cell is None:
+            return None
+        sheet, cell = item.cell
+        return self.sheets.get(sheet, sheet), cell
+
+    def reduction(self, target: Tuple[str, str], standard_target: Optional[Tuple[str, str]]) -> str:
+        """
+        書き込み先の集約方法
+
+        Args:
+            target: このテンプレートの書き込み先
+            standard_target: 同じ項目の標準の様式での書き込み先
+        """
+        if target in self.reductions:
+            return self.reductions[target]
+        return CELL_REDUCTIONS.get(standard_target, 'priority')
+
+
+# 登録済みのテンプレート（テンプレート名 → TemplateVariant）
+#
+# 様式の異なる届出書を追加する場合は、Excelファイルを TEMPLATE_DIR に置き、差分のみを宣言します。
+#     TemplateVariant(
+#         'osaka', '大阪府様式', '大阪府様式.xlsx',
+#         sheets={'１７（６）': '１７（６）株主資本等'},
+#         cells={('equity_change', '当期純利益'): ('１７（６）株主資本等', 'AH19')},
+#     ),
+# 追加後は python create_template.py osaka でコンパイル済みテンプレートを作成します。
+TEMPLATES: Dict[str, TemplateVariant] = {
+    variant.name: variant for variant in (
+        TemplateVariant(STANDARD_TEMPLATE, '標準様式', 'エクセルサンプル.xlsx'),
+    )
+}
+
+# template パラメータを省略した場合のテンプレート名
+DEFAULT_TEMPLATE = os.getenv("DEFAULT_TEMPLATE", STANDARD_TEMPLATE).strip()
+if DEFAULT_TEMPLATE not in TEMPLATES:
+    print(f"警告: DEFAULT_TEMPLATE={DEFAULT_TEMPLATE} は未登録のテンプレートです（{STANDARD_TEMPLATE} を使用します）")
+    DEFAULT_TEMPLATE = STANDARD_TEMPLATE
+
+
+def get_template(name: Optional[str] = None) -> TemplateVariant:
+    """
+    テンプレート名からTemplateVariantを取得
+
+    Args:
+        name: テンプレート名（Noneの場合は DEFAULT_TEMPLATE）
+
+    Returns:
+        TemplateVariant
+
+    Raises:
+        KeyError: 未登録のテンプレート名の場合
+    """
+    name = DEFAULT_TEMPLATE if name is None else name
+    try:
+        return TEMPLATES[name]
+    except KeyError:
+        raise KeyError(f"未登録のテンプレートです: {name}（{' / '.join(TEMPLATES)} を指定してください）")
+
+
+def template_for_path(template_path: str) -> TemplateVariant:
+    """
+    Excelファイルのパスに対応するテンプレート（書き込みプランの選択用）
+
+    登録済みのテンプレートのパスと一致するもの、次にファイル名が一致するものを返し、
+    どちらも無い場合は標準の様式として扱います。
+
+    Args:
+        template_path: Excelファイルのパス
+
+    Returns:
+        TemplateVariant
+    """
+    path = os.path.abspath(template_path)
+    for variant in TEMPLATES.values():
+        if os.path.abspath(variant.path) == path:
+            return variant
+    filename = os.path.basename(path)
+    for variant in TEMPLATES.values():
+        if os.path.basename(variant.filename) == filename:
+            return variant
+    return TEMPLATES[STANDARD_TEMPLATE]
+
+
+def locate_template(value: str) -> Tuple[str, TemplateVariant]:
+    """
+    テンプレート名またはExcelファイルのパスから (ファイルパス, TemplateVariant) を取得（コマンドライン用）
+
+    Args:
+        value: テンプレート名、またはExcelファイルのパス
+
+    Returns:
+        (Excelファイルのパス, TemplateVariant) のタプル
+    """
+    if value in TEMPLATES:
+        variant = TEMPLATES[value]
+        return variant.path, variant
+    return value, template_for_path(value)
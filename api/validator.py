@@ -0,0 +1,214 @@
+"""
+整合性検証モジュール
+抽出した財務データが会計上の恒等式を満たしているかを検証します
+
+恒等式は起動時に疎な行（恒等式ごとの (列番号, 係数) のタプル）へ一度だけコンパイルされ、
+抽出値を並べた値リスト（FinancialStatement の項目番号で取り出す）に対して各行をループで評価します。
+配列演算ではなく、事前コンパイルした疎な行のループです（恒等式は数十件のため十分に速い）。
+未抽出の項目が1つだけの恒等式は、その項目を逆算して補完します。
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from financial_statement import FinancialData, FinancialStatement, as_statement, field_index
+
+# (カテゴリ, 項目名)
+Field = Tuple[str, str]
+
+
+@dataclass(frozen=True)
+class Identity:
+    """
+    会計上の恒等式  total = Σ(sign × part)
+
+    Attributes:
+        name: 恒等式の名前（レポート用）
+        total: 左辺の項目
+        parts: 右辺の (符号, 項目) のタプル
+    """
+    name: str
+    total: Field
+    parts: Tuple[Tuple[int, Field], ...]
+
+
+ASSETS = 'balance_sheet_assets'
+LIABILITIES = 'balance_sheet_liabilities'
+EQUITY = 'balance_sheet_equity'
+INCOME = 'income_statement'
+NON_OPERATING = 'non_operating'
+COST = 'cost_report'
+EQUITY_CHANGE = 'equity_change'
+
+IDENTITIES: Tuple[Identity, ...] = (
+    Identity('資産合計 = 流動資産合計 + 固定資産合計', (ASSETS, '資産合計'), (
+        (1, (ASSETS, '流動資産合計')),
+        (1, (ASSETS, '固定資産合計')),
+    )),
+    Identity('固定資産合計 = 有形 + 無形 + 投資その他', (ASSETS, '固定資産合計'), (
+        (1, (ASSETS, '有形固定資産合計')),
+        (1, (ASSETS, '無形固定資産合計')),
+        (1, (ASSETS, '投資その他の資産合計')),
+    )),
+    Identity('負債合計 = 流動負債合計 + 固定負債合計', (LIABILITIES, '負債合計'), (
+        (1, (LIABILITIES, '流動負債合計')),
+        (1, (LIABILITIES, '固定負債合計')),
+    )),
+    Identity('負債・純資産合計 = 負債合計 + 純資産合計', (EQUITY, '負債・純資産合計'), (
+        (1, (LIABILITIES, '負債合計')),
+        (1, (EQUITY, '純資産合計')),
+    )),
+    Identity('資産合計 = 負債・純資産合計', (ASSETS, '資産合計'), (
+        (1, (EQUITY, '負債・純資産合計')),
+    )),
+    Identity('完成工事総利益 = 完成工事高 - 完成工事原価', (INCOME, '完成工事総利益金額'), (
+        (1, (INCOME, '完成工事高')),
+        (-1, (INCOME, '完成工事原価')),
+    )),
+    Identity('完成工事原価 = 材料費 + 労務費 + 外注加工費 + 経費', (COST, '完成工事原価'), (
+        (1, (COST, '材料費')),
+        (1, (COST, '労務費')),
+        (1, (COST, '外注加工費')),
+        (1, (COST, '経費')),
+    )),
+    Identity('完成工事原価（原価報告書 = 損益計算書）', (COST, '完成工事原価'), (
+        (1, (INCOME, '完成工事原価')),
+    )),
+    Identity('当期純利益（損益計算書 = 株主資本等変動計算書）', (EQUITY_CHANGE, '当期純利益'), (
+        (1, (NON_OPERATING, '当期純利益')),
+    )),
+)
+
+
+@dataclass(frozen=True)
+class CompiledIdentities:
+    """
+    疎な行にコンパイルした恒等式
+
+    Attributes:
+        fields: 値リストの列 → 項目
+        columns: 値リストの列 → FinancialStatement の項目番号
+        rows: 恒等式ごとの ((列番号, 係数), ...)。Σ(係数 × 値) = 0 が成り立つ
+    """
+    fields: Tuple[Field, ...]
+    columns: Tuple[int, ...]
+    rows: Tuple[Tuple[Tuple[int, int], ...], ...]
+
+
+@lru_cache(maxsize=None)
+def compile_identities(identities: Tuple[Identity, ...] = IDENTITIES) -> CompiledIdentities:
+    """
+    恒等式を疎な行にコンパイル（初回のみ構築しキャッシュ）
+
+    Args:
+        identities: 恒等式のタプル
+
+    Returns:
+        CompiledIdentities
+
+    Raises:
+        KeyError: スキーマに無い項目を含む場合
+    """
+    index: Dict[Field, int] = {}
+
+    def column(field: Field) -> int:
+        if field not in index:
+            index[field] = len(index)
+        return index[field]
+
+    rows = []
+    for identity in identities:
+        row = [(column(identity.total), -1)]
+        row.extend((column(field), sign) for sign, field in identity.parts)
+        rows.append(tuple(row))
+
+    numbers = field_index()
+    return CompiledIdentities(tuple(index), tuple(numbers[field] for field in index), tuple(rows))
+
+
+def validate_financial_data(data: FinancialData, tolerance: int = 0,
+                            identities: Tuple[Identity, ...] = IDENTITIES) -> Tuple[Any, Dict[str, Any]]:
+    """
+    抽出データの整合性を検証し、逆算可能な未抽出項目を補完
+
+    Args:
+        data: PDF解析で抽出したデータ（FinancialStatement またはカテゴリ → {項目名: 数値} の辞書、変更されません）
+        tolerance: 許容する差額（円）
+        identities: 検証する恒等式
+
+    Returns:
+        (補完後のデータ（data と同じ型）, 検証レポート) のタプル
+        検証レポート: {'checked': 検証した恒等式数, 'skipped': 値不足で検証できなかった数,
+                       'filled': 補完した項目, 'discrepancies': 不一致の恒等式}
+    """
+    compiled = compile_identities(identities)
+    statement = as_statement(data)
+
+    # 値リストを構築
+    values: List[Optional[int]] = [statement.values[number] for number in compiled.columns]
+
+    # 未抽出項目が1つだけの恒等式を、補完できなくなるまで繰り返し解く
+    filled = []
+    solved = True
+    while solved:
+        solved = False
+        for row_index, row in enumerate(compiled.rows):
+            missing = [(col, coef) for col, coef in row if values[col] is None]
+            if len(missing) != 1:
+                continue
+            col, coef = missing[0]
+            partial = sum(k * values[c] for c, k in row if c != col)
+            values[col] = -partial * coef
+            category, key = compiled.fields[col]
+            filled.append({
+                'category': category,
+                'item': key,
+                'value': values[col],
+                'identity': identities[row_index].name,
+            })
+            solved = True
+
+    # 各恒等式の残差を計算
+    discrepancies = []
+    checked = 0
+    skipped = 0
+    for row_index, row in enumerate(compiled.rows):
+        if any(values[col] is None for col, _ in row):
+            skipped += 1
+            continue
+        checked += 1
+        residual = sum(coef * values[col] for col, coef in row)
+        if abs(residual) > tolerance:
+            identity = identities[row_index]
+            total_value = values[compiled.fields.index(identity.total)]
+            discrepancies.append({
+                'identity': identity.name,
+                'category': identity.total[0],
+                'item': identity.total[1],
+                'actual': total_value,
+                'expected': total_value + residual,
+                'difference': -residual,
+            })
+
+    # 補完値をデータに反映（元のデータは変更しない）
+    result = statement.copy()
+    for col, value in enumerate(values):
+        result.values[compiled.columns[col]] = value
+
+    report = {
+        'checked': checked,
+        'skipped': skipped,
+        'filled': filled,
+        'discrepancies': discrepancies,
+    }
+
+    for entry in filled:
+        print(f"  補完: {entry['item']} = {entry['value']:,} ({entry['identity']})")
+    for entry in discrepancies:
+        print(f"  不一致: {entry['identity']} - 抽出値 {entry['actual']:,} / 計算値 {entry['expected']:,}")
+    print(f"✓ 整合性検証完了: {checked}件検証, 不一致 {len(discrepancies)}件, 補完 {len(filled)}件")
+
+    if isinstance(data, FinancialStatement):
+        return result, report
+    return result.to_dict(), report
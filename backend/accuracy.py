@@ -0,0 +1,366 @@
+#!/usr/bin/env python
+"""
+抽出精度・速度の回帰テストツール
+正解データ付きのPDF（ゴールデンコーパス）を全書類の抽出にかけ、
+項目ごとの適合率（precision）・再現率（recall）とページあたりの処理時間を計測します
+
+コーパスは PDF と同名の正解データ（{名前}.expected.json、カテゴリ → {項目名: 数値} の辞書）の組です。
+正解データに無いカテゴリ・項目を抽出した場合は誤検出として数えます。
+
+使い方:
+    python accuracy.py build golden/ --count 12            # 合成PDFでコーパスを作成
+    python accuracy.py snapshot 決算書フォルダ/              # 実PDFの正解データの下書きを作成
+    python accuracy.py run golden/                           # 精度・速度を計測
+    python accuracy.py run golden/ -o baseline.json          # 計測結果を保存
+    python accuracy.py run golden/ --baseline baseline.json  # 保存した結果より悪化したら失敗
+
+run は閾値を下回った場合に終了コード1を返します。
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import page_cache
+from financial_statement import FinancialData, as_statement
+from pdf_parser import parse_pdf_statement, compile_matchers
+from schema import STATEMENTS
+
+EXPECTED_SUFFIX = ".expected.json"
+DEFAULT_GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden")
+
+
+def load_corpus(directory: str) -> List[Tuple[str, str]]:
+    """
+    正解データのあるPDFを列挙
+
+    Returns:
+        (PDFファイルパス, 正解データのパス) のリスト（ファイル名順）
+    """
+    corpus = []
+    for name in sorted(os.listdir(directory)):
+        if not name.lower().endswith('.pdf'):
+            continue
+        expected_path = os.path.join(directory, os.path.splitext(name)[0] + EXPECTED_SUFFIX)
+        if os.path.exists(expected_path):
+            corpus.append((os.path.join(directory, name), expected_path))
+    return corpus
+
+
+def _ratio(numerator: int, denominator: int) -> float:
+    return numerator / denominator if denominator else 1.0
+
+
+def score(expected: Dict[str, Dict[str, Any]], actual: FinancialData,
+          counts: Dict[str, Dict[str, int]]) -> None:
+    """
+    1ファイルの抽出結果を正解データと比較し、項目ごとの件数を counts に加算
+
+    値が異なる項目は誤検出（fp）と見逃し（fn）の両方に数えます。
+
+    Args:
+        expected: 正解データ（カテゴリ → {項目名: 数値}）
+        actual: parse_pdf_statement の結果（または同じ形式の辞書）
+        counts: "カテゴリ.項目名" → {'tp', 'fp', 'fn'}
+    """
+    extracted: Dict[str, Dict[str, Any]] = {}
+    for category, key, value in as_statement(actual).items():
+        extracted.setdefault(category, {})[key] = value
+
+    for category in set(expected) | set(extracted):
+        want = expected.get(category) or {}
+        got = extracted.get(category) or {}
+        for key in set(want) | set(got):
+            entry = counts.setdefault(f"{category}.{key}", {'tp': 0, 'fp': 0, 'fn': 0})
+            if key in got and got[key] == want.get(key):
+                entry['tp'] += 1
+                continue
+            if key in got:
+                entry['fp'] += 1
+            if key in want:
+                entry['fn'] += 1
+
+
+def _metrics(counts: Dict[str, int]) -> Dict[str, Any]:
+    return {
+        **counts,
+        'precision': _ratio(counts['tp'], counts['tp'] + counts['fp']),
+        'recall': _ratio(counts['tp'], counts['tp'] + counts['fn']),
+    }
+
+
+def evaluate(corpus: List[Tuple[str, str]], repeat: int = 1) -> Dict[str, Any]:
+    """
+    コーパス全体の精度と処理時間を計測
+
+    ページキャッシュは使わずに毎回PDFを解析します。処理時間はファイルごとに
+    repeat 回計測した最小値です（他の処理による揺らぎを除くため）。
+
+    Args:
+        corpus: load_corpus の結果
+        repeat: ファイルごとの計測回数
+
+    Returns:
+        計測結果（全体・カテゴリ別・項目別の適合率/再現率、ページあたりの処理時間）
+    """
+    page_cache.configure(None)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for statement in STATEMENTS:
+            compile_matchers(statement.name)
+
+    counts: Dict[str, Dict[str, int]] = {}
+    files = []
+    for pdf_path, expected_path in corpus:
+        with open(expected_path, encoding='utf-8') as f:
+            expected = json.load(f)
+
+        seconds = None
+        for _ in range(max(1, repeat)):
+            stats: Dict[str, Any] = {}
+            started = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                actual = parse_pdf_statement(pdf_path, stats=stats)
+            elapsed = time.perf_counter() - started
+            seconds = elapsed if seconds is None else min(seconds, elapsed)
+
+        file_counts: Dict[str, Dict[str, int]] = {}
+        score(expected, actual, file_counts)
+        for key, entry in file_counts.items():
+            total = counts.setdefault(key, {'tp': 0, 'fp': 0, 'fn': 0})
+            for name in total:
+                total[name] += entry[name]
+
+        pages = stats.get('pages', 0)
+        files.append({
+            'file': os.path.basename(pdf_path),
+            'pages': pages,
+            'seconds': seconds,
+            'ms_per_page': seconds * 1000 / pages if pages else None,
+            'fp': sum(entry['fp'] for entry in file_counts.values()),
+            'fn': sum(entry['fn'] for entry in file_counts.values()),
+        })
+
+    categories: Dict[str, Dict[str, int]] = {}
+    for key, entry in counts.items():
+        total = categories.setdefault(key.split('.', 1)[0], {'tp': 0, 'fp': 0, 'fn': 0})
+        for name in total:
+            total[name] += entry[name]
+    overall = {name: sum(entry[name] for entry in counts.values()) for name in ('tp', 'fp', 'fn')}
+
+    total_pages = sum(f['pages'] for f in files)
+    total_seconds = sum(f['seconds'] for f in files)
+    per_page = [f['ms_per_page'] for f in files if f['ms_per_page'] is not None]
+    return {
+        'files': len(files),
+        'pages': total_pages,
+        **_metrics(overall),
+        'ms_per_page': total_seconds * 1000 / total_pages if total_pages else None,
+        'ms_per_page_median': statistics.median(per_page) if per_page else None,
+        'ms_per_page_max': max(per_page) if per_page else None,
+        'categories': {name: _metrics(entry) for name, entry in sorted(categories.items())},
+        'keys': {name: _metrics(entry) for name, entry in sorted(counts.items())},
+        'results': files,
+    }
+
+
+def check_thresholds(report: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None,
+                     min_precision: Optional[float] = None, min_recall: Optional[float] = None,
+                     max_ms_per_page: Optional[float] = None, tolerance: float = 0.0,
+                     max_slowdown: float = 1.5) -> List[str]:
+    """
+    計測結果が閾値を満たすか判定
+
+    Args:
+        report: evaluate の結果
+        baseline: 比較する過去の計測結果（全体・項目ごとの精度が tolerance を超えて下がったら失敗）
+        min_precision: 全体の適合率の下限
+        min_recall: 全体の再現率の下限
+        max_ms_per_page: ページあたりの処理時間（ミリ秒）の上限
+        tolerance: 過去の計測結果からの精度の低下の許容幅
+        max_slowdown: 過去の計測結果に対するページあたりの処理時間の倍率の上限
+
+    Returns:
+        満たさなかった閾値の説明のリスト（空なら合格）
+    """
+    failures = []
+    if min_precision is not None and report['precision'] < min_precision:
+        failures.append(f"適合率 {report['precision']:.4f} が下限 {min_precision} を下回りました")
+    if min_recall is not None and report['recall'] < min_recall:
+        failures.append(f"再現率 {report['recall']:.4f} が下限 {min_recall} を下回りました")
+    if max_ms_per_page is not None and report['ms_per_page'] is not None and report['ms_per_page'] > max_ms_per_page:
+        failures.append(f"ページあたりの処理時間 {report['ms_per_page']:.1f}ms が上限 {max_ms_per_page}ms を超えました")
+
+    if baseline is None:
+        return failures
+
+    for metric, label in (('precision', '適合率'), ('recall', '再現率')):
+        if report[metric] < baseline[metric] - tolerance:
+            failures.append(f"{label} {report[metric]:.4f} が前回 {baseline[metric]:.4f} から低下しました")
+        for key, previous in baseline.get('keys', {}).items():
+            current = report['keys'].get(key)
+            if current is not None and current[metric] < previous[metric] - tolerance:
+                failures.append(f"{key} の{label} {current[metric]:.4f} が前回 {previous[metric]:.4f} から低下しました")
+
+    if report['ms_per_page'] and baseline.get('ms_per_page') and report['ms_per_page'] > baseline['ms_per_page'] * max_slowdown:
+        failures.append(f"ページあたりの処理時間 {report['ms_per_page']:.1f}ms が前回 {baseline['ms_per_page']:.1f}ms の"
+                        f"{max_slowdown}倍を超えました")
+    return failures
+
+
+def print_report(report: Dict[str, Any], show: int = 20) -> None:
+    """
+    計測結果を表示（精度の低い項目から順に show 件）
+    """
+    print(f"ファイル数: {report['files']}, ページ数: {report['pages']}")
+    print(f"適合率: {report['precision']:.4f}, 再現率: {report['recall']:.4f} "
+          f"(一致 {report['tp']}, 誤検出 {report['fp']}, 見逃し {report['fn']})")
+    if report['ms_per_page'] is not None:
+        print(f"ページあたりの処理時間: {report['ms_per_page']:.1f}ms "
+              f"(中央値 {report['ms_per_page_median']:.1f}ms, 最大 {report['ms_per_page_max']:.1f}ms)")
+
+    print("\nカテゴリ別:")
+    for name, entry in report['categories'].items():
+        print(f"  {name:<28} 適合率 {entry['precision']:.4f}  再現率 {entry['recall']:.4f}")
+
+    worst = sorted(
+        (item for item in report['keys'].items() if item[1]['fp'] or item[1]['fn']),
+        key=lambda item: (min(item[1]['precision'], item[1]['recall']), item[0]),
+    )
+    if worst:
+        print(f"\n精度の低い項目（{min(show, len(worst))}/{len(worst)}件）:")
+        for name, entry in worst[:show]:
+            print(f"  {name:<40} 適合率 {entry['precision']:.4f}  再現率 {entry['recall']:.4f} "
+                  f"(誤検出 {entry['fp']}, 見逃し {entry['fn']})")
+
+
+def run_build(args: argparse.Namespace) -> int:
+    """
+    build サブコマンド（合成PDFと正解データを作成）
+    """
+    from synthetic_pdf import synthetic_filing
+
+    os.makedirs(args.directory, exist_ok=True)
+    for number in range(args.count):
+        seed = args.seed + number
+        content, expected = synthetic_filing(seed, extra_pages=args.extra_pages, vary_labels=True)
+        stem = os.path.join(args.directory, f"synthetic_{seed:04d}")
+        with open(stem + ".pdf", 'wb') as f:
+            f.write(content)
+        with open(stem + EXPECTED_SUFFIX, 'w', encoding='utf-8') as f:
+            json.dump(expected, f, ensure_ascii=False, indent=2, sort_keys=True)
+            f.write("\n")
+    print(f"✓ コーパスを{args.count}件作成しました: {args.directory}")
+    return 0
+
+
+def run_snapshot(args: argparse.Namespace) -> int:
+    """
+    snapshot サブコマンド（現在の抽出結果を正解データの下書きとして保存）
+    """
+    page_cache.configure(None)
+    created = 0
+    for name in sorted(os.listdir(args.directory)):
+        if not name.lower().endswith('.pdf'):
+            continue
+        expected_path = os.path.join(args.directory, os.path.splitext(name)[0] + EXPECTED_SUFFIX)
+        if os.path.exists(expected_path) and not args.force:
+            continue
+        with contextlib.redirect_stdout(io.StringIO()):
+            data = parse_pdf_statement(os.path.join(args.directory, name))
+        with open(expected_path, 'w', encoding='utf-8') as f:
+            json.dump({category: values for category, values in data.to_dict().items() if values},
+                      f, ensure_ascii=False, indent=2, sort_keys=True)
+            f.write("\n")
+        created += 1
+        print(f"✓ {expected_path}")
+    print(f"正解データを{created}件作成しました（内容を確認・修正してから使用してください）")
+    return 0
+
+
+def run_evaluate(args: argparse.Namespace) -> int:
+    """
+    run サブコマンド
+
+    Returns:
+        終了コード（閾値を満たさなければ1）
+    """
+    corpus = load_corpus(args.directory)
+    if not corpus:
+        print(f"エラー: 正解データ付きのPDFがありません: {args.directory}", file=sys.stderr)
+        return 2
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    report = evaluate(corpus, repeat=args.repeat)
+    print_report(report, show=args.show)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n計測結果: {args.output}")
+
+    failures = check_thresholds(
+        report, baseline,
+        min_precision=args.min_precision, min_recall=args.min_recall,
+        max_ms_per_page=args.max_ms_per_page, tolerance=args.tolerance, max_slowdown=args.max_slowdown,
+    )
+    print()
+    for failure in failures:
+        print(f"✗ {failure}")
+    if failures:
+        return 1
+    print("✓ すべての閾値を満たしました")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    コマンドライン引数のパーサーを作成
+    """
+    parser = argparse.ArgumentParser(description="抽出精度・速度の回帰テスト")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build = subparsers.add_parser('build', help="合成PDFでコーパスを作成（項目名は表記ゆれを含むキーワードから選ぶ）")
+    build.add_argument('directory', help="出力フォルダ")
+    build.add_argument('--count', type=int, default=12, help="作成する件数（既定: 12）")
+    build.add_argument('--seed', type=int, default=0, help="最初のPDFの乱数シード（既定: 0）")
+    build.add_argument('--extra-pages', type=int, default=0, help="各PDFに追加する注記ページ数")
+    build.set_defaults(handler=run_build)
+
+    snapshot = subparsers.add_parser('snapshot', help="現在の抽出結果から正解データの下書きを作成")
+    snapshot.add_argument('directory', help="PDFのフォルダ")
+    snapshot.add_argument('--force', action='store_true', help="既存の正解データを上書き")
+    snapshot.set_defaults(handler=run_snapshot)
+
+    run = subparsers.add_parser('run', help="精度・速度を計測")
+    run.add_argument('directory', nargs='?', default=DEFAULT_GOLDEN_DIR, help="コーパスのフォルダ（既定: golden/）")
+    run.add_argument('--baseline', default=None, help="比較する過去の計測結果（JSON）")
+    run.add_argument('-o', '--output', default=None, help="計測結果の保存先（JSON）")
+    run.add_argument('--min-precision', type=float, default=None, help="全体の適合率の下限")
+    run.add_argument('--min-recall', type=float, default=None, help="全体の再現率の下限")
+    run.add_argument('--max-ms-per-page', type=float, default=None, help="ページあたりの処理時間の上限（ミリ秒）")
+    run.add_argument('--tolerance', type=float, default=0.0, help="前回からの精度の低下の許容幅（既定: 0）")
+    run.add_argument('--max-slowdown', type=float, default=1.5, help="前回に対する処理時間の倍率の上限（既定: 1.5）")
+    run.add_argument('--repeat', type=int, default=3, help="ファイルごとの計測回数（最小値を採用、既定: 3）")
+    run.add_argument('--show', type=int, default=20, help="表示する精度の低い項目数（既定: 20）")
+    run.set_defaults(handler=run_evaluate)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
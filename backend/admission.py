@@ -0,0 +1,177 @@
+"""
+同時実行制御モジュール
+変換処理の同時実行数を制限し、待ち行列があふれた場合は受付を拒否します
+
+pdfplumberの解析はメモリ消費が大きいため、同時に走る変換数をセマフォで制限します。
+待ち行列の長さにも上限を設け、上限を超えたリクエストは QueueFullError で
+即座に拒否します（API側で 429 + Retry-After に変換）。
+
+優先度の低いリクエスト（時間のかかるPDF）は、通常のリクエストが待っていない場合にのみ
+実行枠を確保します。
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Deque, Dict, Optional
+
+# 優先度の低いリクエストが実行枠を譲った後、再び確保を試みるまでの秒数
+LOW_PRIORITY_RETRY_SECONDS = 0.05
+
+
+class QueueFullError(Exception):
+    """
+    待ち行列が満杯、または待ち時間が上限を超えた場合の例外
+
+    Attributes:
+        retry_after: 再試行までの推奨待ち時間（秒）
+        queue: 拒否した待ち行列の名前
+        waiting: 拒否した時点の待ち行列の待ち件数
+        in_flight: 拒否した時点の待ち行列の実行中件数
+    """
+
+    def __init__(self, message: str, retry_after: int, queue: str = '', waiting: int = 0, in_flight: int = 0):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.queue = queue
+        self.waiting = waiting
+        self.in_flight = in_flight
+
+
+class AdmissionController:
+    """
+    セマフォによる同時実行数の制限と、上限付き待ち行列
+
+    Args:
+        max_in_flight: 同時に実行する変換数の上限
+        max_queue: 実行待ちにできるリクエスト数の上限
+        queue_timeout: 実行待ちの最大時間（秒）。Noneの場合は無制限
+        history: 統計に使う直近の記録数
+        name: 待ち行列の名前（受付拒否のログ用）
+    """
+
+    def __init__(self, max_in_flight: int, max_queue: int,
+                 queue_timeout: Optional[float] = None, history: int = 100, name: str = '変換'):
+        self.name = name
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.in_flight = 0
+        self.waiting = 0
+        # 待っている通常（優先度の高い）リクエスト数
+        self.waiting_normal = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._wait_times: Deque[float] = deque(maxlen=history)
+        self._service_times: Deque[float] = deque(maxlen=history)
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # イベントループ起動後に作成する（Python 3.9ではループに紐付くため）
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        return self._semaphore
+
+    def retry_after(self) -> int:
+        """
+        現在の待ち行列から再試行までの推奨秒数を見積もる
+        """
+        service = sum(self._service_times) / len(self._service_times) if self._service_times else 5.0
+        rounds = (self.waiting + self.in_flight) / self.max_in_flight
+        return max(1, math.ceil(service * rounds))
+
+    def _reject(self, message: str) -> QueueFullError:
+        """
+        受付拒否を記録し、この待ち行列の状況を持つ例外を作成
+        """
+        self.rejected += 1
+        return QueueFullError(message, self.retry_after(), self.name, self.waiting, self.in_flight)
+
+    async def _acquire_low_priority(self, semaphore: asyncio.Semaphore) -> None:
+        """
+        通常のリクエストが待っていない場合にのみ実行枠を確保
+        """
+        while True:
+            await semaphore.acquire()
+            if self.waiting_normal == 0:
+                return
+            # 待っている通常のリクエストに譲る
+            semaphore.release()
+            await asyncio.sleep(LOW_PRIORITY_RETRY_SECONDS)
+
+    @asynccontextmanager
+    async def slot(self, low_priority: bool = False):
+        """
+        実行枠を1つ確保するコンテキストマネージャー
+
+        Args:
+            low_priority: Trueの場合は、通常のリクエストが待っていない場合にのみ実行枠を確保
+
+        Yields:
+            実行枠を確保するまでの待ち時間（秒）
+
+        Raises:
+            QueueFullError: 待ち行列が満杯、または待ち時間が上限を超えた場合
+        """
+        semaphore = self._get_semaphore()
+
+        # 実行中 + 待ち の合計で判定（セマフォの取得前でも数えられるよう自前のカウンタを使う）
+        if self.in_flight + self.waiting >= self.max_in_flight + self.max_queue:
+            raise self._reject("変換待ちのリクエストが上限に達しています")
+
+        self.waiting += 1
+        if not low_priority:
+            self.waiting_normal += 1
+        queued_at = time.perf_counter()
+        acquire = self._acquire_low_priority(semaphore) if low_priority else semaphore.acquire()
+        try:
+            if self.queue_timeout is None:
+                await acquire
+            else:
+                await asyncio.wait_for(acquire, timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise self._reject("変換待ちの時間が上限を超えました")
+        finally:
+            self.waiting -= 1
+            if not low_priority:
+                self.waiting_normal -= 1
+
+        waited = time.perf_counter() - queued_at
+        self._wait_times.append(waited)
+        self.admitted += 1
+        self.in_flight += 1
+        started_at = time.perf_counter()
+        try:
+            yield waited
+        finally:
+            self._service_times.append(time.perf_counter() - started_at)
+            self.in_flight -= 1
+            semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        待ち行列と待ち時間の統計
+        """
+        waits = sorted(self._wait_times)
+
+        def percentile(p: float) -> float:
+            if not waits:
+                return 0.0
+            return waits[min(len(waits) - 1, int(len(waits) * p))]
+
+        return {
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queue_depth": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "wait_seconds": {
+                "p50": round(percentile(0.5), 3),
+                "p95": round(percentile(0.95), 3),
+                "max": round(waits[-1], 3) if waits else 0.0,
+            },
+            "service_seconds_avg": round(sum(self._service_times) / len(self._service_times), 3) if self._service_times else 0.0,
+        }
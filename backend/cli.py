@@ -0,0 +1,507 @@
+#!/usr/bin/env python
+"""
+一括変換コマンドラインツール
+ディレクトリまたはglobで指定した決算報告書PDFを、複数プロセスで並列に変換します
+
+使い方:
+    python cli.py convert PDFフォルダ/ -o 出力フォルダ/
+    python cli.py convert "archive/2024/*.pdf" -o out/ --format json --workers 4
+    python cli.py convert archive/ -o out/ --page-cache page_cache.sqlite3
+    python cli.py backfill --page-cache page_cache.sqlite3 -o out/
+    python cli.py convert slow.pdf -o out/ --profile sample
+
+出力フォルダには変換結果（xlsx / json / csv）と、ファイルごとの処理時間を含む
+summary.json を出力します。
+
+--page-cache を指定すると、ページごとの抽出結果をキャッシュファイルに保存します。
+キーワード表やテンプレートを変更した後の再変換では、PDFのレイアウト解析を省略します。
+
+backfill はキャッシュ済みの全PDFを、PDFを開かずに現在のキーワード表・セルマッピングで
+照合し直し、前回の抽出結果から変わった値（計算項目を含む）を出力します（-o を指定すると出力も作り直します）。
+
+--profile を指定すると各ファイルの変換をプロファイラー付きで実行し、出力の隣に
+プロファイル（sample: {名前}.collapsed.txt / cprofile: {名前}.pstats）を保存します。
+"""
+
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import page_cache
+from financial_statement import FinancialData, FinancialStatement, as_statement
+from pdf_parser import parse_pdf_statement, parse_pages, load_cached_pages, compile_matchers, configure_parallel_extraction
+from derived_values import DerivedValueEvaluator
+from excel_writer import calculate_derived_values, write_to_excel, prepare_template
+from validator import validate_financial_data
+from exporters import OUTPUT_FORMATS, to_csv, to_json_payload
+from profiling import PROFILE_MODES, run_profiled, write_profile
+from schema import STATEMENTS
+from template_registry import DEFAULT_TEMPLATE, locate_template
+
+SUMMARY_FILENAME = "summary.json"
+BACKFILL_REPORT_FILENAME = "backfill.json"
+
+
+def iter_pdf_paths(inputs: List[str]) -> Iterator[Tuple[str, str]]:
+    """
+    入力（ディレクトリ / glob / ファイル）からPDFファイルを順に列挙
+
+    ディレクトリは os.scandir で再帰的に走査し、見つかった順に返すため、
+    走査の完了を待たずに変換を開始できます。
+
+    Args:
+        inputs: 入力パスまたはglobパターンのリスト
+
+    Yields:
+        (PDFファイルパス, 出力ファイル名の基準となる相対パス) のタプル
+    """
+    seen = set()
+
+    def walk(root: str, directory: str) -> Iterator[Tuple[str, str]]:
+        try:
+            entries = list(os.scandir(directory))
+        except OSError as e:
+            print(f"警告: ディレクトリを読み込めません: {directory} ({e})", file=sys.stderr)
+            return
+        for entry in sorted(entries, key=lambda e: e.name):
+            if entry.is_dir(follow_symlinks=False):
+                yield from walk(root, entry.path)
+            elif entry.is_file() and entry.name.lower().endswith('.pdf'):
+                yield entry.path, os.path.relpath(entry.path, root)
+
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            candidates = walk(pattern, pattern)
+        else:
+            matches = sorted(glob.glob(pattern, recursive=True))
+            if not matches:
+                print(f"警告: 該当するファイルがありません: {pattern}", file=sys.stderr)
+            candidates = (
+                (path, os.path.basename(path))
+                for path in matches
+                if os.path.isfile(path) and path.lower().endswith('.pdf')
+            )
+
+        for path, relative in candidates:
+            key = os.path.abspath(path)
+            if key in seen:
+                continue
+            seen.add(key)
+            yield path, relative
+
+
+def _init_worker(template_path: Optional[str], page_cache_path: Optional[str] = None) -> None:
+    """
+    ワーカープロセスの初期化（テンプレートとマッチャーをプロセス内にキャッシュ）
+
+    一括変換はPDF単位で並列に実行するため、1つのPDF内のページの並列抽出は行いません。
+    """
+    page_cache.configure(page_cache_path)
+    configure_parallel_extraction(0)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for statement in STATEMENTS:
+            compile_matchers(statement.name)
+        if template_path:
+            prepare_template(template_path)
+
+
+def _write_output(data: FinancialStatement, report: Dict[str, Any], output_format: str,
+                  template_path: str, output_path: str) -> None:
+    """
+    抽出結果を出力形式に合わせて書き込む
+    """
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    if output_format == 'xlsx':
+        write_to_excel(data, template_path, output_path)
+        return
+
+    # 計算項目はExcelと同じ値を含める
+    data = calculate_derived_values(data)
+    if output_format == 'json':
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(to_json_payload(data, report), f, ensure_ascii=False, indent=2)
+    else:
+        with open(output_path, 'w', encoding='utf-8', newline='') as f:
+            f.write(to_csv(data))
+
+
+def convert_file(pdf_path: str, output_path: str, output_format: str,
+                 template_path: str, verbose: bool = False, name: Optional[str] = None,
+                 profile: Optional[str] = None) -> Dict[str, Any]:
+    """
+    1ファイルを変換（ワーカープロセスで実行）
+
+    ページキャッシュが有効な場合は、抽出結果を backfill の差分の基準として保存します。
+
+    Args:
+        pdf_path: 入力PDFファイルパス
+        output_path: 出力ファイルパス
+        output_format: 出力形式（'xlsx', 'json', 'csv'）
+        template_path: Excelテンプレートのパス
+        verbose: Trueの場合は変換ログを標準出力に出す
+        name: ページキャッシュに保存するファイル名（入力の相対パス）
+        profile: プロファイラーの種類（'sample' / 'cprofile'、Noneの場合はプロファイルしない）
+
+    Returns:
+        処理結果（ステータス・段階ごとの処理時間など）
+    """
+    result: Dict[str, Any] = {
+        'input': pdf_path,
+        'output': output_path,
+        'status': 'success',
+        'timings': {},
+    }
+    log = io.StringIO()
+    started = time.perf_counter()
+
+    def run() -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        stage = time.perf_counter()
+        parse_stats: Dict[str, Any] = {}
+        data = parse_pdf_statement(pdf_path, stats=parse_stats)
+        result['timings']['parse'] = time.perf_counter() - stage
+        result['timings'].update(parse_stats.get('timings', {}))
+        result['pages'] = parse_stats.get('pages', 0)
+        result['cached_pages'] = parse_stats.get('cached_pages', 0)
+        result['peak_rss_mb'] = parse_stats.get('peak_rss_mb', 0)
+
+        stage = time.perf_counter()
+        data, report = validate_financial_data(data)
+        result['timings']['validate'] = time.perf_counter() - stage
+
+        stage = time.perf_counter()
+        _write_output(data, report, output_format, template_path, output_path)
+        result['timings']['write'] = time.perf_counter() - stage
+        return data, report
+
+    try:
+        with contextlib.redirect_stdout(sys.stdout if verbose else log):
+            if profile:
+                (data, report), profile_data = run_profiled(profile, run)
+                result['profile'] = write_profile(profile_data, os.path.splitext(output_path)[0])
+            else:
+                data, report = run()
+
+            cache = page_cache.get_default_cache()
+            if cache is not None:
+                cache.store_result(page_cache.document_key(pdf_path), name or pdf_path, data.to_dict())
+
+        result['items'] = len(data)
+        result['discrepancies'] = len(report['discrepancies'])
+
+    except Exception as e:
+        result['status'] = 'error'
+        result['error'] = str(e)
+
+    result['timings']['total'] = time.perf_counter() - started
+    return result
+
+
+def diff_values(before: FinancialData, after: FinancialData) -> List[Dict[str, Any]]:
+    """
+    抽出結果の差分（追加・変更・削除された項目）
+
+    Args:
+        before: 前回の抽出結果（保存済みの カテゴリ → {項目名: 数値} の辞書）
+        after: 今回の抽出結果（FinancialStatement）
+
+    Returns:
+        {'category', 'key', 'before', 'after'} のリスト（値が無い側は None）
+    """
+    old = {(category, key): value for category, key, value in as_statement(before).items()}
+    new = {(category, key): value for category, key, value in as_statement(after).items()}
+    changes = []
+    for field in list(new) + [f for f in old if f not in new]:
+        if old.get(field) != new.get(field):
+            category, key = field
+            changes.append({'category': category, 'key': key, 'before': old.get(field), 'after': new.get(field)})
+    return changes
+
+
+def backfill_document(doc: str, name: Optional[str], output_path: Optional[str], output_format: str,
+                      template_path: Optional[str], record: bool = True) -> Dict[str, Any]:
+    """
+    キャッシュ済みの1ファイルを現在のキーワード表で照合し直す（ワーカープロセスで実行）
+
+    Args:
+        doc: page_cache.document_key() の値
+        name: 一括変換時のファイル名
+        output_path: 出力ファイルパス（Noneの場合は出力しない）
+        output_format: 出力形式（'xlsx', 'json', 'csv'）
+        template_path: Excelテンプレートのパス
+        record: 今回の抽出結果を次回の差分の基準として保存するか
+
+    Returns:
+        処理結果（ステータス・前回からの変更など）
+    """
+    result: Dict[str, Any] = {
+        'doc': doc,
+        'name': name,
+        'output': output_path,
+        'status': 'success',
+        'changes': [],
+    }
+    started = time.perf_counter()
+    cache = page_cache.get_default_cache()
+
+    try:
+        pages = load_cached_pages(cache, doc)
+        if pages is None:
+            result['status'] = 'skipped'
+            result['error'] = "キャッシュに無いページがあります（PDFから変換し直してください）"
+            return result
+
+        before = cache.load_result(doc)
+        with contextlib.redirect_stdout(io.StringIO()):
+            data, report = validate_financial_data(parse_pages(pages))
+            if output_path:
+                _write_output(data, report, output_format, template_path, output_path)
+
+            # 計算項目も比較（前回の値を評価した評価器で、入力が変わったノードのみ再計算）
+            evaluator = DerivedValueEvaluator()
+            derived_before = calculate_derived_values(before or {}, evaluator)
+            derived_after = calculate_derived_values(data, evaluator)
+
+        result['baseline'] = before is not None
+        result['changes'] = diff_values(derived_before, derived_after)
+        if record and result['changes']:
+            cache.store_result(doc, name, data.to_dict())
+
+    except Exception as e:
+        result['status'] = 'error'
+        result['error'] = str(e)
+
+    finally:
+        result['seconds'] = time.perf_counter() - started
+    return result
+
+
+def _output_path_for(relative: str, output_dir: str, output_format: str, used: set) -> str:
+    """
+    入力の相対パスから重複しない出力ファイルパスを作成
+    """
+    stem = os.path.splitext(relative)[0]
+    candidate = os.path.join(output_dir, f"{stem}.{output_format}")
+    index = 1
+    while candidate in used:
+        candidate = os.path.join(output_dir, f"{stem}_{index}.{output_format}")
+        index += 1
+    used.add(candidate)
+    return candidate
+
+
+def run_convert(args: argparse.Namespace) -> int:
+    """
+    convert サブコマンド
+
+    Returns:
+        終了コード（失敗したファイルがあれば1）
+    """
+    output_format = args.format
+    template_path = locate_template(args.template)[0] if output_format == 'xlsx' else None
+
+    if template_path and not os.path.exists(template_path):
+        print(f"エラー: テンプレートファイルが見つかりません: {template_path}", file=sys.stderr)
+        return 2
+
+    os.makedirs(args.output, exist_ok=True)
+    workers = args.workers or os.cpu_count() or 1
+
+    print(f"一括変換開始: 出力形式 {output_format}, ワーカー数 {workers}")
+    if args.page_cache:
+        print(f"ページキャッシュ: {args.page_cache}")
+    if args.profile:
+        print(f"プロファイル: {args.profile}")
+    started = time.perf_counter()
+    results: List[Dict[str, Any]] = []
+    used_outputs: set = set()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(template_path, args.page_cache)) as executor:
+        futures = [
+            executor.submit(
+                convert_file,
+                pdf_path,
+                _output_path_for(relative, args.output, output_format, used_outputs),
+                output_format,
+                template_path,
+                args.verbose,
+                relative,
+                args.profile,
+            )
+            for pdf_path, relative in iter_pdf_paths(args.inputs)
+        ]
+
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if result['status'] == 'success':
+                print(f"✓ {result['input']} ({result['timings']['total']:.2f}秒, "
+                      f"{result['items']}項目, 不一致 {result['discrepancies']}件, "
+                      f"ピークRSS {result['peak_rss_mb']}MB)")
+                if 'profile' in result:
+                    timings = result['timings']
+                    print(f"    読み込み {timings['extract']:.2f}秒 / 照合 {timings['match']:.2f}秒 / "
+                          f"検証 {timings['validate']:.2f}秒 / 出力 {timings['write']:.2f}秒 → {result['profile']}")
+            else:
+                print(f"✗ {result['input']}: {result['error']}")
+
+    elapsed = time.perf_counter() - started
+    results.sort(key=lambda r: r['input'])
+    failed = [r for r in results if r['status'] != 'success']
+
+    summary = {
+        'format': output_format,
+        'workers': workers,
+        'files': len(results),
+        'succeeded': len(results) - len(failed),
+        'failed': len(failed),
+        'elapsed_seconds': elapsed,
+        'pages': sum(r.get('pages', 0) for r in results),
+        'cached_pages': sum(r.get('cached_pages', 0) for r in results),
+        'results': results,
+    }
+    summary_path = os.path.join(args.output, SUMMARY_FILENAME)
+    with open(summary_path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+
+    print(f"\n一括変換完了: {summary['succeeded']}/{summary['files']}件成功 ({elapsed:.2f}秒)")
+    if args.page_cache:
+        print(f"キャッシュから読み込んだページ数: {summary['cached_pages']}/{summary['pages']}")
+    print(f"サマリー: {summary_path}")
+
+    return 1 if failed else 0
+
+
+def run_backfill(args: argparse.Namespace) -> int:
+    """
+    backfill サブコマンド
+
+    Returns:
+        終了コード（エラーのファイルがあれば1）
+    """
+    if not args.page_cache or not os.path.exists(args.page_cache):
+        print("エラー: ページキャッシュが見つかりません（--page-cache または PAGE_CACHE_PATH を指定してください）",
+              file=sys.stderr)
+        return 2
+
+    output_format = args.format
+    template_path = locate_template(args.template)[0] if args.output and output_format == 'xlsx' else None
+    if template_path and not os.path.exists(template_path):
+        print(f"エラー: テンプレートファイルが見つかりません: {template_path}", file=sys.stderr)
+        return 2
+
+    cache = page_cache.configure(args.page_cache)
+    documents = cache.documents()
+    workers = args.workers or os.cpu_count() or 1
+    record = not args.dry_run
+
+    print(f"再照合開始: {len(documents)}件, ワーカー数 {workers}"
+          + (f", 出力形式 {output_format}" if args.output else "")
+          + ("（差分の基準は更新しない）" if not record else ""))
+    started = time.perf_counter()
+    results: List[Dict[str, Any]] = []
+    used_outputs: set = set()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(template_path, args.page_cache)) as executor:
+        futures = []
+        for doc, name in documents:
+            output_path = None
+            if args.output:
+                output_path = _output_path_for(name or doc[:16], args.output, output_format, used_outputs)
+            futures.append(executor.submit(
+                backfill_document, doc, name, output_path, output_format, template_path, record,
+            ))
+
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            label = result['name'] or result['doc'][:16]
+            if result['status'] == 'success':
+                print(f"✓ {label}: 変更 {len(result['changes'])}件"
+                      + ("" if result['baseline'] else "（前回の抽出結果なし）"))
+                for change in result['changes']:
+                    print(f"    {change['category']}.{change['key']}: {change['before']} → {change['after']}")
+            elif result['status'] == 'skipped':
+                print(f"- {label}: {result['error']}")
+            else:
+                print(f"✗ {label}: {result['error']}")
+
+    elapsed = time.perf_counter() - started
+    results.sort(key=lambda r: (r['name'] is None, r['name'] or '', r['doc']))
+    failed = [r for r in results if r['status'] == 'error']
+
+    report = {
+        'files': len(results),
+        'changed': sum(1 for r in results if r['changes']),
+        'changes': sum(len(r['changes']) for r in results),
+        'skipped': sum(1 for r in results if r['status'] == 'skipped'),
+        'failed': len(failed),
+        'recorded': record,
+        'elapsed_seconds': elapsed,
+        'results': results,
+    }
+    report_path = args.report or (os.path.join(args.output, BACKFILL_REPORT_FILENAME) if args.output else None)
+    if report_path:
+        os.makedirs(os.path.dirname(report_path) or '.', exist_ok=True)
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(f"\n再照合完了: {report['files']}件中 {report['changed']}件で {report['changes']}項目が変更 "
+          f"(スキップ {report['skipped']}件, エラー {report['failed']}件, {elapsed:.2f}秒)")
+    if report_path:
+        print(f"レポート: {report_path}")
+
+    return 1 if failed else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    コマンドライン引数のパーサーを作成
+    """
+    parser = argparse.ArgumentParser(description="決算報告書PDF→Excel 一括変換ツール")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    convert = subparsers.add_parser('convert', help="PDFを一括変換")
+    convert.add_argument('inputs', nargs='+', help="PDFファイル、ディレクトリ、またはglobパターン")
+    convert.add_argument('-o', '--output', default='output', help="出力ディレクトリ（既定: output）")
+    convert.add_argument('-f', '--format', choices=list(OUTPUT_FORMATS), default='xlsx', help="出力形式（既定: xlsx）")
+    convert.add_argument('-w', '--workers', type=int, default=None, help="ワーカープロセス数（既定: CPUコア数）")
+    convert.add_argument('-t', '--template', default=DEFAULT_TEMPLATE,
+                         help="テンプレート名（template_registry.py）またはExcelテンプレートのパス（既定: %(default)s）")
+    convert.add_argument('--page-cache', default=page_cache.PAGE_CACHE_PATH or None,
+                         help="ページ抽出結果のキャッシュファイル（SQLite、既定: 環境変数 PAGE_CACHE_PATH）")
+    convert.add_argument('--profile', choices=list(PROFILE_MODES), default=None,
+                         help="プロファイラー付きで変換し、出力の隣にプロファイルを保存（sample / cprofile）")
+    convert.add_argument('-v', '--verbose', action='store_true', help="変換ログを表示")
+    convert.set_defaults(handler=run_convert)
+
+    backfill = subparsers.add_parser('backfill', help="キャッシュ済みのPDFを現在のキーワード表で照合し直す")
+    backfill.add_argument('--page-cache', default=page_cache.PAGE_CACHE_PATH or None,
+                          help="ページ抽出結果のキャッシュファイル（既定: 環境変数 PAGE_CACHE_PATH）")
+    backfill.add_argument('-o', '--output', default=None, help="出力を作り直すディレクトリ（省略時は差分のみ）")
+    backfill.add_argument('-f', '--format', choices=list(OUTPUT_FORMATS), default='xlsx', help="出力形式（既定: xlsx）")
+    backfill.add_argument('-w', '--workers', type=int, default=None, help="ワーカープロセス数（既定: CPUコア数）")
+    backfill.add_argument('-t', '--template', default=DEFAULT_TEMPLATE,
+                          help="テンプレート名（template_registry.py）またはExcelテンプレートのパス（既定: %(default)s）")
+    backfill.add_argument('--report', default=None, help=f"差分レポート（JSON）の出力先（既定: 出力ディレクトリの {BACKFILL_REPORT_FILENAME}）")
+    backfill.add_argument('--dry-run', action='store_true', help="今回の抽出結果を次回の差分の基準として保存しない")
+    backfill.set_defaults(handler=run_backfill)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
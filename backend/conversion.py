@@ -0,0 +1,150 @@
+"""
+変換処理モジュール
+PDFの解析・整合性検証・出力作成までの変換処理本体
+
+APIからはスレッドプールまたはプロセスプールで実行されるため、
+戻り値・例外はプロセス間で受け渡し可能（pickle可能）な形にしています。
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from pdf_parser import parse_pdf_statement, compile_matchers
+from excel_writer import calculate_derived_values, write_to_excel, prepare_template
+from validator import validate_financial_data
+from exporters import to_csv, to_json_payload
+from schema import STATEMENTS
+
+
+class ConversionError(Exception):
+    """
+    変換処理のエラー（メッセージはそのままAPIのエラー詳細として返す）
+    """
+
+
+@dataclass
+class ConversionResult:
+    """
+    変換結果
+
+    Attributes:
+        output_format: 出力形式（'xlsx', 'json', 'csv'）
+        validation_report: 整合性検証レポート
+        peak_rss_mb: PDF解析中のピークRSS（MB）
+        payload: JSON出力の内容（json の場合）
+        text: CSV出力の内容（csv の場合）
+        path: 作成したExcelファイルのパス（xlsx の場合）
+        timings: 段階ごとの処理時間（秒）。parse（うち extract: ページの読み込み, match: 項目の照合）,
+                 validate, write（出力の作成）
+    """
+    output_format: str
+    validation_report: Dict[str, Any]
+    peak_rss_mb: float
+    payload: Optional[Dict[str, Any]] = None
+    text: Optional[str] = None
+    path: Optional[str] = None
+    timings: Dict[str, float] = field(default_factory=dict)
+
+
+def warm_up(template_path: Optional[str]) -> None:
+    """
+    キーワードマッチャーとテンプレートをプロセス内にキャッシュ（ワーカープロセスの初期化用）
+    """
+    for statement in STATEMENTS:
+        compile_matchers(statement.name)
+    if template_path:
+        prepare_template(template_path)
+
+
+def convert_document(filename: str, file_content: bytes, output_format: str,
+                     pdf_path: str, excel_path: str, template_path: str) -> ConversionResult:
+    """
+    PDFの解析から出力作成までを実行
+
+    Args:
+        filename: アップロードされたファイル名（ログ用）
+        file_content: PDFファイルの内容
+        output_format: 出力形式（'xlsx', 'json', 'csv'）
+        pdf_path: PDFの一時保存先
+        excel_path: Excelの出力先（xlsx の場合）
+        template_path: Excelテンプレートのパス
+
+    Returns:
+        ConversionResult
+
+    Raises:
+        ConversionError: 変換エラー時
+    """
+    try:
+        # PDFファイルを保存
+        with open(pdf_path, "wb") as f:
+            f.write(file_content)
+
+        print(f"\n{'='*60}")
+        print(f"変換処理開始: {filename}")
+        print(f"{'='*60}")
+
+        # PDFを解析
+        print("\n[1/3] PDF解析中...")
+        timings: Dict[str, float] = {}
+        stage = time.perf_counter()
+        parse_stats: Dict[str, Any] = {}
+        data = parse_pdf_statement(pdf_path, stats=parse_stats)
+        timings['parse'] = time.perf_counter() - stage
+        timings.update(parse_stats.get('timings', {}))
+
+        # データが抽出できたか確認
+        if len(data) == 0:
+            print("警告: PDFからデータを抽出できませんでした")
+
+        # 整合性検証（逆算可能な未抽出項目を補完）
+        print("\n[2/3] 整合性検証中...")
+        stage = time.perf_counter()
+        data, validation_report = validate_financial_data(data)
+        timings['validate'] = time.perf_counter() - stage
+
+        result = ConversionResult(
+            output_format=output_format,
+            validation_report=validation_report,
+            peak_rss_mb=parse_stats.get("peak_rss_mb", 0),
+            timings=timings,
+        )
+
+        # JSON / CSV 出力時はExcel生成を省略（計算項目はExcelと同じ値を含める）
+        stage = time.perf_counter()
+        if output_format in ("json", "csv"):
+            data = calculate_derived_values(data)
+
+        if output_format == "json":
+            print(f"\n変換処理完了（JSON出力）\n")
+            result.payload = to_json_payload(data, validation_report)
+            timings['write'] = time.perf_counter() - stage
+            return result
+
+        if output_format == "csv":
+            print(f"\n変換処理完了（CSV出力）\n")
+            result.text = to_csv(data)
+            timings['write'] = time.perf_counter() - stage
+            return result
+
+        # Excelに書き込み
+        print("\n[3/3] Excel作成中...")
+        write_to_excel(data, template_path, excel_path)
+        timings['write'] = time.perf_counter() - stage
+
+        print(f"\n{'='*60}")
+        print(f"変換処理完了")
+        print(f"{'='*60}\n")
+
+        result.path = excel_path
+        return result
+
+    except FileNotFoundError as e:
+        raise ConversionError(f"ファイルエラー: {str(e)}")
+
+    except Exception as e:
+        print(f"\n変換エラー: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise ConversionError(f"変換エラー: {str(e)}")
@@ -1,129 +1,279 @@
 """
-Excelテンプレート作成スクリプト
-エクセルサンプル.xlsxを完全に複製してテンプレートファイルを作成します
+Excelテンプレートのコンパイルスクリプト
+エクセルサンプル.xlsxから高速書き込み用のアーティファクト（templates/エクセルサンプル.fastfill）を作成します
+
+書き込み先セル（schema.py のセルマッピング、様式の異なるテンプレートは template_registry.py の差分を反映）に
+あらかじめ数値の書式を設定したテンプレートを保存し、各セルのシートXML内の位置を索引にします。
+元のxlsxのzip内ファイルはそのまま使い、書き換えるのは書き込み先セルのあるシートXMLと styles.xml（数値の書式）だけです
+（図形・入力規則・拡張機能などopenpyxlで保存すると失われる部分も残ります）。
+excel_writer.py はこのアーティファクトがあれば、テンプレートを解析せずに値だけを埋め込みます。
+
+使い方:
+    python create_template.py                       # 登録済みの全テンプレート（ファイルがあるもの）
+    python create_template.py [テンプレート名またはパス ...]
 """
 
 import os
-from openpyxl import load_workbook, Workbook
-from openpyxl.styles import Font, Alignment, Border, Side, PatternFill, Protection
-from copy import copy
+import posixpath
+import re
+import sys
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import Dict, Iterable, Optional, Tuple
+
+from openpyxl.utils.cell import coordinate_from_string, column_index_from_string, range_boundaries
+
+from excel_writer import compile_write_plan, write_plan_fingerprint
+from fastfill import FORMAT_VERSION, artifact_path_for, file_sha256, find_cell_element, write_artifact
+from template_registry import TEMPLATES, locate_template, template_for_path
+
+DEFAULT_TEMPLATE_PATH = 'エクセルサンプル.xlsx'
+
+_NS_MAIN = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_NS_REL = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_NS_PKG_REL = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+# 組み込みの数値書式 '#,##0'
+NUMBER_FORMAT_ID = 3
+
+_MERGE_CELL = re.compile(rb'<mergeCell ref="([A-Z]+[0-9]+:[A-Z]+[0-9]+)"')
+_ROW = re.compile(rb'<row r="([0-9]+)"[ />]')
+_CELL = re.compile(rb'<c r="([A-Z]+)[0-9]+"[ />]')
+_XF = re.compile(rb'<xf\b[^>]*?/>|<xf\b.*?</xf>', re.S)
+
+
+def sheet_parts(parts: Dict[str, bytes]) -> Dict[str, str]:
+    """
+    xlsxのzip内ファイルから シート名 → シートXMLのパス を取得
+    """
+    workbook = ET.fromstring(parts['xl/workbook.xml'])
+    rels = ET.fromstring(parts['xl/_rels/workbook.xml.rels'])
+    targets = {rel.get('Id'): rel.get('Target') for rel in rels.iter(f'{_NS_PKG_REL}Relationship')}
+
+    result = {}
+    for sheet in workbook.iter(f'{_NS_MAIN}sheet'):
+        target = targets[sheet.get(f'{_NS_REL}id')]
+        if target.startswith('/'):
+            result[sheet.get('name')] = target.lstrip('/')
+        else:
+            result[sheet.get('name')] = posixpath.normpath(posixpath.join('xl', target))
+    return result
+
+
+def read_parts(path: str) -> Dict[str, bytes]:
+    """
+    xlsxのzip内ファイルを読み込む（zip内の順序を保持）
+    """
+    with zipfile.ZipFile(path) as archive:
+        return {info.filename: archive.read(info) for info in archive.infolist()}
+
+
+def resolve_address(xml: bytes, address: str) -> str:
+    """
+    書き込み対象のセル位置を取得（マージセルの場合は左上のセル）
+    """
+    column, row = coordinate_from_string(address)
+    col = column_index_from_string(column)
+    for match in _MERGE_CELL.finditer(xml):
+        ref = match.group(1).decode('ascii')
+        min_col, min_row, max_col, max_row = range_boundaries(ref)
+        if min_col <= col <= max_col and min_row <= row <= max_row:
+            return ref.split(':')[0]
+    return address
+
+
+def _set_attribute(element: bytes, name: str, value) -> bytes:
+    """
+    要素の開始タグの属性を設定（無い場合は追加）
+    """
+    tag_end = element.index(b'>')
+    if element[tag_end - 1:tag_end] == b'/':
+        tag_end -= 1
+    start_tag = element[:tag_end]
+    attribute = f' {name}="{value}"'.encode('utf-8')
+    pattern = re.compile(rf' {name}="[^"]*"'.encode('utf-8'))
+    if pattern.search(start_tag):
+        start_tag = pattern.sub(attribute, start_tag, count=1)
+    else:
+        start_tag += attribute
+    return start_tag + element[tag_end:]
+
+
+def ensure_cell_element(xml: bytes, address: str) -> bytes:
+    """
+    シートXMLにセル要素が無い場合は空のセル要素を追加（行・列の順序を保持）
+    """
+    if find_cell_element(xml, address) is not None:
+        return xml
+
+    column, row = coordinate_from_string(address)
+    col = column_index_from_string(column)
+    cell = f'<c r="{address}"/>'.encode('utf-8')
+
+    for match in _ROW.finditer(xml):
+        number = int(match.group(1))
+        if number < row:
+            continue
+        if number > row:
+            new_row = f'<row r="{row}">'.encode('utf-8') + cell + b'</row>'
+            return xml[:match.start()] + new_row + xml[match.start():]
+
+        tag_end = xml.index(b'>', match.start())
+        if xml[tag_end - 1:tag_end] == b'/':
+            return xml[:tag_end - 1] + b'>' + cell + b'</row>' + xml[tag_end + 1:]
+        row_end = xml.index(b'</row>', tag_end)
+        position = row_end
+        for existing in _CELL.finditer(xml, tag_end, row_end):
+            if column_index_from_string(existing.group(1).decode('ascii')) > col:
+                position = existing.start()
+                break
+        return xml[:position] + cell + xml[position:]
+
+    new_row = f'<row r="{row}">'.encode('utf-8') + cell + b'</row>'
+    if b'<sheetData/>' in xml:
+        return xml.replace(b'<sheetData/>', b'<sheetData>' + new_row + b'</sheetData>', 1)
+    position = xml.index(b'</sheetData>')
+    return xml[:position] + new_row + xml[position:]
+
+
+def set_cell_style(xml: bytes, address: str, style: int) -> bytes:
+    """
+    セル要素のスタイル番号を設定
+    """
+    start, end, _ = find_cell_element(xml, address)
+    return xml[:start] + _set_attribute(xml[start:end], 's', style) + xml[end:]
+
+
+def add_number_format_styles(styles: bytes, style_ids: Iterable[int]) -> Tuple[bytes, Dict[int, int]]:
+    """
+    styles.xml のセル書式（cellXfs）に、既存の書式へ数値の書式を設定したものを追加
+
+    Args:
+        styles: styles.xml の内容
+        style_ids: 書き込み先セルの現在のスタイル番号
+
+    Returns:
+        (変更後の styles.xml, 現在のスタイル番号 → 数値の書式を設定したスタイル番号)
+    """
+    start = styles.index(b'<cellXfs')
+    body_start = styles.index(b'>', start) + 1
+    body_end = styles.index(b'</cellXfs>', body_start)
+    xfs = _XF.findall(styles, body_start, body_end)
+
+    number_format = str(NUMBER_FORMAT_ID).encode('ascii')
+    mapping: Dict[int, int] = {}
+    added = []
+    for style_id in sorted(set(style_ids)):
+        xf = xfs[style_id]
+        start_tag = xf[:xf.index(b'>')]
+        if re.search(rb' numFmtId="' + number_format + rb'"', start_tag):
+            mapping[style_id] = style_id
+            continue
+        xf = _set_attribute(xf, 'numFmtId', NUMBER_FORMAT_ID)
+        xf = _set_attribute(xf, 'applyNumberFormat', 1)
+        mapping[style_id] = len(xfs) + len(added)
+        added.append(xf)
 
+    if not added:
+        return styles, mapping
+    open_tag = _set_attribute(styles[start:body_start], 'count', len(xfs) + len(added))
+    styles = styles[:start] + open_tag + styles[body_start:body_end] + b''.join(added) + styles[body_end:]
+    return styles, mapping
 
-def create_template(source_path='エクセルサンプル.xlsx', output_path='templates/template.xlsx'):
+
+def compile_template(source_path: str = DEFAULT_TEMPLATE_PATH, output_path: Optional[str] = None) -> bool:
     """
-    元のExcelファイルを完全に複製してテンプレートを作成
+    テンプレートをコンパイルしてアーティファクトを作成
+
+    書き込み先セルはテンプレートの様式（template_registry.template_for_path）に従います。
 
     Args:
         source_path: 元のExcelファイルパス
-        output_path: 出力先テンプレートファイルパス
+        output_path: 出力先アーティファクトのパス（省略時は templates/<テンプレート名>.fastfill）
+
+    Returns:
+        成功した場合True
     """
     if not os.path.exists(source_path):
         print(f"エラー: {source_path} が見つかりません")
-        print("プロジェクトルートに「エクセルサンプル.xlsx」を配置してください")
+        print("backend/ ディレクトリに「エクセルサンプル.xlsx」を配置してください")
         return False
 
-    print(f"テンプレート作成開始: {source_path} -> {output_path}")
+    output_path = output_path or artifact_path_for(source_path)
+    template = template_for_path(source_path).name
+    print(f"テンプレートコンパイル開始: {source_path} -> {output_path} (様式: {template})")
 
     try:
-        # 元のファイルを読み込み
-        source_wb = load_workbook(source_path)
-
-        # 新しいテンプレートを作成
-        template_wb = Workbook()
-        template_wb.remove(template_wb.active)  # デフォルトシート削除
-
-        # 各シートをコピー
-        for sheet_name in source_wb.sheetnames:
-            print(f"  シートをコピー中: {sheet_name}")
-            source_ws = source_wb[sheet_name]
-            template_ws = template_wb.create_sheet(sheet_name)
-
-            # 1. セル値と書式をコピー
-            for row in source_ws:
-                for cell in row:
-                    new_cell = template_ws[cell.coordinate]
-
-                    # 値をコピー
-                    if cell.value is not None:
-                        new_cell.value = cell.value
-
-                    # 書式をコピー
-                    if cell.has_style:
-                        # フォント
-                        if cell.font:
-                            new_cell.font = copy(cell.font)
-
-                        # 罫線
-                        if cell.border:
-                            new_cell.border = copy(cell.border)
-
-                        # 塗りつぶし
-                        if cell.fill:
-                            new_cell.fill = copy(cell.fill)
-
-                        # 数値フォーマット
-                        if cell.number_format:
-                            new_cell.number_format = copy(cell.number_format)
-
-                        # 配置
-                        if cell.alignment:
-                            new_cell.alignment = copy(cell.alignment)
-
-                        # 保護
-                        if cell.protection:
-                            new_cell.protection = copy(cell.protection)
-
-            # 2. マージセルをコピー
-            for merged_cell_range in source_ws.merged_cells.ranges:
-                template_ws.merge_cells(str(merged_cell_range))
-
-            # 3. 列幅をコピー（すべての列プロパティを完全にコピー）
-            for col_letter, col_dim in source_ws.column_dimensions.items():
-                new_col_dim = template_ws.column_dimensions[col_letter]
-                # 各プロパティを安全にコピー
-                if col_dim.width is not None:
-                    new_col_dim.width = col_dim.width
-                new_col_dim.hidden = col_dim.hidden
-                new_col_dim.auto_size = col_dim.auto_size
-                new_col_dim.bestFit = col_dim.bestFit
-                new_col_dim.collapsed = col_dim.collapsed
-                new_col_dim.outline_level = col_dim.outline_level
-
-            # 4. 行高をコピー（すべての行プロパティを完全にコピー）
-            for row_num, row_dim in source_ws.row_dimensions.items():
-                new_row_dim = template_ws.row_dimensions[row_num]
-                # 各プロパティを安全にコピー
-                if row_dim.height is not None:
-                    new_row_dim.height = row_dim.height
-                new_row_dim.hidden = row_dim.hidden
-                new_row_dim.collapsed = row_dim.collapsed
-                new_row_dim.outline_level = row_dim.outline_level
-
-            # 5. シートのプロパティをコピー
-            template_ws.sheet_properties.tabColor = source_ws.sheet_properties.tabColor
-            template_ws.sheet_view.showGridLines = source_ws.sheet_view.showGridLines
-
-        # 出力ディレクトリが存在しない場合は作成
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-
-        # テンプレートを保存
-        template_wb.save(output_path)
-        print(f"✓ テンプレート作成完了: {output_path}")
+        parts = read_parts(source_path)
+        sheets = sheet_parts(parts)
+        plan = compile_write_plan(template)
+
+        # 書き込み先セル（マージセルは左上）の要素を用意
+        targets = {}
+        for cell_plan in plan:
+            if cell_plan.sheet not in sheets:
+                print(f"  警告: シート「{cell_plan.sheet}」が見つかりません - {cell_plan.cell}をスキップ")
+                continue
+            part = sheets[cell_plan.sheet]
+            address = resolve_address(parts[part], cell_plan.cell)
+            parts[part] = ensure_cell_element(parts[part], address)
+            targets[(cell_plan.sheet, cell_plan.cell)] = address
+
+        # 書き込み先セルに数値の書式を設定（実行時は値のみを埋め込む）
+        current = {
+            (sheets[sheet], address): find_cell_element(parts[sheets[sheet]], address)[2] or 0
+            for (sheet, _), address in targets.items()
+        }
+        parts['xl/styles.xml'], styles = add_number_format_styles(parts['xl/styles.xml'], current.values())
+        for (part, address), style in current.items():
+            parts[part] = set_cell_style(parts[part], address, styles[style])
+
+        # 書き込み先セルのシートXML内の位置を索引化
+        cells: Dict[str, Dict[str, dict]] = {}
+        for (sheet, cell), address in targets.items():
+            part = sheets[sheet]
+            found = find_cell_element(parts[part], address)
+            if found is None:
+                raise ValueError(f"セル要素が見つかりません: {sheet}!{address}")
+            start, end, style = found
+            cells.setdefault(sheet, {})[cell] = {
+                'part': part,
+                'address': address,
+                'start': start,
+                'end': end,
+                'style': style,
+            }
+
+        index = {
+            'format_version': FORMAT_VERSION,
+            'source': os.path.basename(source_path),
+            'source_sha256': file_sha256(source_path),
+            'plan_fingerprint': write_plan_fingerprint(template),
+            'sheets': {sheet: part for sheet, part in sheets.items() if sheet in cells},
+            'cells': cells,
+        }
+        write_artifact(output_path, parts, index)
+
+        print(f"✓ テンプレートコンパイル完了: {sum(len(c) for c in cells.values())}セル, {len(cells)}シート")
         return True
 
     except Exception as e:
-        print(f"エラー: テンプレート作成に失敗しました - {str(e)}")
+        print(f"エラー: テンプレートのコンパイルに失敗しました - {str(e)}")
         import traceback
         traceback.print_exc()
         return False
 
 
 if __name__ == "__main__":
-    success = create_template()
-    if success:
-        print("\n✓ テンプレートファイルが正常に作成されました")
-        print("  次のステップ: バックエンドを起動してください")
-        print("  uvicorn main:app --reload --port 8000")
+    if len(sys.argv) > 1:
+        sources = [locate_template(value)[0] for value in sys.argv[1:]]
+    else:
+        sources = [variant.path for variant in TEMPLATES.values() if os.path.exists(variant.path)] or [DEFAULT_TEMPLATE_PATH]
+
+    failed = [source for source in sources if not compile_template(source)]
+    if not failed:
+        print("\n✓ コンパイル済みテンプレートが作成されました")
+        print("  テンプレートまたはセルマッピング（schema.py / template_registry.py）を変更した場合は再実行してください")
     else:
-        print("\n✗ テンプレート作成に失敗しました")
-        print("  「エクセルサンプル.xlsx」を backend/ ディレクトリに配置してから再実行してください")
+        print(f"\n✗ テンプレートのコンパイルに失敗しました: {', '.join(failed)}")
+        sys.exit(1)
@@ -0,0 +1,213 @@
+"""
+財務データモジュール
+抽出した財務データを、スキーマから決まる固定の項目番号の配列で保持します
+
+項目番号は schema.py の全項目（書類・グループ・項目の定義順）に振った連番で、
+別名（aliases）は同じ番号に解決されます。抽出・整合性検証・計算項目・Excel書き込みは
+この番号で値を読み書きするため、リクエストごとに入れ子の辞書を組み立てる必要がありません。
+
+JSON出力やキャッシュとの受け渡しには to_dict() / from_dict() で従来の
+カテゴリ → {項目名: 数値} の辞書に変換し、値だけを保存する場合は
+to_list() / from_list() で項目番号順のリストに変換します。
+"""
+
+import hashlib
+import json
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from schema import CATEGORIES, iter_sections
+
+# (カテゴリ, 項目名)
+Field = Tuple[str, str]
+
+
+@lru_cache(maxsize=None)
+def compile_fields() -> Tuple[Field, ...]:
+    """
+    項目番号 → (カテゴリ, 項目名) の表をスキーマから構築（初回のみ構築しキャッシュ）
+    """
+    fields: List[Field] = []
+    for _, section in iter_sections():
+        for item in section.items:
+            field = (section.category, item.key)
+            if field not in fields:
+                fields.append(field)
+    return tuple(fields)
+
+
+@lru_cache(maxsize=None)
+def field_index() -> Dict[Field, int]:
+    """
+    (カテゴリ, 項目名) → 項目番号 の辞書（別名も同じ番号に解決）
+    """
+    index = {field: number for number, field in enumerate(compile_fields())}
+    for _, section in iter_sections():
+        for item in section.items:
+            for alias in item.aliases:
+                index.setdefault((section.category, alias), index[(section.category, item.key)])
+    return index
+
+
+@lru_cache(maxsize=None)
+def category_slots(category: str) -> Tuple[Tuple[int, str], ...]:
+    """
+    カテゴリの (項目番号, 項目名) のタプル（スキーマの定義順、別名は除く）
+    """
+    return tuple(
+        (number, key) for number, (field_category, key) in enumerate(compile_fields()) if field_category == category
+    )
+
+
+@lru_cache(maxsize=None)
+def fields_fingerprint() -> str:
+    """
+    項目番号の表のハッシュ（to_list() で保存した値の鮮度確認用）
+    """
+    return hashlib.sha256(json.dumps(compile_fields(), ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+class FinancialStatement:
+    """
+    抽出した財務データ（項目番号順の値の配列）
+
+    Attributes:
+        values: 項目番号 → 値（未抽出の項目はNone）
+        extra: スキーマに無い項目 (カテゴリ, 項目名) → 値（from_dict で受け取った場合のみ、通常はNone）
+    """
+
+    __slots__ = ('values', 'extra')
+
+    def __init__(self, values: Optional[Iterable[Optional[int]]] = None,
+                 extra: Optional[Dict[Field, Any]] = None):
+        size = len(compile_fields())
+        self.values: List[Optional[int]] = [None] * size if values is None else list(values)
+        if len(self.values) != size:
+            raise ValueError(f"値の数が項目数と一致しません（{len(self.values)}件、項目数{size}件）")
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'FinancialStatement':
+        """
+        カテゴリ → {項目名: 数値} の辞書から作成（別名は正式な項目名の値が無い場合のみ採用）
+        """
+        index = field_index()
+        statement = cls()
+        values = statement.values
+        for category, items in data.items():
+            if not isinstance(items, dict):
+                continue
+            for key, value in items.items():
+                number = index.get((category, key))
+                if number is None:
+                    if statement.extra is None:
+                        statement.extra = {}
+                    statement.extra[(category, key)] = value
+                elif values[number] is None or compile_fields()[number][1] == key:
+                    values[number] = value
+        return statement
+
+    @classmethod
+    def from_list(cls, values: List[Optional[int]], fingerprint: Optional[str] = None) -> 'FinancialStatement':
+        """
+        to_list() の値から作成
+
+        Raises:
+            ValueError: 項目数またはスキーマのハッシュが一致しない場合
+        """
+        if fingerprint is not None and fingerprint != fields_fingerprint():
+            raise ValueError("保存時とスキーマの項目が異なります")
+        return cls(values)
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        """
+        カテゴリ → {項目名: 数値} の辞書（全カテゴリを含み、項目はスキーマの定義順）
+        """
+        result: Dict[str, Dict[str, Any]] = {category: {} for category in CATEGORIES}
+        for (category, key), value in zip(compile_fields(), self.values):
+            if value is not None:
+                result[category][key] = value
+        for (category, key), value in (self.extra or {}).items():
+            result.setdefault(category, {})[key] = value
+        return result
+
+    def to_list(self) -> List[Optional[int]]:
+        """
+        項目番号順の値のリスト（スキーマに無い項目は含まない）
+        """
+        return list(self.values)
+
+    def get(self, category: str, key: str, default: Any = None) -> Any:
+        number = field_index().get((category, key))
+        if number is None:
+            return (self.extra or {}).get((category, key), default)
+        value = self.values[number]
+        return default if value is None else value
+
+    def set(self, category: str, key: str, value: Any) -> None:
+        number = field_index().get((category, key))
+        if number is None:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[(category, key)] = value
+        else:
+            self.values[number] = value
+
+    def update(self, category: str, items: Dict[str, Any]) -> None:
+        """
+        1カテゴリ分の {項目名: 数値} をまとめて設定
+        """
+        for key, value in items.items():
+            self.set(category, key, value)
+
+    def category(self, category: str) -> Dict[str, Any]:
+        """
+        1カテゴリ分の {項目名: 数値}（抽出済みの項目のみ、スキーマの定義順）
+        """
+        values = self.values
+        return {key: values[number] for number, key in category_slots(category) if values[number] is not None}
+
+    def count(self, category: str) -> int:
+        """
+        1カテゴリの抽出済みの項目数（辞書を作らずに数える）
+        """
+        values = self.values
+        return sum(values[number] is not None for number, _ in category_slots(category))
+
+    def items(self) -> Iterator[Tuple[str, str, Any]]:
+        """
+        抽出済みの (カテゴリ, 項目名, 値) を項目番号順に返す（スキーマに無い項目は最後）
+        """
+        for (category, key), value in zip(compile_fields(), self.values):
+            if value is not None:
+                yield category, key, value
+        for (category, key), value in (self.extra or {}).items():
+            yield category, key, value
+
+    def copy(self) -> 'FinancialStatement':
+        return FinancialStatement(self.values, dict(self.extra) if self.extra else None)
+
+    def __len__(self) -> int:
+        """
+        抽出済みの項目数
+        """
+        return sum(value is not None for value in self.values) + len(self.extra or {})
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, FinancialStatement):
+            return NotImplemented
+        return self.values == other.values and (self.extra or {}) == (other.extra or {})
+
+    def __repr__(self) -> str:
+        return f"FinancialStatement({len(self)}項目)"
+
+
+# FinancialStatement または カテゴリ → {項目名: 数値} の辞書（各モジュールの入力として受け付ける形式）
+FinancialData = Union[FinancialStatement, Dict[str, Any]]
+
+
+def as_statement(data: FinancialData) -> FinancialStatement:
+    """
+    FinancialStatement または カテゴリ → {項目名: 数値} の辞書を FinancialStatement にする
+    """
+    return data if isinstance(data, FinancialStatement) else FinancialStatement.from_dict(data)
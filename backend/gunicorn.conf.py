@@ -0,0 +1,49 @@
+"""
+本番用サーバー設定（gunicorn + UvicornWorker）
+
+使い方:
+    gunicorn main:app -c gunicorn.conf.py
+
+CPUコア数に合わせた複数のワーカープロセスでAPIを実行します。
+アプリはワーカーの起動前にマスタープロセスで読み込み（preload_app）、
+テンプレートとキーワードマッチャーのキャッシュをコピーオンライトで共有します。
+PDF解析（pdfminer）でワーカーのメモリが増え続けないよう、
+一定数のリクエストを処理したワーカーは処理中のリクエストを終えてから入れ替えます。
+
+同時変換数の上限（MAX_CONCURRENT_CONVERSIONS）はワーカーごとの値です。
+サーバー全体の同時変換数は WEB_CONCURRENCY × MAX_CONCURRENT_CONVERSIONS になります。
+"""
+
+import os
+
+# 待ち受けアドレス（RenderなどはPORTを指定する）
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+
+# ワーカー数（既定: CPUコア数）
+workers = int(os.getenv("WEB_CONCURRENCY", "0")) or (os.cpu_count() or 1)
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# ワーカーの起動前にアプリを読み込む
+preload_app = True
+
+# 指定数のリクエストを処理したワーカーを入れ替える（同時に入れ替わらないよう揺らぎを加える）
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "500"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "50"))
+
+# 入れ替え・停止時に処理中の変換を待つ秒数
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "60"))
+# 応答の無いワーカーを再起動するまでの秒数
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+keepalive = 5
+
+accesslog = "-"
+errorlog = "-"
+
+
+def when_ready(server):
+    """
+    ワーカーの起動前（アプリの読み込み後）にキャッシュを準備
+    """
+    import main
+    main.warm_caches()
+    server.log.info("キャッシュを準備しました（%dワーカーで共有）", workers)
@@ -0,0 +1,585 @@
+#!/usr/bin/env python
+"""
+負荷試験ツール
+ローカルに起動したAPIサーバー（uvicorn）へ同時にリクエストを送り、
+スループット・レイテンシ（p50/p95/p99）・エラー率・サーバーのメモリ使用量を計測します
+
+使い方:
+    python loadtest.py --synthetic 20 --concurrency 4 --requests 100
+    python loadtest.py --synthetic 10 --rate 2 --duration 60 --mix convert=3,json=1,health=1
+    python loadtest.py --corpus PDFフォルダ/ --modes inline,thread,process --output result.json
+    python loadtest.py --url http://localhost:8000 --corpus PDFフォルダ/
+
+--rate を指定した場合は平均 rate 件/秒のポアソン到着でリクエストを送ります（オープンループ）。
+省略時は --concurrency 件のクライアントが応答を待ってから次を送ります（クローズドループ）。
+--modes を指定すると、実行方式（CONVERT_EXECUTION_MODE）ごとにサーバーを起動し直して比較します。
+"""
+
+import argparse
+import glob
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from synthetic_pdf import synthetic_filing
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# リクエストの種類 → (メソッド, パス)
+REQUEST_KINDS = {
+    'convert': ('POST', '/api/convert'),
+    'json': ('POST', '/api/convert?format=json'),
+    'health': ('GET', '/health'),
+}
+
+
+@dataclass
+class RequestResult:
+    """
+    1リクエストの結果
+
+    Attributes:
+        kind: リクエストの種類（'convert', 'json', 'health'）
+        started: 送信予定時刻（試験開始からの秒数）
+        latency: 送信予定時刻から応答受信完了までの秒数
+        status: HTTPステータス（接続エラーの場合は0）
+        size: 応答本文のバイト数
+        error: 接続エラーの内容
+    """
+    kind: str
+    started: float
+    latency: float
+    status: int
+    size: int = 0
+    error: Optional[str] = None
+
+
+def load_corpus(corpus_dir: Optional[str], synthetic: int, extra_pages: int = 0) -> List[Tuple[str, bytes]]:
+    """
+    送信するPDFの一覧を作成
+
+    Args:
+        corpus_dir: PDFフォルダ（指定時はフォルダ内のPDFを使用）
+        synthetic: 合成PDFの件数（corpus_dir を指定しない場合）
+        extra_pages: 合成PDFに追加する注記ページ数
+
+    Returns:
+        (ファイル名, PDFの内容) のリスト
+    """
+    if corpus_dir:
+        paths = sorted(glob.glob(os.path.join(corpus_dir, '**', '*.pdf'), recursive=True))
+        corpus = []
+        for path in paths:
+            with open(path, 'rb') as f:
+                corpus.append((os.path.basename(path), f.read()))
+        return corpus
+
+    return [
+        (f"synthetic_{seed:04d}.pdf", synthetic_filing(seed, extra_pages=extra_pages)[0])
+        for seed in range(synthetic)
+    ]
+
+
+def parse_mix(mix: str) -> List[Tuple[str, float]]:
+    """
+    リクエストの配分（例: 'convert=3,json=1,health=1'）を解析
+
+    Raises:
+        ValueError: 不明な種類や不正な比率の場合
+    """
+    weights = []
+    for part in mix.split(','):
+        kind, _, weight = part.strip().partition('=')
+        if kind not in REQUEST_KINDS:
+            raise ValueError(f"不明なリクエストの種類です: {kind}（{', '.join(REQUEST_KINDS)}）")
+        weights.append((kind, float(weight or 1)))
+    if not weights or sum(weight for _, weight in weights) <= 0:
+        raise ValueError(f"リクエストの配分が不正です: {mix}")
+    return weights
+
+
+def encode_multipart(filename: str, content: bytes) -> Tuple[bytes, str]:
+    """
+    PDFを multipart/form-data の本文に変換
+
+    Returns:
+        (本文, Content-Type)
+    """
+    boundary = uuid.uuid4().hex
+    body = b''.join([
+        f'--{boundary}\r\n'.encode('ascii'),
+        f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'.encode('utf-8'),
+        b'Content-Type: application/pdf\r\n\r\n',
+        content,
+        f'\r\n--{boundary}--\r\n'.encode('ascii'),
+    ])
+    return body, f'multipart/form-data; boundary={boundary}'
+
+
+def send_request(base_url: str, kind: str, document: Tuple[str, bytes], timeout: float) -> Tuple[int, int, Optional[str]]:
+    """
+    1リクエストを送信して応答を最後まで受信
+
+    Returns:
+        (HTTPステータス, 応答本文のバイト数, 接続エラーの内容)
+    """
+    method, path = REQUEST_KINDS[kind]
+    body, content_type = (None, None)
+    if method == 'POST':
+        body, content_type = encode_multipart(*document)
+
+    request = urllib.request.Request(base_url + path, data=body, method=method)
+    if content_type:
+        request.add_header('Content-Type', content_type)
+
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, len(response.read()), None
+    except urllib.error.HTTPError as e:
+        return e.code, len(e.read()), None
+    except (urllib.error.URLError, OSError) as e:
+        return 0, 0, str(getattr(e, 'reason', e))
+
+
+def percentile(values: Sequence[float], percent: float) -> Optional[float]:
+    """
+    パーセンタイル（最近接順位法）
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return ordered[int(rank) - 1]
+
+
+def process_tree_rss(pid: int) -> Optional[float]:
+    """
+    プロセスと子孫プロセス（プロセスプールのワーカーを含む）のRSSの合計（MB）
+
+    /proc を参照するためLinuxのみ対応（取得できない場合はNone）
+    """
+    total_kb = 0
+    pending = [pid]
+    seen = set()
+    while pending:
+        current = pending.pop()
+        if current in seen:
+            continue
+        seen.add(current)
+        try:
+            with open(f'/proc/{current}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total_kb += int(line.split()[1])
+                        break
+            for task in os.listdir(f'/proc/{current}/task'):
+                with open(f'/proc/{current}/task/{task}/children') as f:
+                    pending.extend(int(child) for child in f.read().split())
+        except (FileNotFoundError, ProcessLookupError, PermissionError):
+            if current == pid:
+                return None
+    return round(total_kb / 1024, 1)
+
+
+class RSSMonitor:
+    """
+    サーバーのRSSを一定間隔で記録するスレッド
+
+    Args:
+        pid: サーバーのプロセスID
+        interval: 記録間隔（秒）
+    """
+
+    def __init__(self, pid: int, interval: float = 0.5):
+        self.pid = pid
+        self.interval = interval
+        self.samples: List[Tuple[float, float]] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._started = 0.0
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            rss = process_tree_rss(self.pid)
+            if rss is not None:
+                self.samples.append((round(time.monotonic() - self._started, 2), rss))
+            self._stop.wait(self.interval)
+
+    def start(self) -> None:
+        self._started = time.monotonic()
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+class LocalServer:
+    """
+    負荷試験用にAPIサーバー（uvicorn）をサブプロセスで起動するコンテキストマネージャー
+
+    Args:
+        env: サーバーに渡す追加の環境変数（CONVERT_EXECUTION_MODE など）
+        port: ポート番号（0の場合は空いているポートを使用）
+        log_path: サーバーのログの出力先（Noneの場合は破棄）
+    """
+
+    def __init__(self, env: Optional[Dict[str, str]] = None, port: int = 0, log_path: Optional[str] = None):
+        self.env = env or {}
+        self.port = port or _free_port()
+        self.log_path = log_path
+        self.process: Optional[subprocess.Popen] = None
+        self._log = None
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.port}'
+
+    def __enter__(self) -> 'LocalServer':
+        env = {**os.environ, **self.env, 'PYTHONUNBUFFERED': '1'}
+        self._log = open(self.log_path, 'a', encoding='utf-8') if self.log_path else subprocess.DEVNULL
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'uvicorn', 'main:app', '--host', '127.0.0.1', '--port', str(self.port)],
+            cwd=BACKEND_DIR,
+            env=env,
+            stdout=self._log,
+            stderr=subprocess.STDOUT,
+        )
+        try:
+            wait_until_ready(self.url, timeout=60, process=self.process)
+        except Exception:
+            self.__exit__(None, None, None)
+            raise
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        if self._log not in (None, subprocess.DEVNULL):
+            self._log.close()
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(base_url: str, timeout: float, process: Optional[subprocess.Popen] = None) -> None:
+    """
+    /health が応答するまで待機
+
+    Raises:
+        RuntimeError: サーバーが終了した、またはタイムアウトした場合
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"サーバーが起動できませんでした（終了コード {process.returncode}）")
+        try:
+            with urllib.request.urlopen(base_url + '/health', timeout=2) as response:
+                if response.status == 200:
+                    return
+        except (urllib.error.URLError, OSError):
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"サーバーが{timeout}秒以内に応答しませんでした: {base_url}")
+
+
+def run_load(base_url: str, corpus: List[Tuple[str, bytes]], mix: List[Tuple[str, float]],
+             concurrency: int, requests: Optional[int], duration: Optional[float],
+             rate: Optional[float] = None, timeout: float = 300, seed: int = 0) -> Tuple[List[RequestResult], float]:
+    """
+    負荷をかけてリクエストごとの結果を収集
+
+    Args:
+        base_url: サーバーのURL
+        corpus: 送信するPDFの一覧
+        mix: リクエストの種類と比率
+        concurrency: 同時に送信するリクエスト数の上限
+        requests: 送信するリクエスト数（durationと併用時は先に達した方で終了）
+        duration: 試験時間（秒）
+        rate: 平均到着率（件/秒）。Noneの場合はクローズドループ
+        timeout: 1リクエストのタイムアウト（秒）
+        seed: 乱数シード（リクエストの種類・PDFの選択・到着間隔）
+
+    Returns:
+        (結果のリスト, 実際の試験時間（秒）)
+    """
+    rng = random.Random(seed)
+    lock = threading.Lock()
+    results: List[RequestResult] = []
+    kinds = [kind for kind, _ in mix]
+    weights = [weight for _, weight in mix]
+    started = time.monotonic()
+    issued = 0
+
+    def next_request() -> Optional[Tuple[str, Tuple[str, bytes]]]:
+        nonlocal issued
+        with lock:
+            if requests is not None and issued >= requests:
+                return None
+            if duration is not None and time.monotonic() - started >= duration:
+                return None
+            issued += 1
+            return rng.choices(kinds, weights)[0], rng.choice(corpus)
+
+    def execute(kind: str, document: Tuple[str, bytes], scheduled: float) -> None:
+        status, size, error = send_request(base_url, kind, document, timeout)
+        result = RequestResult(
+            kind=kind,
+            started=round(scheduled - started, 3),
+            latency=time.monotonic() - scheduled,
+            status=status,
+            size=size,
+            error=error,
+        )
+        with lock:
+            results.append(result)
+
+    if rate is None:
+        # クローズドループ: 各クライアントは応答を受け取ってから次を送る
+        def client() -> None:
+            while True:
+                request = next_request()
+                if request is None:
+                    return
+                execute(*request, time.monotonic())
+
+        threads = [threading.Thread(target=client) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    else:
+        # オープンループ: 応答を待たずにポアソン到着で送る（送信待ちの時間もレイテンシに含める）
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            scheduled = started
+            while True:
+                scheduled += rng.expovariate(rate)
+                delay = scheduled - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                request = next_request()
+                if request is None:
+                    break
+                executor.submit(execute, *request, scheduled)
+
+    return results, time.monotonic() - started
+
+
+def summarize(results: List[RequestResult], elapsed: float,
+              rss_samples: Optional[List[Tuple[float, float]]] = None) -> Dict[str, Any]:
+    """
+    結果を集計
+
+    429（受付拒否）はエラーと分けて集計します。
+
+    Returns:
+        集計結果の辞書
+    """
+    def latency_stats(items: List[RequestResult]) -> Dict[str, Any]:
+        latencies = [item.latency for item in items if 200 <= item.status < 300]
+        return {
+            'requests': len(items),
+            'ok': len(latencies),
+            'p50': _round(percentile(latencies, 50)),
+            'p95': _round(percentile(latencies, 95)),
+            'p99': _round(percentile(latencies, 99)),
+            'max': _round(max(latencies) if latencies else None),
+        }
+
+    total = len(results)
+    ok = sum(1 for item in results if 200 <= item.status < 300)
+    rejected = sum(1 for item in results if item.status == 429)
+    errors = total - ok - rejected
+
+    summary = {
+        'requests': total,
+        'elapsed_seconds': round(elapsed, 2),
+        'throughput_rps': round(ok / elapsed, 2) if elapsed > 0 else 0,
+        'ok': ok,
+        'rejected_429': rejected,
+        'errors': errors,
+        'error_rate': round(errors / total, 4) if total else 0,
+        'latency': latency_stats(results),
+        'by_kind': {
+            kind: latency_stats([item for item in results if item.kind == kind])
+            for kind in sorted({item.kind for item in results})
+        },
+        'status_counts': {
+            str(status): sum(1 for item in results if item.status == status)
+            for status in sorted({item.status for item in results})
+        },
+    }
+
+    if rss_samples:
+        values = [rss for _, rss in rss_samples]
+        summary['server_rss_mb'] = {
+            'start': values[0],
+            'peak': max(values),
+            'end': values[-1],
+            'samples': rss_samples,
+        }
+
+    return summary
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 3)
+
+
+def print_summary(label: str, summary: Dict[str, Any]) -> None:
+    """
+    集計結果を表示
+    """
+    latency = summary['latency']
+    print(f"\n[{label}]")
+    print(f"  リクエスト数: {summary['requests']}件 / {summary['elapsed_seconds']}秒")
+    print(f"  スループット: {summary['throughput_rps']} 件/秒")
+    print(f"  成功: {summary['ok']}件, 受付拒否(429): {summary['rejected_429']}件, "
+          f"エラー: {summary['errors']}件 (エラー率 {summary['error_rate'] * 100:.1f}%)")
+    print(f"  レイテンシ: p50 {latency['p50']}秒, p95 {latency['p95']}秒, p99 {latency['p99']}秒")
+    for kind, stats in summary['by_kind'].items():
+        print(f"    {kind}: {stats['ok']}/{stats['requests']}件, p50 {stats['p50']}秒, p95 {stats['p95']}秒, p99 {stats['p99']}秒")
+    if 'server_rss_mb' in summary:
+        rss = summary['server_rss_mb']
+        print(f"  サーバーRSS: 開始 {rss['start']}MB, ピーク {rss['peak']}MB, 終了 {rss['end']}MB")
+
+
+def print_comparison(summaries: Dict[str, Dict[str, Any]]) -> None:
+    """
+    実行方式ごとの結果を表形式で表示
+    """
+    print(f"\n{'=' * 78}")
+    print(f"{'実行方式':<10}{'件/秒':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'429':>7}{'エラー':>7}{'ピークRSS(MB)':>16}")
+    print('-' * 78)
+    for mode, summary in summaries.items():
+        latency = summary['latency']
+        peak = summary.get('server_rss_mb', {}).get('peak', '-')
+        print(f"{mode:<12}{summary['throughput_rps']:>9}{str(latency['p50']):>9}{str(latency['p95']):>9}"
+              f"{str(latency['p99']):>9}{summary['rejected_429']:>7}{summary['errors']:>9}{str(peak):>14}")
+    print('=' * 78)
+
+
+def run_scenario(args: argparse.Namespace, corpus: List[Tuple[str, bytes]], mix: List[Tuple[str, float]],
+                 mode: Optional[str]) -> Dict[str, Any]:
+    """
+    サーバーを起動（--url 指定時は既存のサーバーを使用）して1回分の負荷試験を実行
+    """
+    if args.url:
+        wait_until_ready(args.url, timeout=30)
+        results, elapsed = run_load(args.url, corpus, mix, args.concurrency, args.requests,
+                                    args.duration, args.rate, args.timeout, args.seed)
+        return summarize(results, elapsed)
+
+    env = dict(item.split('=', 1) for item in args.env)
+    if mode:
+        env['CONVERT_EXECUTION_MODE'] = mode
+
+    with LocalServer(env=env, port=args.port, log_path=args.server_log) as server:
+        monitor = RSSMonitor(server.process.pid, args.rss_interval)
+        monitor.start()
+        try:
+            results, elapsed = run_load(server.url, corpus, mix, args.concurrency, args.requests,
+                                        args.duration, args.rate, args.timeout, args.seed)
+        finally:
+            monitor.stop()
+    return summarize(results, elapsed, monitor.samples)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="APIサーバーの負荷試験")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--corpus", help="送信するPDFのフォルダ")
+    source.add_argument("--synthetic", type=int, default=10, help="合成PDFの件数（既定: 10）")
+    parser.add_argument("--extra-pages", type=int, default=0, help="合成PDFに追加する注記ページ数")
+    parser.add_argument("--url", help="既存のサーバーのURL（省略時はローカルにuvicornを起動）")
+    parser.add_argument("--port", type=int, default=0, help="ローカルサーバーのポート（既定: 空きポート）")
+    parser.add_argument("--concurrency", "-c", type=int, default=4, help="同時リクエスト数（既定: 4）")
+    parser.add_argument("--rate", type=float, help="平均到着率（件/秒）。指定時はオープンループ")
+    parser.add_argument("--requests", "-n", type=int, help="リクエスト数（既定: 50、--duration 指定時は無制限）")
+    parser.add_argument("--duration", type=float, help="試験時間（秒）")
+    parser.add_argument("--mix", default="convert=1", help="リクエストの配分（例: convert=3,json=1,health=1）")
+    parser.add_argument("--modes", help="比較する実行方式（例: inline,thread,process）")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="ローカルサーバーに渡す環境変数（複数指定可）")
+    parser.add_argument("--timeout", type=float, default=300, help="1リクエストのタイムアウト（秒）")
+    parser.add_argument("--rss-interval", type=float, default=0.5, help="サーバーRSSの記録間隔（秒）")
+    parser.add_argument("--seed", type=int, default=0, help="乱数シード")
+    parser.add_argument("--server-log", help="ローカルサーバーのログの出力先")
+    parser.add_argument("--output", "-o", help="結果をJSONで保存するファイル")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    if args.requests is None and args.duration is None:
+        args.requests = 50
+    if args.url and args.modes:
+        print("エラー: --modes はローカルサーバーを起動する場合のみ指定できます")
+        return 1
+    if any('=' not in item for item in args.env):
+        print("エラー: --env は KEY=VALUE の形式で指定してください")
+        return 1
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        print(f"エラー: {str(e)}")
+        return 1
+
+    corpus = load_corpus(args.corpus, args.synthetic, args.extra_pages)
+    if not corpus:
+        print("エラー: 送信するPDFがありません")
+        return 1
+
+    modes = [mode.strip() for mode in args.modes.split(',')] if args.modes else [None]
+    loop_type = f"オープンループ {args.rate}件/秒" if args.rate else "クローズドループ"
+    print(f"負荷試験開始: PDF {len(corpus)}件, 同時 {args.concurrency}, {loop_type}")
+
+    summaries: Dict[str, Dict[str, Any]] = {}
+    for mode in modes:
+        label = mode or 'default'
+        try:
+            summaries[label] = run_scenario(args, corpus, mix, mode)
+        except RuntimeError as e:
+            print(f"✗ {label}: {str(e)}")
+            return 1
+        print_summary(label, summaries[label])
+
+    if len(summaries) > 1:
+        print_comparison(summaries)
+
+    if args.output:
+        report = {
+            'config': vars(args),
+            'corpus_size': len(corpus),
+            'results': summaries,
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n結果を保存しました: {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,24 +3,58 @@ FastAPI バックエンドアプリケーション
 決算報告書PDF→Excel変換API
 """
 
+import asyncio
+import base64
+import hmac
+import json
 import os
 import uuid
-from typing import Optional
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Any, Dict, Iterator, Optional
+from fastapi import FastAPI, UploadFile, File, HTTPException, Query, Request
+from fastapi.concurrency import iterate_in_threadpool, run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
-from pdf_parser import parse_pdf
-from excel_writer import write_to_excel
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
+from pdf_parser import iter_parse_events, shutdown_extract_pool
+from excel_writer import calculate_derived_values, iter_write_excel
+from derived_values import DerivedValueEvaluator
+from validator import validate_financial_data
+from financial_statement import FinancialStatement
+from exporters import OUTPUT_FORMATS, resolve_output_format, to_json_payload
+from conversion import ConversionError, ConversionResult, convert_document, warm_up
+from profiling import PROFILE_MODES, run_profiled
+from admission import AdmissionController, QueueFullError
+from preflight import PreflightError, PreflightReport, inspect_pdf
+from template_registry import DEFAULT_TEMPLATE, TEMPLATES, TemplateVariant, get_template
+from temp_files import TempFileSweeper
 from dotenv import load_dotenv
 
 # 環境変数を読み込み
 load_dotenv()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    起動時に一時ファイルの定期削除を開始し、終了時に停止（変換用・ページ抽出用のプロセスプールも終了）
+    """
+    temp_files.start()
+    yield
+    await temp_files.stop()
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+    shutdown_extract_pool()
+
+
 # FastAPIアプリケーション作成
 app = FastAPI(
     title="決算報告書PDF→Excel変換API",
     description="建設業の決算報告書PDFをExcelに自動変換するAPI",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS設定（フロントエンドとの通信用）
@@ -47,13 +81,60 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Validation-Report", "X-Queue-Wait-Seconds", "X-Peak-RSS-MB",
+                    "X-Preflight-Cost", "X-Conversion-Lane"],
 )
 
 # 定数
 UPLOAD_DIR = "uploads"
-TEMPLATE_PATH = "エクセルサンプル.xlsx"
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
 
+# 同時実行制御（512MBのインスタンスでもメモリ不足にならないよう変換数を制限）
+MAX_CONCURRENT_CONVERSIONS = int(os.getenv("MAX_CONCURRENT_CONVERSIONS", "2"))
+MAX_QUEUED_CONVERSIONS = int(os.getenv("MAX_QUEUED_CONVERSIONS", "8"))
+QUEUE_TIMEOUT_SECONDS = float(os.getenv("QUEUE_TIMEOUT_SECONDS", "60"))
+
+admission = AdmissionController(
+    max_in_flight=MAX_CONCURRENT_CONVERSIONS,
+    max_queue=MAX_QUEUED_CONVERSIONS,
+    queue_timeout=QUEUE_TIMEOUT_SECONDS,
+)
+
+# 時間のかかるPDF（事前検査の見積もりが PREFLIGHT_HEAVY_SECONDS 以上）の待ち行列
+# この待ち行列を通過した後、通常のリクエストが待っていない場合にのみ変換の実行枠を使う
+HEAVY_MAX_CONCURRENT_CONVERSIONS = int(os.getenv("HEAVY_MAX_CONCURRENT_CONVERSIONS", "1"))
+HEAVY_MAX_QUEUED_CONVERSIONS = int(os.getenv("HEAVY_MAX_QUEUED_CONVERSIONS", "4"))
+HEAVY_QUEUE_TIMEOUT_SECONDS = float(os.getenv("HEAVY_QUEUE_TIMEOUT_SECONDS", "300"))
+
+heavy_admission = AdmissionController(
+    max_in_flight=HEAVY_MAX_CONCURRENT_CONVERSIONS,
+    max_queue=HEAVY_MAX_QUEUED_CONVERSIONS,
+    queue_timeout=HEAVY_QUEUE_TIMEOUT_SECONDS,
+    name="重いPDF",
+)
+
+# 変換処理の実行方式（inline / thread / process）
+CONVERT_EXECUTION_MODES = ("inline", "thread", "process")
+CONVERT_EXECUTION_MODE = os.getenv("CONVERT_EXECUTION_MODE", "thread").strip().lower()
+if CONVERT_EXECUTION_MODE not in CONVERT_EXECUTION_MODES:
+    print(f"警告: CONVERT_EXECUTION_MODE={CONVERT_EXECUTION_MODE} は無効です（thread で実行します）")
+    CONVERT_EXECUTION_MODE = "thread"
+CONVERT_PROCESS_WORKERS = int(os.getenv("CONVERT_PROCESS_WORKERS", "0")) or MAX_CONCURRENT_CONVERSIONS
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+# プロファイリング（X-Profile ヘッダーと管理者トークンを指定したリクエストのみ、未設定の場合は無効）
+PROFILE_ADMIN_TOKEN = os.getenv("PROFILE_ADMIN_TOKEN", "").strip()
+
+# 一時ファイルの有効期限（送信されなかった出力Excelなどを定期的に削除）
+TEMP_FILE_TTL_SECONDS = float(os.getenv("TEMP_FILE_TTL_SECONDS", "3600"))
+TEMP_SWEEP_INTERVAL_SECONDS = float(os.getenv("TEMP_SWEEP_INTERVAL_SECONDS", "300"))
+
+temp_files = TempFileSweeper(
+    UPLOAD_DIR,
+    ttl_seconds=TEMP_FILE_TTL_SECONDS,
+    interval_seconds=TEMP_SWEEP_INTERVAL_SECONDS,
+)
+
 # アップロードディレクトリの作成
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
@@ -69,6 +150,11 @@ def read_root():
         "status": "running",
         "endpoints": {
             "convert": "/api/convert (POST)",
+            "convert_stream": "/api/convert/stream (POST)",
+            "download": "/api/download/{file_id} (GET)",
+            "templates": "/api/templates (GET)",
+            "stats": "/api/stats (GET)",
+            "cleanup": "/api/cleanup (DELETE)",
             "health": "/health (GET)"
         }
     }
@@ -79,32 +165,246 @@ def health_check():
     """
     ヘルスチェックエンドポイント
     """
-    # テンプレートファイルの存在確認
-    template_exists = os.path.exists(TEMPLATE_PATH)
+    # テンプレートファイルの存在確認（template パラメータを省略した場合のテンプレート）
+    template = get_template()
+    template_exists = os.path.exists(template.path)
 
     return {
         "status": "healthy" if template_exists else "degraded",
         "template_exists": template_exists,
-        "template_path": TEMPLATE_PATH,
-        "message": "OK" if template_exists else "エクセルサンプル.xlsxファイルが見つかりません。backend/ディレクトリに配置してください。"
+        "template_path": template.path,
+        "templates": {name: os.path.exists(variant.path) for name, variant in TEMPLATES.items()},
+        "message": "OK" if template_exists else f"{template.filename}ファイルが見つかりません。backend/ディレクトリに配置してください。"
+    }
+
+
+@app.get("/api/templates")
+def list_templates():
+    """
+    変換に使えるテンプレート（届出書の様式）の一覧（template パラメータに指定する名前）
+    """
+    return {
+        "default": DEFAULT_TEMPLATE,
+        "templates": [
+            {"name": name, "label": variant.label, "available": os.path.exists(variant.path)}
+            for name, variant in TEMPLATES.items()
+        ]
     }
 
 
+@app.get("/api/stats")
+def conversion_stats():
+    """
+    変換処理の同時実行数・待ち行列（heavy: 時間のかかるPDFの待ち行列）・実行方式・一時ファイル削除の統計
+    """
+    return {
+        **admission.stats(),
+        "heavy": heavy_admission.stats(),
+        "execution_mode": CONVERT_EXECUTION_MODE,
+        "temp_files": temp_files.stats()
+    }
+
+
+@app.delete("/api/cleanup")
+def cleanup_temp_files():
+    """
+    一時ファイルをクリーンアップ（管理用）
+
+    変換中・送信中のファイルは、他のワーカープロセスのものも含めて削除しません。
+    """
+    try:
+        result = temp_files.sweep(ttl_seconds=0)
+        return {
+            "status": "success",
+            "message": f"{result['deleted']}個の一時ファイルを削除しました"
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"クリーンアップエラー: {str(e)}")
+
+
 @app.post("/api/convert")
-async def convert_pdf_to_excel(file: UploadFile = File(...)):
+async def convert_pdf_to_excel(
+    request: Request,
+    file: UploadFile = File(...),
+    output_format: Optional[str] = Query(None, alias="format", description="出力形式（xlsx / json / csv）"),
+    template: Optional[str] = Query(None, description="テンプレート名（/api/templates、省略時は既定のテンプレート）")
+):
     """
     PDFをExcelに変換するメインエンドポイント
 
+    format パラメータまたは Accept ヘッダーで json / csv を指定した場合は、
+    Excelを生成せずに抽出データのみを返します。
+    template パラメータで書き込み先のテンプレート（届出書の様式）を選択します。
+
+    変換前にPDFの構造を検査し、読み込めないPDFや時間がかかりすぎるPDFは400で拒否します。
+    時間のかかるPDFは優先度の低い待ち行列で変換します（X-Conversion-Lane: heavy）。
+
+    X-Profile ヘッダー（sample / cprofile）と X-Admin-Token ヘッダー（PROFILE_ADMIN_TOKEN）を
+    指定した場合は、変換をプロファイラー付きで実行し、出力の代わりにプロファイルと
+    段階ごとの処理時間をJSONで返します。
+
     Args:
+        request: リクエスト（Acceptヘッダーの参照用）
         file: アップロードされたPDFファイル
+        output_format: 出力形式（省略時はAcceptヘッダーで判定、既定はxlsx）
+        template: テンプレート名（省略時は DEFAULT_TEMPLATE）
 
     Returns:
-        変換されたExcelファイル
+        変換されたExcelファイル、または抽出データ（JSON / CSV）
 
     Raises:
-        HTTPException: ファイル検証エラー、変換エラー時
+        HTTPException: ファイル検証エラー、未登録のテンプレート、変換エラー時
     """
+    # 出力形式の判定
+    try:
+        output_format = resolve_output_format(output_format, request.headers.get("accept"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    variant = resolve_template(template)
+
+    profile_mode = request.headers.get("x-profile")
+    if profile_mode is not None:
+        profile_mode = authorize_profile(profile_mode, request.headers.get("x-admin-token"))
+
     # ファイル検証
+    file_content = await read_pdf_upload(file, variant if output_format == "xlsx" else None)
+    report = await preflight_pdf(file.filename, file_content)
+
+    # 同時実行数の制限（待ち行列が満杯の場合は429）
+    try:
+        async with conversion_slot(report) as waited:
+            if profile_mode is not None:
+                response = await run_profiled_conversion(
+                    file.filename, file_content, output_format, variant.path, profile_mode
+                )
+            else:
+                response = await run_conversion(file.filename, file_content, output_format, variant.path)
+            response.headers["X-Queue-Wait-Seconds"] = f"{waited:.3f}"
+            response.headers["X-Preflight-Cost"] = f"{report.estimated_seconds:.3f}"
+            response.headers["X-Conversion-Lane"] = conversion_lane(report)
+            return response
+    except QueueFullError as e:
+        raise queue_full_error(e)
+
+
+@app.post("/api/convert/stream")
+async def convert_pdf_stream(
+    file: UploadFile = File(...),
+    template: Optional[str] = Query(None, description="テンプレート名（/api/templates、省略時は既定のテンプレート）")
+):
+    """
+    PDFをExcelに変換し、進捗を Server-Sent Events で返すエンドポイント
+
+    ページの読み込み・項目の抽出・シートの書き込みごとにイベントを送信し、
+    最後の complete イベントでダウンロードURLを返します。
+    最初の queued イベントには事前検査の見積もり秒数と待ち行列の種類を含めます。
+
+    Args:
+        file: アップロードされたPDFファイル
+        template: テンプレート名（省略時は DEFAULT_TEMPLATE）
+
+    Returns:
+        text/event-stream のレスポンス
+
+    Raises:
+        HTTPException: ファイル検証エラー、未登録のテンプレート、待ち行列が満杯の場合
+    """
+    variant = resolve_template(template)
+    file_content = await read_pdf_upload(file, variant)
+    report = await preflight_pdf(file.filename, file_content)
+
+    # 実行枠はストリームの送信が終わるまで保持する
+    # （ジェネレーターが一度も実行されずに切断された場合もレスポンスのバックグラウンドタスクで解放）
+    slot = AsyncExitStack()
+    try:
+        waited = await slot.enter_async_context(conversion_slot(report))
+    except QueueFullError as e:
+        raise queue_full_error(e)
+
+    async def event_stream():
+        try:
+            yield format_sse("queued", {
+                "waited_seconds": round(waited, 3),
+                "estimated_seconds": round(report.estimated_seconds, 3),
+                "lane": conversion_lane(report),
+            })
+            async for event in iterate_in_threadpool(iter_conversion_events(file.filename, file_content, variant.path)):
+                yield format_sse(event.pop("event"), event)
+        finally:
+            await slot.aclose()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(slot.aclose),
+    )
+
+
+@app.get("/api/download/{file_id}")
+def download_excel(file_id: str):
+    """
+    ストリーミング変換で作成したExcelファイルのダウンロード
+
+    Args:
+        file_id: complete イベントで通知されたファイルID
+
+    Returns:
+        Excelファイル
+
+    Raises:
+        HTTPException: ファイルが存在しない場合
+    """
+    try:
+        file_id = str(uuid.UUID(file_id))
+    except ValueError:
+        raise HTTPException(status_code=404, detail="ファイルが見つかりません")
+
+    excel_path = os.path.join(UPLOAD_DIR, f"{file_id}_output.xlsx")
+    temp_files.acquire(excel_path)
+    if not os.path.exists(excel_path):
+        temp_files.release(excel_path)
+        raise HTTPException(status_code=404, detail="ファイルが見つかりません（有効期限が切れた可能性があります）")
+
+    # 送信後に削除
+    return FileResponse(
+        excel_path,
+        media_type=OUTPUT_FORMATS["xlsx"],
+        filename="事業年度終了届出書.xlsx",
+        headers={
+            "Content-Disposition": "attachment; filename*=UTF-8''%E4%BA%8B%E6%A5%AD%E5%B9%B4%E5%BA%A6%E7%B5%82%E4%BA%86%E5%B1%8A%E5%87%BA%E6%9B%B8.xlsx"
+        },
+        background=BackgroundTask(temp_files.remove, excel_path)
+    )
+
+
+def resolve_template(name: Optional[str]) -> TemplateVariant:
+    """
+    template パラメータからテンプレートを取得
+
+    Raises:
+        HTTPException: 未登録のテンプレート名の場合（400）
+    """
+    try:
+        return get_template(name)
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=e.args[0])
+
+
+async def read_pdf_upload(file: UploadFile, template: Optional[TemplateVariant]) -> bytes:
+    """
+    アップロードされたPDFを検証して読み込む
+
+    Args:
+        file: アップロードされたPDFファイル
+        template: 指定した場合はExcelテンプレートの存在も確認
+
+    Returns:
+        PDFファイルの内容
+
+    Raises:
+        HTTPException: ファイル検証エラー、テンプレートが無い場合
+    """
     if not file.filename:
         raise HTTPException(status_code=400, detail="ファイルが選択されていません")
 
@@ -124,100 +424,385 @@ async def convert_pdf_to_excel(file: UploadFile = File(...)):
     if file_size == 0:
         raise HTTPException(status_code=400, detail="ファイルが空です")
 
-    # テンプレートファイルの存在確認
-    if not os.path.exists(TEMPLATE_PATH):
+    # テンプレートファイルの存在確認（Excel出力時のみ）
+    if template is not None and not os.path.exists(template.path):
         raise HTTPException(
             status_code=500,
-            detail="エクセルサンプル.xlsxファイルが見つかりません。backend/ディレクトリに配置してください。"
+            detail=f"{template.filename}ファイルが見つかりません。backend/ディレクトリに配置してください。"
         )
 
+    return file_content
+
+
+async def preflight_pdf(filename: str, file_content: bytes) -> PreflightReport:
+    """
+    PDFの構造を検査して変換時間を見積もる（preflight.inspect_pdf）
+
+    Args:
+        filename: アップロードされたファイル名（ログ用）
+        file_content: PDFファイルの内容
+
+    Returns:
+        PreflightReport
+
+    Raises:
+        HTTPException: 読み込めないPDF、ページ数または見積もりが上限を超えた場合（400）
+    """
+    try:
+        report = await run_in_threadpool(inspect_pdf, file_content)
+    except PreflightError as e:
+        print(f"✗ 事前検査で拒否: {filename} ({str(e)})")
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if report.heavy:
+        print(f"時間のかかるPDF: {filename} ({report.page_count}ページ, 見積もり{report.estimated_seconds:.1f}秒)")
+    return report
+
+
+def conversion_lane(report: PreflightReport) -> str:
+    """
+    変換に使う待ち行列の種類（heavy / normal）
+    """
+    return "heavy" if report.heavy else "normal"
+
+
+@asynccontextmanager
+async def conversion_slot(report: PreflightReport):
+    """
+    事前検査の結果に応じて変換の実行枠を確保するコンテキストマネージャー
+
+    時間のかかるPDFは専用の待ち行列（heavy_admission）を通過した後、
+    通常のリクエストが待っていない場合にのみ変換の実行枠を使います。
+
+    Yields:
+        待ち時間の合計（秒）
+
+    Raises:
+        QueueFullError: 待ち行列が満杯、または待ち時間が上限を超えた場合
+    """
+    if not report.heavy:
+        async with admission.slot() as waited:
+            yield waited
+        return
+
+    async with heavy_admission.slot() as heavy_waited:
+        async with admission.slot(low_priority=True) as waited:
+            yield heavy_waited + waited
+
+
+def queue_full_error(error: QueueFullError) -> HTTPException:
+    """
+    受付拒否を 429 + Retry-After のHTTPExceptionに変換
+    """
+    print(f"受付拒否: {str(error)} ({error.queue}: 待ち {error.waiting}件, 実行中 {error.in_flight}件)")
+    return HTTPException(
+        status_code=429,
+        detail=f"{str(error)}。{error.retry_after}秒後に再試行してください",
+        headers={"Retry-After": str(error.retry_after)}
+    )
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """
+    Server-Sent Events の1イベント分の文字列を作成
+    """
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def run_conversion(filename: str, file_content: bytes, output_format: str, template_path: str) -> Response:
+    """
+    PDFの解析からレスポンス作成までを実行（CONVERT_EXECUTION_MODE の方式で実行）
+
+    Args:
+        filename: アップロードされたファイル名（ログ用）
+        file_content: PDFファイルの内容
+        output_format: 出力形式（'xlsx', 'json', 'csv'）
+        template_path: Excelテンプレートのパス
+
+    Returns:
+        レスポンス
+
+    Raises:
+        HTTPException: 変換エラー時
+    """
     # 一時ファイル名の生成
     file_id = str(uuid.uuid4())
     pdf_path = os.path.join(UPLOAD_DIR, f"{file_id}.pdf")
     excel_path = os.path.join(UPLOAD_DIR, f"{file_id}_output.xlsx")
+    # 変換中のファイルを定期削除の対象から除外
+    temp_files.acquire(pdf_path)
+    temp_files.acquire(excel_path)
+    excel_sent = False
 
     try:
-        # PDFファイルを保存
-        with open(pdf_path, "wb") as f:
-            f.write(file_content)
+        try:
+            result = await execute_conversion(
+                filename, file_content, output_format, pdf_path, excel_path, template_path
+            )
+        except ConversionError as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+        # 検証レポート（ヘッダーはASCIIのみのためエスケープしたJSON）
+        report_header = json.dumps(result.validation_report, ensure_ascii=True)
+        # PDF解析中のピークRSS（変換を実行したプロセス全体の値）
+        peak_rss_header = str(result.peak_rss_mb)
+
+        if output_format == "json":
+            return JSONResponse(result.payload, headers={"X-Peak-RSS-MB": peak_rss_header})
+
+        if output_format == "csv":
+            return Response(
+                content=result.text,
+                media_type=OUTPUT_FORMATS["csv"],
+                headers={"X-Validation-Report": report_header, "X-Peak-RSS-MB": peak_rss_header}
+            )
+
+        # Excelファイルを返却（送信後に削除）
+        excel_sent = True
+        return FileResponse(
+            result.path,
+            media_type=OUTPUT_FORMATS["xlsx"],
+            filename="事業年度終了届出書.xlsx",
+            headers={
+                "Content-Disposition": "attachment; filename*=UTF-8''%E4%BA%8B%E6%A5%AD%E5%B9%B4%E5%BA%A6%E7%B5%82%E4%BA%86%E5%B1%8A%E5%87%BA%E6%9B%B8.xlsx",
+                "X-Validation-Report": report_header,
+                "X-Peak-RSS-MB": peak_rss_header
+            },
+            background=BackgroundTask(temp_files.remove, excel_path)
+        )
 
-        print(f"\n{'='*60}")
-        print(f"変換処理開始: {file.filename}")
-        print(f"{'='*60}")
+    finally:
+        # 一時PDFファイルを削除（Excelは返却後に削除される）
+        temp_files.remove(pdf_path)
+        if not excel_sent:
+            temp_files.remove(excel_path)
 
-        # PDFを解析
-        print("\n[1/2] PDF解析中...")
-        data = parse_pdf(pdf_path)
 
-        # データが抽出できたか確認
-        total_items = sum([
-            len(data.get('balance_sheet_assets', {})),
-            len(data.get('balance_sheet_liabilities', {})),
-            len(data.get('balance_sheet_equity', {})),
-            len(data.get('income_statement', {})),
-            len(data.get('non_operating', {})),
-            len(data.get('equity_change', {}))
-        ])
+def authorize_profile(mode: str, token: Optional[str]) -> str:
+    """
+    プロファイリングのリクエストを検証
 
-        if total_items == 0:
-            print("警告: PDFからデータを抽出できませんでした")
+    Args:
+        mode: X-Profile ヘッダーの値（sample / cprofile）
+        token: X-Admin-Token ヘッダーの値
 
-        # Excelに書き込み
-        print("\n[2/2] Excel作成中...")
-        write_to_excel(data, TEMPLATE_PATH, excel_path)
+    Returns:
+        プロファイラーの種類
 
-        print(f"\n{'='*60}")
-        print(f"変換処理完了")
-        print(f"{'='*60}\n")
+    Raises:
+        HTTPException: 管理者トークンが未設定・不一致（403）、種類が不正（400）
+    """
+    if not PROFILE_ADMIN_TOKEN or not hmac.compare_digest((token or "").encode(), PROFILE_ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="プロファイリングの権限がありません")
+    mode = mode.strip().lower()
+    if mode not in PROFILE_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"X-Profile が不正です: {mode}（{' / '.join(PROFILE_MODES)} を指定してください）"
+        )
+    return mode
 
-        # Excelファイルを返却
-        return FileResponse(
-            excel_path,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            filename="事業年度終了届出書.xlsx",
-            headers={
-                "Content-Disposition": "attachment; filename*=UTF-8''%E4%BA%8B%E6%A5%AD%E5%B9%B4%E5%BA%A6%E7%B5%82%E4%BA%86%E5%B1%8A%E5%87%BA%E6%9B%B8.xlsx"
-            }
+
+async def run_profiled_conversion(filename: str, file_content: bytes, output_format: str,
+                                  template_path: str, mode: str) -> Response:
+    """
+    変換をプロファイラー付きで実行し、プロファイルと段階ごとの処理時間を返す
+
+    プロファイラーは変換を実行するスレッドを計測するため、実行方式にかかわらず
+    スレッドプールで実行します。出力（Excelなど）は返さずに削除します。
+
+    Args:
+        filename: アップロードされたファイル名
+        file_content: PDFファイルの内容
+        output_format: 出力形式（'xlsx', 'json', 'csv'）
+        template_path: Excelテンプレートのパス
+        mode: プロファイラーの種類（sample / cprofile）
+
+    Returns:
+        プロファイル（sample: collapsed stacks、cprofile: base64エンコードした pstats と上位関数の一覧）を含むJSON
+
+    Raises:
+        HTTPException: 変換エラー時
+    """
+    file_id = str(uuid.uuid4())
+    pdf_path = os.path.join(UPLOAD_DIR, f"{file_id}.pdf")
+    excel_path = os.path.join(UPLOAD_DIR, f"{file_id}_output.xlsx")
+    temp_files.acquire(pdf_path)
+    temp_files.acquire(excel_path)
+
+    try:
+        try:
+            result, profile = await run_in_threadpool(
+                run_profiled, mode, convert_document,
+                filename, file_content, output_format, pdf_path, excel_path, template_path
+            )
+        except ConversionError as e:
+            raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        temp_files.remove(pdf_path)
+        temp_files.remove(excel_path)
+
+    if "pstats" in profile:
+        profile["pstats"] = base64.b64encode(profile["pstats"]).decode("ascii")
+
+    print(f"✓ プロファイル取得: {filename} ({mode}, {profile['elapsed_seconds']:.2f}秒)")
+    return JSONResponse(
+        {
+            "filename": filename,
+            "output_format": output_format,
+            "timings": result.timings,
+            "peak_rss_mb": result.peak_rss_mb,
+            "validation_report": result.validation_report,
+            "profile": profile,
+        },
+        headers={"Cache-Control": "no-store"}
+    )
+
+
+async def execute_conversion(*args) -> ConversionResult:
+    """
+    conversion.convert_document を実行方式に応じて実行
+
+    inline: イベントループ上で直接実行（比較用。変換中は他のリクエストを処理できません）
+    thread: スレッドプールで実行
+    process: プロセスプールで実行（GILの影響を受けずに複数の変換を並列実行）
+
+    Raises:
+        ConversionError: 変換エラー時
+    """
+    if CONVERT_EXECUTION_MODE == "inline":
+        return convert_document(*args)
+
+    if CONVERT_EXECUTION_MODE == "thread":
+        return await run_in_threadpool(convert_document, *args)
+
+    global _process_pool
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(get_process_pool(), convert_document, *args)
+    except BrokenProcessPool:
+        # 異常終了したプールは破棄し、次のリクエストで作り直す
+        print("警告: 変換ワーカープロセスが異常終了しました")
+        _process_pool = None
+        raise ConversionError("変換エラー: 変換ワーカープロセスが異常終了しました")
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    変換用のプロセスプール（最初の変換時に作成し、ワーカーで既定のテンプレートを事前に読み込む）
+
+    他のテンプレートは、各ワーカーでそのテンプレートを使う最初の変換時に読み込みます。
+    """
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(
+            max_workers=CONVERT_PROCESS_WORKERS,
+            initializer=warm_up,
+            initargs=(default_template_path(),),
         )
+        print(f"変換プロセスプール作成: {CONVERT_PROCESS_WORKERS}プロセス")
+    return _process_pool
+
+
+def iter_conversion_events(filename: str, file_content: bytes, template_path: str) -> Iterator[Dict[str, Any]]:
+    """
+    PDFの解析からExcel作成までを実行し、進捗をイベントとして順に返す
+
+    Args:
+        filename: アップロードされたファイル名（ログ用）
+        file_content: PDFファイルの内容
+        template_path: Excelテンプレートのパス
+
+    Yields:
+        イベントの辞書（'event' キーで種類を判別）
+        page / items / statement: PDF解析の進捗（pdf_parser.iter_parse_events）
+                                  statement には抽出済みの書類から算出できた計算項目（'derived'）を含む
+        validated: 整合性検証の結果（'data': 計算項目を補完したデータ, 'validation': 検証レポート）
+        sheet: シートの書き込み完了（'sheet', 'cells'）
+        complete: 変換完了（'file_id', 'download_url'）
+        error: 変換エラー（'detail'）
+    """
+    file_id = str(uuid.uuid4())
+    pdf_path = os.path.join(UPLOAD_DIR, f"{file_id}.pdf")
+    excel_path = os.path.join(UPLOAD_DIR, f"{file_id}_output.xlsx")
+    temp_files.acquire(pdf_path)
+    temp_files.acquire(excel_path)
 
-    except FileNotFoundError as e:
-        raise HTTPException(status_code=500, detail=f"ファイルエラー: {str(e)}")
+    try:
+        with open(pdf_path, "wb") as f:
+            f.write(file_content)
+
+        print(f"\n{'='*60}")
+        print(f"変換処理開始（ストリーミング）: {filename}")
+        print(f"{'='*60}")
+
+        print("\n[1/3] PDF解析中...")
+        data = FinancialStatement()
+        # 書類ごとに計算項目を評価し、入力が変わったノードのみ再計算（最後の補完でも同じ評価器を使う）
+        evaluator = DerivedValueEvaluator()
+        extracted: Dict[str, Dict[str, Any]] = {}
+        for event in iter_parse_events(pdf_path):
+            if event["event"] == "parsed":
+                data = event["data"]
+                yield {"event": "parsed", "pages": event["pages"], "ocr_pages": event["ocr_pages"],
+                       "cached_pages": event["cached_pages"]}
+                continue
+
+            if event["event"] == "statement":
+                for category, items in event["items"].items():
+                    extracted.setdefault(category, {}).update(items)
+                derived: Dict[str, Dict[str, int]] = {}
+                for (category, key), value in evaluator.evaluate(extracted).items():
+                    derived.setdefault(category, {})[key] = value
+                event["derived"] = derived
+            yield event
+
+        print("\n[2/3] 整合性検証中...")
+        data, validation_report = validate_financial_data(data)
+        data = calculate_derived_values(data, evaluator)
+        yield {"event": "validated", **to_json_payload(data, validation_report)}
+
+        print("\n[3/3] Excel作成中...")
+        for event in iter_write_excel(data, template_path, excel_path):
+            if event["event"] == "sheet":
+                yield event
+
+        print(f"\n変換処理完了（ストリーミング）\n")
+        yield {
+            "event": "complete",
+            "file_id": file_id,
+            "download_url": f"/api/download/{file_id}",
+        }
 
     except Exception as e:
         print(f"\n変換エラー: {str(e)}")
         import traceback
         traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"変換エラー: {str(e)}")
+        yield {"event": "error", "detail": f"変換エラー: {str(e)}"}
 
     finally:
-        # 一時PDFファイルを削除（Excelは返却後に自動削除される）
-        if os.path.exists(pdf_path):
-            try:
-                os.remove(pdf_path)
-            except Exception as e:
-                print(f"一時ファイル削除エラー: {str(e)}")
+        # 出力Excelはダウンロードまたは有効期限切れで削除される
+        temp_files.remove(pdf_path)
+        temp_files.release(excel_path)
 
 
-@app.delete("/api/cleanup")
-def cleanup_temp_files():
+def default_template_path() -> Optional[str]:
     """
-    一時ファイルをクリーンアップ（管理用）
+    既定のテンプレートのパス（ファイルが無い場合はNone）
     """
-    try:
-        deleted_count = 0
-        if os.path.exists(UPLOAD_DIR):
-            for filename in os.listdir(UPLOAD_DIR):
-                file_path = os.path.join(UPLOAD_DIR, filename)
-                if os.path.isfile(file_path):
-                    os.remove(file_path)
-                    deleted_count += 1
+    path = get_template().path
+    return path if os.path.exists(path) else None
 
-        return {
-            "status": "success",
-            "message": f"{deleted_count}個の一時ファイルを削除しました"
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"クリーンアップエラー: {str(e)}")
+
+def warm_caches() -> None:
+    """
+    キーワードマッチャーと既定のテンプレートを事前に読み込む
+
+    gunicorn（preload_app）ではワーカーの起動前にマスタープロセスで呼び出し、
+    読み込んだキャッシュをコピーオンライトで全ワーカーと共有します。
+    他のテンプレートは最初に使う変換時に読み込むため、テンプレートを追加しても起動時間は変わりません。
+    """
+    warm_up(default_template_path())
 
 
 if __name__ == "__main__":
@@ -229,4 +814,5 @@ if __name__ == "__main__":
     print("API仕様: http://localhost:8000/docs")
     print("\nCtrl+C で停止\n")
 
-    uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
+    # reload を使う場合はアプリをインポート文字列で指定する必要がある
+    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
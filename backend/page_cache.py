@@ -0,0 +1,246 @@
+"""
+ページ抽出結果キャッシュモジュール
+PDFのページごとのテキストと単語位置をSQLiteファイルに保存し、プロセスをまたいで再利用します
+
+キーワード表やテンプレートを変更して同じPDFを処理し直す場合、
+pdfplumberのレイアウト解析を省略して項目の照合だけを再実行できます。
+キーは (PDFファイルのハッシュ, ページ番号, pdfplumberのバージョン) で、
+pdfplumberを更新するとキャッシュは自動的に使われなくなります。
+
+一括変換（cli.py）では各PDFの最終的な抽出結果も保存し、cli.py backfill で
+現在のキーワード表で照合し直した結果との差分を確認できます。
+
+キャッシュは PAGE_CACHE_PATH（SQLiteファイルのパス）を指定した場合のみ有効です。
+ファイルを削除すればキャッシュは空になります。
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import zlib
+from contextlib import closing
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import pdfplumber
+
+# キャッシュファイルのパス（空の場合は無効）
+PAGE_CACHE_PATH = os.getenv("PAGE_CACHE_PATH", "").strip()
+
+# 保存形式を変えた場合に上げる（古い形式のキャッシュは使われなくなる）
+CACHE_FORMAT = 1
+
+# キャッシュの有効範囲（抽出結果はpdfplumberのバージョンに依存する）
+EXTRACTOR_VERSION = f"pdfplumber-{pdfplumber.__version__}/{CACHE_FORMAT}"
+
+# 保存する単語の属性（この順で配列にして保存）
+WORD_KEYS = ('text', 'x0', 'x1', 'top', 'bottom')
+
+# (テキスト, 単語のリスト)
+PageEntry = Tuple[str, List[Dict[str, Any]]]
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS documents ("
+    " doc TEXT NOT NULL, version TEXT NOT NULL, page_count INTEGER NOT NULL,"
+    " PRIMARY KEY (doc, version))",
+    "CREATE TABLE IF NOT EXISTS pages ("
+    " doc TEXT NOT NULL, page INTEGER NOT NULL, version TEXT NOT NULL, data BLOB NOT NULL,"
+    " PRIMARY KEY (doc, page, version))",
+    "CREATE TABLE IF NOT EXISTS results ("
+    " doc TEXT PRIMARY KEY, name TEXT, data TEXT NOT NULL, updated REAL NOT NULL)",
+)
+
+
+def document_key(pdf_path: str) -> str:
+    """
+    PDFファイルの内容のハッシュ（ファイル名や保存場所が変わっても同じキー）
+    """
+    digest = hashlib.sha256()
+    with open(pdf_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def encode_page(text: str, words: Sequence[Dict[str, Any]]) -> bytes:
+    """
+    1ページ分の抽出結果を保存形式（zlib圧縮したJSON、単語は属性の配列）に変換
+    """
+    data = {'text': text, 'words': [[word[key] for key in WORD_KEYS] for word in words]}
+    return zlib.compress(json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+
+def decode_page(blob: bytes) -> PageEntry:
+    """
+    保存形式から1ページ分の抽出結果を復元
+    """
+    data = json.loads(zlib.decompress(blob).decode('utf-8'))
+    return data['text'], [dict(zip(WORD_KEYS, values)) for values in data['words']]
+
+
+class PageCache:
+    """
+    ページ抽出結果のキャッシュ（SQLiteファイル）
+
+    複数のプロセスから同時に読み書きできます（接続は操作ごとに開く）。
+    読み書きに失敗した場合は警告を出し、キャッシュなしで処理を続けます。
+
+    Args:
+        path: SQLiteファイルのパス
+        version: キャッシュの有効範囲（既定: pdfplumberのバージョン）
+    """
+
+    def __init__(self, path: str, version: str = EXTRACTOR_VERSION):
+        self.path = path
+        self.version = version
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=30)
+        if not self._initialized:
+            connection.execute("PRAGMA journal_mode=WAL")
+            for statement in _SCHEMA:
+                connection.execute(statement)
+            connection.commit()
+            self._initialized = True
+        return connection
+
+    def load(self, doc: str) -> Tuple[Optional[int], Dict[int, PageEntry]]:
+        """
+        PDFのキャッシュ済みページを読み込む
+
+        Args:
+            doc: document_key() の値
+
+        Returns:
+            (総ページ数（未保存の場合はNone）, ページ番号 → (テキスト, 単語のリスト))
+        """
+        try:
+            with closing(self._connect()) as connection:
+                row = connection.execute(
+                    "SELECT page_count FROM documents WHERE doc = ? AND version = ?", (doc, self.version)
+                ).fetchone()
+                rows = connection.execute(
+                    "SELECT page, data FROM pages WHERE doc = ? AND version = ?", (doc, self.version)
+                ).fetchall()
+            return (row[0] if row else None), {page: decode_page(data) for page, data in rows}
+        except (sqlite3.Error, OSError, ValueError, zlib.error) as e:
+            print(f"警告: ページキャッシュを読み込めません: {str(e)}")
+            return None, {}
+
+    def store(self, doc: str, page_count: int, pages: Dict[int, PageEntry]) -> None:
+        """
+        PDFの総ページ数とページの抽出結果を保存
+
+        Args:
+            doc: document_key() の値
+            page_count: PDFの総ページ数
+            pages: ページ番号 → (テキスト, 単語のリスト)
+        """
+        try:
+            with closing(self._connect()) as connection, connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO documents (doc, version, page_count) VALUES (?, ?, ?)",
+                    (doc, self.version, page_count),
+                )
+                connection.executemany(
+                    "INSERT OR REPLACE INTO pages (doc, page, version, data) VALUES (?, ?, ?, ?)",
+                    [(doc, page, self.version, encode_page(text, words)) for page, (text, words) in pages.items()],
+                )
+        except (sqlite3.Error, OSError) as e:
+            print(f"警告: ページキャッシュを保存できません: {str(e)}")
+
+    def documents(self) -> List[Tuple[str, Optional[str]]]:
+        """
+        キャッシュ済みのPDFの一覧（現在のバージョンのみ）
+
+        Returns:
+            (document_key() の値, 抽出結果を保存したときのファイル名（無い場合はNone）) のリスト（ファイル名順）
+        """
+        try:
+            with closing(self._connect()) as connection:
+                rows = connection.execute(
+                    "SELECT documents.doc, results.name FROM documents"
+                    " LEFT JOIN results ON results.doc = documents.doc"
+                    " WHERE documents.version = ?"
+                    " ORDER BY results.name IS NULL, results.name, documents.doc",
+                    (self.version,),
+                ).fetchall()
+            return [(doc, name) for doc, name in rows]
+        except sqlite3.Error as e:
+            print(f"警告: ページキャッシュを読み込めません: {str(e)}")
+            return []
+
+    def load_result(self, doc: str) -> Optional[Dict[str, Any]]:
+        """
+        保存済みの抽出結果（無い場合はNone）
+        """
+        try:
+            with closing(self._connect()) as connection:
+                row = connection.execute("SELECT data FROM results WHERE doc = ?", (doc,)).fetchone()
+            return json.loads(row[0]) if row else None
+        except (sqlite3.Error, ValueError) as e:
+            print(f"警告: ページキャッシュを読み込めません: {str(e)}")
+            return None
+
+    def store_result(self, doc: str, name: Optional[str], data: Dict[str, Any]) -> None:
+        """
+        PDFの抽出結果を保存（次回の backfill で差分の基準にする）
+
+        Args:
+            doc: document_key() の値
+            name: PDFのファイル名（Noneの場合は保存済みの名前を残す）
+            data: 抽出結果（カテゴリ → {項目名: 数値}）
+        """
+        try:
+            with closing(self._connect()) as connection, connection:
+                connection.execute(
+                    "INSERT INTO results (doc, name, data, updated) VALUES (?, ?, ?, ?)"
+                    " ON CONFLICT(doc) DO UPDATE SET name = COALESCE(excluded.name, results.name),"
+                    " data = excluded.data, updated = excluded.updated",
+                    (doc, name, json.dumps(data, ensure_ascii=False), time.time()),
+                )
+        except sqlite3.Error as e:
+            print(f"警告: ページキャッシュを保存できません: {str(e)}")
+
+    def stats(self) -> Dict[str, int]:
+        """
+        キャッシュ済みのPDF数・ページ数（現在のバージョンのみ）
+        """
+        try:
+            with closing(self._connect()) as connection:
+                documents = connection.execute(
+                    "SELECT COUNT(*) FROM documents WHERE version = ?", (self.version,)
+                ).fetchone()[0]
+                pages = connection.execute(
+                    "SELECT COUNT(*) FROM pages WHERE version = ?", (self.version,)
+                ).fetchone()[0]
+            return {'documents': documents, 'pages': pages}
+        except sqlite3.Error as e:
+            print(f"警告: ページキャッシュを読み込めません: {str(e)}")
+            return {'documents': 0, 'pages': 0}
+
+
+_default_cache: Optional[PageCache] = PageCache(PAGE_CACHE_PATH) if PAGE_CACHE_PATH else None
+
+
+def configure(path: Optional[str]) -> Optional[PageCache]:
+    """
+    既定のキャッシュファイルを変更（Noneまたは空文字列で無効）
+
+    Returns:
+        設定したキャッシュ
+    """
+    global _default_cache
+    _default_cache = PageCache(path) if path else None
+    return _default_cache
+
+
+def get_default_cache() -> Optional[PageCache]:
+    """
+    既定のキャッシュ（無効な場合はNone）
+    """
+    return _default_cache
@@ -0,0 +1,172 @@
+"""
+PDF事前検査モジュール
+レイアウト解析の前に、PDFの構造（トレーラー・ページ数・各ページのコンテンツストリームの長さ・
+画像のみのページ）だけを読み取り、変換にかかる時間を見積もります
+
+見積もりが上限を超えるPDFや、読み込めない・暗号化されたPDFは変換前に拒否し、
+時間のかかるPDFはAPI側で優先度の低い専用の待ち行列に回します。
+ファイルサイズは画像の有無で大きく変わるため、処理時間の目安にはなりません。
+
+見積もりは検索対象のページ（先頭 MAX_SCAN_PAGES ページ）のみが対象で、
+    ページごとの固定時間 + コンテンツストリーム（圧縮後）1KBあたりの時間
+    + OCRするページ（テキストが無く画像のみ、OCRが有効な場合）ごとの時間
+の合計（秒）です。
+"""
+
+import io
+import os
+from typing import Any, Dict, NamedTuple, Optional
+
+from pdfminer.pdfdocument import PDFDocument, PDFEncryptionError, PDFPasswordIncorrect
+from pdfminer.pdfpage import PDFPage
+from pdfminer.pdfparser import PDFParser
+from pdfminer.pdftypes import resolve1
+from pdfminer.psparser import PSLiteral
+
+import ocr
+from schema import MAX_SCAN_PAGES
+
+# 拒否する上限（総ページ数・見積もり秒数）
+PREFLIGHT_MAX_PAGES = int(os.getenv("PREFLIGHT_MAX_PAGES", "1000"))
+PREFLIGHT_MAX_SECONDS = float(os.getenv("PREFLIGHT_MAX_SECONDS", "120"))
+# 優先度の低い待ち行列に回す見積もり秒数
+PREFLIGHT_HEAVY_SECONDS = float(os.getenv("PREFLIGHT_HEAVY_SECONDS", "5"))
+
+# 見積もりの係数（秒）
+PAGE_BASE_SECONDS = 0.02
+SECONDS_PER_CONTENT_KB = 0.05
+OCR_PAGE_SECONDS = 3.0
+
+
+class PreflightError(Exception):
+    """
+    変換前に拒否するPDF（メッセージはそのままAPIのエラー詳細として返す）
+    """
+
+
+class PreflightReport(NamedTuple):
+    """
+    事前検査の結果
+
+    Attributes:
+        page_count: 総ページ数
+        scanned_pages: 検索対象のページ数
+        content_bytes: 検索対象のページのコンテンツストリームの長さ（圧縮後）の合計
+        max_page_bytes: 検索対象のページのコンテンツストリームの長さの最大値
+        image_pages: 検索対象のうちテキストが無く画像のみのページ数
+        ocr_pages: OCRするページ数（OCRが無効な場合は0）
+        estimated_seconds: 変換時間の見積もり（秒）
+        heavy: 優先度の低い待ち行列に回すか
+    """
+    page_count: int
+    scanned_pages: int
+    content_bytes: int
+    max_page_bytes: int
+    image_pages: int
+    ocr_pages: int
+    estimated_seconds: float
+    heavy: bool
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {**self._asdict(), 'estimated_seconds': round(self.estimated_seconds, 3)}
+
+
+def _stream_length(stream: Any) -> int:
+    """
+    コンテンツストリームの長さ（展開せずに /Length を読む）
+    """
+    stream = resolve1(stream)
+    attrs = getattr(stream, 'attrs', None)
+    if attrs is None:
+        return 0
+    length = resolve1(attrs.get('Length', 0))
+    return length if isinstance(length, int) else len(getattr(stream, 'rawdata', b'') or b'')
+
+
+def _is_image_only(page: PDFPage) -> bool:
+    """
+    フォントを持たず、画像のみを配置したページか（スキャンしたページ）
+    """
+    resources = resolve1(page.resources) or {}
+    if resolve1(resources.get('Font')):
+        return False
+    xobjects = resolve1(resources.get('XObject')) or {}
+    for xobject in xobjects.values():
+        stream = resolve1(xobject)
+        subtype = stream.attrs.get('Subtype') if hasattr(stream, 'attrs') else None
+        if isinstance(subtype, PSLiteral) and subtype.name == 'Image':
+            return True
+    return False
+
+
+def inspect_pdf(content: bytes, max_pages: int = MAX_SCAN_PAGES,
+                use_ocr: Optional[bool] = None) -> PreflightReport:
+    """
+    PDFの構造のみを読み取り、変換時間を見積もる（レイアウト解析は行わない）
+
+    Args:
+        content: PDFファイルの内容
+        max_pages: 検索対象のページ数
+        use_ocr: OCRを使うか（Noneの場合は環境に応じて自動判定）
+
+    Returns:
+        PreflightReport
+
+    Raises:
+        PreflightError: 読み込めない・暗号化されたPDF、総ページ数または見積もりが上限を超えた場合
+    """
+    try:
+        document = PDFDocument(PDFParser(io.BytesIO(content)))
+        page_count = resolve1(resolve1(document.catalog.get('Pages') or {}).get('Count', 0))
+        if not isinstance(page_count, int):
+            page_count = 0
+
+        scanned = 0
+        content_bytes = 0
+        max_page_bytes = 0
+        image_pages = 0
+        for page in PDFPage.create_pages(document):
+            if scanned >= max_pages:
+                break
+            scanned += 1
+            page_bytes = sum(_stream_length(stream) for stream in page.contents)
+            content_bytes += page_bytes
+            max_page_bytes = max(max_page_bytes, page_bytes)
+            image_pages += _is_image_only(page)
+    except (PDFEncryptionError, PDFPasswordIncorrect):
+        raise PreflightError("パスワードで保護されたPDFには対応していません")
+    except PreflightError:
+        raise
+    except Exception as e:
+        raise PreflightError(f"PDFを読み込めません: {str(e)}")
+
+    if scanned == 0:
+        raise PreflightError("PDFにページがありません")
+    page_count = max(page_count, scanned)
+    if page_count > PREFLIGHT_MAX_PAGES:
+        raise PreflightError(f"ページ数が多すぎます（{page_count}ページ、最大{PREFLIGHT_MAX_PAGES}ページ）")
+
+    if use_ocr is None:
+        use_ocr = ocr.is_enabled()
+    ocr_pages = image_pages if use_ocr else 0
+
+    estimated = (
+        scanned * PAGE_BASE_SECONDS
+        + content_bytes / 1024 * SECONDS_PER_CONTENT_KB
+        + ocr_pages * OCR_PAGE_SECONDS
+    )
+    if estimated > PREFLIGHT_MAX_SECONDS:
+        raise PreflightError(
+            f"変換に時間がかかりすぎるPDFです（見積もり{estimated:.0f}秒、上限{PREFLIGHT_MAX_SECONDS:.0f}秒）"
+        )
+
+    return PreflightReport(
+        page_count=page_count,
+        scanned_pages=scanned,
+        content_bytes=content_bytes,
+        max_page_bytes=max_page_bytes,
+        image_pages=image_pages,
+        ocr_pages=ocr_pages,
+        estimated_seconds=estimated,
+        heavy=estimated >= PREFLIGHT_HEAVY_SECONDS,
+    )
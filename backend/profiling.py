@@ -0,0 +1,166 @@
+"""
+プロファイリングモジュール
+1件の変換をプロファイラー付きで実行し、どの処理（pdfminerのレイアウト解析・正規表現の照合・
+Excelの保存など）に時間がかかっているかを調べます
+
+プロファイラーは2種類です。
+    sample: 一定間隔で実行中のスタックを記録（オーバーヘッドが小さい）。結果は
+            フレームグラフ用の collapsed stacks 形式（flamegraph.pl / speedscope で表示可能）
+    cprofile: 全関数呼び出しを計測（cProfile）。結果は pstats 形式（snakeviz などで表示可能）と
+              累積時間順の上位関数の一覧
+"""
+
+import cProfile
+import io
+import marshal
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Optional, Tuple
+
+PROFILE_MODES = ("sample", "cprofile")
+
+# sample の既定のサンプリング間隔（秒）
+DEFAULT_SAMPLE_INTERVAL = 0.005
+
+# cprofile の一覧に出す関数の数
+SUMMARY_LIMIT = 30
+
+
+def _frame_label(frame) -> str:
+    """
+    スタックの1フレームの表示名（モジュール名:関数名）
+    """
+    module = frame.f_globals.get('__name__', '?')
+    return f"{module}:{frame.f_code.co_name}"
+
+
+class StackSampler:
+    """
+    指定したスレッドのスタックを一定間隔で記録するプロファイラー
+
+    記録はバックグラウンドスレッドで sys._current_frames() から取得します。
+    GILを解放しない長い処理（正規表現の照合など）の間はサンプリングが遅れるため、
+    サンプル数は処理時間のおおよその比率を表します。
+
+    Args:
+        thread_id: 記録するスレッドの識別子（threading.get_ident() の値）
+        interval: サンプリング間隔（秒）
+    """
+
+    def __init__(self, thread_id: int, interval: float = DEFAULT_SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def sample(self) -> None:
+        """
+        対象スレッドの現在のスタックを1回記録
+        """
+        frame = sys._current_frames().get(self.thread_id)
+        if frame is None:
+            return
+        stack = []
+        while frame is not None:
+            stack.append(_frame_label(frame))
+            frame = frame.f_back
+        self.stacks[';'.join(reversed(stack))] += 1
+        self.samples += 1
+
+    def collapsed(self) -> str:
+        """
+        collapsed stacks 形式（1行に「フレーム;フレーム;... サンプル数」）
+        """
+        return ''.join(f"{stack} {count}\n" for stack, count in sorted(self.stacks.items()))
+
+
+def run_profiled(mode: str, func: Callable[..., Any], *args: Any,
+                 interval: float = DEFAULT_SAMPLE_INTERVAL) -> Tuple[Any, Dict[str, Any]]:
+    """
+    関数をプロファイラー付きで実行（呼び出したスレッドで実行）
+
+    Args:
+        mode: プロファイラーの種類（'sample' / 'cprofile'）
+        func: 実行する関数
+        *args: 関数の引数
+        interval: sample のサンプリング間隔（秒）
+
+    Returns:
+        (関数の戻り値, プロファイル) のタプル。プロファイルの内容:
+            mode, elapsed_seconds
+            sample: samples（サンプル数）, interval_seconds, collapsed（collapsed stacks 形式の文字列）
+            cprofile: pstats（pstats.Stats で読み込めるバイト列）, summary（累積時間順の上位関数）
+
+    Raises:
+        ValueError: 不明なプロファイラーの種類
+    """
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"プロファイラーの種類が不正です: {mode}（{' / '.join(PROFILE_MODES)}）")
+
+    profile: Dict[str, Any] = {'mode': mode}
+    started = time.perf_counter()
+
+    if mode == "sample":
+        sampler = StackSampler(threading.get_ident(), interval)
+        sampler.start()
+        try:
+            result = func(*args)
+        finally:
+            sampler.stop()
+            profile['elapsed_seconds'] = time.perf_counter() - started
+        profile['samples'] = sampler.samples
+        profile['interval_seconds'] = interval
+        profile['collapsed'] = sampler.collapsed()
+        return result, profile
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        result = func(*args)
+    finally:
+        profiler.disable()
+        profile['elapsed_seconds'] = time.perf_counter() - started
+
+    stats = pstats.Stats(profiler)
+    profile['pstats'] = marshal.dumps(stats.stats)
+    summary = io.StringIO()
+    stats.stream = summary
+    stats.sort_stats('cumulative').print_stats(SUMMARY_LIMIT)
+    profile['summary'] = summary.getvalue()
+    return result, profile
+
+
+def write_profile(profile: Dict[str, Any], stem: str) -> str:
+    """
+    プロファイルをファイルに保存（sample: {stem}.collapsed.txt / cprofile: {stem}.pstats）
+
+    Returns:
+        保存したファイルのパス
+    """
+    if profile['mode'] == "sample":
+        path = f"{stem}.collapsed.txt"
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(profile['collapsed'])
+    else:
+        path = f"{stem}.pstats"
+        with open(path, 'wb') as f:
+            f.write(profile['pstats'])
+    return path
@@ -0,0 +1,68 @@
+"""
+メモリ使用量計測モジュール
+変換処理中のプロセスRSS（常駐メモリ）を計測します
+"""
+
+import os
+import sys
+from typing import Any, Dict
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def current_rss() -> int:
+    """
+    現在のプロセスRSS（バイト）を返す
+
+    Linuxでは /proc/self/statm から現在値を読み取ります。
+    取得できない環境ではプロセス開始以降の最大RSSを返します（0の場合は計測不可）。
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        pass
+
+    if resource is not None:
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # macOSはバイト、Linuxはキロバイト単位
+        return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+    return 0
+
+
+class PeakRSSTracker:
+    """
+    処理区間中のRSSのピークを記録
+
+    sample() を処理の区切り（ページごとなど）で呼び出し、その時点のRSSを記録します。
+    RSSはプロセス全体の値のため、同時に実行中の他のリクエストの分も含まれます。
+    """
+
+    def __init__(self):
+        self.start_bytes = current_rss()
+        self.peak_bytes = self.start_bytes
+
+    def sample(self) -> int:
+        """
+        現在のRSSを記録して返す
+        """
+        rss = current_rss()
+        if rss > self.peak_bytes:
+            self.peak_bytes = rss
+        return rss
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        計測結果（MB単位）
+        """
+        return {
+            'start_rss_mb': round(self.start_bytes / 1024 / 1024, 1),
+            'peak_rss_mb': round(self.peak_bytes / 1024 / 1024, 1),
+            'peak_increase_mb': round((self.peak_bytes - self.start_bytes) / 1024 / 1024, 1),
+        }
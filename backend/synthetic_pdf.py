@@ -0,0 +1,238 @@
+"""
+合成PDF生成モジュール
+負荷試験・精度測定用に、決算報告書の形式を模したPDFを生成します
+
+外部ライブラリを使わずにPDFを直接組み立てます。日本語はPDF標準の
+CJKフォント（HeiseiKakuGo-W5 / UniJIS-UCS2-H）で埋め込みなしに描画するため、
+pdfplumberでそのままテキストとして抽出できます。
+
+使い方:
+    python synthetic_pdf.py 出力フォルダ/ [件数] [シード]
+"""
+
+import os
+import random
+import sys
+import zlib
+from typing import Dict, List, Sequence, Tuple
+
+from schema import BALANCE_SHEET, INCOME_STATEMENT, COST_REPORT, EQUITY_STATEMENT, Statement
+
+# 1行分のテキスト (x, y, 文字サイズ, テキスト)
+TextItem = Tuple[int, int, int, str]
+
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+
+_FONT = (
+    b"<< /Type /Font /Subtype /Type0 /BaseFont /HeiseiKakuGo-W5 /Encoding /UniJIS-UCS2-H"
+    b" /DescendantFonts [<< /Type /Font /Subtype /CIDFontType0 /BaseFont /HeiseiKakuGo-W5"
+    b" /CIDSystemInfo << /Registry (Adobe) /Ordering (Japan1) /Supplement 2 >> /DW 1000"
+    b" /FontDescriptor << /Type /FontDescriptor /FontName /HeiseiKakuGo-W5 /Flags 4"
+    b" /FontBBox [-92 -250 1010 922] /ItalicAngle 0 /Ascent 752 /Descent -221"
+    b" /CapHeight 737 /StemV 68 >> >>] >>"
+)
+
+# 株主資本等変動計算書の列（スキーマで読み取らない列も含む）
+EQUITY_COLUMNS = ('資本金', '資本剰余金', '繰越利益剰余金', '純資産合計')
+# 株主資本等変動計算書の行（当期変動額は見出しのみ）
+EQUITY_ROWS = ('当期首残高', '当期変動額', '当期純利益', '当期末残高')
+
+_LABEL_X = 60
+_VALUE_X = 330
+_ROW_HEIGHT = 15
+_TOP_Y = 770
+
+
+def pdf_bytes(pages: Sequence[Sequence[TextItem]]) -> bytes:
+    """
+    テキストのみのPDFを作成
+
+    Args:
+        pages: ページごとの (x, y, 文字サイズ, テキスト) のリスト（座標はPDF座標系、左下原点）
+
+    Returns:
+        PDFファイルの内容
+    """
+    objects: List[bytes] = []
+
+    def add(obj: bytes) -> int:
+        objects.append(obj)
+        return len(objects)
+
+    font_id = add(_FONT)
+    # ページツリーのオブジェクト番号（各ページの内容・ページの後）
+    pages_id = len(objects) + 1 + 2 * len(pages)
+
+    kids = []
+    for items in pages:
+        operators = [
+            b"BT /F1 %d Tf %d %d Td <%s> Tj ET" % (size, x, y, text.encode('utf-16-be').hex().encode('ascii'))
+            for x, y, size, text in items
+        ]
+        stream = zlib.compress(b"\n".join(operators))
+        content_id = add(b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        kids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] /Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>"
+            % (pages_id, PAGE_WIDTH, PAGE_HEIGHT, font_id, content_id)
+        ))
+
+    add(b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % kid for kid in kids), len(kids)))
+    catalog_id = add(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n" % number + obj + b"\nendobj\n"
+
+    xref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog_id, xref)
+    return bytes(output)
+
+
+def _label(keywords: Tuple[str, ...]) -> str:
+    """
+    PDFに印字する項目名（文字間が空白区切りでない最初のキーワード）
+    """
+    for keyword in keywords:
+        if ' ' not in keyword:
+            return keyword
+    return keywords[0]
+
+
+def _statement_page(statement: Statement, rng: random.Random, coverage: float,
+                    expected: Dict[str, Dict[str, int]], vary_labels: bool = False) -> List[TextItem]:
+    """
+    「項目名 金額」を1行ずつ並べた書類のページを作成（vary_labels の場合は項目名をキーワードから無作為に選ぶ）
+    """
+    items: List[TextItem] = [(_LABEL_X, 800, 14, statement.markers[0]), (450, 800, 9, '（単位：円）')]
+    y = _TOP_Y
+    for section in statement.sections:
+        for item in section.items:
+            if not item.keywords or rng.random() > coverage:
+                continue
+            value = rng.randrange(1, 500) * 1000 + rng.randrange(1000)
+            label = rng.choice(item.keywords) if vary_labels else _label(item.keywords)
+            items.append((_LABEL_X, y, 10, label))
+            items.append((_VALUE_X, y, 10, f"{value:,}"))
+            expected.setdefault(section.category, {})[item.key] = value
+            y -= _ROW_HEIGHT
+    return items
+
+
+def _equity_page(rng: random.Random, expected: Dict[str, Dict[str, int]]) -> List[TextItem]:
+    """
+    株主資本等変動計算書（行: 残高・変動、列: 資本金・資本剰余金・繰越利益剰余金・純資産合計 の表形式）のページを作成
+    """
+    items: List[TextItem] = [(_LABEL_X, 800, 14, EQUITY_STATEMENT.markers[0])]
+
+    column_x = dict(zip(EQUITY_COLUMNS, (180, 280, 380, 480)))
+    for heading, x in column_x.items():
+        items.append((x, _TOP_Y, 10, heading))
+
+    capital = rng.randrange(10, 100) * 1000000
+    surplus = rng.randrange(0, 10) * 1000000
+    retained = rng.randrange(1, 50000) * 1000
+    profit = rng.randrange(1, 5000) * 1000
+    values = {
+        '当期首残高': (capital, surplus, retained, capital + surplus + retained),
+        '当期変動額': (None, None, None, None),
+        '当期純利益': (None, None, profit, profit),
+        '当期末残高': (capital, surplus, retained + profit, capital + surplus + retained + profit),
+    }
+
+    cells = {}
+    y = _TOP_Y - 2 * _ROW_HEIGHT
+    for row in EQUITY_ROWS:
+        items.append((_LABEL_X, y, 10, row))
+        for column, value in zip(EQUITY_COLUMNS, values[row]):
+            if value is None:
+                continue
+            items.append((column_x[column], y, 8, f"{value:,}"))
+            cells[(row, column)] = value
+        y -= 2 * _ROW_HEIGHT
+
+    for section in EQUITY_STATEMENT.sections:
+        for item in section.items:
+            if item.grid in cells:
+                expected.setdefault(section.category, {})[item.key] = cells[item.grid]
+    return items
+
+
+def _notes_page(rng: random.Random, number: int) -> List[TextItem]:
+    """
+    抽出対象外の注記ページ（ページ数の多いPDFを作るための埋め草）
+    """
+    items: List[TextItem] = [(_LABEL_X, 800, 12, f'個別注記表（{number}）')]
+    y = _TOP_Y
+    while y > 60:
+        items.append((_LABEL_X, y, 9, '重要な会計方針に係る事項に関する注記 ' + str(rng.randrange(1000000))))
+        y -= _ROW_HEIGHT
+    return items
+
+
+def synthetic_filing(seed: int, coverage: float = 0.85, extra_pages: int = 0,
+                     vary_labels: bool = False) -> Tuple[bytes, Dict[str, Dict[str, int]]]:
+    """
+    決算報告書の合成PDFを作成
+
+    表紙・貸借対照表・損益計算書・完成工事原価報告書・株主資本等変動計算書の順に
+    1ページずつ作成します。金額は乱数のため、合計欄と内訳は一致しません。
+
+    Args:
+        seed: 乱数シード（同じシードなら同じPDF）
+        coverage: 各項目を印字する確率
+        extra_pages: 末尾に追加する注記ページ数
+        vary_labels: 項目名を各項目のキーワード（表記ゆれ・空白区切り）から無作為に選ぶ
+
+    Returns:
+        (PDFファイルの内容, 印字した項目 {カテゴリ: {項目名: 金額}})
+    """
+    rng = random.Random(seed)
+    expected: Dict[str, Dict[str, int]] = {}
+
+    pages = [[(150, 500, 24, '決算報告書'), (150, 450, 14, f'株式会社サンプル建設{seed:04d}')]]
+    for statement in (BALANCE_SHEET, INCOME_STATEMENT, COST_REPORT):
+        pages.append(_statement_page(statement, rng, coverage, expected, vary_labels))
+    pages.append(_equity_page(rng, expected))
+    pages.extend(_notes_page(rng, number) for number in range(1, extra_pages + 1))
+
+    return pdf_bytes(pages), expected
+
+
+def generate_corpus(directory: str, count: int, seed: int = 0, extra_pages: int = 0) -> List[str]:
+    """
+    合成PDFを複数作成してディレクトリに保存
+
+    Args:
+        directory: 出力フォルダ
+        count: 作成する件数
+        seed: 最初のPDFの乱数シード（以降は1ずつ増やす）
+        extra_pages: 各PDFに追加する注記ページ数
+
+    Returns:
+        作成したPDFファイルのパスのリスト
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for number in range(count):
+        content, _ = synthetic_filing(seed + number, extra_pages=extra_pages)
+        path = os.path.join(directory, f"synthetic_{seed + number:04d}.pdf")
+        with open(path, 'wb') as f:
+            f.write(content)
+        paths.append(path)
+    return paths
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("使い方: python synthetic_pdf.py 出力フォルダ/ [件数] [シード]")
+        sys.exit(1)
+
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+    paths = generate_corpus(sys.argv[1], count, seed)
+    print(f"✓ 合成PDFを{len(paths)}件作成しました: {sys.argv[1]}")
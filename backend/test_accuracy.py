@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+"""
+ゴールデンコーパス（golden/）で抽出精度をテストするスクリプト
+速度の回帰は実行環境に依存するため、accuracy.py run --baseline で確認します
+"""
+
+import contextlib
+import io
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from accuracy import DEFAULT_GOLDEN_DIR, check_thresholds, evaluate, load_corpus, score
+from pdf_parser import parse_pdf, parse_pdf_statement
+
+print("=" * 70)
+print("抽出精度テスト")
+print("=" * 70)
+
+all_passed = True
+
+
+def check(label, result, expected):
+    global all_passed
+    passed = result == expected
+    all_passed = all_passed and passed
+    status = "✓ PASS" if passed else "✗ FAIL"
+    print(f"{status}: {label} -> {result} (期待値: {expected})")
+
+
+# 1. 件数の数え方（値の違いは誤検出と見逃しの両方）
+counts = {}
+score(
+    {'income_statement': {'売上高': 100, '受取利息': 3}},
+    {'income_statement': {'売上高': 100, '受取利息': 4, '雑収入': 5}},
+    counts,
+)
+check("一致", counts['income_statement.売上高'], {'tp': 1, 'fp': 0, 'fn': 0})
+check("値の違い", counts['income_statement.受取利息'], {'tp': 0, 'fp': 1, 'fn': 1})
+check("正解に無い項目", counts['income_statement.雑収入'], {'tp': 0, 'fp': 1, 'fn': 0})
+
+# 2. 閾値（過去の計測結果からの低下・処理時間の倍率）
+baseline = {'precision': 1.0, 'recall': 1.0, 'ms_per_page': 10.0,
+            'keys': {'income_statement.売上高': {'precision': 1.0, 'recall': 1.0}}}
+report = {'precision': 1.0, 'recall': 0.9, 'ms_per_page': 12.0,
+          'keys': {'income_statement.売上高': {'precision': 1.0, 'recall': 0.5}}}
+check("低下なし", check_thresholds(baseline, baseline), [])
+check("再現率の低下", len(check_thresholds(report, baseline)), 2)
+check("許容幅内", check_thresholds(report, baseline, tolerance=0.5), [])
+check("処理時間の倍率", len(check_thresholds(report, baseline, tolerance=0.5, max_slowdown=1.1)), 1)
+check("処理時間の上限", len(check_thresholds(report, max_ms_per_page=5.0)), 1)
+
+# 3. ゴールデンコーパスの全項目を正しく抽出できる
+corpus = load_corpus(DEFAULT_GOLDEN_DIR)
+check("コーパスあり", len(corpus) > 0, True)
+result = evaluate(corpus)
+check("適合率", result['precision'], 1.0)
+check("再現率", result['recall'], 1.0)
+check("全書類の項目を含む", sorted(result['categories']), [
+    'balance_sheet_assets', 'balance_sheet_equity', 'balance_sheet_liabilities',
+    'cost_report', 'equity_change', 'income_statement', 'non_operating',
+])
+check("ページあたりの処理時間を計測", result['ms_per_page'] is not None and result['ms_per_page'] > 0, True)
+
+# 4. parse_pdf（互換用のラッパー）は parse_pdf_statement の結果の辞書
+with contextlib.redirect_stdout(io.StringIO()):
+    statement = parse_pdf_statement(corpus[0][0])
+    data = parse_pdf(corpus[0][0])
+check("parse_pdf は辞書", data, statement.to_dict())
+counts = {}
+score(data, statement, counts)
+check("FinancialStatement で採点", all(entry['fp'] == entry['fn'] == 0 for entry in counts.values()), True)
+
+print("=" * 70)
+if all_passed:
+    print("✓ すべてのテストが成功しました")
+else:
+    print("✗ 一部のテストが失敗しました")
+    sys.exit(1)
+print("=" * 70)
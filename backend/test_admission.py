@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+"""
+同時実行制御（待ち行列が満杯の場合の429・Retry-After、待ち時間の上限、実行枠の解放）をテストするスクリプト
+"""
+
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+from fastapi import UploadFile
+
+from admission import AdmissionController, QueueFullError
+from synthetic_pdf import synthetic_filing
+
+print("=" * 70)
+print("同時実行制御テスト")
+print("=" * 70)
+
+all_passed = True
+
+
+def check(label, result, expected):
+    global all_passed
+    passed = result == expected
+    all_passed = all_passed and passed
+    status = "✓ PASS" if passed else "✗ FAIL"
+    print(f"{status}: {label} -> {result} (期待値: {expected})")
+
+
+QUEUE_TIMEOUT = 0.3
+pdf, _ = synthetic_filing(1, coverage=1.0)
+
+
+async def scenario(main):
+    # 実行枠1・待ち行列1を、変換の外で確保したリクエストで埋める
+    controller = AdmissionController(max_in_flight=1, max_queue=1, queue_timeout=QUEUE_TIMEOUT)
+    main.admission = controller
+    release = asyncio.Event()
+
+    async def hold():
+        async with controller.slot():
+            await release.wait()
+
+    async def wait_in_queue():
+        try:
+            async with controller.slot():
+                return "確保"
+        except QueueFullError as e:
+            return str(e)
+
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    queued = asyncio.create_task(wait_in_queue())
+    while (controller.in_flight, controller.waiting) != (1, 1):
+        await asyncio.sleep(0.01)
+
+    results = {}
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        def files():
+            return {"file": ("filing.pdf", pdf, "application/pdf")}
+
+        # 1. 実行中 + 待ち が上限に達している場合は待たずに429
+        started = time.perf_counter()
+        results['full'] = await client.post("/api/convert", params={"format": "json"}, files=files())
+        results['full_seconds'] = time.perf_counter() - started
+        results['full_stream'] = await client.post("/api/convert/stream", files=files())
+
+        # 2. 待ち時間が上限を超えた場合も429（待ち行列に空きができた後のリクエスト）
+        results['queued'] = await queued
+        started = time.perf_counter()
+        results['timeout'] = await client.post("/api/convert", params={"format": "json"}, files=files())
+        results['timeout_seconds'] = time.perf_counter() - started
+
+        release.set()
+        await holder
+
+        # 3. 送信を始める前に切断されたストリームも実行枠を解放する
+        upload = UploadFile(io.BytesIO(pdf), filename="filing.pdf")
+        response = await main.convert_pdf_stream(upload, None)
+        results['stream_held'] = controller.in_flight
+        # 切断時もStarletteはレスポンスのバックグラウンドタスクを実行する（ジェネレーターは実行されない）
+        if response.background is not None:
+            await response.background()
+        results['stream_released'] = controller.in_flight
+
+        # 4. 実行枠が空けば変換できる
+        results['admitted'] = await client.post("/api/convert", params={"format": "json"}, files=files())
+        results['stats_endpoint'] = (await client.get("/api/stats")).json()
+
+    results['stats'] = controller.stats()
+    return results
+
+
+async def heavy_rejection(main):
+    # 重いPDFの待ち行列で拒否した場合は、その待ち行列の状況をログに出す
+    heavy = AdmissionController(max_in_flight=1, max_queue=0, name="重いPDF")
+    async with heavy.slot():
+        try:
+            async with heavy.slot():
+                pass
+        except QueueFullError as e:
+            error = e
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        main.queue_full_error(error)
+    return error, log.getvalue()
+
+
+with tempfile.TemporaryDirectory() as directory:
+    cwd = os.getcwd()
+    os.chdir(directory)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            import main
+            os.makedirs(main.UPLOAD_DIR, exist_ok=True)
+            admission = main.admission
+            try:
+                results = asyncio.run(scenario(main))
+                heavy_error, heavy_log = asyncio.run(heavy_rejection(main))
+            finally:
+                # pytestで他のテストと同じプロセスで実行した場合に備えて元に戻す
+                main.admission = admission
+    finally:
+        os.chdir(cwd)
+
+    for name in ('full', 'full_stream'):
+        response = results[name]
+        check(f"{name}: 429", response.status_code, 429)
+        check(f"{name}: Retry-After（1秒以上の整数）", response.headers.get("retry-after", "").isdigit()
+              and int(response.headers["retry-after"]) >= 1, True)
+    check("満杯の場合は待たない", results['full_seconds'] < results['timeout_seconds'], True)
+    check("待ち行列のリクエストは待ち時間の上限でエラー", results['queued'], "変換待ちの時間が上限を超えました")
+
+    response = results['timeout']
+    check("待ち時間の上限: 429", response.status_code, 429)
+    check("待ち時間の上限: Retry-After", response.headers.get("retry-after", "").isdigit(), True)
+    check("待ち時間の上限: 上限まで待つ", results['timeout_seconds'] >= QUEUE_TIMEOUT, True)
+    check("待ち時間の上限: メッセージ", "上限を超えました" in response.json()["detail"], True)
+
+    check("未送信のストリームが実行枠を保持", results['stream_held'], 1)
+    check("未送信のストリームの実行枠を解放", results['stream_released'], 0)
+
+    response = results['admitted']
+    check("空いた後は変換できる", response.status_code, 200)
+    check("待ち時間のヘッダー", "x-queue-wait-seconds" in response.headers, True)
+    stats = results['stats']
+    check("拒否件数", stats['rejected'], 4)
+    check("実行中・待ちが残らない", (stats['in_flight'], stats['queue_depth']), (0, 0))
+    check("/api/stats", results['stats_endpoint']['rejected'], 4)
+
+    # 5. 受付拒否のログは拒否した待ち行列の状況
+    check("拒否した待ち行列", (heavy_error.queue, heavy_error.waiting, heavy_error.in_flight), ("重いPDF", 0, 1))
+    check("受付拒否のログ", "(重いPDF: 待ち 0件, 実行中 1件)" in heavy_log, True)
+
+print("=" * 70)
+if all_passed:
+    print("✓ すべてのテストが成功しました")
+else:
+    print("✗ 一部のテストが失敗しました")
+    sys.exit(1)
+print("=" * 70)
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+"""
+一括変換コマンドラインツール（convert / backfill）をテストするスクリプト
+"""
+
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from openpyxl import load_workbook
+
+from cli import BACKFILL_REPORT_FILENAME, SUMMARY_FILENAME, main
+from page_cache import PageCache
+from synthetic_pdf import generate_corpus
+
+print("=" * 70)
+print("一括変換コマンドラインテスト")
+print("=" * 70)
+
+all_passed = True
+
+
+def check(label, result, expected):
+    global all_passed
+    passed = result == expected
+    all_passed = all_passed and passed
+    status = "✓ PASS" if passed else "✗ FAIL"
+    print(f"{status}: {label} -> {result} (期待値: {expected})")
+
+
+def run(*argv):
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+        code = main(list(argv))
+    return code, output.getvalue()
+
+
+def read_json(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+with tempfile.TemporaryDirectory() as directory:
+    inputs = os.path.join(directory, "in")
+    generate_corpus(inputs, 2, seed=10)
+    generate_corpus(os.path.join(inputs, "2024"), 1, seed=20)
+    with open(os.path.join(inputs, "memo.txt"), "w") as f:
+        f.write("PDF以外は対象外")
+    cache_path = os.path.join(directory, "page_cache.sqlite3")
+
+    # 1. ディレクトリ内のPDFを一括変換（サブディレクトリの構成を出力にも保つ）
+    out = os.path.join(directory, "out")
+    code, log = run("convert", inputs, "-o", out, "-f", "json", "-w", "2", "--page-cache", cache_path)
+    summary = read_json(os.path.join(out, SUMMARY_FILENAME))
+    check("終了コード", code, 0)
+    check("変換件数", (summary['files'], summary['succeeded'], summary['failed']), (3, 3, 0))
+    check("出力ファイル", sorted(
+        os.path.relpath(os.path.join(root, name), out)
+        for root, _, names in os.walk(out) for name in names if name != SUMMARY_FILENAME
+    ), ["2024/synthetic_0020.json", "synthetic_0010.json", "synthetic_0011.json"])
+    payload = read_json(os.path.join(out, "synthetic_0010.json"))
+    check("JSONの項目", len(payload['items']) > 0, True)
+    check("段階ごとの処理時間", {'parse', 'validate', 'write', 'total'} <= set(summary['results'][0]['timings']), True)
+    check("ログに完了件数", "3/3件成功" in log, True)
+
+    # 2. 2回目はページキャッシュから読み込む（xlsx）
+    xlsx_out = os.path.join(directory, "xlsx")
+    code, log = run("convert", inputs, "-o", xlsx_out, "-w", "1", "--page-cache", cache_path)
+    summary = read_json(os.path.join(xlsx_out, SUMMARY_FILENAME))
+    check("xlsx: 終了コード", code, 0)
+    check("xlsx: 全ページをキャッシュから読み込み", summary['cached_pages'] == summary['pages'] > 0, True)
+    check("xlsx: 出力を開ける", load_workbook(os.path.join(xlsx_out, "synthetic_0011.xlsx")) is not None, True)
+
+    # 3. 出力できなかったファイルは失敗として集計し、終了コード1
+    failed_out = os.path.join(directory, "failed")
+    os.makedirs(os.path.join(failed_out, "synthetic_0011.csv"))
+    code, log = run("convert", inputs, "-o", failed_out, "-f", "csv", "-w", "1")
+    summary = read_json(os.path.join(failed_out, SUMMARY_FILENAME))
+    check("失敗時の終了コード", code, 1)
+    check("失敗の件数", (summary['succeeded'], summary['failed']), (2, 1))
+    check("失敗をログに出力", "✗ " in log and "synthetic_0011.pdf" in log, True)
+
+    # 4. backfill は前回の抽出結果からの差分を出力する
+    cache = PageCache(cache_path)
+    documents = dict((name, doc) for doc, name in cache.documents())
+    check("キャッシュ済みの文書", sorted(documents), ["2024/synthetic_0020.pdf", "synthetic_0010.pdf", "synthetic_0011.pdf"])
+    code, log = run("backfill", "--page-cache", cache_path, "-w", "1")
+    check("変更なし", (code, "3件中 0件で 0項目が変更" in log), (0, True))
+
+    # 前回の抽出結果を書き換え、差分として出力されることを確認
+    doc = documents["synthetic_0010.pdf"]
+    baseline = cache.load_result(doc)
+    category, items = next((c, v) for c, v in baseline.items() if v)
+    key, value = next(iter(items.items()))
+    altered = {c: dict(v) for c, v in baseline.items()}
+    altered[category][key] = value + 1
+    cache.store_result(doc, "synthetic_0010.pdf", altered)
+
+    report_path = os.path.join(directory, "backfill", BACKFILL_REPORT_FILENAME)
+    code, log = run("backfill", "--page-cache", cache_path, "-w", "1", "--dry-run", "--report", report_path)
+    check("差分の出力", f"{category}.{key}: {value + 1} → {value}" in log, True)
+    report = read_json(report_path)
+    check("レポートの変更件数", (report['changed'], report['changes'], report['recorded']), (1, 1, False))
+    check("dry-run は基準を更新しない", cache.load_result(doc)[category][key], value + 1)
+
+    # 計算項目も差分に含める（営業損失の変更は営業利益 = −営業損失 にも現れる）
+    income = altered['income_statement']
+    if '営業損失金額' in income:
+        income['営業損失金額'] += 1000
+        cache.store_result(doc, "synthetic_0010.pdf", altered)
+        code, log = run("backfill", "--page-cache", cache_path, "-w", "1", "--dry-run")
+        loss = income['営業損失金額'] - 1000
+        check("計算項目の差分", f"income_statement.営業利益金額: {-(loss + 1000)} → {-loss}" in log, True)
+    else:
+        check("計算項目の差分（営業損失を含む文書）", "なし", "あり")
+
+    code, log = run("backfill", "--page-cache", cache_path, "-w", "1", "-o", os.path.join(directory, "rebuilt"), "-f", "json")
+    check("基準を更新", cache.load_result(doc)[category][key], value)
+    check("出力を作り直す", os.path.exists(os.path.join(directory, "rebuilt", "synthetic_0010.json")), True)
+    code, log = run("backfill", "--page-cache", cache_path, "-w", "1")
+    check("更新後は変更なし", "3件中 0件で 0項目が変更" in log, True)
+
+    # 5. テンプレート・キャッシュが無い場合はエラー
+    code, _ = run("convert", inputs, "-o", os.path.join(directory, "missing"), "-t", os.path.join(directory, "missing.xlsx"))
+    check("テンプレート無しの終了コード", code, 2)
+    code, _ = run("backfill", "--page-cache", os.path.join(directory, "missing.sqlite3"))
+    check("キャッシュ無しの終了コード", code, 2)
+
+print("=" * 70)
+if all_passed:
+    print("✓ すべてのテストが成功しました")
+else:
+    print("✗ 一部のテストが失敗しました")
+    sys.exit(1)
+print("=" * 70)
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+"""
+計算項目（完成工事総利益・営業利益・経常利益など）の算出をテストするスクリプト
+"""
+
+import contextlib
+import io
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from derived_values import FORMULAS, DerivedValueEvaluator
+from excel_writer import calculate_derived_values, compile_write_plan, reduce_cell_values
+from schema import SHEET_16_4, SHEET_16_5
+
+print("=" * 70)
+print("計算項目テスト")
+print("=" * 70)
+
+all_passed = True
+
+
+def check(label, result, expected):
+    global all_passed
+    passed = result == expected
+    all_passed = all_passed and passed
+    status = "✓ PASS" if passed else "✗ FAIL"
+    print(f"{status}: {label} -> {result} (期待値: {expected})")
+
+
+INCOME = 'income_statement'
+NON_OPERATING = 'non_operating'
+COST = 'cost_report'
+
+# 販管費合計の入力（販売費及び一般管理費の全項目）を 1,000 ずつ
+expense_keys = [field[1] for formula in FORMULAS if formula.target == (INCOME, '販管費合計') for _, field in formula.fields]
+expenses = {key: 1000 for key in expense_keys}
+
+data = {
+    INCOME: {'完成工事高': 100000, '完成工事原価': 60000, **expenses},
+    NON_OPERATING: {'受取利息': 3000, '受取配当金': 1000, '雑収入': 500, '支払利息': 2000},
+}
+expense_total = 1000 * len(expense_keys)
+
+# 1. すべての入力が揃った場合
+evaluator = DerivedValueEvaluator()
+derived = evaluator.evaluate(data)
+check("完成工事総利益", derived.get((INCOME, '完成工事総利益金額')), 40000)
+check("販管費合計", derived.get((INCOME, '販管費合計')), expense_total)
+check("営業利益", derived.get((INCOME, '営業利益金額')), 40000 - expense_total)
+check("営業外収益合計", derived.get((NON_OPERATING, '営業外収益合計')), 4500)
+check("経常利益", derived.get((NON_OPERATING, '経常利益金額')), 40000 - expense_total + 4500 - 2000)
+
+# 2. 入力が変わらなければ再計算しない
+evaluator.evaluate(data)
+check("入力変更なしの再計算ノード数", evaluator.recomputed, 0)
+
+# 3. 支払利息の変更は営業外費用合計と経常利益のみ再計算
+data[NON_OPERATING]['支払利息'] = 4000
+derived = evaluator.evaluate(data)
+check("支払利息変更時の再計算ノード数", evaluator.recomputed, 2)
+check("再計算後の経常利益", derived.get((NON_OPERATING, '経常利益金額')), 40000 - expense_total + 4500 - 4000)
+
+# 4. 抽出済みの値は上書きしない
+data[INCOME]['営業利益金額'] = 20000
+derived = evaluator.evaluate(data)
+check("抽出済みの営業利益は算出しない", (INCOME, '営業利益金額') in derived, False)
+check("抽出値を使った経常利益", derived.get((NON_OPERATING, '経常利益金額')), 20000 + 4500 - 4000)
+
+# 5. 合計の式は一部の内訳のみでも無い内訳を 0 として算出し、差額の式はすべての入力が必要
+partial = DerivedValueEvaluator().evaluate({
+    INCOME: {'完成工事高': 100000, '完成工事原価': 60000, '役員報酬': 10000, '雑費': 5000},
+    NON_OPERATING: {'受取利息': 3000, '雑収入': 500, '支払利息': 2000},
+    COST: {'材料費': 50},
+})
+check("総利益は算出", partial.get((INCOME, '完成工事総利益金額')), 40000)
+check("販管費の一部のみ: 販管費合計", partial.get((INCOME, '販管費合計')), 15000)
+check("販管費の一部のみ: 営業利益", partial.get((INCOME, '営業利益金額')), 25000)
+check("受取配当金なし: 営業外収益合計", partial.get((NON_OPERATING, '営業外収益合計')), 3500)
+check("営業外費用合計は支払利息のみで算出", partial.get((NON_OPERATING, '営業外費用合計')), 2000)
+check("経常利益", partial.get((NON_OPERATING, '経常利益金額')), 25000 + 3500 - 2000)
+check("材料費のみ: 完成工事原価", partial.get((COST, '完成工事原価')), 50)
+
+sparse = DerivedValueEvaluator().evaluate({INCOME: {'完成工事高': 100000, '営業損失金額': 3000}})
+check("完成工事原価なし: 総利益なし", (INCOME, '完成工事総利益金額') in sparse, False)
+check("内訳なし: 販管費合計なし", (INCOME, '販管費合計') in sparse, False)
+check("営業外損益なし: 経常利益 = 営業利益", sparse.get((NON_OPERATING, '経常利益金額')), -3000)
+check("営業利益なし: 経常利益なし", (NON_OPERATING, '経常利益金額') in DerivedValueEvaluator().evaluate(
+    {NON_OPERATING: {'雑収入': 500}}), False)
+
+cost = DerivedValueEvaluator().evaluate({COST: {'材料費': 50, '労務費': 20, '外注加工費': 20, '経費': 10}})
+check("完成工事原価（全入力）", cost.get((COST, '完成工事原価')), 100)
+
+# 6. 受取利息・配当金は 受取利息 + 受取配当金 の代わり（加算しない）
+combined = DerivedValueEvaluator().evaluate({NON_OPERATING: {'受取利息・配当金': 4000, '雑収入': 500}})
+check("受取利息・配当金 + 雑収入", combined.get((NON_OPERATING, '営業外収益合計')), 4500)
+both = DerivedValueEvaluator().evaluate(
+    {NON_OPERATING: {'受取利息': 3000, '受取配当金': 1000, '受取利息・配当金': 4000, '雑収入': 500}})
+check("内訳と両方ある場合も二重に数えない", both.get((NON_OPERATING, '営業外収益合計')), 4500)
+check("受取利息・配当金（内訳の合計）", derived.get((NON_OPERATING, '受取利息・配当金')), 4000)
+
+# 7. 営業損失が抽出されている場合は営業利益 = −営業損失（S39 には負の値で書き込む）
+loss_data = {INCOME: {'完成工事高': 100000, '完成工事原価': 60000, '営業損失金額': 3000, **expenses}}
+loss = DerivedValueEvaluator().evaluate(loss_data)
+check("営業利益 = −営業損失", loss.get((INCOME, '営業利益金額')), -3000)
+
+plan = compile_write_plan()
+
+
+def cell_value(values, sheet, cell):
+    resolved = {(p.sheet, p.cell): value for p, value, _ in reduce_cell_values(values, plan)}
+    return resolved.get((sheet, cell))
+
+
+def s39(values):
+    return cell_value(values, SHEET_16_4, 'S39')
+
+
+with contextlib.redirect_stdout(io.StringIO()):
+    completed_loss, completed = calculate_derived_values(loss_data), calculate_derived_values(data)
+check("S39（営業損失のみ）", s39({INCOME: {'営業損失金額': 3000}}), -3000)
+check("S39（営業損失と算出した営業利益）", s39(completed_loss), -3000)
+check("S39（抽出した営業利益）", s39(completed), 20000)
+
+# 8. S4 は受取利息・配当金を優先し、内訳のみの場合は算出した 受取利息 + 受取配当金 を書き込む
+with contextlib.redirect_stdout(io.StringIO()):
+    split_only = calculate_derived_values({NON_OPERATING: {'受取利息': 500, '受取配当金': 800}})
+    with_combined = calculate_derived_values(
+        {NON_OPERATING: {'受取利息': 500, '受取配当金': 800, '受取利息・配当金': 1000}})
+check("S4（内訳のみ）", cell_value(split_only, SHEET_16_5, 'S4'), 1300)
+check("S4（受取利息・配当金を優先）", cell_value(with_combined, SHEET_16_5, 'S4'), 1000)
+
+print("=" * 70)
+if all_passed:
+    print("✓ すべてのテストが成功しました")
+else:
+    print("✗ 一部のテストが失敗しました")
+    sys.exit(1)
+print("=" * 70)
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+"""
+株主資本等変動計算書（表形式）の読み取りをテストするスクリプト
+単語位置（pdfplumberの extract_words の結果）から行見出し×列見出しのセルを読み取ります
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from pdf_parser import match_statement_grid
+
+print("=" * 70)
+print("株主資本等変動計算書 表形式読み取りテスト")
+print("=" * 70)
+
+all_passed = True
+
+
+def check(label, result, expected):
+    global all_passed
+    passed = result == expected
+    all_passed = all_passed and passed
+    status = "✓ PASS" if passed else "✗ FAIL"
+    print(f"{status}: {label} -> {result} (期待値: {expected})")
+
+
+def word(text, x0, top, size=10):
+    """1文字の幅を文字サイズとした単語"""
+    return {'text': text, 'x0': x0, 'x1': x0 + size * len(text), 'top': top, 'bottom': top + size}
+
+
+# 1. 列: 資本金・資本剰余金・繰越利益剰余金・純資産合計（スキーマに無い列の数値は読まない）
+words = [
+    word('株主資本等変動計算書', 60, 40, 14),
+    word('資本金', 180, 80), word('資本剰余金', 280, 80), word('繰越利益剰余金', 380, 80), word('純資産合計', 480, 80),
+    word('当期首残高', 60, 110), word('10,000,000', 180, 110, 8), word('2,000,000', 280, 110, 8),
+    word('5,000,000', 380, 110, 8), word('17,000,000', 480, 110, 8),
+    word('当期変動額', 60, 140),
+    word('当期純利益', 80, 170), word('1,200,000', 380, 170, 8), word('1,200,000', 480, 170, 8),
+    word('当期末残高', 60, 200), word('10,000,000', 180, 200, 8), word('2,000,000', 280, 200, 8),
+    word('6,200,000', 380, 200, 8), word('18,200,000', 480, 200, 8),
+]
+check("表の全セル", match_statement_grid(words, 'equity_statement'), {'equity_change': {
+    '当期首残高_資本金': 10000000,
+    '当期首残高_繰越利益剰余金': 5000000,
+    '当期純利益': 1200000,
+    '当期末残高_資本金': 10000000,
+    '当期末残高_繰越利益剰余金': 6200000,
+}})
+
+# 2. 見出しの文字間の空白・上位の見出し付きの行・△（負数）
+words = [
+    word('資', 180, 80), word('本', 195, 80), word('金', 210, 80),
+    word('繰越利益剰余金', 300, 80),
+    word('当期変動額', 60, 110), word('当期純利益', 115, 110), word('△300,000', 300, 110, 8),
+    word('当期末残高', 60, 140), word('3,000,000', 180, 140, 8), word('△100,000', 300, 140, 8),
+]
+check("空白入りの見出し・負数", match_statement_grid(words, 'equity_statement'), {'equity_change': {
+    '当期純利益': -300000,
+    '当期末残高_資本金': 3000000,
+    '当期末残高_繰越利益剰余金': -100000,
+}})
+
+# 3. 列見出しが無いページ・単語位置の無いページ（OCR）は読み取らない
+check("列見出しなし", match_statement_grid([word('当期首残高', 60, 110), word('1,000', 180, 110)], 'equity_statement'), {})
+check("単語なし", match_statement_grid([], 'equity_statement'), {})
+
+print("=" * 70)
+if all_passed:
+    print("✓ すべてのテストが成功しました")
+else:
+    print("✗ 一部のテストが失敗しました")
+    sys.exit(1)
+print("=" * 70)
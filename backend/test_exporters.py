@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+"""
+出力フォーマット（JSON・CSV）と、format パラメータ・Acceptヘッダーによる出力形式の選択をテストするスクリプト
+"""
+
+import contextlib
+import csv
+import io
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from openpyxl import load_workbook
+
+from exporters import OUTPUT_FORMATS, parse_accept, resolve_output_format, to_csv, to_json_payload
+from schema import SHEET_16_4
+from synthetic_pdf import synthetic_filing
+
+print("=" * 70)
+print("出力フォーマットテスト")
+print("=" * 70)
+
+all_passed = True
+
+
+def check(label, result, expected):
+    global all_passed
+    passed = result == expected
+    all_passed = all_passed and passed
+    status = "✓ PASS" if passed else "✗ FAIL"
+    print(f"{status}: {label} -> {result} (期待値: {expected})")
+
+
+data = {
+    'income_statement': {'完成工事原価': 600, '完成工事高': 1000},
+    'balance_sheet_assets': {'現金及び預金': 200},
+}
+
+# 1. JSON / CSV（カテゴリ順、カテゴリ内はスキーマの定義順）
+payload = to_json_payload(data, {'discrepancies': []})
+check("JSONの項目", [(row['category'], row['item'], row['value']) for row in payload['items']], [
+    ('balance_sheet_assets', '現金及び預金', 200),
+    ('income_statement', '完成工事高', 1000),
+    ('income_statement', '完成工事原価', 600),
+])
+check("JSONの検証レポート", payload['validation'], {'discrepancies': []})
+rows = list(csv.DictReader(io.StringIO(to_csv(data))))
+check("CSVの列", list(rows[0]), ['category', 'item', 'value'])
+check("CSVの行", [(row['item'], row['value']) for row in rows], [
+    ('現金及び預金', '200'), ('完成工事高', '1000'), ('完成工事原価', '600'),
+])
+
+# 2. Acceptヘッダーの優先度（q値の大きい順、同じq値は記述順、q=0 は除外）
+check("q値の順", parse_accept('text/csv;q=0.5, application/json, */*;q=0.1'), ['application/json', 'text/csv', '*/*'])
+check("q=0 は除外", parse_accept('application/json;q=0, text/csv'), ['text/csv'])
+
+# 3. format パラメータ・Acceptヘッダーからの出力形式: (format, Accept, 期待値)
+cases = [
+    (None, None, 'xlsx'),
+    ('JSON', None, 'json'),
+    ('csv', 'application/json', 'csv'),
+    (None, 'application/json', 'json'),
+    (None, 'text/csv;charset=utf-8', 'csv'),
+    (None, 'text/csv, application/json', 'csv'),
+    (None, 'application/json, text/csv', 'json'),
+    (None, 'text/csv;q=0.5, application/json', 'json'),
+    (None, 'application/json;q=0, text/csv;q=0.2', 'csv'),
+    (None, 'text/html, application/xml;q=0.9, */*;q=0.8', 'xlsx'),
+    (None, 'text/*', 'csv'),
+    (None, 'text/html', 'xlsx'),
+]
+for format_param, accept, expected in cases:
+    check(f"format={format_param} Accept={accept}", resolve_output_format(format_param, accept), expected)
+try:
+    resolve_output_format('pdf', None)
+    check("未対応の format", "エラーなし", "ValueError")
+except ValueError:
+    check("未対応の format", "ValueError", "ValueError")
+
+# 4. APIでの出力形式の選択（JSON / CSV にもExcelと同じ計算項目を含める）
+pdf, filed = synthetic_filing(1, coverage=1.0)
+with tempfile.TemporaryDirectory() as directory:
+    cwd = os.getcwd()
+    os.chdir(directory)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            from fastapi.testclient import TestClient
+            import main
+            # pytestで他のテストと同じプロセスで実行した場合もこのディレクトリに一時ファイルを作る
+            os.makedirs(main.UPLOAD_DIR, exist_ok=True)
+
+            with TestClient(main.app) as client:
+                def convert(params=None, headers=None):
+                    return client.post("/api/convert", params=params, headers=headers,
+                                       files={"file": ("filing.pdf", pdf, "application/pdf")})
+
+                responses = {
+                    'xlsx': convert(),
+                    'json': convert({"format": "json"}),
+                    'csv': convert(headers={"Accept": "text/csv"}),
+                    'accept_q': convert(headers={"Accept": "text/csv;q=0.5, application/json"}),
+                    'override': convert({"format": "csv"}, {"Accept": "application/json"}),
+                    'invalid': convert({"format": "pdf"}),
+                }
+    finally:
+        os.chdir(cwd)
+
+    def content_type(name):
+        return responses[name].headers.get("content-type", "").split(';')[0]
+
+    for name, expected in [('xlsx', 'xlsx'), ('json', 'json'), ('csv', 'csv'), ('accept_q', 'json'), ('override', 'csv')]:
+        check(f"{name}: Content-Type", content_type(name), OUTPUT_FORMATS[expected])
+    check("未対応の format は400", responses['invalid'].status_code, 400)
+
+    json_items = {(row['category'], row['item']): row['value'] for row in responses['json'].json()['items']}
+    csv_items = {(row['category'], row['item']): int(row['value'])
+                 for row in csv.DictReader(io.StringIO(responses['csv'].text))}
+    check("APIのJSONの項目", json_items[('income_statement', '完成工事高')],
+          filed['income_statement']['完成工事高'])
+    check("JSONとCSVが一致", csv_items, json_items)
+    check("CSVに検証レポートのヘッダー", 'x-validation-report' in responses['csv'].headers, True)
+    operating = json_items.get(('income_statement', '営業利益金額'))
+    check("JSONに計算項目（営業利益）", operating is not None, True)
+    check("CSVに計算項目（営業利益）", csv_items.get(('income_statement', '営業利益金額')), operating)
+    workbook = load_workbook(io.BytesIO(responses['xlsx'].content))
+    # S39 はマージセル M39:S39 のため左上のセルに千円単位で書き込まれる
+    check("Excelの営業利益と一致", workbook[SHEET_16_4]['M39'].value, operating // 1000)
+    check("一時ファイルを残さない", sorted(os.listdir(os.path.join(directory, main.UPLOAD_DIR))), [])
+
+print("=" * 70)
+if all_passed:
+    print("✓ すべてのテストが成功しました")
+else:
+    print("✗ 一部のテストが失敗しました")
+    sys.exit(1)
+print("=" * 70)
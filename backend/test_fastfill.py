@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+"""
+コンパイル済みテンプレート（fast-fill）での書き込みをテストするスクリプト
+openpyxlでの書き込み結果と同じ値・書式になることを確認します
+"""
+
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from openpyxl import load_workbook
+
+from create_template import add_number_format_styles, compile_template, ensure_cell_element, read_parts, resolve_address
+from excel_writer import compile_cell_map, compile_write_plan, prepare_template, write_plan_fingerprint, write_to_excel
+from fastfill import artifact_path_for, find_cell_element, load_artifact
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "エクセルサンプル.xlsx")
+
+print("=" * 70)
+print("コンパイル済みテンプレートテスト")
+print("=" * 70)
+
+all_passed = True
+
+
+def check(label, result, expected):
+    global all_passed
+    passed = result == expected
+    all_passed = all_passed and passed
+    status = "✓ PASS" if passed else "✗ FAIL"
+    print(f"{status}: {label} -> {result} (期待値: {expected})")
+
+
+# 1. セル要素の検索
+xml = b'<row r="1"><c r="A1" s="3"/><c r="A10" s="4" t="n"><v>5</v></c><c r="A11"/></row>'
+check("自己終了タグ", find_cell_element(xml, "A1"), (11, 28, 3))
+check("値を持つセル（A1と区別）", find_cell_element(xml, "A10")[2], 4)
+check("スタイル無し", find_cell_element(xml, "A11")[2], None)
+check("存在しないセル", find_cell_element(xml, "B1"), None)
+
+# 2. シートXML・styles.xml の書き換え
+row = b'<sheetData><row r="2"><c r="A2"/><c r="C2"/></row><row r="4"/></sheetData>'
+check("行内の列順に追加", ensure_cell_element(row, "B2"),
+      b'<sheetData><row r="2"><c r="A2"/><c r="B2"/><c r="C2"/></row><row r="4"/></sheetData>')
+check("空の行に追加", ensure_cell_element(row, "A4"),
+      b'<sheetData><row r="2"><c r="A2"/><c r="C2"/></row><row r="4"><c r="A4"/></row></sheetData>')
+check("行を追加", ensure_cell_element(row, "A3"),
+      b'<sheetData><row r="2"><c r="A2"/><c r="C2"/></row><row r="3"><c r="A3"/></row><row r="4"/></sheetData>')
+check("既存のセルは変更しない", ensure_cell_element(row, "C2"), row)
+check("マージセルは左上", resolve_address(b'<mergeCell ref="B2:D3"/>', "C3"), "B2")
+styles = b'<cellXfs count="2"><xf numFmtId="0" fontId="1"/><xf numFmtId="3" fontId="2"><alignment/></xf></cellXfs>'
+check("数値の書式を追加", add_number_format_styles(styles, [0, 1]), (
+    b'<cellXfs count="3"><xf numFmtId="0" fontId="1"/><xf numFmtId="3" fontId="2"><alignment/></xf>'
+    b'<xf numFmtId="3" fontId="1" applyNumberFormat="1"/></cellXfs>',
+    {0: 2, 1: 1},
+))
+
+data = {
+    'balance_sheet_assets': {'現金及び預金': 1234567, '流動資産合計': 5000000},
+    'balance_sheet_liabilities': {'工事未払金': 2000000, '未払金': 300000},
+    'income_statement': {'完成工事高': 50000000, '完成工事原価': 40000000, '給与手当': 3000000},
+    'non_operating': {'受取利息': 1000, '雑収入': 2000},
+    'cost_report': {'材料費': 1000000, '労務費': 2000000},
+    'equity_change': {'当期純利益': 500000},
+}
+
+with tempfile.TemporaryDirectory() as directory:
+    template = os.path.join(directory, "エクセルサンプル.xlsx")
+    shutil.copy(TEMPLATE_PATH, template)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        # openpyxlでの書き込み（アーティファクト無し）
+        check("アーティファクト無しはopenpyxl", prepare_template(template), 'openpyxl')
+        write_to_excel(data, template, os.path.join(directory, "out", "openpyxl.xlsx"))
+
+        # コンパイルしてfast-fillで書き込み
+        compiled = compile_template(template)
+        mode = prepare_template(template)
+        write_to_excel(data, template, os.path.join(directory, "out", "fastfill.xlsx"))
+
+    check("コンパイル成功", compiled, True)
+    check("アーティファクト作成", os.path.exists(artifact_path_for(template)), True)
+    check("アーティファクト有りはfast-fill", mode, 'fastfill')
+
+    # 書き換えるのは書き込み先のシートXMLと styles.xml のみ（図形などは元のxlsxのまま）
+    source_parts = read_parts(template)
+    artifact = load_artifact(template, write_plan_fingerprint())
+    check("zip内ファイルの一覧が元のxlsxと一致", list(artifact.parts), list(source_parts))
+    changed = {name for name, content in artifact.parts.items() if content != source_parts[name]}
+    check("styles.xml とシートXML以外は変更しない",
+          changed <= {'xl/styles.xml'} | set(artifact.sheets.values()), True)
+
+    # 3. 書き込み先セルの値と書式がopenpyxlと一致
+    expected = load_workbook(os.path.join(directory, "out", "openpyxl.xlsx"))
+    actual = load_workbook(os.path.join(directory, "out", "fastfill.xlsx"))
+    mismatches = []
+    for cell_plan in compile_write_plan():
+        if cell_plan.sheet not in expected.sheetnames:
+            continue
+        a = expected[cell_plan.sheet][cell_plan.cell]
+        b = actual[cell_plan.sheet][cell_plan.cell]
+        if a.value != b.value or (isinstance(a.value, int) and a.number_format != b.number_format):
+            mismatches.append(f"{cell_plan.sheet}!{cell_plan.cell}")
+    check("書き込み先セルの不一致", mismatches, [])
+    sheet, cell = compile_cell_map('balance_sheet_assets')['現金及び預金']
+    check("現金及び預金（下3桁除去）", actual[sheet][cell].value, 1234)
+
+    # 4. セルマッピングまたはテンプレートが変更された場合はアーティファクトを使わない
+    with contextlib.redirect_stdout(io.StringIO()):
+        mapping_changed = load_artifact(template, "changed")
+        expected.save(template)
+        template_changed = load_artifact(template, write_plan_fingerprint())
+    check("セルマッピング変更の検出", mapping_changed, None)
+    check("テンプレート変更の検出", template_changed, None)
+
+# 5. Vercel用（api/）に同梱したアーティファクトが最新か
+#    古い場合は backend/ で python create_template.py ../api/エクセルサンプル.xlsx を実行
+api_template = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "api", "エクセルサンプル.xlsx")
+if os.path.exists(api_template):
+    with contextlib.redirect_stdout(io.StringIO()):
+        bundled = load_artifact(api_template, write_plan_fingerprint())
+    check("api/ 同梱のアーティファクトが最新", bundled is not None, True)
+
+print("=" * 70)
+if all_passed:
+    print("✓ すべてのテストが成功しました")
+else:
+    print("✗ 一部のテストが失敗しました")
+    sys.exit(1)
+print("=" * 70)
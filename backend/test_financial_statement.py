@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+"""
+抽出データ（項目番号の配列）の変換と、各モジュールでの扱いをテストするスクリプト
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from financial_statement import (
+    FinancialStatement, as_statement, category_slots, compile_fields, field_index, fields_fingerprint,
+)
+from schema import CATEGORIES, iter_sections
+from validator import validate_financial_data
+
+print("=" * 70)
+print("抽出データ（FinancialStatement）テスト")
+print("=" * 70)
+
+all_passed = True
+
+
+def check(label, result, expected):
+    global all_passed
+    passed = result == expected
+    all_passed = all_passed and passed
+    status = "✓ PASS" if passed else "✗ FAIL"
+    print(f"{status}: {label} -> {result} (期待値: {expected})")
+
+
+# 別名を持つ項目（1件目）
+alias_field = next(
+    (section.category, item.key, item.aliases[0])
+    for _, section in iter_sections() for item in section.items if item.aliases
+)
+category, key, alias = alias_field
+
+# 1. 項目番号の表
+fields = compile_fields()
+check("項目番号が重複しない", len(set(fields)), len(fields))
+check("別名は同じ番号", field_index()[(category, alias)], field_index()[(category, key)])
+check("__slots__（属性の辞書を持たない）", hasattr(FinancialStatement(), '__dict__'), False)
+
+# 2. 辞書との相互変換（全カテゴリを含む）
+data = {
+    'balance_sheet_assets': {'現金及び預金': 1000, '売掛金': 200},
+    'income_statement': {'完成工事高': 5000},
+}
+statement = FinancialStatement.from_dict(data)
+check("抽出済みの項目数", len(statement), 3)
+check("get", statement.get('income_statement', '完成工事高'), 5000)
+check("get（未抽出）", statement.get('income_statement', '完成工事原価', 0), 0)
+check("category", statement.category('balance_sheet_assets'), data['balance_sheet_assets'])
+check("count", (statement.count('balance_sheet_assets'), statement.count('equity_change')), (2, 0))
+check("カテゴリの項目番号", all(compile_fields()[number] == ('income_statement', key)
+                             for number, key in category_slots('income_statement')), True)
+check("to_dict のカテゴリ", list(statement.to_dict()), list(CATEGORIES))
+check("from_dict(to_dict())", FinancialStatement.from_dict(statement.to_dict()), statement)
+
+# 3. 別名は正式な項目名に集約（正式な項目名の値を優先）
+check("別名で設定", FinancialStatement.from_dict({category: {alias: 7}}).to_dict()[category], {key: 7})
+check("正式な項目名を優先", FinancialStatement.from_dict({category: {key: 1, alias: 2}}).get(category, key), 1)
+check("正式な項目名を優先（順序逆）", FinancialStatement.from_dict({category: {alias: 2, key: 1}}).get(category, key), 1)
+
+# 4. スキーマに無い項目は extra に保持
+unknown = FinancialStatement.from_dict({'income_statement': {'スキーマに無い項目': 9}})
+check("スキーマに無い項目", unknown.to_dict()['income_statement'], {'スキーマに無い項目': 9})
+check("items に含む", list(unknown.items()), [('income_statement', 'スキーマに無い項目', 9)])
+
+# 5. 値のリストとの相互変換（スキーマのハッシュで鮮度確認）
+values = statement.to_list()
+check("リストの長さ", len(values), len(fields))
+check("from_list", FinancialStatement.from_list(values, fields_fingerprint()), statement)
+for label, args in [("ハッシュ不一致", (values, "0" * 64)), ("項目数不一致", (values[:-1],))]:
+    try:
+        FinancialStatement.from_list(*args)
+        check(label, "エラーなし", "ValueError")
+    except ValueError:
+        check(label, "ValueError", "ValueError")
+
+# 6. copy は独立、as_statement は同じオブジェクトをそのまま返す
+copied = statement.copy()
+copied.set('income_statement', '完成工事高', 1)
+check("copy は独立", statement.get('income_statement', '完成工事高'), 5000)
+check("as_statement（そのまま）", as_statement(statement) is statement, True)
+check("as_statement（辞書）", as_statement(data), statement)
+
+# 7. 整合性検証は入力と同じ形式で返す
+validated, _ = validate_financial_data(statement)
+check("検証結果（FinancialStatement）", isinstance(validated, FinancialStatement), True)
+validated, _ = validate_financial_data(data)
+check("検証結果（辞書）", isinstance(validated, dict), True)
+
+print("=" * 70)
+if all_passed:
+    print("✓ すべてのテストが成功しました")
+else:
+    print("✗ 一部のテストが失敗しました")
+    sys.exit(1)
+print("=" * 70)
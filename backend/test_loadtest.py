@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+"""
+負荷試験ツールの集計処理と合成PDFをテストするスクリプト
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from loadtest import RequestResult, parse_mix, percentile, summarize
+from pdf_parser import read_pages
+from synthetic_pdf import synthetic_filing
+
+print("=" * 70)
+print("負荷試験ツールテスト")
+print("=" * 70)
+
+all_passed = True
+
+
+def check(label, result, expected):
+    global all_passed
+    passed = result == expected
+    all_passed = all_passed and passed
+    status = "✓ PASS" if passed else "✗ FAIL"
+    print(f"{status}: {label} -> {result} (期待値: {expected})")
+
+
+# 1. パーセンタイル（最近接順位法）
+values = [float(n) for n in range(1, 101)]
+check("p50", percentile(values, 50), 50.0)
+check("p99", percentile(values, 99), 99.0)
+check("1件のみ", percentile([0.3], 95), 0.3)
+check("空", percentile([], 50), None)
+
+# 2. リクエストの配分
+check("配分", parse_mix("convert=3,json=1,health"), [("convert", 3.0), ("json", 1.0), ("health", 1.0)])
+try:
+    parse_mix("upload=1")
+    check("不明な種類はエラー", False, True)
+except ValueError:
+    check("不明な種類はエラー", True, True)
+
+# 3. 429はエラーと分けて集計し、レイテンシは成功したリクエストのみ
+results = [
+    RequestResult("convert", 0.0, 0.5, 200),
+    RequestResult("convert", 0.1, 1.5, 200),
+    RequestResult("convert", 0.2, 0.01, 429),
+    RequestResult("json", 0.3, 0.2, 500),
+]
+summary = summarize(results, elapsed=2.0, rss_samples=[(0.0, 80.0), (1.0, 120.0), (2.0, 100.0)])
+check("成功", summary["ok"], 2)
+check("受付拒否", summary["rejected_429"], 1)
+check("エラー率", summary["error_rate"], 0.25)
+check("スループット", summary["throughput_rps"], 1.0)
+check("p99", summary["latency"]["p99"], 1.5)
+check("ピークRSS", summary["server_rss_mb"]["peak"], 120.0)
+
+# 4. 合成PDF（同じシードなら同じ内容、書類ごとに1ページ）
+content, expected = synthetic_filing(7, extra_pages=2)
+check("同じシードは同じPDF", synthetic_filing(7, extra_pages=2)[0] == content, True)
+check("貸借対照表の項目あり", len(expected.get("balance_sheet_assets", {})) > 0, True)
+
+with tempfile.TemporaryDirectory() as directory:
+    path = os.path.join(directory, "synthetic.pdf")
+    with open(path, "wb") as f:
+        f.write(content)
+    with contextlib.redirect_stdout(io.StringIO()):
+        pages = read_pages(path)
+
+check("ページ数", len(pages), 7)
+check("書類名を抽出できる", "貸借対照表" in pages[1].text, True)
+first_value = next(iter(expected["balance_sheet_assets"].values()))
+check("金額を抽出できる", f"{first_value:,}" in pages[1].text, True)
+
+print("=" * 70)
+if all_passed:
+    print("✓ すべてのテストが成功しました")
+else:
+    print("✗ 一部のテストが失敗しました")
+    sys.exit(1)
+print("=" * 70)
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+"""
+OCR結果の整形とページ画像キャッシュをテストするスクリプト
+"""
+
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ocr import OCRCache, image_key, normalize_ocr_text, ocr_images
+
+print("=" * 70)
+print("OCRテスト")
+print("=" * 70)
+
+all_passed = True
+
+
+def check(label, result, expected):
+    global all_passed
+    passed = result == expected
+    all_passed = all_passed and passed
+    status = "✓ PASS" if passed else "✗ FAIL"
+    print(f"{status}: {label} -> {result} (期待値: {expected})")
+
+
+# 1. 日本語の文字間の空白を除去（数値との区切りは残す）
+check("文字間の空白", normalize_ocr_text("現 金 及 び 預 金 1,234,567"), "現金及び預金 1,234,567")
+check("全角記号", normalize_ocr_text("負 債 ・ 純 資 産 合 計"), "負債・純資産合計")
+check("英数字の空白は残す", normalize_ocr_text("Page 1 of 2"), "Page 1 of 2")
+check("改行は残す", normalize_ocr_text("貸 借\n対 照 表"), "貸借\n対照表")
+
+# 2. キャッシュキー（同じ画像・言語なら同じキー）
+check("同じ画像は同じキー", image_key(b"png", "jpn"), image_key(b"png", "jpn"))
+check("言語が違えば別のキー", image_key(b"png", "jpn") == image_key(b"png", "eng"), False)
+
+with tempfile.TemporaryDirectory() as directory:
+    cache = OCRCache(directory)
+
+    # 3. キャッシュの保存と読み込み
+    key = image_key(b"page-1", "jpn")
+    check("未保存のキー", cache.get(key), None)
+    cache.put(key, "貸借対照表")
+    check("保存したOCR結果", cache.get(key), "貸借対照表")
+
+    # 4. キャッシュ済みのページはOCRを実行しない（Tesseractが無くても結果を返す）
+    cache.put(image_key(b"page-2", "jpn"), "損益計算書")
+    results = ocr_images([(0, b"page-1"), (1, b"page-2")], cache, lang="jpn")
+    check("キャッシュからの結果", results, {0: "貸借対照表", 1: "損益計算書"})
+
+print("=" * 70)
+if all_passed:
+    print("✓ すべてのテストが成功しました")
+else:
+    print("✗ 一部のテストが失敗しました")
+    sys.exit(1)
+print("=" * 70)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+"""
+ページ抽出結果キャッシュをテストするスクリプト
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import page_cache
+import pdf_parser
+from cli import backfill_document, diff_values
+from page_cache import PageCache, decode_page, document_key, encode_page
+from pdf_parser import iter_page_contents, load_cached_pages, parse_pages
+from synthetic_pdf import synthetic_filing
+from validator import validate_financial_data
+
+print("=" * 70)
+print("ページキャッシュテスト")
+print("=" * 70)
+
+all_passed = True
+
+
+def check(label, result, expected):
+    global all_passed
+    passed = result == expected
+    all_passed = all_passed and passed
+    status = "✓ PASS" if passed else "✗ FAIL"
+    print(f"{status}: {label} -> {result} (期待値: {expected})")
+
+
+def read(path, cache):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return list(iter_page_contents(path, use_ocr=False, cache=cache))
+
+
+# 1. 保存形式（単語は属性の配列で保存し、辞書に戻す）
+words = [{'text': '資本金', 'x0': 180.0, 'x1': 210.0, 'top': 61.5, 'bottom': 71.5}]
+check("保存形式の往復", decode_page(encode_page("貸借対照表\n資本金", words)), ("貸借対照表\n資本金", words))
+
+with tempfile.TemporaryDirectory() as directory:
+    content, _ = synthetic_filing(3, extra_pages=1)
+    path = os.path.join(directory, "filing.pdf")
+    with open(path, "wb") as f:
+        f.write(content)
+    copy_path = os.path.join(directory, "copy.pdf")
+    with open(copy_path, "wb") as f:
+        f.write(content)
+
+    cache = PageCache(os.path.join(directory, "cache", "pages.sqlite3"))
+
+    # 2. 初回はPDFから抽出して保存、2回目はPDFを開かずにキャッシュから読み込む
+    first = read(path, cache)
+    check("初回はキャッシュなし", [page.cached for page in first], [False] * 6)
+    check("保存したページ数", cache.stats(), {'documents': 1, 'pages': 6})
+
+    original_open = pdf_parser.pdfplumber.open
+    opened = []
+    pdf_parser.pdfplumber.open = lambda *args, **kwargs: opened.append(args) or original_open(*args, **kwargs)
+    try:
+        second = read(copy_path, cache)
+    finally:
+        pdf_parser.pdfplumber.open = original_open
+    check("同じ内容のPDFはキャッシュから読み込む", [page.cached for page in second], [True] * 6)
+    check("PDFを開かない", opened, [])
+    same = [(p.index, p.text, p.words) for p in second] == [(p.index, p.text, p.words) for p in first]
+    check("抽出結果が同じ", same, True)
+
+    # 3. 検索ページ数が少ない場合も総ページ数を保存
+    check("先頭ページのみ", len(list(iter_page_contents(path, max_pages=2, use_ocr=False, cache=cache))), 2)
+
+    # 4. pdfplumberのバージョンが違うキャッシュは使わない
+    other = PageCache(cache.path, version="pdfplumber-0.0.0/1")
+    check("バージョン違い", other.load(document_key(path)), (None, {}))
+
+    # 5. キャッシュなし
+    check("キャッシュ無効", [page.cached for page in read(path, None)], [False] * 6)
+
+    # 6. キャッシュのみで再照合（backfill）
+    doc = document_key(path)
+    check("検索ページが揃っている", len(load_cached_pages(cache, doc)), 6)
+    partial = PageCache(os.path.join(directory, "partial.sqlite3"))
+    list(iter_page_contents(path, max_pages=2, use_ocr=False, cache=partial))
+    check("揃っていない場合はNone", load_cached_pages(partial, doc), None)
+    check("未登録のPDF", load_cached_pages(cache, "0" * 64), None)
+    with contextlib.redirect_stdout(io.StringIO()):
+        data, _ = validate_financial_data(parse_pages(load_cached_pages(cache, doc)))
+
+    cache.store_result(doc, "2024/filing.pdf", {'balance_sheet_assets': {'現金及び預金': 1}})
+    check("ファイル名付きの一覧", cache.documents(), [(doc, "2024/filing.pdf")])
+    page_cache.configure(cache.path)
+    result = backfill_document(doc, "2024/filing.pdf", None, 'json', None, record=True)
+    check("前回の結果からの変更あり", result['status'] == 'success' and len(result['changes']) > 0, True)
+    check("差分の基準を更新", backfill_document(doc, "2024/filing.pdf", None, 'json', None)['changes'], [])
+    check("基準は照合結果", cache.load_result(doc)['balance_sheet_assets'], data.category('balance_sheet_assets'))
+    page_cache.configure(None)
+
+    # 7. キャッシュファイルが壊れている場合はキャッシュなしで続行
+    broken_path = os.path.join(directory, "broken.sqlite3")
+    with open(broken_path, "wb") as f:
+        f.write(b"not a database" * 100)
+    check("壊れたキャッシュ", len(read(path, PageCache(broken_path))), 6)
+
+# 8. 差分（追加・変更・削除）
+check("差分", diff_values(
+    {'income_statement': {'売上高': 100, '雑収入': 5}},
+    {'income_statement': {'売上高': 120, '受取利息': 3}},
+), [
+    {'category': 'income_statement', 'key': '売上高', 'before': 100, 'after': 120},
+    {'category': 'income_statement', 'key': '受取利息', 'before': None, 'after': 3},
+    {'category': 'income_statement', 'key': '雑収入', 'before': 5, 'after': None},
+])
+
+print("=" * 70)
+if all_passed:
+    print("✓ すべてのテストが成功しました")
+else:
+    print("✗ 一部のテストが失敗しました")
+    sys.exit(1)
+print("=" * 70)
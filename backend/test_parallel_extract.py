@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+"""
+1つのPDF内のページの並列抽出（プロセスプール）をテストするスクリプト
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pdf_parser
+from page_cache import PageCache
+from pdf_parser import configure_parallel_extraction, iter_page_contents, parse_pages
+from synthetic_pdf import synthetic_filing
+
+print("=" * 70)
+print("ページ並列抽出テスト")
+print("=" * 70)
+
+all_passed = True
+
+
+def check(label, result, expected):
+    global all_passed
+    passed = result == expected
+    all_passed = all_passed and passed
+    status = "✓ PASS" if passed else "✗ FAIL"
+    print(f"{status}: {label} -> {result} (期待値: {expected})")
+
+
+def read(path, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return list(iter_page_contents(path, use_ocr=False, **kwargs))
+
+
+with tempfile.TemporaryDirectory() as directory:
+    content, _ = synthetic_filing(7, extra_pages=5)
+    path = os.path.join(directory, "filing.pdf")
+    with open(path, 'wb') as f:
+        f.write(content)
+
+    configure_parallel_extraction(0)
+    sequential = read(path, cache=None)
+
+    # 1. 並列抽出の結果は順に抽出した結果と同じ（ページ番号順）
+    configure_parallel_extraction(3)
+    parallel = read(path, cache=None)
+    check("ページ番号順", [page.index for page in parallel], list(range(len(sequential))))
+    check("抽出結果が同じ", parallel == sequential, True)
+    check("照合結果が同じ", parse_pages(parallel) == parse_pages(sequential), True)
+    check("プロセスプールを作成", pdf_parser._extract_pool is not None, True)
+
+    # 2. 抽出するページが少ない場合は並列にしない
+    configure_parallel_extraction(3)
+    few = pdf_parser.PARALLEL_EXTRACT_MIN_PAGES - 1
+    check("少ないページは順に抽出", read(path, max_pages=few, cache=None) == sequential[:few], True)
+    check("プロセスプールを作成しない", pdf_parser._extract_pool, None)
+
+    # 3. キャッシュ済みのページは並列抽出の対象外（残りのページのみ並列に抽出）
+    cache = PageCache(os.path.join(directory, "cache.sqlite3"))
+    configure_parallel_extraction(0)
+    read(path, max_pages=2, cache=cache)
+    configure_parallel_extraction(3)
+    mixed = read(path, cache=cache)
+    check("キャッシュ済みのページ", [page.cached for page in mixed], [True, True] + [False] * (len(sequential) - 2))
+    check("キャッシュと並列抽出の結果", [(page.index, page.text, page.words) for page in mixed]
+          == [(page.index, page.text, page.words) for page in sequential], True)
+
+    # 4. ワーカープロセスが異常終了した場合は順に抽出する
+    configure_parallel_extraction(3)
+    pdf_parser._get_extract_pool().submit(os._exit, 1)
+    with contextlib.suppress(Exception):
+        pdf_parser._extract_pool.submit(int).result()
+    check("異常終了後も抽出できる", read(path, cache=None) == sequential, True)
+    check("異常終了したプールを破棄", pdf_parser._extract_pool, None)
+
+    configure_parallel_extraction(0)
+
+print("=" * 70)
+if all_passed:
+    print("✓ すべてのテストが成功しました")
+else:
+    print("✗ 一部のテストが失敗しました")
+    sys.exit(1)
+print("=" * 70)
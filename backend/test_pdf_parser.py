@@ -3,10 +3,11 @@
 PDF解析のキーワードマッチングをテストするスクリプト
 """
 
+import os
 import sys
-sys.path.insert(0, '/home/user/Termination-notification/backend')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from pdf_parser import extract_value
+from pdf_parser import extract_value, match_statement_text
 
 # テストケース: スペース入りの「現 金 及 び 預 金」
 test_cases = [
@@ -15,6 +16,26 @@ test_cases = [
     ('現金及び預金 5,000,123', '現金及び預金', 5000123),
     ('現金預金 5,000,123', '現金預金', 5000123),
     ('現 金 及 び 預 金　1,234,567', '現 金 及 び 預 金', 1234567),  # 全角スペース
+    # 別の項目名の一部には一致しない（行頭・空白・数値の直後のみ）
+    ('工事未払金 2,000', '未払金', None),
+    ('工事未払金 2,000\n未払金 300', '未払金', 300),
+    ('税引前当期純利益 500 当期純利益 300', '当期純利益', 300),
+]
+
+# テストケース: 書類の全項目を1回の走査で照合（長いキーワードを優先）
+statement_cases = [
+    # (テキスト, 書類, 期待値)
+    ('工事未払金 2,000\n未払金 300', 'balance_sheet',
+     {'liabilities': {'工事未払金': 2000, '未払金': 300}}),
+    ('工事未払金 2,000', 'balance_sheet',
+     {'liabilities': {'工事未払金': 2000}}),
+    ('流動資産合計 100\n有形固定資産合計 50\n固定資産合計 70\n資産合計 170', 'balance_sheet',
+     {'assets': {'流動資産合計': 100, '有形固定資産合計': 50, '固定資産合計': 70, '資産合計': 170}}),
+    ('税引前当期純利益 500\n法人税、住民税及び事業税 200\n当期純利益 300', 'income_statement',
+     {'non_operating': {'税引前当期純利益': 500, '法人税・住民税・事業税': 200, '当期純利益': 300}}),
+    # 同じ項目のキーワードが複数ある場合はスキーマで先に書かれたキーワードを優先
+    ('完成工事未収入金 800\n売掛金 500', 'balance_sheet',
+     {'assets': {'売掛金': 500}}),
 ]
 
 print("=" * 70)
@@ -32,6 +53,15 @@ for text, keyword, expected in test_cases:
     print(f"{status}: '{text}'")
     print(f"       キーワード: '{keyword}' -> 結果: {result} (期待値: {expected})")
 
+for text, statement_name, expected in statement_cases:
+    result = match_statement_text(text, statement_name)
+    passed = result == expected
+    all_passed = all_passed and passed
+
+    status = "✓ PASS" if passed else "✗ FAIL"
+    print(f"{status}: {text!r} ({statement_name})")
+    print(f"       結果: {result} (期待値: {expected})")
+
 print("=" * 70)
 if all_passed:
     print("✓ すべてのテストが成功しました")
@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+"""
+PDFの事前検査（変換時間の見積もり・拒否）と優先度の低い実行枠の確保をテストするスクリプト
+"""
+
+import asyncio
+import os
+import subprocess
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import preflight
+from admission import AdmissionController
+from preflight import PreflightError, inspect_pdf
+from synthetic_pdf import pdf_bytes, synthetic_filing
+
+print("=" * 70)
+print("PDF事前検査テスト")
+print("=" * 70)
+
+all_passed = True
+
+
+def check(label, result, expected):
+    global all_passed
+    passed = result == expected
+    all_passed = all_passed and passed
+    status = "✓ PASS" if passed else "✗ FAIL"
+    print(f"{status}: {label} -> {result} (期待値: {expected})")
+
+
+def rejected(content, **kwargs):
+    """
+    拒否された場合はエラーメッセージ、拒否されなかった場合はNone
+    """
+    try:
+        inspect_pdf(content, **kwargs)
+    except PreflightError as e:
+        return str(e)
+    return None
+
+
+def image_only_pdf():
+    """
+    フォントを持たず、画像1枚のみを配置した1ページのPDF（スキャンしたPDFを模したもの）
+    """
+    content = b"q 595 0 0 842 0 0 cm /Im1 Do Q"
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842]"
+        b" /Resources << /XObject << /Im1 4 0 R >> >> /Contents 5 0 R >>",
+        b"<< /Type /XObject /Subtype /Image /Width 1 /Height 1 /ColorSpace /DeviceGray"
+        b" /BitsPerComponent 8 /Length 1 >>\nstream\n\xff\nendstream",
+        b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream",
+    ]
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n" % number + obj + b"\nendobj\n"
+    xref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(output)
+
+
+# 1. 通常の決算報告書: ページ数・コンテンツの長さを読み取り、通常の待ち行列
+content, _ = synthetic_filing(1, extra_pages=3)
+report = inspect_pdf(content, use_ocr=False)
+check("総ページ数", report.page_count, 8)
+check("検索対象のページ数", report.scanned_pages, 8)
+check("コンテンツの長さ", report.content_bytes > 0, True)
+check("最大値 <= 合計", report.max_page_bytes <= report.content_bytes, True)
+check("画像のみのページなし", report.image_pages, 0)
+check("見積もり > 0", report.estimated_seconds > 0, True)
+check("通常の待ち行列", report.heavy, False)
+check("as_dict", sorted(report.as_dict()), sorted(report._fields))
+
+# 2. 検索対象のページ数で打ち切る（総ページ数は全ページ）
+report = inspect_pdf(content, max_pages=3, use_ocr=False)
+check("打ち切り後の検索対象", report.scanned_pages, 3)
+check("打ち切り後の総ページ数", report.page_count, 8)
+
+# 3. 読み込めないPDF
+check("PDFでないファイル", (rejected(b"not a pdf at all") or "").startswith("PDFを読み込めません"), True)
+check("途中で切れたPDF", rejected(content[:len(content) // 3]) is not None, True)
+
+# 4. 総ページ数の上限
+original = preflight.PREFLIGHT_MAX_PAGES
+preflight.PREFLIGHT_MAX_PAGES = 5
+check("総ページ数の上限", "ページ数が多すぎます" in (rejected(content, use_ocr=False) or ""), True)
+preflight.PREFLIGHT_MAX_PAGES = original
+
+# 5. 文字の多いページは時間がかかる（専用の待ち行列・上限を超えたら拒否）
+dense = pdf_bytes([[(10, 800 - (line % 50) * 15, 6, f"重要な会計方針 {line:08d} " * 6) for line in range(3000)]] * 4)
+report = inspect_pdf(dense, use_ocr=False)
+check("文字の多いページの見積もり > 通常", report.estimated_seconds > inspect_pdf(content, use_ocr=False).estimated_seconds, True)
+original = preflight.PREFLIGHT_HEAVY_SECONDS
+preflight.PREFLIGHT_HEAVY_SECONDS = report.estimated_seconds / 2
+check("専用の待ち行列", inspect_pdf(dense, use_ocr=False).heavy, True)
+preflight.PREFLIGHT_HEAVY_SECONDS = original
+original = preflight.PREFLIGHT_MAX_SECONDS
+preflight.PREFLIGHT_MAX_SECONDS = report.estimated_seconds / 2
+check("見積もりの上限", "時間がかかりすぎる" in (rejected(dense, use_ocr=False) or ""), True)
+preflight.PREFLIGHT_MAX_SECONDS = original
+
+# 6. 画像のみのページ（OCRが有効な場合のみOCRの時間を見積もる）
+scanned = image_only_pdf()
+report = inspect_pdf(scanned, use_ocr=False)
+check("画像のみのページ", report.image_pages, 1)
+check("OCR無効", report.ocr_pages, 0)
+report = inspect_pdf(scanned, use_ocr=True)
+check("OCR有効", report.ocr_pages, 1)
+check("OCRの見積もり", report.estimated_seconds >= preflight.OCR_PAGE_SECONDS, True)
+
+
+# 7. 優先度の低いリクエストは、待っている通常のリクエストに実行枠を譲る
+async def lane_order():
+    controller = AdmissionController(max_in_flight=1, max_queue=10)
+    order = []
+
+    async def convert(name, low_priority, delay):
+        await asyncio.sleep(delay)
+        async with controller.slot(low_priority=low_priority):
+            order.append(name)
+            await asyncio.sleep(0.05)
+
+    await asyncio.gather(
+        convert("first", False, 0),
+        convert("heavy", True, 0.01),
+        convert("normal", False, 0.02),
+    )
+    return order, controller.waiting_normal, controller.in_flight
+
+order, waiting_normal, in_flight = asyncio.run(lane_order())
+check("通常のリクエストが先", order, ["first", "normal", "heavy"])
+check("待ち件数を戻す", (waiting_normal, in_flight), (0, 0))
+
+# 8. 事前検査は pdf_parser（pdfplumber）を読み込まない
+loaded = subprocess.run(
+    [sys.executable, "-c", "import sys, preflight; print('pdf_parser' in sys.modules, 'pdfplumber' in sys.modules)"],
+    cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True,
+).stdout.strip()
+check("pdf_parser を読み込まない", loaded, "False False")
+
+print("=" * 70)
+if all_passed:
+    print("✓ すべてのテストが成功しました")
+else:
+    print("✗ 一部のテストが失敗しました")
+    sys.exit(1)
+print("=" * 70)
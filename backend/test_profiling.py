@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+"""
+変換のプロファイリング（スタックのサンプリング・cProfile）をテストするスクリプト
+"""
+
+import marshal
+import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from profiling import run_profiled
+
+print("=" * 70)
+print("プロファイリングテスト")
+print("=" * 70)
+
+all_passed = True
+
+
+def check(label, result, expected):
+    global all_passed
+    passed = result == expected
+    all_passed = all_passed and passed
+    status = "✓ PASS" if passed else "✗ FAIL"
+    print(f"{status}: {label} -> {result} (期待値: {expected})")
+
+
+def busy_inner(seconds):
+    deadline = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < deadline:
+        total += 1
+    return total
+
+
+def busy_outer(seconds):
+    busy_inner(seconds)
+    return "done"
+
+
+# 1. sample: 実行中のスタックを collapsed stacks 形式で記録
+result, profile = run_profiled("sample", busy_outer, 0.2, interval=0.002)
+lines = profile['collapsed'].splitlines()
+check("戻り値", result, "done")
+check("サンプルあり", profile['samples'] > 10, True)
+# モジュール名は実行方法で変わる（スクリプトとして実行: __main__ / pytest: test_profiling）
+stack = f"{busy_outer.__module__}:busy_outer;{busy_inner.__module__}:busy_inner "
+check("呼び出し順のスタック", any(stack in line for line in lines), True)
+check("サンプル数の合計", sum(int(line.rsplit(' ', 1)[1]) for line in lines), profile['samples'])
+
+# 2. cprofile: pstats 形式と上位関数の一覧
+result, profile = run_profiled("cprofile", busy_outer, 0.05)
+stats = marshal.loads(profile['pstats'])
+check("戻り値", result, "done")
+check("pstats に関数を含む", any(name == "busy_inner" for _, _, name in stats), True)
+check("上位関数の一覧", "busy_outer" in profile['summary'], True)
+
+# 3. 不明な種類
+try:
+    run_profiled("flame", busy_outer, 0)
+    check("不明な種類はエラー", False, True)
+except ValueError:
+    check("不明な種類はエラー", True, True)
+
+print("=" * 70)
+if all_passed:
+    print("✓ すべてのテストが成功しました")
+else:
+    print("✗ 一部のテストが失敗しました")
+    sys.exit(1)
+print("=" * 70)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+"""
+スキーマ（抽出キーワードとセルマッピング）の整合性をテストするスクリプト
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from schema import CATEGORIES, iter_sections
+from excel_writer import compile_cell_map, compile_write_plan, reduce_cell_values
+
+# テストケース: (カテゴリ, 項目名, 期待するセル)
+test_cases = [
+    ('income_statement', '給与手当', ('１６（４）', 'S19')),
+    ('income_statement', '給与手当等', ('１６（４）', 'S19')),
+    ('income_statement', '事務用品費', ('１６（４）', 'S24')),
+    ('income_statement', '事務用品費等', ('１６（４）', 'S24')),
+    ('balance_sheet_assets', '現金及び預金', ('１５ (１)', 'AE12')),
+    ('cost_report', '完成工事原価', ('１６（５）', 'S37')),
+]
+
+print("=" * 70)
+print("スキーマ整合性テスト")
+print("=" * 70)
+
+all_passed = True
+
+for category, key, expected in test_cases:
+    result = compile_cell_map(category).get(key)
+    passed = result == expected
+    all_passed = all_passed and passed
+
+    status = "✓ PASS" if passed else "✗ FAIL"
+    print(f"{status}: {category}.{key} -> {result} (期待値: {expected})")
+
+# すべてのSectionのカテゴリがparse_pdfの出力カテゴリに含まれること
+for statement, section in iter_sections():
+    passed = section.category in CATEGORIES
+    all_passed = all_passed and passed
+    if not passed:
+        print(f"✗ FAIL: {statement.name}.{section.name} のカテゴリ {section.category} が未定義です")
+
+# 同一カテゴリ内で項目名が重複していないこと
+for category in CATEGORIES:
+    keys = [item.key for _, section in iter_sections(category) for item in section.items]
+    passed = len(keys) == len(set(keys))
+    all_passed = all_passed and passed
+    if not passed:
+        print(f"✗ FAIL: {category} に重複した項目名があります")
+
+# 同一セルへの複数項目は宣言どおりに集約されること: (データ, シート, セル, 期待値)
+reduction_cases = [
+    ({'income_statement': {'旅費交通費': 1500000, '通信費': 700000}}, '１６（４）', 'S25', 2200000),
+    ({'non_operating': {'受取利息・配当金': 1300}}, '１６（５）', 'S4', 1300),
+    # 受取利息・配当金と内訳の両方がある場合も二重に数えない
+    ({'non_operating': {'受取利息': 500, '受取配当金': 800, '受取利息・配当金': 1300}}, '１６（５）', 'S4', 1300),
+    ({'balance_sheet_assets': {'建物・構築物': 1000000, '機械装置': 2000000}}, '１５ (１)', 'T28', 3000000),
+    ({'income_statement': {'給与手当': 3000000, '給与手当等': 1}}, '１６（４）', 'S19', 3000000),
+    ({'income_statement': {'営業損失金額': 400000}}, '１６（４）', 'S39', -400000),
+    ({'income_statement': {'営業損失金額': 400000, '営業利益金額': -400000}}, '１６（４）', 'S39', -400000),
+]
+
+plan = compile_write_plan()
+for data, sheet, cell, expected in reduction_cases:
+    resolved = {(p.sheet, p.cell): value for p, value, _ in reduce_cell_values(data, plan)}
+    result = resolved.get((sheet, cell))
+    passed = result == expected
+    all_passed = all_passed and passed
+
+    status = "✓ PASS" if passed else "✗ FAIL"
+    print(f"{status}: {sheet}!{cell} = {result} (期待値: {expected})")
+
+# 1セルにつきプランは1つであること
+cells = [(p.sheet, p.cell) for p in plan]
+passed = len(cells) == len(set(cells))
+all_passed = all_passed and passed
+if not passed:
+    print("✗ FAIL: 同じセルに複数の書き込みプランがあります")
+
+print("=" * 70)
+if all_passed:
+    print("✓ すべてのテストが成功しました")
+else:
+    print("✗ 一部のテストが失敗しました")
+    sys.exit(1)
+print("=" * 70)
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+"""
+ストリーミング変換（Server-Sent Events）とダウンロードをテストするスクリプト
+"""
+
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from openpyxl import load_workbook
+
+from synthetic_pdf import synthetic_filing
+from template_registry import TEMPLATES, TemplateVariant
+
+print("=" * 70)
+print("ストリーミング変換テスト")
+print("=" * 70)
+
+all_passed = True
+
+
+def check(label, result, expected):
+    global all_passed
+    passed = result == expected
+    all_passed = all_passed and passed
+    status = "✓ PASS" if passed else "✗ FAIL"
+    print(f"{status}: {label} -> {result} (期待値: {expected})")
+
+
+def parse_sse(text):
+    """
+    text/event-stream の本文を (イベント名, データ) のリストに変換
+    """
+    events = []
+    for block in text.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def stages(events):
+    """
+    イベント名の並び（PDF解析の進捗 page / items / statement は 'parse' にまとめ、連続は1つにする）
+    """
+    names = []
+    for name, _ in events:
+        name = 'parse' if name in ('page', 'items', 'statement') else name
+        if not names or names[-1] != name:
+            names.append(name)
+    return names
+
+
+pdf, _ = synthetic_filing(1, coverage=1.0)
+files = {"file": ("filing.pdf", pdf, "application/pdf")}
+
+with tempfile.TemporaryDirectory() as directory:
+    # 書き込みに失敗するテンプレート（Excelではないファイル）
+    broken_template = os.path.join(directory, "broken.xlsx")
+    with open(broken_template, "w") as f:
+        f.write("not an xlsx file")
+    TEMPLATES['stream_broken'] = TemplateVariant('stream_broken', '壊れた様式', broken_template)
+
+    cwd = os.getcwd()
+    os.chdir(directory)
+    try:
+        # 変換エラーのトレースバックも出力しない
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            from fastapi.testclient import TestClient
+            import main
+            # pytestで他のテストと同じプロセスで実行した場合もこのディレクトリに一時ファイルを作る
+            os.makedirs(main.UPLOAD_DIR, exist_ok=True)
+
+            with TestClient(main.app) as client:
+                streamed = client.post("/api/convert/stream", files=files)
+                events = parse_sse(streamed.text)
+                file_id = events[-1][1].get("file_id")
+                excel_path = os.path.join(main.UPLOAD_DIR, f"{file_id}_output.xlsx")
+                kept_until_download = os.path.exists(excel_path)
+                downloaded = client.get(f"/api/download/{file_id}")
+                removed_after_download = not os.path.exists(excel_path)
+                downloaded_again = client.get(f"/api/download/{file_id}")
+                invalid_id = client.get("/api/download/not-a-uuid")
+
+                failed = client.post("/api/convert/stream", params={"template": "stream_broken"}, files=files)
+                failed_events = parse_sse(failed.text)
+                leftover = sorted(os.listdir(main.UPLOAD_DIR))
+    finally:
+        os.chdir(cwd)
+        del TEMPLATES['stream_broken']
+
+    # 1. イベントの順序
+    check("Content-Type", streamed.headers["content-type"].split(";")[0], "text/event-stream")
+    check("イベントの順序", stages(events), ['queued', 'parse', 'parsed', 'validated', 'sheet', 'complete'])
+    names = [name for name, _ in events]
+    check("page / items / statement を含む", {'page', 'items', 'statement'} <= set(names), True)
+    check("ページごとのイベント", names.count('page'), dict(events)['parsed']['pages'])
+    statement = next(data for name, data in events if name == 'statement' and data['derived'])
+    check("statement に計算項目", 'income_statement' in statement['derived'], True)
+    validated = dict(events)['validated']
+    check("validated に計算項目", any(row['item'] == '営業利益金額' for row in validated['items']), True)
+    check("complete のダウンロードURL", events[-1][1]['download_url'], f"/api/download/{file_id}")
+
+    # 2. ダウンロード後にファイルを削除
+    check("ダウンロードまで保持", kept_until_download, True)
+    check("ダウンロード", downloaded.status_code, 200)
+    check("Excelとして読める", load_workbook(io.BytesIO(downloaded.content)) is not None, True)
+    check("送信後に削除", removed_after_download, True)
+    check("2回目は404", downloaded_again.status_code, 404)
+    check("不正なIDは404", invalid_id.status_code, 404)
+
+    # 3. 変換エラーは error イベントで通知し、一時ファイルを残さない
+    check("エラー時のイベントの順序", stages(failed_events), ['queued', 'parse', 'parsed', 'validated', 'error'])
+    check("エラーの内容", failed_events[-1][1]['detail'].startswith("変換エラー"), True)
+    check("一時ファイルを残さない", leftover, [])
+
+print("=" * 70)
+if all_passed:
+    print("✓ すべてのテストが成功しました")
+else:
+    print("✗ 一部のテストが失敗しました")
+    sys.exit(1)
+print("=" * 70)
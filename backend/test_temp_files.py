@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+"""
+一時ファイルの有効期限削除をテストするスクリプト
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import uuid
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from temp_files import TempFileSweeper, is_managed_file, lock_path
+
+print("=" * 70)
+print("一時ファイル削除テスト")
+print("=" * 70)
+
+all_passed = True
+
+
+def check(label, result, expected):
+    global all_passed
+    passed = result == expected
+    all_passed = all_passed and passed
+    status = "✓ PASS" if passed else "✗ FAIL"
+    print(f"{status}: {label} -> {result} (期待値: {expected})")
+
+
+def make_file(directory, name, age_seconds=0):
+    path = os.path.join(directory, name)
+    with open(path, "wb") as f:
+        f.write(b"x")
+    mtime = time.time() - age_seconds
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+with tempfile.TemporaryDirectory() as directory:
+    sweeper = TempFileSweeper(directory, ttl_seconds=60, interval_seconds=60, batch_size=3)
+
+    # 1. 対象ファイル名の判定
+    check("PDFは対象", is_managed_file(f"{uuid.uuid4()}.pdf"), True)
+    check("出力Excelは対象", is_managed_file(f"{uuid.uuid4()}_output.xlsx"), True)
+    check("その他のファイルは対象外", is_managed_file("notes.txt"), False)
+
+    # 2. 有効期限切れのみ削除（バッチサイズより多いファイル）
+    expired = [make_file(directory, f"{uuid.uuid4()}_output.xlsx", age_seconds=120) for _ in range(7)]
+    fresh = make_file(directory, f"{uuid.uuid4()}_output.xlsx")
+    other = make_file(directory, "keep.txt", age_seconds=120)
+    busy = make_file(directory, f"{uuid.uuid4()}.pdf", age_seconds=120)
+    sweeper.acquire(busy)
+
+    result = sweeper.sweep()
+    check("削除件数", result['deleted'], 7)
+    check("有効期限内のファイルは残る", os.path.exists(fresh), True)
+    check("対象外のファイルは残る", os.path.exists(other), True)
+    check("使用中のファイルは残る", os.path.exists(busy), True)
+
+    # 3. 手動クリーンアップ（TTL=0）でも使用中は残る
+    result = sweeper.sweep(ttl_seconds=0)
+    check("TTL=0の削除件数", result['deleted'], 1)
+    check("TTL=0でも使用中のファイルは残る", os.path.exists(busy), True)
+
+    # 4. 送信後の削除で使用中登録も解除
+    sweeper.remove(busy)
+    check("送信後に削除", os.path.exists(busy), False)
+    check("使用中の登録数", sweeper.stats()['in_use'], 0)
+
+    # 5. 解除されないまま有効期限を過ぎた登録は無視
+    stale = make_file(directory, f"{uuid.uuid4()}.pdf", age_seconds=120)
+    sweeper.acquire(stale)
+    check("登録直後は使用中", sweeper.in_use(stale), True)
+    check("有効期限後は使用中とみなさない", sweeper.in_use(stale, now=time.time() + 120), False)
+    # プロセスが異常終了して解除されなかった目印（有効期限切れ）
+    os.utime(lock_path(stale), (time.time() - 120, time.time() - 120))
+
+    # 6. 非同期削除
+    make_file(directory, f"{uuid.uuid4()}_output.xlsx", age_seconds=120)
+    result = asyncio.run(sweeper.sweep_async())
+    check("非同期削除の件数", result['deleted'], 2)
+    check("解除されなかった目印も削除", os.path.exists(lock_path(stale)), False)
+
+    # 7. 同じディレクトリを共有する複数のワーカー（別々のインスタンス）
+    worker_a = TempFileSweeper(directory, ttl_seconds=60, interval_seconds=60)
+    worker_b = TempFileSweeper(directory, ttl_seconds=60, interval_seconds=60)
+    converting = make_file(directory, f"{uuid.uuid4()}.pdf")
+    worker_a.acquire(converting)
+    check("他のワーカーの使用中を判定", worker_b.in_use(converting), True)
+    worker_b.sweep(ttl_seconds=0)
+    check("他のワーカーの手動クリーンアップでも残る", os.path.exists(converting), True)
+    check("目印は削除されない", os.path.exists(lock_path(converting)), True)
+
+    # 他のワーカーが後から使用中にした場合（ダウンロード中）は、先に登録したワーカーの解除で目印を消さない
+    worker_b.acquire(converting)
+    worker_a.release(converting)
+    check("後から登録したワーカーの使用中は続く", worker_a.in_use(converting), True)
+    worker_b.remove(converting)
+    check("送信後に削除", (os.path.exists(converting), os.path.exists(lock_path(converting))), (False, False))
+
+    # 同じワーカー内で複数の処理が使う場合は、すべて解除されるまで使用中
+    shared = make_file(directory, f"{uuid.uuid4()}_output.xlsx")
+    worker_a.acquire(shared)
+    worker_a.acquire(shared)
+    worker_a.release(shared)
+    check("1つ解除しても使用中", worker_b.in_use(shared), True)
+    worker_a.release(shared)
+    check("すべて解除すると使用中でない", worker_b.in_use(shared), False)
+    worker_b.sweep(ttl_seconds=0)
+    check("解除後は手動クリーンアップで削除", os.path.exists(shared), False)
+
+print("=" * 70)
+if all_passed:
+    print("✓ すべてのテストが成功しました")
+else:
+    print("✗ 一部のテストが失敗しました")
+    sys.exit(1)
+print("=" * 70)
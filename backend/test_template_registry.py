@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+"""
+テンプレートの登録（様式ごとの書き込みプラン・キャッシュ）をテストするスクリプト
+"""
+
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from openpyxl import load_workbook
+
+import excel_writer
+from create_template import compile_template
+from excel_writer import compile_write_plan, prepare_template, write_plan_fingerprint, write_to_excel
+from schema import SHEET_15_1, SHEET_17_6
+from template_registry import (
+    DEFAULT_TEMPLATE, STANDARD_TEMPLATE, TEMPLATES, TemplateVariant,
+    get_template, locate_template, template_for_path,
+)
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "エクセルサンプル.xlsx")
+
+print("=" * 70)
+print("テンプレート登録テスト")
+print("=" * 70)
+
+all_passed = True
+
+
+def check(label, result, expected):
+    global all_passed
+    passed = result == expected
+    all_passed = all_passed and passed
+    status = "✓ PASS" if passed else "✗ FAIL"
+    print(f"{status}: {label} -> {result} (期待値: {expected})")
+
+
+def targets(template):
+    return {(cell_plan.sheet, cell_plan.cell): cell_plan for cell_plan in compile_write_plan(template)}
+
+
+def quiet(function, *args):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return function(*args)
+
+
+data = {
+    'balance_sheet_assets': {'現金及び預金': 1234567, '建物・構築物': 300000, '機械装置': 200000},
+    'income_statement': {'完成工事高': 50000000, '完成工事原価': 40000000},
+    'equity_change': {'当期純利益': 500000},
+}
+
+# 1. テンプレート名の解決
+check("既定のテンプレート", get_template().name, DEFAULT_TEMPLATE)
+try:
+    get_template("unknown")
+    check("未登録のテンプレート", "エラーなし", "KeyError")
+except KeyError as e:
+    check("未登録のテンプレート", STANDARD_TEMPLATE in e.args[0], True)
+
+with tempfile.TemporaryDirectory() as directory:
+    # シート名が異なり、当期純利益の行が1行下にある様式
+    renamed_sheet = '１７（６）届出'
+    variant_path = os.path.join(directory, "テスト様式.xlsx")
+    wb = load_workbook(TEMPLATE_PATH)
+    wb[SHEET_17_6].title = renamed_sheet
+    wb.save(variant_path)
+    variant = TemplateVariant(
+        'test', 'テスト様式', variant_path,
+        sheets={SHEET_17_6: renamed_sheet},
+        cells={('equity_change', '当期純利益'): (renamed_sheet, 'AH19')},
+    )
+    standard_copy = os.path.join(directory, "エクセルサンプル.xlsx")
+    shutil.copy(TEMPLATE_PATH, standard_copy)
+
+    # 2. テンプレートを追加しても、他のテンプレートの書き込みでは書き込みプランを作成しない
+    quiet(prepare_template, standard_copy)
+    TEMPLATES[variant.name] = variant
+    compiled = compile_write_plan.cache_info().currsize
+    quiet(write_to_excel, data, standard_copy, os.path.join(directory, "out", "standard.xlsx"))
+    check("標準の様式の書き込みでプランを作成しない", compile_write_plan.cache_info().currsize, compiled)
+    quiet(write_to_excel, data, variant_path, os.path.join(directory, "out", "openpyxl.xlsx"))
+    check("テスト様式のプランは最初の書き込み時に作成", compile_write_plan.cache_info().currsize, compiled + 1)
+
+    # 3. パスからテンプレートの様式を判定
+    check("登録済みのパス", template_for_path(variant_path).name, 'test')
+    check("未登録のパス（標準の様式）", template_for_path(standard_copy).name, STANDARD_TEMPLATE)
+    check("テンプレート名から", locate_template('test') == (variant_path, variant), True)
+    check("パスから", locate_template(standard_copy)[1].name, STANDARD_TEMPLATE)
+
+    # 4. 書き込みプラン（シート名・セル位置の差分、集約方法は標準の様式から引き継ぐ）
+    standard, tested = targets(STANDARD_TEMPLATE), targets('test')
+    check("セル数が同じ", len(tested), len(standard))
+    check("移動したセル", (renamed_sheet, 'AH19') in tested and (renamed_sheet, 'AH18') not in tested, True)
+    check("シート名の変更", sum(sheet == SHEET_17_6 for sheet, _ in tested), 0)
+    check("集約方法を引き継ぐ", tested[(SHEET_15_1, 'T28')].reduce, 'sum')
+    check("プランのハッシュが異なる", write_plan_fingerprint('test') != write_plan_fingerprint(), True)
+
+    # 5. openpyxl / コンパイル済みテンプレートのどちらでもテスト様式のセルに書き込む
+    check("アーティファクト作成", quiet(compile_template, variant_path), True)
+    check("コンパイル済みテンプレートを使用", quiet(prepare_template, variant_path), 'fastfill')
+    quiet(write_to_excel, data, variant_path, os.path.join(directory, "out", "fastfill.xlsx"))
+    for mode in ('openpyxl', 'fastfill'):
+        written = load_workbook(os.path.join(directory, "out", f"{mode}.xlsx"))
+        check(f"{mode}: 当期純利益", written[renamed_sheet]['AH19'].value, 500)
+        check(f"{mode}: 合計するセル", written[SHEET_15_1]['T28'].value, 500)
+    check("標準の様式のファイルは元の位置", load_workbook(os.path.join(directory, "out", "standard.xlsx"))[SHEET_17_6]['AH18'].value, 500)
+
+    # 6. スキーマに無い項目のセル位置は書き込みプランの作成時にエラー
+    TEMPLATES['broken'] = TemplateVariant('broken', '誤った様式', variant_path, cells={('equity_change', '無い項目'): None})
+    try:
+        compile_write_plan('broken')
+        check("スキーマに無い項目", "エラーなし", "KeyError")
+    except KeyError:
+        check("スキーマに無い項目", "KeyError", "KeyError")
+
+    del TEMPLATES['test'], TEMPLATES['broken']
+    excel_writer._template_snapshot.cache_clear()
+
+print("=" * 70)
+if all_passed:
+    print("✓ すべてのテストが成功しました")
+else:
+    print("✗ 一部のテストが失敗しました")
+    sys.exit(1)
+print("=" * 70)
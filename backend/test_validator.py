@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+"""
+財務データ整合性検証をテストするスクリプト
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from validator import validate_financial_data
+
+print("=" * 70)
+print("整合性検証テスト")
+print("=" * 70)
+
+all_passed = True
+
+
+def check(label, result, expected):
+    global all_passed
+    passed = result == expected
+    all_passed = all_passed and passed
+    status = "✓ PASS" if passed else "✗ FAIL"
+    print(f"{status}: {label} -> {result} (期待値: {expected})")
+
+
+# 1. 整合しているデータ: 不一致なし
+data = {
+    'balance_sheet_assets': {'流動資産合計': 6000, '固定資産合計': 4000, '資産合計': 10000},
+    'balance_sheet_liabilities': {'流動負債合計': 3000, '固定負債合計': 2000, '負債合計': 5000},
+    'balance_sheet_equity': {'純資産合計': 5000, '負債・純資産合計': 10000},
+}
+_, report = validate_financial_data(data)
+check("整合データの不一致件数", len(report['discrepancies']), 0)
+
+# 2. 資産合計の読み違い: 不一致として報告
+data['balance_sheet_assets']['資産合計'] = 10500
+_, report = validate_financial_data(data)
+check("不一致の恒等式数", len(report['discrepancies']), 2)
+check("不一致の差額", report['discrepancies'][0]['difference'], 500)
+
+# 3. 未抽出項目の補完（連鎖的に逆算）
+data = {
+    'balance_sheet_assets': {'流動資産合計': 6000, '固定資産合計': 4000},
+    'balance_sheet_liabilities': {'流動負債合計': 3000, '固定負債合計': 2000},
+    'balance_sheet_equity': {'純資産合計': 5000},
+    'income_statement': {'完成工事高': 50000, '完成工事原価': 40000},
+}
+filled_data, report = validate_financial_data(data)
+check("資産合計の補完", filled_data['balance_sheet_assets'].get('資産合計'), 10000)
+check("負債・純資産合計の補完", filled_data['balance_sheet_equity'].get('負債・純資産合計'), 10000)
+check("完成工事総利益の補完", filled_data['income_statement'].get('完成工事総利益金額'), 10000)
+check("元データは変更されない", '資産合計' in data['balance_sheet_assets'], False)
+
+print("=" * 70)
+if all_passed:
+    print("✓ すべてのテストが成功しました")
+else:
+    print("✗ 一部のテストが失敗しました")
+    sys.exit(1)
+print("=" * 70)
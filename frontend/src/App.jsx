@@ -4,70 +4,168 @@ import LoadingSpinner from './components/LoadingSpinner'
 import ErrorMessage from './components/ErrorMessage'
 import './App.css'
 
+// エラーレスポンスからメッセージを取り出す
+const readErrorMessage = async (response) => {
+  // Content-Typeをチェックしてレスポンスタイプを判定
+  const contentType = response.headers.get('content-type')
+  let errorMessage = '変換に失敗しました'
+
+  try {
+    if (contentType && contentType.includes('application/json')) {
+      // JSONレスポンスの場合
+      const errorData = await response.json()
+      errorMessage = errorData.detail || errorMessage
+    } else {
+      // JSONでない場合（HTMLやプレーンテキスト）
+      const errorText = await response.text()
+      // 長すぎるエラーメッセージは省略
+      if (errorText.length > 200) {
+        errorMessage = `サーバーエラーが発生しました (${response.status})`
+      } else {
+        errorMessage = errorText || errorMessage
+      }
+    }
+  } catch (parseError) {
+    // パースエラーが発生した場合
+    console.error('Error parsing response:', parseError)
+    errorMessage = `サーバーエラーが発生しました (${response.status})`
+  }
+
+  return errorMessage
+}
+
+// Server-Sent Events のレスポンスを1イベントずつ読み込む
+const readEvents = async (response, onEvent) => {
+  const reader = response.body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ''
+
+  while (true) {
+    const { done, value } = await reader.read()
+    if (done) break
+    buffer += decoder.decode(value, { stream: true })
+
+    const chunks = buffer.split('\n\n')
+    buffer = chunks.pop()
+    for (const chunk of chunks) {
+      let event = 'message'
+      let data = ''
+      for (const line of chunk.split('\n')) {
+        if (line.startsWith('event: ')) event = line.slice(7)
+        else if (line.startsWith('data: ')) data += line.slice(6)
+      }
+      onEvent(event, data ? JSON.parse(data) : {})
+    }
+  }
+}
+
+// ファイルをダウンロード
+const downloadBlob = (blob) => {
+  const url = window.URL.createObjectURL(blob)
+  const a = document.createElement('a')
+  a.href = url
+  a.download = '事業年度終了届出書.xlsx'
+  document.body.appendChild(a)
+  a.click()
+  window.URL.revokeObjectURL(url)
+  document.body.removeChild(a)
+}
+
 function App() {
   const [loading, setLoading] = useState(false)
   const [error, setError] = useState(null)
+  const [progress, setProgress] = useState(null)
 
   // API URLを環境変数から取得（デフォルトは本番環境の相対パス）
   const API_URL = import.meta.env.VITE_API_URL || '/api/convert'
+  // ストリーミング変換のURL（指定時のみ進捗を表示）
+  const STREAM_API_URL = import.meta.env.VITE_STREAM_API_URL
+
+  const convert = async (formData) => {
+    const response = await fetch(API_URL, {
+      method: 'POST',
+      body: formData,
+    })
+
+    if (!response.ok) {
+      throw new Error(await readErrorMessage(response))
+    }
+
+    // Excelファイルをダウンロード
+    downloadBlob(await response.blob())
+  }
+
+  const convertWithProgress = async (formData) => {
+    const response = await fetch(STREAM_API_URL, {
+      method: 'POST',
+      body: formData,
+    })
+
+    if (!response.ok) {
+      throw new Error(await readErrorMessage(response))
+    }
+
+    const items = new Map()
+    let downloadUrl = null
+    let streamError = null
+
+    await readEvents(response, (event, data) => {
+      switch (event) {
+        case 'page':
+          setProgress({ message: `${data.page}ページ目を解析中...`, items: [...items.values()] })
+          break
+        case 'items':
+          // 抽出した値をすぐに表示
+          for (const values of Object.values(data.items)) {
+            for (const [item, value] of Object.entries(values)) {
+              items.set(item, { item, value })
+            }
+          }
+          setProgress({ message: `${data.page}ページ目から項目を抽出しました`, items: [...items.values()] })
+          break
+        case 'sheet':
+          setProgress({ message: `シート「${data.sheet}」を作成しました`, items: [...items.values()] })
+          break
+        case 'complete':
+          downloadUrl = new URL(data.download_url, new URL(STREAM_API_URL, window.location.href))
+          break
+        case 'error':
+          streamError = data.detail
+          break
+        default:
+          break
+      }
+    })
+
+    if (streamError) throw new Error(streamError)
+    if (!downloadUrl) throw new Error('変換が完了しませんでした')
+
+    const download = await fetch(downloadUrl)
+    if (!download.ok) {
+      throw new Error(await readErrorMessage(download))
+    }
+    downloadBlob(await download.blob())
+  }
 
   const handleFileUpload = async (file) => {
     setLoading(true)
     setError(null)
+    setProgress(null)
 
     const formData = new FormData()
     formData.append('file', file)
 
     try {
-      const response = await fetch(API_URL, {
-        method: 'POST',
-        body: formData,
-      })
-
-      if (!response.ok) {
-        // Content-Typeをチェックしてレスポンスタイプを判定
-        const contentType = response.headers.get('content-type')
-        let errorMessage = '変換に失敗しました'
-
-        try {
-          if (contentType && contentType.includes('application/json')) {
-            // JSONレスポンスの場合
-            const errorData = await response.json()
-            errorMessage = errorData.detail || errorMessage
-          } else {
-            // JSONでない場合（HTMLやプレーンテキスト）
-            const errorText = await response.text()
-            // 長すぎるエラーメッセージは省略
-            if (errorText.length > 200) {
-              errorMessage = `サーバーエラーが発生しました (${response.status})`
-            } else {
-              errorMessage = errorText || errorMessage
-            }
-          }
-        } catch (parseError) {
-          // パースエラーが発生した場合
-          console.error('Error parsing response:', parseError)
-          errorMessage = `サーバーエラーが発生しました (${response.status})`
-        }
-
-        throw new Error(errorMessage)
+      if (STREAM_API_URL) {
+        await convertWithProgress(formData)
+      } else {
+        await convert(formData)
       }
-
-      // Excelファイルをダウンロード
-      const blob = await response.blob()
-      const url = window.URL.createObjectURL(blob)
-      const a = document.createElement('a')
-      a.href = url
-      a.download = '事業年度終了届出書.xlsx'
-      document.body.appendChild(a)
-      a.click()
-      window.URL.revokeObjectURL(url)
-      document.body.removeChild(a)
-
     } catch (err) {
       setError(err.message)
     } finally {
       setLoading(false)
+      setProgress(null)
     }
   }
 
@@ -84,7 +182,7 @@ function App() {
         {error && <ErrorMessage message={error} onClose={() => setError(null)} />}
 
         {loading ? (
-          <LoadingSpinner />
+          <LoadingSpinner progress={progress} />
         ) : (
           <FileUpload onFileSelect={handleFileUpload} />
         )}
@@ -1,4 +1,4 @@
-export default function LoadingSpinner() {
+export default function LoadingSpinner({ progress }) {
   return (
     <div className="flex flex-col items-center justify-center p-12">
       <div className="relative">
@@ -6,8 +6,26 @@ export default function LoadingSpinner() {
         <div className="absolute top-0 left-0 animate-ping rounded-full h-16 w-16 border-4 border-blue-300 opacity-20"></div>
       </div>
       <p className="mt-6 text-lg text-gray-700 font-semibold">変換処理中...</p>
-      <p className="mt-2 text-sm text-gray-500">PDFを解析してExcelファイルを作成しています</p>
-      <p className="mt-1 text-sm text-gray-500">しばらくお待ちください（10〜30秒程度）</p>
+      {progress ? (
+        <>
+          <p className="mt-2 text-sm text-gray-500">{progress.message}</p>
+          {progress.items.length > 0 && (
+            <ul className="mt-4 w-full max-w-md text-sm text-gray-700 divide-y divide-gray-100">
+              {progress.items.map(({ item, value }) => (
+                <li key={item} className="flex justify-between py-1">
+                  <span>{item}</span>
+                  <span className="font-mono">{value.toLocaleString()}</span>
+                </li>
+              ))}
+            </ul>
+          )}
+        </>
+      ) : (
+        <>
+          <p className="mt-2 text-sm text-gray-500">PDFを解析してExcelファイルを作成しています</p>
+          <p className="mt-1 text-sm text-gray-500">しばらくお待ちください（10〜30秒程度）</p>
+        </>
+      )}
     </div>
   )
 }